@@ -0,0 +1 @@
+"""Benchmarks de desempenho (executados à parte da suíte de testes)."""
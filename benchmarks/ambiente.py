@@ -0,0 +1,37 @@
+"""Inicialização do Django e de um banco descartável para os benchmarks."""
+import contextlib
+import logging
+import os
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def configurar_django():
+    """Configura o Django com as settings do projeto em modo de desenvolvimento."""
+    if str(RAIZ) not in sys.path:
+        sys.path.insert(0, str(RAIZ))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'queops.settings')
+    os.environ.setdefault('DEBUG', 'True')
+
+    import django
+    django.setup()
+
+    # Logs em arquivo distorcem as medições
+    logging.disable(logging.WARNING)
+
+
+@contextlib.contextmanager
+def banco_temporario():
+    """Cria um banco de testes migrado e o remove ao final."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    nome_original = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        teardown_test_environment()
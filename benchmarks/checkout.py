@@ -0,0 +1,125 @@
+"""
+Benchmark do checkout: tempo de transação (locks de estoque) e queries.
+
+Compara o fluxo antigo, com SELECT ... FOR UPDATE, INSERT e UPDATE por item,
+com o motor set-based de pedidos.services.checkout para carrinhos de 1, 10
+e 50 itens.
+
+Uso: python -m benchmarks.checkout [--repeticoes 20]
+"""
+import argparse
+import statistics
+import time
+from decimal import Decimal
+
+from benchmarks.ambiente import configurar_django, banco_temporario
+
+TAMANHOS = (1, 10, 50)
+
+ENTREGA = {
+    'endereco': 'Rua Benchmark, 1',
+    'cidade': 'São Paulo',
+    'estado': 'SP',
+    'cep': '01310100',
+    'telefone': '11999999999',
+}
+
+RESULTADO_PAGAMENTO = {'status': 'autorizado', 'transacao_id': 'bench'}
+
+
+def _checkout_legado(usuario, carrinho):
+    """Reprodução do laço por item usado antes do motor de checkout."""
+    from django.db import transaction
+    from produtos.models import Produto
+    from pedidos.models import Pedido, ItemPedido, Pagamento
+
+    with transaction.atomic():
+        pedido = Pedido.objects.create(usuario=usuario, total=Decimal('100.00'), valor_frete=Decimal('14.90'), **ENTREGA)
+        for item in carrinho.select_related('produto'):
+            produto = Produto.objects.select_for_update().get(id=item.produto_id)
+            if produto.estoque < item.quantidade:
+                raise ValueError(f'Estoque insuficiente para {produto.nome}')
+            ItemPedido.objects.create(
+                pedido=pedido,
+                produto=produto,
+                quantidade=item.quantidade,
+                preco_unitario=produto.preco_final,
+            )
+            produto.estoque -= item.quantidade
+            produto.save()
+        Pagamento.objects.create(pedido=pedido, metodo='pix', status='autorizado', valor=Decimal('114.90'))
+        carrinho.delete()
+
+
+def _checkout_motor(usuario, carrinho):
+    from pedidos.services import finalizar_pedido
+
+    finalizar_pedido(
+        usuario=usuario,
+        carrinho=carrinho,
+        entrega=ENTREGA,
+        total=Decimal('100.00'),
+        valor_frete=Decimal('14.90'),
+        metodo_pagamento='pix',
+        resultado_pagamento=RESULTADO_PAGAMENTO,
+    )
+
+
+def _medir(funcao, usuario, produtos, tamanho, repeticoes):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from pedidos.models import CarrinhoItem
+
+    tempos, queries = [], []
+    for _ in range(repeticoes):
+        CarrinhoItem.objects.bulk_create([
+            CarrinhoItem(usuario=usuario, produto=produto, quantidade=1)
+            for produto in produtos[:tamanho]
+        ])
+        carrinho = CarrinhoItem.objects.filter(usuario=usuario)
+
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            funcao(usuario, carrinho)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        queries.append(len(capturadas))
+
+    tempos.sort()
+    return {
+        'mediana_ms': statistics.median(tempos),
+        'p95_ms': tempos[max(int(len(tempos) * 0.95) - 1, 0)],
+        'queries': max(queries),
+    }
+
+
+def executar(repeticoes=20):
+    """Executa o benchmark e retorna os resultados por tamanho de carrinho."""
+    from tests.factories import UserFactory, ProdutoFactory
+
+    usuario = UserFactory()
+    produtos = ProdutoFactory.create_batch(max(TAMANHOS), estoque=1_000_000)
+
+    resultados = []
+    for tamanho in TAMANHOS:
+        for nome, funcao in (('legado', _checkout_legado), ('motor', _checkout_motor)):
+            medicao = _medir(funcao, usuario, produtos, tamanho, repeticoes)
+            resultados.append({'fluxo': nome, 'itens': tamanho, **medicao})
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    configurar_django()
+    with banco_temporario():
+        resultados = executar(args.repeticoes)
+
+    print(f'{"fluxo":<8} {"itens":>5} {"mediana (ms)":>13} {"p95 (ms)":>9} {"queries":>8}')
+    for r in resultados:
+        print(f'{r["fluxo"]:<8} {r["itens"]:>5} {r["mediana_ms"]:>13.2f} {r["p95_ms"]:>9.2f} {r["queries"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Massa de dados sintética para os benchmarks.
+
+Clientes, categorias, produtos e avaliações saem das factories de
+tests/factories.py (build + bulk_create); pedidos, itens e pagamentos são
+instanciados direto nos modelos porque, com um milhão de linhas, o Faker
+por linha dominaria o tempo de semeadura. Todas as funções inserem em
+lotes e são determinísticas para o mesmo volume (random com semente fixa).
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+LOTE_INSERCAO = 10_000
+
+# Nomes de catálogo de farmácia, para a busca ter o que encontrar
+NOMES = (
+    'Dipirona', 'Paracetamol', 'Ibuprofeno', 'Vitamina C', 'Vitamina D', 'Protetor Solar',
+    'Shampoo', 'Hidratante', 'Sabonete', 'Creme Dental', 'Fralda', 'Omeprazol',
+    'Losartana', 'Colágeno', 'Ômega 3', 'Álcool em Gel', 'Soro Fisiológico', 'Multivitamínico',
+)
+APRESENTACOES = ('500mg', '1g', '20 comprimidos', '60 cápsulas', '200ml', '1L', 'FPS 50', 'gotas')
+
+# Peso de cada status na base de pedidos (o grosso já entregue)
+STATUS_PEDIDO = (
+    ('entregue', 70), ('enviado', 10), ('processando', 8), ('pendente', 7), ('cancelado', 5),
+)
+METODOS_PAGAMENTO = ('pix', 'cartao_credito', 'boleto')
+
+
+def _em_lotes(total, lote=LOTE_INSERCAO):
+    inicio = 0
+    while inicio < total:
+        yield inicio, min(lote, total - inicio)
+        inicio += lote
+
+
+def semear_clientes(quantidade):
+    """
+    Cria clientes com a mesma senha ('senha123'), gerando o hash uma única vez.
+
+    Args:
+        quantidade: Número de clientes
+
+    Returns:
+        list[User]: Clientes criados
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from tests.factories import UserFactory
+
+    senha = make_password('senha123')
+    clientes = []
+    for _, tamanho in _em_lotes(quantidade):
+        # password=None: set_password(None) não calcula hash por usuário
+        lote = UserFactory.build_batch(tamanho, password=None)
+        for cliente in lote:
+            cliente.password = senha
+        clientes.extend(User.objects.bulk_create(lote))
+    return clientes
+
+
+def semear_catalogo(produtos, categorias=20):
+    """
+    Cria categorias e produtos com nomes, preços, estoque e promoções variados.
+
+    Args:
+        produtos: Número de produtos
+        categorias: Número de categorias
+
+    Returns:
+        list[int]: IDs dos produtos criados
+    """
+    from django.utils.text import slugify
+    from produtos.models import Produto
+    from tests.factories import CategoriaFactory, ProdutoFactory
+
+    aleatorio = random.Random(produtos)
+    lista_categorias = CategoriaFactory.create_batch(categorias)
+    ids = []
+    for inicio, tamanho in _em_lotes(produtos):
+        lote = []
+        for n in range(inicio, inicio + tamanho):
+            nome = f'{NOMES[n % len(NOMES)]} {APRESENTACOES[n // len(NOMES) % len(APRESENTACOES)]} {n}'
+            preco = Decimal(aleatorio.randint(299, 49999)) / 100
+            lote.append(ProdutoFactory.build(
+                nome=nome,
+                # save() gera o slug; bulk_create não passa por ele
+                slug=slugify(nome),
+                preco=preco,
+                preco_promocional=(preco * Decimal('0.85')).quantize(Decimal('0.01'))
+                if aleatorio.random() < 0.15 else None,
+                categoria=lista_categorias[n % categorias],
+                estoque=aleatorio.choice((0, 5, 50, 200, 1000)),
+                ativo=aleatorio.random() < 0.95,
+                destaque=aleatorio.random() < 0.02,
+            ))
+        ids.extend(produto.id for produto in Produto.objects.bulk_create(lote))
+    return ids
+
+
+def semear_avaliacoes(quantidade, produtos, clientes):
+    """
+    Cria avaliações distribuídas entre produtos e clientes e recalcula os agregados.
+
+    Cada par (produto, cliente) aparece no máximo uma vez (unique_together):
+    o k-ésimo par usa o produto (k * 7919) % P e o cliente k % C, que só se
+    repetem depois de mmc(P, C) avaliações. Acima disso a quantidade é limitada.
+
+    Args:
+        quantidade: Número de avaliações desejado
+        produtos: IDs dos produtos
+        clientes: Clientes (User)
+
+    Returns:
+        int: Número de avaliações criadas
+    """
+    import math
+    from produtos.models import Avaliacao
+    from produtos.services import recalcular_avaliacoes
+    from tests.factories import AvaliacaoFactory
+
+    aleatorio = random.Random(quantidade)
+    quantidade = min(quantidade, math.lcm(len(produtos), len(clientes)))
+    for inicio, tamanho in _em_lotes(quantidade):
+        Avaliacao.objects.bulk_create([
+            AvaliacaoFactory.build(
+                produto_id=produtos[k * 7919 % len(produtos)],
+                usuario=clientes[k % len(clientes)],
+                # Inclinado para notas altas, como em lojas reais
+                rating=aleatorio.choices((1, 2, 3, 4, 5), weights=(5, 5, 15, 35, 40))[0],
+            )
+            for k in range(inicio, inicio + tamanho)
+        ])
+    # bulk_create não dispara os signals que mantêm rating_medio/total/soma
+    recalcular_avaliacoes()
+    return quantidade
+
+
+def semear_pedidos(quantidade, clientes, produtos=None, dias=365):
+    """
+    Cria pedidos com pagamento (e um a três itens, se houver produtos).
+
+    As datas de criação se espalham pelos últimos `dias`, com milhares de
+    empates por lote (como num dia de pico).
+
+    Args:
+        quantidade: Número de pedidos
+        clientes: Clientes (User) entre os quais os pedidos são distribuídos
+        produtos: IDs de produtos para os itens (opcional)
+        dias: Janela de datas dos pedidos
+
+    Returns:
+        tuple[date, date]: Primeiro e último dia com pedidos
+    """
+    from django.db import transaction
+    from django.utils import timezone
+    from pedidos.models import ItemPedido, Pagamento, Pedido
+
+    aleatorio = random.Random(quantidade)
+    status = [nome for nome, _ in STATUS_PEDIDO]
+    pesos = [peso for _, peso in STATUS_PEDIDO]
+    agora = timezone.now()
+
+    for inicio, tamanho in _em_lotes(quantidade):
+        # (produto_id, quantidade, preço unitário) de cada pedido do lote
+        itens = [
+            [
+                (aleatorio.choice(produtos), aleatorio.randint(1, 3), Decimal(aleatorio.randint(299, 19999)) / 100)
+                for _ in range(aleatorio.randint(1, 3))
+            ] if produtos else []
+            for _ in range(tamanho)
+        ]
+        with transaction.atomic():
+            pedidos = Pedido.objects.bulk_create([
+                Pedido(
+                    usuario=clientes[(inicio + i) % len(clientes)],
+                    status=aleatorio.choices(status, weights=pesos)[0] if produtos else 'entregue',
+                    total=sum((q * preco for _, q, preco in itens[i]), Decimal('0')) if produtos else Decimal('99.90'),
+                    valor_frete=Decimal('14.90'),
+                    endereco='Rua Benchmark, 1',
+                    cidade='São Paulo',
+                    estado='SP',
+                    cep='01310100',
+                    telefone='11999999999',
+                )
+                for i in range(tamanho)
+            ])
+            ItemPedido.objects.bulk_create([
+                ItemPedido(pedido=pedido, produto_id=produto_id, quantidade=q, preco_unitario=preco)
+                for pedido, itens_pedido in zip(pedidos, itens)
+                for produto_id, q, preco in itens_pedido
+            ])
+            Pagamento.objects.bulk_create([
+                Pagamento(
+                    pedido=pedido,
+                    metodo=aleatorio.choice(METODOS_PAGAMENTO) if produtos else 'pix',
+                    status='recusado' if pedido.status == 'cancelado' else 'autorizado',
+                    valor=pedido.total + pedido.valor_frete,
+                )
+                for pedido in pedidos
+            ])
+            # auto_now_add ignora o valor passado no bulk_create
+            Pedido.objects.filter(id__range=(pedidos[0].id, pedidos[-1].id)).update(
+                criado_em=agora - timedelta(days=dias * (quantidade - inicio) / quantidade)
+            )
+
+    return (agora - timedelta(days=dias)).date(), agora.date()
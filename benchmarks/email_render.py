@@ -0,0 +1,112 @@
+"""
+Benchmark da renderização de e-mails: render_to_string por destinatário x render_many.
+
+Renderiza o mesmo template de e-mail para N contextos sintéticos (sem banco)
+das duas formas e confere que o HTML é idêntico. O benchmark falha (código
+de saída 1) se as saídas divergirem.
+
+Uso: python -m benchmarks.email_render [--renders 10000] [--template pedido_enviado]
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+from benchmarks.ambiente import configurar_django
+
+
+def _contextos(quantidade):
+    agora = datetime(2024, 1, 1, 12, 0)
+    contextos = []
+    for i in range(quantidade):
+        usuario = SimpleNamespace(first_name=f'Cliente {i}', username=f'cliente{i}', email=f'cliente{i}@example.com')
+        itens = [
+            SimpleNamespace(
+                produto=SimpleNamespace(nome=f'Produto {j}'),
+                quantidade=j + 1,
+                preco_unitario=Decimal('9.90'),
+                subtotal=Decimal('9.90') * (j + 1),
+            )
+            for j in range(3)
+        ]
+        pedido = SimpleNamespace(
+            id=i,
+            usuario=usuario,
+            status='enviado',
+            get_status_display='Enviado',
+            criado_em=agora,
+            atualizado_em=agora,
+            total=Decimal('59.40'),
+            valor_frete=Decimal('15.00'),
+            total_com_frete=Decimal('74.40'),
+            endereco='Rua Benchmark, 1',
+            cidade='São Paulo',
+            estado='SP',
+            cep='01310100',
+            telefone='11999999999',
+            itens=SimpleNamespace(all=lambda itens=itens: itens),
+        )
+        contextos.append({
+            'user': usuario,
+            'usuario': usuario,
+            'pedido': pedido,
+            'site_url': 'https://loja.example.com',
+            'url_recuperacao': f'https://loja.example.com/reset/{i}/',
+        })
+    return contextos
+
+
+def executar(renders=10_000, template='pedido_enviado'):
+    """Renderiza `renders` e-mails das duas formas e retorna os tempos."""
+    from django.template.loader import render_to_string
+    from core import email_render
+
+    nome = f'emails/{template}.html'
+    contextos = _contextos(renders)
+
+    # Aquecimento: as duas formas começam com o template já em cache
+    render_to_string(nome, contextos[0])
+    email_render.render(nome, contextos[0])
+
+    inicio = time.perf_counter()
+    individuais = [render_to_string(nome, contexto) for contexto in contextos]
+    tempo_individual = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    em_lote = email_render.render_many(nome, contextos)
+    tempo_lote = time.perf_counter() - inicio
+
+    return {
+        'renders': renders,
+        'tempo_individual': tempo_individual,
+        'tempo_lote': tempo_lote,
+        'identicos': individuais == em_lote,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--renders', type=int, default=10_000)
+    parser.add_argument('--template', default='pedido_enviado')
+    args = parser.parse_args()
+
+    configurar_django()
+    r = executar(args.renders, args.template)
+
+    print(f'{r["renders"]} renders de emails/{args.template}.html')
+    print(f'render_to_string: {r["tempo_individual"]:.2f}s '
+          f'({r["renders"] / max(r["tempo_individual"], 1e-9):,.0f}/s)')
+    print(f'render_many:      {r["tempo_lote"]:.2f}s '
+          f'({r["renders"] / max(r["tempo_lote"], 1e-9):,.0f}/s, '
+          f'{r["tempo_individual"] / max(r["tempo_lote"], 1e-9):.1f}x)')
+
+    if not r['identicos']:
+        print('FALHA: render_many gerou HTML diferente de render_to_string.')
+        sys.exit(1)
+    print('OK: saídas idênticas.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark da exportação de vendas em CSV: memória residente durante o streaming.
+
+Gera pedidos sintéticos (com pagamento) e consome a resposta de
+/admin-relatorios/exportar-vendas/ medindo o RSS do processo ao longo da
+exportação. Com o streaming em lotes keyset o pico deve ficar estável: o
+benchmark falha (código de saída 1) se o RSS crescer mais que a tolerância
+depois do aquecimento.
+
+Uso: python -m benchmarks.exportacao [--pedidos 1000000] [--tolerancia-mb 32]
+"""
+import argparse
+import gc
+import os
+import resource
+import sys
+import time
+
+from benchmarks.ambiente import configurar_django, banco_temporario
+
+AMOSTRAS = 20
+# Fração das linhas lidas antes da medição de referência
+AQUECIMENTO = 0.05
+
+
+def _rss_atual_mb():
+    """RSS atual do processo; sem /proc, usa o pico (ru_maxrss)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            paginas = int(statm.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def executar(pedidos=1_000_000):
+    """Exporta todos os pedidos e retorna linhas, tempo e amostras de RSS."""
+    from django.test import Client
+    from tests.factories import UserFactory
+    from benchmarks.dados import semear_clientes, semear_pedidos
+
+    inicio = time.perf_counter()
+    semear_pedidos(pedidos, semear_clientes(50))
+    tempo_semeadura = time.perf_counter() - inicio
+
+    client = Client()
+    client.force_login(UserFactory(is_staff=True, is_superuser=True))
+    gc.collect()
+
+    rss_inicial = _rss_atual_mb()
+    intervalo = max(pedidos // AMOSTRAS, 1)
+    referencia = None
+    amostras = []
+    linhas = 0
+
+    inicio = time.perf_counter()
+    resposta = client.get('/admin-relatorios/exportar-vendas/')
+    for pedaco in resposta.streaming_content:
+        linhas += pedaco.count(b'\n')
+        if referencia is None and linhas >= pedidos * AQUECIMENTO:
+            referencia = _rss_atual_mb()
+        if linhas % intervalo == 0:
+            amostras.append(_rss_atual_mb())
+    tempo_exportacao = time.perf_counter() - inicio
+    amostras.append(_rss_atual_mb())
+
+    return {
+        'pedidos': pedidos,
+        'linhas': linhas - 1,
+        'tempo_semeadura': tempo_semeadura,
+        'tempo_exportacao': tempo_exportacao,
+        'rss_inicial': rss_inicial,
+        'rss_referencia': referencia if referencia is not None else amostras[0],
+        'rss_pico': max(amostras),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pedidos', type=int, default=1_000_000)
+    parser.add_argument('--tolerancia-mb', type=float, default=32)
+    args = parser.parse_args()
+
+    configurar_django()
+    with banco_temporario():
+        r = executar(args.pedidos)
+
+    crescimento = r['rss_pico'] - r['rss_referencia']
+    print(f'pedidos exportados: {r["linhas"]} de {r["pedidos"]}')
+    print(f'semeadura: {r["tempo_semeadura"]:.1f}s  exportação: {r["tempo_exportacao"]:.1f}s '
+          f'({r["linhas"] / max(r["tempo_exportacao"], 1e-9):,.0f} linhas/s)')
+    print(f'RSS inicial {r["rss_inicial"]:.1f} MB, após aquecimento {r["rss_referencia"]:.1f} MB, '
+          f'pico {r["rss_pico"]:.1f} MB (+{crescimento:.1f} MB)')
+
+    if r['linhas'] != r['pedidos']:
+        print('FALHA: a exportação não trouxe todos os pedidos.')
+        sys.exit(1)
+    if crescimento > args.tolerancia_mb:
+        print(f'FALHA: RSS cresceu mais de {args.tolerancia_mb:.0f} MB durante a exportação.')
+        sys.exit(1)
+    print('OK: memória estável durante a exportação.')
+
+
+if __name__ == '__main__':
+    main()
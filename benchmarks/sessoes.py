@@ -0,0 +1,89 @@
+"""
+Benchmark de sessões: leituras e escritas em django_session por navegação anônima.
+
+Simula visitantes anônimos que percorrem home, listagem, detalhe e carrinho;
+um em cada dez adiciona um produto ao carrinho. Conta as queries na tabela de
+sessões a cada 1000 páginas vistas para cada SESSION_ENGINE informado.
+
+Uso: python -m benchmarks.sessoes [--paginas 1000] [--engine db --engine cached_db]
+"""
+import argparse
+
+from benchmarks.ambiente import configurar_django, banco_temporario
+
+ENGINES = ('db', 'cached_db')
+
+# Páginas vistas por visitante; o detalhe é onde um em cada dez compra
+ROTEIRO = ('home', 'lista', 'detalhe', 'carrinho', 'lista')
+INTERVALO_COMPRA = 10
+
+
+def _visitar(produto, paginas):
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    urls = {
+        'home': '/',
+        'lista': '/produtos/',
+        'detalhe': f'/produtos/{produto.slug}/',
+        'carrinho': '/pedidos/carrinho/',
+    }
+
+    vistas = 0
+    visitante = 0
+    with CaptureQueriesContext(connection) as capturadas:
+        while vistas < paginas:
+            client = Client()
+            for pagina in ROTEIRO:
+                client.get(urls[pagina])
+                vistas += 1
+                if pagina == 'detalhe' and visitante % INTERVALO_COMPRA == 0:
+                    client.post(f'/pedidos/adicionar/{produto.id}/', {'quantidade': 1})
+                if vistas >= paginas:
+                    break
+            visitante += 1
+
+    contagem = {'leituras': 0, 'escritas': 0}
+    for query in capturadas.captured_queries:
+        sql = query['sql'].lstrip().upper()
+        if 'DJANGO_SESSION' not in sql:
+            continue
+        contagem['leituras' if sql.startswith('SELECT') else 'escritas'] += 1
+    return {'visitantes': visitante, **contagem}
+
+
+def executar(paginas=1000, engines=ENGINES):
+    """Executa o benchmark e retorna as contagens por engine de sessão."""
+    from django.core.cache import cache
+    from django.test.utils import override_settings
+    from tests.factories import ProdutoFactory
+
+    produto = ProdutoFactory(estoque=1_000_000)
+    ProdutoFactory.create_batch(11)
+
+    resultados = []
+    for engine in engines:
+        cache.clear()
+        with override_settings(SESSION_ENGINE=f'django.contrib.sessions.backends.{engine}'):
+            resultados.append({'engine': engine, 'paginas': paginas, **_visitar(produto, paginas)})
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--paginas', type=int, default=1000)
+    parser.add_argument('--engine', action='append', choices=ENGINES)
+    args = parser.parse_args()
+
+    configurar_django()
+    with banco_temporario():
+        resultados = executar(args.paginas, args.engine or ENGINES)
+
+    print(f'{"engine":<10} {"páginas":>8} {"visitantes":>11} {"leituras":>9} {"escritas":>9}')
+    for r in resultados:
+        print(f'{r["engine"]:<10} {r["paginas"]:>8} {r["visitantes"]:>11} {r["leituras"]:>9} {r["escritas"]:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+"""
+Suíte de benchmarks dos caminhos quentes: latência e número de consultas.
+
+Semeia um banco descartável com volumes realistas (por padrão 100 mil
+produtos, 1 milhão de pedidos e 50 mil avaliações; ver benchmarks.dados)
+e mede, pelo cliente de testes do Django (middlewares incluídos):
+
+- listagem de produtos (página fora do cache do catálogo), busca e detalhe;
+- carrinho pela API (adicionar e atualizar quantidade);
+- checkout pela API;
+- dashboard do admin;
+- exportações CSV de vendas e de estoque (resposta consumida até o fim).
+
+Cada cenário roda algumas vezes de aquecimento e depois `--repeticoes`
+vezes; o resultado tem p50/p95/média/máximo em ms e a quantidade de
+consultas (a maior entre as repetições). Com --saida o resultado vai para
+JSON; com --comparar o resultado é comparado a um JSON de referência e o
+comando sai com código 1 se algum cenário piorou: p95 acima da tolerância
+(e acima do piso de ruído) ou qualquer consulta a mais.
+
+Uso:
+    python -m benchmarks.suite --saida base.json
+    python -m benchmarks.suite --comparar base.json [--tolerancia 0.2]
+    python -m benchmarks.suite --produtos 2000 --pedidos 20000 --avaliacoes 1000
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.ambiente import configurar_django, banco_temporario
+
+REPETICOES = 20
+AQUECIMENTO = 2
+# Diferenças de p95 abaixo disto (ms) são ruído, qualquer que seja a proporção
+PISO_RUIDO_MS = 2.0
+CLIENTES = 1000
+AMOSTRA_PRODUTOS = 500
+# Profundidade de paginação visitada na listagem (além das páginas em cache)
+PAGINAS_NAVEGADAS = 50
+
+TERMOS_BUSCA = ('vitamina', 'dipirona 500mg', 'protetor solar fps', 'shampoo', 'omeprazol')
+
+ENTREGA = {
+    'endereco': 'Rua Benchmark, 1',
+    'cidade': 'São Paulo',
+    'estado': 'SP',
+    'cep': '01310100',
+    'telefone': '11999999999',
+    'metodo_pagamento': 'pix',
+}
+
+
+class Contexto:
+    """Dados semeados e clientes HTTP compartilhados pelos cenários."""
+
+    def __init__(self, produtos, pedidos, avaliacoes):
+        from django.test import Client
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import RefreshToken
+        from core import metricas
+        from produtos.models import Produto
+        from tests.factories import UserFactory
+        from benchmarks import dados
+
+        inicio = time.perf_counter()
+        clientes = dados.semear_clientes(CLIENTES)
+        ids = dados.semear_catalogo(produtos)
+        avaliacoes = dados.semear_avaliacoes(avaliacoes, ids, clientes)
+        primeiro, ultimo = dados.semear_pedidos(pedidos, clientes, ids)
+        # O dashboard lê os rollups diários, não as tabelas de origem
+        metricas.recalcular_periodo(primeiro, ultimo)
+        self.tempo_semeadura = time.perf_counter() - inicio
+        self.volumes = {
+            'produtos': produtos, 'pedidos': pedidos, 'avaliacoes': avaliacoes, 'clientes': CLIENTES,
+        }
+
+        disponiveis = Produto.objects.filter(ativo=True, estoque__gte=1000).order_by('?')
+        self.produtos = list(disponiveis.values_list('id', 'slug')[:AMOSTRA_PRODUTOS])
+        self.paginas = max(Produto.objects.filter(ativo=True).count() // 12, 1)
+
+        self.cliente = clientes[0]
+        self.web = Client()
+        self.api = APIClient()
+        token = RefreshToken.for_user(self.cliente).access_token
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.admin = Client()
+        self.admin.force_login(UserFactory(is_staff=True, is_superuser=True))
+
+    def produto(self, i):
+        return self.produtos[i % len(self.produtos)]
+
+    def preparar_carrinho(self, itens):
+        """Deixa o carrinho do cliente com `itens` produtos (fora da medição)."""
+        from pedidos.models import CarrinhoItem
+
+        CarrinhoItem.objects.filter(usuario=self.cliente).delete()
+        CarrinhoItem.objects.bulk_create([
+            CarrinhoItem(usuario=self.cliente, produto_id=produto_id, quantidade=1)
+            for produto_id, _ in self.produtos[-itens:]
+        ] if itens else [])
+
+
+def _consumir(resposta):
+    """Lê a resposta inteira (streaming ou não) e devolve o número de bytes."""
+    if resposta.streaming:
+        return sum(len(pedaco) for pedaco in resposta.streaming_content)
+    return len(resposta.content)
+
+
+def _pagina(ctx, i):
+    # Páginas 1-3 vêm do cache do catálogo; a partir da 4 o caminho é o banco
+    return 4 + i % max(min(ctx.paginas - 3, PAGINAS_NAVEGADAS), 1)
+
+
+def _listagem(ctx, i):
+    return ctx.web.get('/produtos/', {'page': _pagina(ctx, i)})
+
+
+def _listagem_api(ctx, i):
+    return ctx.api.get('/api/produtos/', {'page': _pagina(ctx, i)})
+
+
+def _busca(ctx, i):
+    return ctx.web.get('/produtos/', {'q': TERMOS_BUSCA[i % len(TERMOS_BUSCA)]})
+
+
+def _busca_api(ctx, i):
+    return ctx.api.get('/api/produtos/', {'q': TERMOS_BUSCA[i % len(TERMOS_BUSCA)]})
+
+
+def _facetas_api(ctx, i):
+    # Com busca as contagens não vêm do cache: mede a consulta de agregação
+    return ctx.api.get('/api/facetas/', {
+        'q': TERMOS_BUSCA[i % len(TERMOS_BUSCA)], 'estoque': 'true', 'preco': '25-50',
+    })
+
+
+def _detalhe(ctx, i):
+    return ctx.web.get(f'/produtos/{ctx.produto(i)[1]}/')
+
+
+def _detalhe_api(ctx, i):
+    return ctx.api.get(f'/api/produtos/{ctx.produto(i)[1]}/')
+
+
+def _carrinho_adicionar(ctx, i):
+    return ctx.api.post('/api/carrinho/', {'produto_id': ctx.produto(i)[0], 'quantidade': 1}, format='json')
+
+
+def _carrinho_atualizar(ctx, i):
+    return ctx.api.put(f'/api/carrinho/{ctx.produtos[-1][0]}/', {'quantidade': 1 + i % 5}, format='json')
+
+
+def _checkout(ctx, i):
+    return ctx.api.post('/api/checkout/', ENTREGA, format='json')
+
+
+def _dashboard(ctx, i):
+    return ctx.admin.get('/admin-dashboard/')
+
+
+def _exportar_vendas(ctx, i):
+    return ctx.admin.get('/admin-relatorios/exportar-vendas/')
+
+
+def _exportar_estoque(ctx, i):
+    return ctx.admin.get('/admin-relatorios/exportar-estoque/')
+
+
+# Cada cenário: nome -> (executar(ctx, i) -> resposta, preparar(ctx, i) ou None, repetições fixas ou None)
+CENARIOS = {
+    'listagem': (_listagem, None, None),
+    'listagem_api': (_listagem_api, None, None),
+    'busca': (_busca, None, None),
+    'busca_api': (_busca_api, None, None),
+    'facetas_api': (_facetas_api, None, None),
+    'detalhe': (_detalhe, None, None),
+    'detalhe_api': (_detalhe_api, None, None),
+    'carrinho_adicionar': (_carrinho_adicionar, lambda ctx, i: ctx.preparar_carrinho(3), None),
+    'carrinho_atualizar': (_carrinho_atualizar, lambda ctx, i: ctx.preparar_carrinho(3), None),
+    'checkout_api': (_checkout, lambda ctx, i: ctx.preparar_carrinho(3), None),
+    'dashboard_admin': (_dashboard, None, None),
+    # Exportações percorrem a base inteira: poucas repetições bastam
+    'exportar_vendas': (_exportar_vendas, None, 3),
+    'exportar_estoque': (_exportar_estoque, None, 3),
+}
+
+
+def medir(ctx, executar, preparar=None, repeticoes=REPETICOES, aquecimento=AQUECIMENTO):
+    """
+    Mede um cenário: latência da requisição completa e consultas SQL.
+
+    Args:
+        ctx: Contexto com os dados semeados
+        executar: Função (ctx, i) que faz a requisição e devolve a resposta
+        preparar: Função (ctx, i) executada antes de cada repetição, fora da medição
+        repeticoes: Número de repetições medidas
+        aquecimento: Repetições descartadas antes da medição
+
+    Returns:
+        dict: p50_ms, p95_ms, media_ms, max_ms, consultas e bytes
+
+    Raises:
+        RuntimeError: Se alguma resposta tiver status de erro (>= 400)
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from core.perf import percentil
+
+    tempos, consultas, tamanho = [], [], 0
+    for i in range(aquecimento + repeticoes):
+        if preparar:
+            preparar(ctx, i)
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            resposta = executar(ctx, i)
+            tamanho = _consumir(resposta)
+            duracao = (time.perf_counter() - inicio) * 1000
+        if resposta.status_code >= 400:
+            raise RuntimeError(f'{executar.__name__}: HTTP {resposta.status_code}')
+        if i >= aquecimento:
+            tempos.append(duracao)
+            consultas.append(len(capturadas))
+
+    tempos.sort()
+    return {
+        'repeticoes': repeticoes,
+        'p50_ms': round(percentil(tempos, 50), 3),
+        'p95_ms': round(percentil(tempos, 95), 3),
+        'media_ms': round(statistics.fmean(tempos), 3),
+        'max_ms': round(tempos[-1], 3),
+        'consultas': max(consultas),
+        'bytes': tamanho,
+    }
+
+
+def executar(produtos, pedidos, avaliacoes, repeticoes=REPETICOES, cenarios=None):
+    """
+    Semeia o banco e mede os cenários escolhidos.
+
+    Args:
+        produtos: Número de produtos
+        pedidos: Número de pedidos
+        avaliacoes: Número de avaliações
+        repeticoes: Repetições por cenário (exceto os de repetição fixa)
+        cenarios: Nomes dos cenários (default: todos)
+
+    Returns:
+        dict: 'meta' (volumes, ambiente, data) e 'cenarios' (nome -> medição)
+    """
+    from django.db import connection
+
+    ctx = Contexto(produtos, pedidos, avaliacoes)
+    resultados = {}
+    for nome in cenarios or CENARIOS:
+        funcao, preparar, fixas = CENARIOS[nome]
+        resultados[nome] = medir(
+            ctx, funcao, preparar,
+            repeticoes=min(fixas or repeticoes, repeticoes),
+            aquecimento=1 if fixas else AQUECIMENTO,
+        )
+        print(f'  {nome}: p95 {resultados[nome]["p95_ms"]:.1f} ms, {resultados[nome]["consultas"]} consultas',
+              file=sys.stderr)
+
+    return {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'volumes': ctx.volumes,
+            'tempo_semeadura_s': round(ctx.tempo_semeadura, 1),
+            'banco': connection.vendor,
+            'python': platform.python_version(),
+            'maquina': platform.node(),
+        },
+        'cenarios': resultados,
+    }
+
+
+def comparar(atual, referencia, tolerancia):
+    """
+    Compara duas execuções cenário a cenário.
+
+    Um cenário regrediu se o p95 passou de referência * (1 + tolerância) e a
+    diferença absoluta está acima do piso de ruído, ou se fez mais consultas.
+
+    Args:
+        atual: Resultado de executar()
+        referencia: Resultado de referência (mesmo formato)
+        tolerancia: Piora relativa aceita no p95 (0.2 = 20%)
+
+    Returns:
+        list[dict]: Uma linha por cenário presente nos dois resultados
+    """
+    linhas = []
+    for nome, medicao in atual['cenarios'].items():
+        base = referencia['cenarios'].get(nome)
+        if base is None:
+            continue
+        variacao = medicao['p95_ms'] / base['p95_ms'] - 1 if base['p95_ms'] else 0.0
+        lenta = variacao > tolerancia and medicao['p95_ms'] - base['p95_ms'] > PISO_RUIDO_MS
+        linhas.append({
+            'cenario': nome,
+            'p95_base': base['p95_ms'],
+            'p95_atual': medicao['p95_ms'],
+            'variacao': variacao,
+            'consultas_base': base['consultas'],
+            'consultas_atual': medicao['consultas'],
+            'regrediu': lenta or medicao['consultas'] > base['consultas'],
+        })
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument('--produtos', type=int, default=100_000)
+    parser.add_argument('--pedidos', type=int, default=1_000_000)
+    parser.add_argument('--avaliacoes', type=int, default=50_000)
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES)
+    parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), metavar='CENARIO',
+                        help=f'subconjunto de: {", ".join(CENARIOS)}')
+    parser.add_argument('--saida', help='grava o resultado neste arquivo JSON')
+    parser.add_argument('--comparar', metavar='REFERENCIA', help='JSON de uma execução anterior')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='piora relativa aceita no p95')
+    args = parser.parse_args()
+
+    referencia = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            referencia = json.load(arquivo)
+
+    configurar_django()
+    with banco_temporario():
+        resultado = executar(args.produtos, args.pedidos, args.avaliacoes, args.repeticoes, args.cenarios)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+    meta = resultado['meta']
+    print(f'volumes: {meta["volumes"]}  semeadura: {meta["tempo_semeadura_s"]:.1f}s')
+    print(f'{"cenário":<20} {"p50 (ms)":>9} {"p95 (ms)":>9} {"média (ms)":>11} {"consultas":>10}')
+    for nome, r in resultado['cenarios'].items():
+        print(f'{nome:<20} {r["p50_ms"]:>9.2f} {r["p95_ms"]:>9.2f} {r["media_ms"]:>11.2f} {r["consultas"]:>10}')
+
+    if referencia is None:
+        return
+    if referencia['meta']['volumes'] != meta['volumes']:
+        print(f'AVISO: volumes diferentes da referência ({referencia["meta"]["volumes"]}).')
+
+    linhas = comparar(resultado, referencia, args.tolerancia)
+    print(f'\n{"cenário":<20} {"p95 base":>9} {"p95 atual":>10} {"variação":>9} {"consultas":>12}')
+    for linha in linhas:
+        print(
+            f'{linha["cenario"]:<20} {linha["p95_base"]:>9.2f} {linha["p95_atual"]:>10.2f} '
+            f'{linha["variacao"]:>+9.1%} {linha["consultas_base"]:>5} -> {linha["consultas_atual"]:<4}'
+            f'{"  REGRESSÃO" if linha["regrediu"] else ""}'
+        )
+    regressoes = [linha['cenario'] for linha in linhas if linha['regrediu']]
+    if regressoes:
+        print(f'FALHA: {len(regressoes)} cenário(s) pioraram: {", ".join(regressoes)}.')
+        sys.exit(1)
+    print('OK: nenhum cenário piorou além da tolerância.')
+
+
+if __name__ == '__main__':
+    main()
@@ -8,3 +8,6 @@ python manage.py collectstatic --noinput
 
 # Apply migrations
 python manage.py migrate --noinput
+
+# Generate product image derivatives (templates link to them without checking the storage)
+python manage.py warm_product_images
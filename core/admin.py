@@ -8,7 +8,8 @@ from django.template.response import TemplateResponse
 from django.shortcuts import redirect
 import json
 import csv
-from .models import ConsentimentoLGPD, SolicitacaoDados, LogAcessoDados, PoliticaPrivacidade
+from . import outbox
+from .models import ConsentimentoLGPD, SolicitacaoDados, LogAcessoDados, PoliticaPrivacidade, MensagemOutbox
 
 
 @admin.register(ConsentimentoLGPD)
@@ -212,6 +213,27 @@ class PoliticaPrivacidadeAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
 
+@admin.register(MensagemOutbox)
+class MensagemOutboxAdmin(admin.ModelAdmin):
+    list_display = ['assunto', 'destinatarios', 'status', 'tentativas', 'proximo_envio_em', 'criado_em', 'enviado_em']
+    list_filter = ['status', 'template', 'criado_em']
+    search_fields = ['assunto', 'destinatarios']
+    readonly_fields = [
+        'assunto', 'template', 'contexto', 'corpo_texto', 'remetente', 'destinatarios',
+        'status', 'tentativas', 'proximo_envio_em', 'ultimo_erro', 'criado_em', 'enviado_em',
+    ]
+    date_hierarchy = 'criado_em'
+    actions = ['reenfileirar']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def reenfileirar(self, request, queryset):
+        updated = outbox.reenfileirar(queryset)
+        self.message_user(request, f'{updated} mensagem(ns) devolvida(s) à fila.')
+    reenfileirar.short_description = 'Reenfileirar mensagens selecionadas'
+
+
 # Customização do Admin Site para adicionar dashboard LGPD
 class LGPDAdminSite(admin.AdminSite):
     site_header = 'Administração LGPD - Farmácia QUEOPS'
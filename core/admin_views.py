@@ -1,71 +1,100 @@
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
-from django.db.models import Count, Sum, Avg, F, Q, DecimalField, ExpressionWrapper
-from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import (
+    Count, Sum, Avg, F, Q, Case, CharField, DecimalField, ExpressionWrapper, Value, When,
+)
+from django.db.models.functions import Coalesce, TruncMonth, TruncWeek
 from django.utils import timezone
 from datetime import timedelta
-from django.http import HttpResponse
+from django.db import DatabaseError
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+import codecs
 import csv
 from produtos.models import Produto, Avaliacao, Categoria
 from pedidos.models import Pedido, ItemPedido, Pagamento
 from usuarios.models import User
-from .models import ConsentimentoLGPD, SolicitacaoDados, LogAcessoDados
+from . import metricas, perf
+from .metricas import STATUS_VENDIDOS
+from .pagination import percorrer_keyset
+from .models import (
+    ConsentimentoLGPD, SolicitacaoDados, LogAcessoDados,
+    MetricaPedidosDia, MetricaProdutoDia, MetricaPagamentoDia, MetricaCadastrosDia,
+)
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 @staff_member_required
 def dashboard_admin(request):
-    """Dashboard principal do administrador com métricas e gráficos."""
+    """
+    Dashboard principal do administrador com métricas e gráficos.
+
+    Vendas, pedidos, produtos vendidos, pagamentos, cadastros e clientes
+    com pedido vêm dos rollups diários de core.metricas, então o custo da
+    página não cresce com o histórico de pedidos. Os dias alterados desde a
+    última visita são recalculados aqui, antes da leitura.
+    """
+    try:
+        metricas.atualizar_pendentes()
+    except DatabaseError:
+        # Mostra os rollups como estão; as marcas continuam para a próxima visita
+        logger.exception('Falha ao recalcular as métricas pendentes')
     
     # Período de análise
-    hoje = timezone.now().date()
+    hoje = timezone.localdate()
     inicio_mes = hoje.replace(day=1)
     trinta_dias_atras = hoje - timedelta(days=30)
     sete_dias_atras = hoje - timedelta(days=7)
+    tres_meses_atras = hoje - timedelta(days=90)
+    vendido = Q(status__in=STATUS_VENDIDOS)
     
     # ==================== MÉTRICAS GERAIS ====================
     
-    # Vendas
-    total_vendas = Pedido.objects.filter(
-        status__in=['processando', 'enviado', 'entregue']
-    ).aggregate(total=Sum('total'))['total'] or 0
-    
-    vendas_mes = Pedido.objects.filter(
-        criado_em__gte=inicio_mes,
-        status__in=['processando', 'enviado', 'entregue']
-    ).aggregate(total=Sum('total'))['total'] or 0
-    
-    vendas_7dias = Pedido.objects.filter(
-        criado_em__gte=sete_dias_atras,
-        status__in=['processando', 'enviado', 'entregue']
-    ).aggregate(total=Sum('total'))['total'] or 0
-    
-    # Pedidos
-    total_pedidos = Pedido.objects.count()
-    pedidos_pendentes = Pedido.objects.filter(status='pendente').count()
-    pedidos_processando = Pedido.objects.filter(status='processando').count()
-    pedidos_mes = Pedido.objects.filter(criado_em__gte=inicio_mes).count()
+    # Vendas e pedidos
+    pedidos = MetricaPedidosDia.objects.aggregate(
+        total_vendas=Sum('total', filter=vendido),
+        vendas_mes=Sum('total', filter=vendido & Q(data__gte=inicio_mes)),
+        vendas_7dias=Sum('total', filter=vendido & Q(data__gte=sete_dias_atras)),
+        total_pedidos=Sum('quantidade'),
+        pedidos_pendentes=Sum('quantidade', filter=Q(status='pendente')),
+        pedidos_processando=Sum('quantidade', filter=Q(status='processando')),
+        pedidos_mes=Sum('quantidade', filter=Q(data__gte=inicio_mes)),
+    )
+    pedidos = {chave: valor or 0 for chave, valor in pedidos.items()}
+    total_vendas = pedidos['total_vendas']
+    total_pedidos = pedidos['total_pedidos']
     
     # Usuários
-    total_usuarios = User.objects.count()
-    usuarios_mes = User.objects.filter(date_joined__gte=inicio_mes).count()
-    usuarios_ativos_7dias = User.objects.filter(
-        last_login__gte=sete_dias_atras
-    ).count()
+    cadastros = MetricaCadastrosDia.objects.aggregate(
+        total=Sum('quantidade'),
+        mes=Sum('quantidade', filter=Q(data__gte=inicio_mes)),
+        com_pedido=Sum('compradores'),
+    )
+    total_usuarios = cadastros['total'] or 0
+    usuarios_mes = cadastros['mes'] or 0
+    usuarios_com_pedido = cadastros['com_pedido'] or 0
+    usuarios_ativos_7dias = User.objects.filter(last_login__gte=sete_dias_atras).count()
     
     # Produtos
-    total_produtos = Produto.objects.filter(ativo=True).count()
-    produtos_estoque_baixo = Produto.objects.filter(
-        ativo=True, estoque__lt=10, estoque__gt=0
-    ).count()
-    produtos_sem_estoque = Produto.objects.filter(ativo=True, estoque=0).count()
+    produtos = _com_situacao_estoque(Produto.objects.filter(ativo=True)).aggregate(
+        total=Count('id'),
+        estoque_baixo=Count('id', filter=Q(situacao='baixo')),
+        sem_estoque=Count('id', filter=Q(situacao='esgotado')),
+    )
+    produtos_sem_estoque = produtos['sem_estoque']
+    produtos_estoque_baixo = produtos['estoque_baixo']
     
     # Avaliações
-    total_avaliacoes = Avaliacao.objects.count()
-    media_avaliacoes = Avaliacao.objects.aggregate(
-        media=Avg('rating')
-    )['media'] or 0
-    avaliacoes_mes = Avaliacao.objects.filter(criado_em__gte=inicio_mes).count()
+    avaliacoes = Avaliacao.objects.aggregate(
+        total=Count('id'),
+        media=Avg('rating'),
+        mes=Count('id', filter=Q(criado_em__date__gte=inicio_mes)),
+    )
     
     # LGPD
     solicitacoes_pendentes_lgpd = SolicitacaoDados.objects.filter(
@@ -79,62 +108,51 @@ def dashboard_admin(request):
     
     # Vendas por dia (últimos 30 dias)
     vendas_por_dia = list(
-        Pedido.objects.filter(
-            criado_em__gte=trinta_dias_atras,
-            status__in=['processando', 'enviado', 'entregue']
-        )
-        .annotate(data=TruncDate('criado_em'))
+        MetricaPedidosDia.objects.filter(vendido, data__gte=trinta_dias_atras)
         .values('data')
-        .annotate(total=Sum('total'), quantidade=Count('id'))
+        .annotate(total=Sum('total'), quantidade=Sum('quantidade'))
         .order_by('data')
     )
     
     # Pedidos por status
     pedidos_por_status = list(
-        Pedido.objects.values('status')
-        .annotate(total=Count('id'))
+        MetricaPedidosDia.objects.values('status')
+        .annotate(total=Sum('quantidade'))
         .order_by('-total')
     )
     
     # Produtos mais vendidos (top 10)
     produtos_mais_vendidos = list(
-        ItemPedido.objects.filter(
-            pedido__status__in=['processando', 'enviado', 'entregue']
-        )
-        .values('produto__nome')
+        MetricaProdutoDia.objects.values('produto__nome')
         .annotate(quantidade=Sum('quantidade'))
         .order_by('-quantidade')[:10]
     )
     
     # Categorias mais vendidas
-    categorias_mais_vendidas = list(
-        ItemPedido.objects.filter(
-            pedido__status__in=['processando', 'enviado', 'entregue']
-        )
-        .values('produto__categoria__nome')
+    categorias_mais_vendidas = [
+        {'produto__categoria__nome': linha['categoria__nome'], 'total': linha['total']}
+        for linha in MetricaProdutoDia.objects.values('categoria__nome')
         .annotate(total=Sum('quantidade'))
         .order_by('-total')[:5]
-    )
+    ]
     
     # Novos usuários por semana (últimos 3 meses)
-    tres_meses_atras = hoje - timedelta(days=90)
     novos_usuarios_por_semana = list(
-        User.objects.filter(date_joined__gte=tres_meses_atras)
-        .annotate(semana=TruncWeek('date_joined'))
+        MetricaCadastrosDia.objects.filter(data__gte=tres_meses_atras)
+        .annotate(semana=TruncWeek('data'))
         .values('semana')
-        .annotate(total=Count('id'))
+        .annotate(total=Sum('quantidade'))
         .order_by('semana')
     )
     
     # Métodos de pagamento
     metodos_pagamento = list(
-        Pagamento.objects.values('metodo')
-        .annotate(total=Count('id'), receita=Sum('valor'))
+        MetricaPagamentoDia.objects.values('metodo')
+        .annotate(total=Sum('quantidade'), receita=Sum('receita'))
         .order_by('-total')
     )
     
     # Taxa de conversão (usuários que fizeram pedido)
-    usuarios_com_pedido = Pedido.objects.values('usuario').distinct().count()
     taxa_conversao = round(
         (usuarios_com_pedido / total_usuarios * 100) if total_usuarios > 0 else 0,
         2
@@ -164,10 +182,10 @@ def dashboard_admin(request):
             'icone': 'alert-triangle'
         })
     
-    if pedidos_pendentes > 5:
+    if pedidos['pedidos_pendentes'] > 5:
         alertas.append({
             'tipo': 'info',
-            'mensagem': f'{pedidos_pendentes} pedido(s) aguardando processamento',
+            'mensagem': f'{pedidos["pedidos_pendentes"]} pedido(s) aguardando processamento',
             'icone': 'shopping-cart'
         })
     
@@ -181,21 +199,21 @@ def dashboard_admin(request):
     context = {
         # Métricas
         'total_vendas': total_vendas,
-        'vendas_mes': vendas_mes,
-        'vendas_7dias': vendas_7dias,
+        'vendas_mes': pedidos['vendas_mes'],
+        'vendas_7dias': pedidos['vendas_7dias'],
         'total_pedidos': total_pedidos,
-        'pedidos_pendentes': pedidos_pendentes,
-        'pedidos_processando': pedidos_processando,
-        'pedidos_mes': pedidos_mes,
+        'pedidos_pendentes': pedidos['pedidos_pendentes'],
+        'pedidos_processando': pedidos['pedidos_processando'],
+        'pedidos_mes': pedidos['pedidos_mes'],
         'total_usuarios': total_usuarios,
         'usuarios_mes': usuarios_mes,
         'usuarios_ativos_7dias': usuarios_ativos_7dias,
-        'total_produtos': total_produtos,
+        'total_produtos': produtos['total'],
         'produtos_estoque_baixo': produtos_estoque_baixo,
         'produtos_sem_estoque': produtos_sem_estoque,
-        'total_avaliacoes': total_avaliacoes,
-        'media_avaliacoes': round(media_avaliacoes, 1),
-        'avaliacoes_mes': avaliacoes_mes,
+        'total_avaliacoes': avaliacoes['total'],
+        'media_avaliacoes': round(avaliacoes['media'] or 0, 1),
+        'avaliacoes_mes': avaliacoes['mes'],
         'solicitacoes_pendentes_lgpd': solicitacoes_pendentes_lgpd,
         'consentimentos_ativos': consentimentos_ativos,
         'taxa_conversao': taxa_conversao,
@@ -216,6 +234,29 @@ def dashboard_admin(request):
     return render(request, 'admin/dashboard.html', context)
 
 
+def _filtrar_pedidos(pedidos, params):
+    """
+    Aplica os filtros de data (dias inclusivos) e status dos relatórios de vendas.
+
+    Args:
+        pedidos: QuerySet de Pedido
+        params: QueryDict com data_inicio, data_fim (AAAA-MM-DD) e status
+
+    Returns:
+        QuerySet: Pedidos filtrados (datas inválidas são ignoradas)
+    """
+    for parametro, lookup in (('data_inicio', 'criado_em__date__gte'), ('data_fim', 'criado_em__date__lte')):
+        try:
+            data = parse_date(params.get(parametro) or '')
+        except ValueError:
+            data = None
+        if data:
+            pedidos = pedidos.filter(**{lookup: data})
+    if params.get('status'):
+        pedidos = pedidos.filter(status=params['status'])
+    return pedidos
+
+
 @staff_member_required
 def relatorio_vendas(request):
     """Relatório detalhado de vendas com filtros."""
@@ -225,18 +266,11 @@ def relatorio_vendas(request):
     data_fim = request.GET.get('data_fim')
     status = request.GET.get('status')
     
-    # Query base
-    pedidos = Pedido.objects.all().select_related(
-        'usuario', 'pagamento'
-    ).prefetch_related('itens__produto')
-    
-    # Aplicar filtros
-    if data_inicio:
-        pedidos = pedidos.filter(criado_em__gte=data_inicio)
-    if data_fim:
-        pedidos = pedidos.filter(criado_em__lte=data_fim)
-    if status:
-        pedidos = pedidos.filter(status=status)
+    # Query base com filtros
+    pedidos = _filtrar_pedidos(
+        Pedido.objects.all().select_related('usuario', 'pagamento').prefetch_related('itens__produto'),
+        request.GET,
+    )
     
     # Estatísticas
     stats = pedidos.aggregate(
@@ -269,39 +303,94 @@ def relatorio_vendas(request):
     return render(request, 'admin/relatorio_vendas.html', context)
 
 
+SITUACOES_ESTOQUE = {'ok': 'OK', 'baixo': 'Estoque Baixo', 'esgotado': 'Esgotado'}
+
+
+def _com_situacao_estoque(queryset, prefixo=''):
+    """
+    Anota a situação do estoque (ok, baixo, esgotado) e o valor em estoque.
+
+    O limite de estoque baixo é o da categoria do produto ou, se vazio,
+    settings.ESTOQUE_BAIXO_PADRAO.
+
+    Args:
+        queryset: QuerySet de Produto, ou de um modelo relacionado
+        prefixo: Caminho até o produto (ex.: 'produto__')
+
+    Returns:
+        QuerySet: Com as anotações situacao e valor_estoque
+    """
+    estoque = f'{prefixo}estoque'
+    limite = Coalesce(
+        F(f'{prefixo}categoria__limite_estoque_baixo'),
+        Value(settings.ESTOQUE_BAIXO_PADRAO),
+    )
+    return queryset.annotate(
+        situacao=Case(
+            When(**{estoque: 0}, then=Value('esgotado')),
+            When(**{f'{estoque}__lt': limite}, then=Value('baixo')),
+            default=Value('ok'),
+            output_field=CharField(),
+        ),
+        valor_estoque=ExpressionWrapper(
+            F(estoque) * F(f'{prefixo}preco'),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+    )
+
+
+def _pagina_da_faixa(produtos, situacao, total, numero):
+    """Página de uma faixa de estoque, sem COUNT (o total já veio do agregado)."""
+    paginator = Paginator(
+        produtos.filter(situacao=situacao).order_by('estoque', 'nome', 'id'),
+        settings.RELATORIO_ESTOQUE_POR_PAGINA,
+    )
+    paginator.__dict__['count'] = total
+    return paginator.get_page(numero)
+
+
 @staff_member_required
 def relatorio_estoque(request):
-    """Relatório de estoque de produtos."""
+    """
+    Relatório de estoque de produtos.
+
+    Totais, valor em estoque e tamanho de cada faixa saem de um único
+    agregado condicional; cada faixa é paginada (?pagina_ok, ?pagina_baixo,
+    ?pagina_esgotado), então o relatório não lista o catálogo inteiro.
+    """
     
-    # Produtos por situação de estoque com valor calculado
-    produtos_ok = Produto.objects.filter(ativo=True, estoque__gte=10).select_related('categoria')
-    produtos_baixo = Produto.objects.filter(ativo=True, estoque__lt=10, estoque__gt=0).select_related('categoria')
-    produtos_esgotado = Produto.objects.filter(ativo=True, estoque=0).select_related('categoria')
+    produtos = _com_situacao_estoque(
+        Produto.objects.filter(ativo=True).select_related('categoria')
+    )
     
-    # Adicionar valor_estoque calculado a cada produto
-    for produto in produtos_ok:
-        produto.valor_estoque = produto.estoque * produto.preco
+    # Totais e tamanho de cada faixa em uma única consulta
+    resumo = produtos.aggregate(
+        total_produtos_ativos=Count('id'),
+        valor_total_estoque=Sum('valor_estoque'),
+        ok=Count('id', filter=Q(situacao='ok')),
+        baixo=Count('id', filter=Q(situacao='baixo')),
+        esgotado=Count('id', filter=Q(situacao='esgotado')),
+    )
     
     # Produtos mais vendidos (para reposição)
-    produtos_mais_vendidos = ItemPedido.objects.filter(
-        pedido__criado_em__gte=timezone.now() - timedelta(days=30)
+    produtos_mais_vendidos = _com_situacao_estoque(
+        ItemPedido.objects.filter(
+            pedido__criado_em__gte=timezone.now() - timedelta(days=30)
+        ),
+        prefixo='produto__',
     ).values(
-        'produto__id', 'produto__nome', 'produto__estoque'
+        'produto__id', 'produto__nome', 'produto__estoque', 'situacao'
     ).annotate(
         vendidos=Sum('quantidade')
     ).order_by('-vendidos')[:50]
     
-    # Valor total em estoque - calcular manualmente
-    produtos_ativos = Produto.objects.filter(ativo=True)
-    valor_estoque = sum(p.estoque * p.preco for p in produtos_ativos)
-    
     context = {
-        'estoque_ok': produtos_ok,
-        'estoque_baixo': produtos_baixo,
-        'esgotados': produtos_esgotado,
+        'estoque_ok': _pagina_da_faixa(produtos, 'ok', resumo['ok'], request.GET.get('pagina_ok')),
+        'estoque_baixo': _pagina_da_faixa(produtos, 'baixo', resumo['baixo'], request.GET.get('pagina_baixo')),
+        'esgotados': _pagina_da_faixa(produtos, 'esgotado', resumo['esgotado'], request.GET.get('pagina_esgotado')),
         'mais_vendidos': produtos_mais_vendidos,
-        'valor_total_estoque': valor_estoque,
-        'total_produtos_ativos': produtos_ativos.count(),
+        'valor_total_estoque': resumo['valor_total_estoque'] or 0,
+        'total_produtos_ativos': resumo['total_produtos_ativos'],
     }
     
     return render(request, 'admin/relatorio_estoque.html', context)
@@ -391,70 +480,100 @@ def relatorio_usuarios(request):
     return render(request, 'admin/relatorio_usuarios.html', context)
 
 
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve a linha em vez de guardá-la."""
+
+    def write(self, valor):
+        return valor
+
+
+def _resposta_csv(linhas, nome_arquivo):
+    response = StreamingHttpResponse(_codificar(linhas), content_type='text/csv; charset=utf-8-sig')
+    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+    return response
+
+
+def _codificar(linhas):
+    # Codificar cada pedaço com utf-8-sig repetiria o BOM em todas as linhas
+    yield codecs.BOM_UTF8
+    for linha in linhas:
+        yield linha.encode('utf-8')
+
+
 @staff_member_required
 def exportar_vendas_csv(request):
-    """Exporta relatório de vendas em CSV."""
-    
-    response = HttpResponse(content_type='text/csv; charset=utf-8-sig')
-    response['Content-Disposition'] = 'attachment; filename="relatorio_vendas.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
+    """
+    Exporta relatório de vendas em CSV.
+
+    Aceita os mesmos filtros de relatorio_vendas e envia a resposta em
+    streaming, lendo os pedidos em lotes keyset: a memória usada não
+    depende da quantidade de pedidos exportados.
+    """
+    pedidos = _filtrar_pedidos(Pedido.objects.all(), request.GET).values(
+        'id', 'criado_em', 'usuario__username', 'status', 'total',
+        'pagamento__metodo', 'pagamento__status',
+    )
+    return _resposta_csv(_linhas_vendas(pedidos), 'relatorio_vendas.csv')
+
+
+def _linhas_vendas(pedidos):
+    writer = csv.writer(_Eco())
+    status_pedido = dict(Pedido.STATUS_CHOICES)
+    metodos = dict(Pagamento.METODO_CHOICES)
+    status_pagamento = dict(Pagamento.STATUS_CHOICES)
+
+    yield writer.writerow([
         'ID Pedido', 'Data', 'Cliente', 'Status', 'Total', 
         'Método Pagamento', 'Status Pagamento'
     ])
-    
-    pedidos = Pedido.objects.select_related(
-        'usuario', 'pagamento'
-    ).order_by('-criado_em')[:1000]
-    
-    for pedido in pedidos:
-        writer.writerow([
-            pedido.id,
-            pedido.criado_em.strftime('%d/%m/%Y %H:%M'),
-            pedido.usuario.username,
-            pedido.get_status_display(),
-            f'R$ {pedido.total}',
-            pedido.pagamento.get_metodo_display() if hasattr(pedido, 'pagamento') else 'N/A',
-            pedido.pagamento.get_status_display() if hasattr(pedido, 'pagamento') else 'N/A',
+    for pedido in percorrer_keyset(pedidos, ('-criado_em', '-id')):
+        tem_pagamento = pedido['pagamento__metodo'] is not None
+        yield writer.writerow([
+            pedido['id'],
+            timezone.localtime(pedido['criado_em']).strftime('%d/%m/%Y %H:%M'),
+            pedido['usuario__username'],
+            status_pedido.get(pedido['status'], pedido['status']),
+            f'R$ {pedido["total"]}',
+            metodos.get(pedido['pagamento__metodo'], 'N/A') if tem_pagamento else 'N/A',
+            status_pagamento.get(pedido['pagamento__status'], 'N/A') if tem_pagamento else 'N/A',
         ])
-    
-    return response
 
 
 @staff_member_required
 def exportar_estoque_csv(request):
-    """Exporta relatório de estoque em CSV."""
-    
-    response = HttpResponse(content_type='text/csv; charset=utf-8-sig')
-    response['Content-Disposition'] = 'attachment; filename="relatorio_estoque.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
+    """Exporta relatório de estoque em CSV, em streaming e em lotes keyset."""
+    produtos = _com_situacao_estoque(Produto.objects.filter(ativo=True)).values(
+        'id', 'nome', 'categoria__nome', 'estoque', 'preco', 'situacao', 'valor_estoque'
+    )
+    return _resposta_csv(_linhas_estoque(produtos), 'relatorio_estoque.csv')
+
+
+def _linhas_estoque(produtos):
+    writer = csv.writer(_Eco())
+    yield writer.writerow([
         'ID', 'Produto', 'Categoria', 'Estoque', 'Preço', 
         'Valor Total', 'Status'
     ])
-    
-    produtos = Produto.objects.filter(ativo=True).select_related('categoria')
-    
-    for produto in produtos:
-        valor_total = produto.estoque * produto.preco
-        
-        if produto.estoque == 0:
-            status = 'Esgotado'
-        elif produto.estoque < 10:
-            status = 'Estoque Baixo'
-        else:
-            status = 'OK'
-        
-        writer.writerow([
-            produto.id,
-            produto.nome,
-            produto.categoria.nome,
-            produto.estoque,
-            f'R$ {produto.preco}',
-            f'R$ {valor_total}',
-            status,
+    for produto in percorrer_keyset(produtos, ('id',)):
+        yield writer.writerow([
+            produto['id'],
+            produto['nome'],
+            produto['categoria__nome'],
+            produto['estoque'],
+            f'R$ {produto["preco"]}',
+            f'R$ {produto["valor_estoque"]:.2f}',
+            SITUACOES_ESTOQUE[produto['situacao']],
         ])
-    
-    return response
+
+
+@staff_member_required
+def painel_desempenho(request):
+    """Percentis por rota e consultas lentas mais custosas (memória deste processo)."""
+    context = {
+        'rotas': perf.janela.resumo(settings.PERF_JANELA_SEGUNDOS),
+        'janela_minutos': settings.PERF_JANELA_SEGUNDOS // 60,
+        'janela_maxima': settings.PERF_JANELA_MAXIMA,
+        'consultas_lentas': perf.consultas_lentas.piores(),
+        'limite_consulta_lenta': settings.PERF_CONSULTA_LENTA_MS,
+    }
+    return render(request, 'admin/desempenho.html', context)
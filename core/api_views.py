@@ -4,21 +4,39 @@ from rest_framework.views import APIView
 
 from produtos.models import Produto
 from produtos.serializers import ProdutoListSerializer
+from . import cache as catalogo_cache
+from . import cache_http
+from .carregamento import otimizar_queryset
 
 
 class HomeView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        destaques = Produto.objects.filter(
-            ativo=True, destaque=True
-        ).select_related('categoria')[:8]
+        janela = cache_http.janela_estoque()
+        return cache_http.responder(
+            request,
+            lambda: Response(self._payload(request)),
+            cache_http.calcular_etag(request, 'home', janela),
+            cache_http.ultima_modificacao(janela),
+            chaves=lambda resposta: [cache_http.CHAVE_LISTAGENS] + list(cache_http.chaves_de_produtos(
+                resposta.data['destaques'] + resposta.data['promocoes']
+            )),
+        )
 
-        promocoes = Produto.objects.filter(
-            ativo=True, preco_promocional__isnull=False
-        ).select_related('categoria')[:8]
+    def _payload(self, request):
+        # imagem_url é absoluta, então o payload varia com esquema e host
+        return catalogo_cache.obter_ou_calcular(
+            'api_home', lambda: self._montar_payload(request),
+            request.scheme, request.get_host(),
+        )
 
-        return Response({
+    def _montar_payload(self, request):
+        produtos = otimizar_queryset(Produto.objects.filter(ativo=True), ProdutoListSerializer, request)
+        destaques = produtos.filter(destaque=True)[:8]
+        promocoes = produtos.filter(preco_promocional__isnull=False)[:8]
+
+        return {
             'destaques': ProdutoListSerializer(destaques, many=True, context={'request': request}).data,
             'promocoes': ProdutoListSerializer(promocoes, many=True, context={'request': request}).data,
-        })
+        }
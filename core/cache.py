@@ -0,0 +1,177 @@
+"""
+Cache read-through do catálogo (home, categorias e listagens).
+
+As chaves carregam a versão atual do catálogo; salvar ou excluir produtos e
+categorias incrementa a versão, invalidando todas as entradas de uma vez sem
+precisar conhecê-las. O recálculo de uma chave expirada é feito por um único
+worker (single-flight): os demais aguardam o valor ficar pronto.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .perf import registrar_cache
+
+CHAVE_VERSAO = 'catalogo:versao'
+CHAVE_MODIFICACAO = 'catalogo:modificado_em'
+PREFIXO_ESTATISTICAS = 'catalogo:estatisticas'
+
+# Intervalo de envio dos contadores locais para o cache compartilhado
+LOTE_ESTATISTICAS = 50
+
+_AUSENTE = object()
+_contadores = Counter()
+_contadores_lock = threading.Lock()
+
+
+def _timeout_padrao():
+    return getattr(settings, 'CATALOGO_CACHE_TIMEOUT', 300)
+
+
+def versao_catalogo():
+    """Retorna a versão atual do catálogo, inicializando-a se necessário."""
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        # Parte do relógio, não de 1: depois de um flush do cache a versão não
+        # volta a valores já usados em ETags guardadas pelos clientes
+        cache.add(CHAVE_VERSAO, int(time.time()), None)
+        versao = cache.get(CHAVE_VERSAO, 1)
+    return versao
+
+
+def modificacao_catalogo():
+    """Retorna o timestamp (s) da última invalidação do catálogo."""
+    modificado_em = cache.get(CHAVE_MODIFICACAO)
+    if modificado_em is None:
+        cache.add(CHAVE_MODIFICACAO, int(time.time()), None)
+        modificado_em = cache.get(CHAVE_MODIFICACAO, int(time.time()))
+    return modificado_em
+
+
+def invalidar_catalogo():
+    """Invalida todas as entradas do catálogo incrementando a versão."""
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        cache.set(CHAVE_VERSAO, int(time.time()), None)
+    cache.set(CHAVE_MODIFICACAO, int(time.time()), None)
+
+
+def montar_chave(nome, *partes):
+    """Monta a chave versionada para um namespace e seus parâmetros."""
+    sufixo = hashlib.md5(repr(partes).encode()).hexdigest()
+    return f'catalogo:v{versao_catalogo()}:{nome}:{sufixo}'
+
+
+def obter_ou_calcular(nome, calcular, *partes, timeout=None):
+    """
+    Retorna o valor em cache ou o calcula uma única vez.
+
+    Args:
+        nome: Namespace da entrada (usado nas estatísticas)
+        calcular: Função sem argumentos que produz o valor
+        *partes: Parâmetros que distinguem a entrada dentro do namespace
+        timeout: Validade em segundos (default: CATALOGO_CACHE_TIMEOUT)
+
+    Returns:
+        Valor armazenado ou recém-calculado
+    """
+    timeout = _timeout_padrao() if timeout is None else timeout
+    chave = montar_chave(nome, *partes)
+
+    valor = cache.get(chave, _AUSENTE)
+    if valor is not _AUSENTE:
+        _registrar(nome, 'hits')
+        return valor
+
+    _registrar(nome, 'misses')
+    chave_lock = f'{chave}:lock'
+    espera = getattr(settings, 'CATALOGO_CACHE_ESPERA', 2.0)
+
+    if cache.add(chave_lock, 1, max(int(espera * 5), 1)):
+        try:
+            valor = calcular()
+            cache.set(chave, valor, timeout)
+        finally:
+            cache.delete(chave_lock)
+        return valor
+
+    # Outro worker está recalculando: aguarda o valor em vez de repetir a query
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        time.sleep(0.05)
+        valor = cache.get(chave, _AUSENTE)
+        if valor is not _AUSENTE:
+            _registrar(nome, 'esperas')
+            return valor
+
+    _registrar(nome, 'esperas_expiradas')
+    return calcular()
+
+
+def _registrar(nome, evento):
+    if evento in ('hits', 'misses'):
+        registrar_cache(evento == 'hits')
+    with _contadores_lock:
+        _contadores[(nome, evento)] += 1
+        if sum(_contadores.values()) < LOTE_ESTATISTICAS:
+            return
+        pendentes = dict(_contadores)
+        _contadores.clear()
+    _enviar_estatisticas(pendentes)
+
+
+def _enviar_estatisticas(pendentes):
+    for (nome, evento), quantidade in pendentes.items():
+        chave = f'{PREFIXO_ESTATISTICAS}:{nome}:{evento}'
+        if not cache.add(chave, quantidade, None):
+            try:
+                cache.incr(chave, quantidade)
+            except ValueError:
+                cache.set(chave, quantidade, None)
+
+    registrados = set(cache.get(PREFIXO_ESTATISTICAS, ()))
+    novos = {nome for nome, _ in pendentes} - registrados
+    if novos:
+        cache.set(PREFIXO_ESTATISTICAS, sorted(registrados | novos), None)
+
+
+def estatisticas():
+    """
+    Retorna hits, misses e taxa de acerto por namespace.
+
+    Soma os contadores já enviados ao cache compartilhado (todos os
+    processos) com os contadores ainda pendentes neste processo.
+    """
+    with _contadores_lock:
+        locais = dict(_contadores)
+
+    nomes = set(cache.get(PREFIXO_ESTATISTICAS, ())) | {nome for nome, _ in locais}
+    eventos = ('hits', 'misses', 'esperas', 'esperas_expiradas')
+    resultado = {}
+    for nome in sorted(nomes):
+        dados = {
+            evento: cache.get(f'{PREFIXO_ESTATISTICAS}:{nome}:{evento}', 0) + locais.get((nome, evento), 0)
+            for evento in eventos
+        }
+        consultas = dados['hits'] + dados['misses']
+        dados['taxa_acerto'] = round(dados['hits'] / consultas * 100, 1) if consultas else 0
+        resultado[nome] = dados
+    return resultado
+
+
+def zerar_estatisticas():
+    """Remove os contadores locais e compartilhados."""
+    with _contadores_lock:
+        _contadores.clear()
+    nomes = cache.get(PREFIXO_ESTATISTICAS, ())
+    cache.delete_many([
+        f'{PREFIXO_ESTATISTICAS}:{nome}:{evento}'
+        for nome in nomes
+        for evento in ('hits', 'misses', 'esperas', 'esperas_expiradas')
+    ])
+    cache.delete(PREFIXO_ESTATISTICAS)
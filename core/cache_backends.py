@@ -0,0 +1,167 @@
+"""
+Backends de cache do projeto.
+
+CacheDoisNiveis coloca um LRU em memória de cada processo (LocMemCache) na
+frente de um cache compartilhado entre workers (Redis). As chaves quentes,
+selecionadas por prefixo, são lidas do nível local por até TIMEOUT_LOCAL
+segundos; as demais vão sempre ao compartilhado. Se o compartilhado ficar
+indisponível, o backend passa a operar só com o nível local por alguns
+segundos em vez de derrubar as requisições.
+"""
+import logging
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.functional import cached_property
+
+try:
+    from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+    ERROS_CONEXAO = (RedisConnectionError, RedisTimeoutError, ConnectionError, TimeoutError)
+except ImportError:
+    ERROS_CONEXAO = (ConnectionError, TimeoutError)
+
+logger = logging.getLogger(__name__)
+
+_AUSENTE = object()
+_INDISPONIVEL = object()
+
+
+class CacheDoisNiveis(BaseCache):
+    """
+    Cache em dois níveis: LRU por processo na frente de um cache compartilhado.
+
+    LOCATION é o alias do cache compartilhado em settings.CACHES. OPTIONS:
+        PREFIXOS_LOCAIS: Prefixos das chaves mantidas também no nível local
+        TIMEOUT_LOCAL: Validade máxima (s) de qualquer entrada local (default: 5)
+        MAX_ENTRADAS_LOCAIS: Tamanho do LRU local (default: 1000)
+        PAUSA_APOS_FALHA: Segundos sem tentar o compartilhado após uma falha (default: 5)
+
+    Escritas feitas por outro processo levam até TIMEOUT_LOCAL segundos para
+    aparecer em chaves locais, o que vale também para a versão do catálogo.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        opcoes = params.get('OPTIONS', {})
+        self._alias_compartilhado = location or 'compartilhado'
+        self._prefixos = tuple(opcoes.get('PREFIXOS_LOCAIS', ()))
+        self._timeout_local = opcoes.get('TIMEOUT_LOCAL', 5)
+        self._pausa_apos_falha = opcoes.get('PAUSA_APOS_FALHA', 5)
+        self._indisponivel_ate = 0
+        self.local = LocMemCache(f'dois-niveis:{self._alias_compartilhado}', {
+            'TIMEOUT': self._timeout_local,
+            'OPTIONS': {'MAX_ENTRIES': opcoes.get('MAX_ENTRADAS_LOCAIS', 1000)},
+        })
+
+    @cached_property
+    def compartilhado(self):
+        return caches[self._alias_compartilhado]
+
+    def _eh_local(self, key):
+        return key.startswith(self._prefixos)
+
+    def _ttl_local(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self._timeout_local
+        return min(timeout, self._timeout_local)
+
+    def _compartilhado(self, metodo, *args, **kwargs):
+        """Executa no nível compartilhado; retorna _INDISPONIVEL se ele falhar."""
+        if time.monotonic() < self._indisponivel_ate:
+            return _INDISPONIVEL
+        try:
+            return getattr(self.compartilhado, metodo)(*args, **kwargs)
+        except ERROS_CONEXAO as e:
+            self._indisponivel_ate = time.monotonic() + self._pausa_apos_falha
+            logger.warning(
+                f'Cache compartilhado "{self._alias_compartilhado}" indisponível ({e}); '
+                f'usando apenas o cache local por {self._pausa_apos_falha}s'
+            )
+            return _INDISPONIVEL
+
+    def get(self, key, default=None, version=None):
+        local = self._eh_local(key)
+        if local:
+            valor = self.local.get(key, _AUSENTE, version=version)
+            if valor is not _AUSENTE:
+                return valor
+
+        valor = self._compartilhado('get', key, _AUSENTE, version=version)
+        if valor is _INDISPONIVEL:
+            return self.local.get(key, default, version=version)
+        if valor is _AUSENTE:
+            return default
+        if local:
+            self.local.set(key, valor, self._timeout_local, version=version)
+        return valor
+
+    def get_many(self, keys, version=None):
+        encontrados = {}
+        faltando = []
+        for key in keys:
+            valor = self.local.get(key, _AUSENTE, version=version) if self._eh_local(key) else _AUSENTE
+            if valor is _AUSENTE:
+                faltando.append(key)
+            else:
+                encontrados[key] = valor
+        if not faltando:
+            return encontrados
+
+        compartilhados = self._compartilhado('get_many', faltando, version=version)
+        if compartilhados is _INDISPONIVEL:
+            compartilhados = self.local.get_many(faltando, version=version)
+        else:
+            for key, valor in compartilhados.items():
+                if self._eh_local(key):
+                    self.local.set(key, valor, self._timeout_local, version=version)
+        encontrados.update(compartilhados)
+        return encontrados
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        resultado = self._compartilhado('set', key, value, timeout, version=version)
+        if resultado is _INDISPONIVEL or self._eh_local(key):
+            self.local.set(key, value, self._ttl_local(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        resultado = self._compartilhado('add', key, value, timeout, version=version)
+        if resultado is _INDISPONIVEL:
+            return self.local.add(key, value, self._ttl_local(timeout), version=version)
+        if resultado and self._eh_local(key):
+            self.local.set(key, value, self._ttl_local(timeout), version=version)
+        return resultado
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        resultado = self._compartilhado('touch', key, timeout, version=version)
+        if resultado is _INDISPONIVEL:
+            return self.local.touch(key, self._ttl_local(timeout), version=version)
+        return resultado
+
+    def delete(self, key, version=None):
+        removido_local = self.local.delete(key, version=version)
+        resultado = self._compartilhado('delete', key, version=version)
+        return removido_local if resultado is _INDISPONIVEL else resultado
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.local.delete_many(keys, version=version)
+        self._compartilhado('delete_many', keys, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        resultado = self._compartilhado('incr', key, delta, version=version)
+        if resultado is _INDISPONIVEL:
+            return self.local.incr(key, delta, version=version)
+        if self._eh_local(key):
+            self.local.set(key, resultado, self._timeout_local, version=version)
+        return resultado
+
+    def has_key(self, key, version=None):
+        return self.get(key, _AUSENTE, version=version) is not _AUSENTE
+
+    def clear(self):
+        self.local.clear()
+        self._compartilhado('clear')
+
+    def close(self, **kwargs):
+        self._compartilhado('close', **kwargs)
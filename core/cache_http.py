@@ -0,0 +1,198 @@
+"""
+Cache HTTP do catálogo: requisições condicionais, Cache-Control e chaves de purga.
+
+Os validadores (ETag e Last-Modified) são calculados sem montar a
+resposta: saem da versão do catálogo (core.cache), do `atualizado_em` do
+objeto e do que mais fizer o corpo variar (host, Accept, usuário). Um
+cliente que repete a requisição recebe 304 sem serialização nem template.
+
+Respostas anônimas da API são públicas: Cache-Control curto para o
+navegador (com stale-while-revalidate), Surrogate-Control longo para a
+CDN/proxy e o cabeçalho de chaves (Surrogate-Key por padrão) com uma
+chave por produto e categoria presentes no corpo. Quando o catálogo muda,
+os signals chamam purgar() com as chaves afetadas, que repassa ao
+purgador configurado em CACHE_HTTP_PURGADOR. Respostas autenticadas e as
+páginas HTML (que levam token CSRF e dados da sessão) são privadas, mas
+continuam respondendo 304.
+"""
+import hashlib
+import logging
+import time
+from calendar import timegm
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
+
+from . import cache as catalogo_cache
+
+logger = logging.getLogger(__name__)
+
+
+def chave_produto(pk):
+    return f'produto-{pk}'
+
+
+def chave_categoria(pk):
+    return f'categoria-{pk}'
+
+
+# Todas as listagens e vitrines (mudam quando produtos entram, saem ou trocam de ordem)
+CHAVE_LISTAGENS = 'listagens'
+CHAVE_CATEGORIAS = 'categorias'
+
+
+def calcular_etag(request, *partes, por_usuario=False):
+    """
+    ETag fraco a partir da versão do catálogo e das partes informadas.
+
+    Inclui o host e o esquema (URLs absolutas no corpo), o Accept (JSON ou
+    API navegável) e, com por_usuario, o usuário autenticado.
+
+    Returns:
+        str: ETag entre aspas, com o prefixo W/
+    """
+    variacao = [
+        catalogo_cache.versao_catalogo(),
+        request.scheme,
+        request.get_host(),
+        request.META.get('HTTP_ACCEPT', ''),
+        *partes,
+    ]
+    if por_usuario and request.user.is_authenticated:
+        variacao.append(f'u{request.user.pk}')
+    return f'W/"{hashlib.md5(repr(variacao).encode()).hexdigest()}"'
+
+
+def janela_estoque():
+    """
+    Início (timestamp) da janela corrente de CATALOGO_CACHE_TIMEOUT segundos.
+
+    O checkout baixa o estoque com UPDATE, sem mudar a versão do catálogo.
+    Listagens e vitrines (que exibem o estoque de vários produtos) incluem a
+    janela no ETag: o estoque mostrado fica, no máximo, tão defasado quanto o
+    das páginas já servidas do cache do catálogo.
+    """
+    timeout = max(getattr(settings, 'CATALOGO_CACHE_TIMEOUT', 300), 1)
+    agora = int(time.time())
+    return agora - agora % timeout
+
+
+def ultima_modificacao(*datas):
+    """
+    Timestamp (s) mais recente entre as datas e a última mudança do catálogo.
+
+    Args:
+        *datas: datetimes (ex.: Produto.atualizado_em) ou timestamps; None é ignorado
+    """
+    candidatos = [catalogo_cache.modificacao_catalogo()]
+    for data in datas:
+        if data is None:
+            continue
+        candidatos.append(data if isinstance(data, (int, float)) else timegm(data.utctimetuple()))
+    return int(max(candidatos))
+
+
+def responder(request, gerar, etag, modificado_em=None, chaves=(), publica=True, vary=('Accept', 'Authorization')):
+    """
+    Responde 304 se os validadores do cliente conferem; senão gera a resposta.
+
+    Args:
+        request: HttpRequest (ou Request do DRF)
+        gerar: Callable sem argumentos que produz a resposta completa
+        etag: Valor de calcular_etag
+        modificado_em: Timestamp para Last-Modified (ultima_modificacao)
+        chaves: Chaves de purga, ou callable(resposta) que as extrai da
+            resposta gerada (um 304 não tem corpo e vai sem chaves)
+        publica: False para respostas que nunca podem ir para cache compartilhado
+        vary: Cabeçalhos da requisição que fazem o corpo variar
+
+    Returns:
+        HttpResponse: 304 com os cabeçalhos de cache, ou a resposta de gerar()
+    """
+    resposta = None
+    if request.method in ('GET', 'HEAD'):
+        resposta = get_conditional_response(request, etag=etag, last_modified=modificado_em)
+    if resposta is not None:
+        chaves = ()
+    else:
+        resposta = gerar()
+        if not 200 <= resposta.status_code < 300:
+            return resposta
+        if callable(chaves):
+            chaves = chaves(resposta)
+
+    resposta.setdefault('ETag', etag)
+    if modificado_em is not None:
+        resposta.setdefault('Last-Modified', http_date(modificado_em))
+    patch_vary_headers(resposta, vary)
+    aplicar_politica(request, resposta, chaves, publica)
+    return resposta
+
+
+def aplicar_politica(request, resposta, chaves=(), publica=True):
+    """
+    Cache-Control, Surrogate-Control e chaves de purga da resposta.
+
+    Requisições autenticadas (sessão ou Authorization) recebem sempre
+    `private, no-cache`: o navegador guarda, mas revalida (e ganha 304).
+    """
+    autenticada = request.user.is_authenticated or 'HTTP_AUTHORIZATION' in request.META
+    if not publica or autenticada:
+        patch_cache_control(resposta, private=True, no_cache=True)
+        return resposta
+
+    patch_cache_control(
+        resposta,
+        public=True,
+        max_age=settings.CACHE_HTTP_MAX_AGE,
+        stale_while_revalidate=settings.CACHE_HTTP_STALE_WHILE_REVALIDATE,
+        stale_if_error=settings.CACHE_HTTP_STALE_IF_ERROR,
+    )
+    resposta['Surrogate-Control'] = f'max-age={settings.CACHE_HTTP_SURROGATE_MAX_AGE}'
+    if chaves:
+        resposta[settings.CACHE_HTTP_CABECALHO_CHAVES] = ' '.join(sorted(set(chaves)))
+    return resposta
+
+
+def chaves_de_produtos(produtos):
+    """Chaves de purga de uma lista de produtos serializados (dicts com id e categoria)."""
+    chaves = set()
+    for produto in produtos:
+        chaves.add(chave_produto(produto['id']))
+        categoria = produto.get('categoria')
+        if categoria:
+            chaves.add(chave_categoria(categoria['id']))
+    return chaves
+
+
+def tem_mensagens(request):
+    """Mensagens pendentes são consumidas ao renderizar: a página não pode ser 304."""
+    return len(get_messages(request)) > 0
+
+
+def purgar(chaves):
+    """
+    Pede à CDN/proxy a remoção das respostas marcadas com as chaves.
+
+    Repassa ao callable configurado em CACHE_HTTP_PURGADOR (caminho
+    pontilhado, recebe a lista de chaves). Sem purgador, só registra em log.
+    Falhas são registradas e não interrompem quem alterou o catálogo: as
+    respostas expiram sozinhas pelo Surrogate-Control.
+
+    Args:
+        chaves: Iterável de chaves (ver chave_produto, chave_categoria)
+    """
+    chaves = sorted(set(chaves))
+    if not chaves:
+        return
+    caminho = getattr(settings, 'CACHE_HTTP_PURGADOR', '')
+    if not caminho:
+        logger.debug(f'Purga de cache HTTP (sem purgador configurado): {chaves}')
+        return
+    try:
+        import_string(caminho)(chaves)
+    except Exception:
+        logger.exception(f'Erro ao purgar as chaves {chaves}')
@@ -0,0 +1,140 @@
+"""
+Carregamento antecipado (select_related/prefetch_related/annotate) guiado pelos serializers.
+
+Cada serializer declara o que precisa do banco e as views aplicam isso ao
+queryset automaticamente, em vez de repetir `select_related` em cada
+`get_queryset` (e esquecer algum relacionamento quando o serializer muda).
+
+O plano de carregamento é inferido dos campos:
+
+- `source` pontilhado (ex.: 'usuario.username') faz `select_related` das
+  relações do caminho (ou `prefetch_related`, se alguma for múltipla);
+- serializers aninhados viram `select_related` (FK/one-to-one) ou um
+  `Prefetch` cujo queryset recebe o plano do serializer filho;
+
+e completado pelas declarações do `CarregamentoSerializerMixin`
+(`select_related`, `prefetch_related`, `anotacoes`). Anotações de um
+serializer aninhado por `select_related` são ignoradas: só se aplicam ao
+modelo do queryset ou de um `Prefetch`.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+class CarregamentoSerializerMixin:
+    """
+    Declarações de carregamento de um serializer.
+
+    Atributos:
+        select_related: Relações extras para `select_related`
+        prefetch_related: Lookups (str ou Prefetch) para `prefetch_related`
+        anotacoes: Dicionário nome -> expressão, ou -> callable(request)
+            que devolve a expressão (para anotações que dependem do usuário)
+    """
+
+    select_related = ()
+    prefetch_related = ()
+    anotacoes = {}
+
+    @classmethod
+    def otimizar_queryset(cls, queryset, request=None):
+        """Aplica o plano de carregamento deste serializer ao queryset."""
+        return otimizar_queryset(queryset, cls, request)
+
+
+class CarregamentoViewMixin:
+    """
+    Views genéricas do DRF: aplica o plano do serializer_class ao queryset.
+
+    O gancho é filter_queryset (usado por list e get_object), para que as
+    views continuem livres para sobrescrever get_queryset com os filtros.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return otimizar_queryset(queryset, self.get_serializer_class(), self.request)
+
+
+def otimizar_queryset(queryset, serializer_class, request=None):
+    """
+    Aplica ao queryset o plano de carregamento do serializer.
+
+    Args:
+        queryset: QuerySet do modelo serializado
+        serializer_class: Classe do serializer
+        request: Request atual (para anotações que dependem dele)
+
+    Returns:
+        QuerySet: Com select_related, prefetch_related e annotate aplicados
+    """
+    selects, prefetches, anotacoes = _planejar(serializer_class(), queryset.model, request)
+    if selects:
+        queryset = queryset.select_related(*sorted(selects))
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    if anotacoes:
+        queryset = queryset.annotate(**anotacoes)
+    return queryset
+
+
+def _planejar(serializer, modelo, request):
+    selects = set(getattr(serializer, 'select_related', ()))
+    prefetches = list(getattr(serializer, 'prefetch_related', ()))
+    anotacoes = {
+        nome: expressao(request) if callable(expressao) else expressao
+        for nome, expressao in getattr(serializer, 'anotacoes', {}).items()
+    }
+
+    for campo in serializer.fields.values():
+        if campo.write_only or campo.source == '*':
+            continue
+        aninhado = isinstance(campo, serializers.BaseSerializer)
+        partes = campo.source.split('.') if aninhado else campo.source.split('.')[:-1]
+        select, prefetch, relacionado = _caminho_relacional(modelo, partes)
+        if prefetch:
+            if aninhado and prefetch == '__'.join(partes):
+                filho = campo.child if isinstance(campo, serializers.ListSerializer) else campo
+                queryset = otimizar_queryset(relacionado._default_manager.all(), type(filho), request)
+                prefetches.append(Prefetch(prefetch, queryset=queryset))
+            else:
+                prefetches.append(prefetch)
+            continue
+        if not select:
+            continue
+        selects.add(select)
+        if aninhado and isinstance(campo, serializers.ModelSerializer):
+            filho_selects, filho_prefetches, _ = _planejar(campo, relacionado, request)
+            selects.update(f'{select}__{lookup}' for lookup in filho_selects)
+            prefetches.extend(_prefixar(select, lookup) for lookup in filho_prefetches)
+
+    return selects, prefetches, anotacoes
+
+
+def _caminho_relacional(modelo, partes):
+    """
+    Percorre as relações de um `source` a partir do modelo.
+
+    Returns:
+        tuple: (lookup de select_related ou None, lookup de prefetch ou None,
+        modelo onde o caminho relacional termina)
+    """
+    caminho = []
+    for parte in partes:
+        try:
+            campo = modelo._meta.get_field(parte)
+        except FieldDoesNotExist:
+            break
+        if not campo.is_relation:
+            break
+        caminho.append(parte)
+        modelo = campo.related_model
+        if campo.one_to_many or campo.many_to_many:
+            return None, '__'.join(caminho), modelo
+    return '__'.join(caminho) or None, None, modelo
+
+
+def _prefixar(prefixo, lookup):
+    if isinstance(lookup, Prefetch):
+        return Prefetch(f'{prefixo}__{lookup.prefetch_through}', queryset=lookup.queryset)
+    return f'{prefixo}__{lookup}'
@@ -0,0 +1,44 @@
+"""
+Renderização dos templates de e-mail.
+
+Os templates vêm do engine padrão do projeto (get_template), que já mantém
+os templates compilados em cache por processo. `render_many` renderiza o
+mesmo template para vários contextos (envios em massa, lotes do outbox)
+carregando-o uma única vez.
+"""
+from django.template.loader import get_template
+
+
+def render(nome, contexto):
+    """
+    Renderiza um template de e-mail.
+
+    Args:
+        nome: Caminho do template (ex.: 'emails/pedido_enviado.html')
+        contexto: Dicionário com as variáveis do template
+
+    Returns:
+        str: HTML renderizado
+
+    Raises:
+        TemplateDoesNotExist: Se o template não existir
+    """
+    return get_template(nome).render(contexto)
+
+
+def render_many(nome, contextos):
+    """
+    Renderiza o mesmo template para cada contexto, carregando-o uma só vez.
+
+    Args:
+        nome: Caminho do template
+        contextos: Iterável de dicionários
+
+    Returns:
+        list[str]: HTML renderizado, na ordem dos contextos
+
+    Raises:
+        TemplateDoesNotExist: Se o template não existir
+    """
+    template = get_template(nome)
+    return [template.render(contexto) for contexto in contextos]
@@ -1,17 +1,19 @@
-"""Utilitários para envio de e-mails transacionais."""
+"""Utilitários para envio de e-mails transacionais (enfileirados no outbox)."""
 
 import logging
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.conf import settings
-from django.contrib.sites.shortcuts import get_current_site
+
+from . import outbox
 
 logger = logging.getLogger(__name__)
 
 
-def enviar_email_template(assunto, template_name, contexto, destinatarios, request=None):
+def enviar_email_template(assunto, template_name, contexto, destinatarios, request=None, corpo_texto=''):
     """
-    Envia um e-mail usando um template HTML.
+    Enfileira um e-mail com template HTML no outbox.
+    
+    O envio acontece fora da requisição, pelo comando processar_outbox ou
+    pelo cron /tarefas/processar-outbox/ (ver core.outbox).
     
     Args:
         assunto: Assunto do e-mail
@@ -19,48 +21,44 @@ def enviar_email_template(assunto, template_name, contexto, destinatarios, reque
         contexto: Dicionário com variáveis do template
         destinatarios: Lista de e-mails destinatários
         request: HttpRequest object (opcional, para obter URL do site)
+        corpo_texto: Versão em texto puro (opcional)
     
     Returns:
-        bool: True se enviado com sucesso, False caso contrário
+        bool: True se enfileirado com sucesso, False caso contrário
     """
     try:
         # Adiciona URL do site ao contexto
-        if request:
-            site_url = request.build_absolute_uri('/')
-        else:
-            site_url = getattr(settings, 'SITE_URL', 'http://localhost:8000')
-        
-        contexto['site_url'] = site_url.rstrip('/')
-        
-        # Renderiza o template HTML
-        html_content = render_to_string(f'emails/{template_name}.html', contexto)
+        contexto['site_url'] = _site_url(request)
         
-        # Cria o e-mail
-        email = EmailMultiAlternatives(
-            subject=assunto,
-            body='Este e-mail requer um cliente que suporte HTML.',
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=destinatarios if isinstance(destinatarios, list) else [destinatarios],
+        mensagem = outbox.enfileirar(
+            assunto=assunto,
+            template=template_name,
+            contexto=contexto,
+            destinatarios=destinatarios,
+            corpo_texto=corpo_texto,
         )
         
-        email.attach_alternative(html_content, "text/html")
-        
-        # Envia o e-mail
-        email.send(fail_silently=False)
-        
         logger.info(
-            f'E-mail enviado com sucesso: {assunto} para {destinatarios}'
+            f'E-mail #{mensagem.id} enfileirado: {assunto} para {destinatarios}'
         )
         return True
         
     except Exception as e:
         logger.error(
-            f'Erro ao enviar e-mail: {assunto} para {destinatarios}. Erro: {str(e)}',
+            f'Erro ao enfileirar e-mail: {assunto} para {destinatarios}. Erro: {str(e)}',
             exc_info=True
         )
         return False
 
 
+def _site_url(request=None):
+    if request:
+        site_url = request.build_absolute_uri('/')
+    else:
+        site_url = getattr(settings, 'SITE_URL', 'http://localhost:8000')
+    return site_url.rstrip('/')
+
+
 def enviar_email_boas_vindas(user, request=None):
     """Envia e-mail de boas-vindas para novo usuário."""
     if not user.email:
@@ -118,3 +116,50 @@ def enviar_email_pedido_enviado(pedido, request=None):
         destinatarios=pedido.usuario.email,
         request=request
     )
+
+
+def enviar_emails_pedido_enviado(pedidos, request=None):
+    """
+    Enfileira, em um único lote, o aviso de envio de vários pedidos.
+    
+    Args:
+        pedidos: Iterável de pedidos (com `usuario` carregado)
+        request: HttpRequest object (opcional, para obter URL do site)
+    
+    Returns:
+        int: Quantidade de e-mails enfileirados
+    """
+    site_url = _site_url(request)
+    mensagens = [
+        {
+            'assunto': f'Pedido #{pedido.id} Enviado - Farmácia QUEOPS',
+            'template': 'pedido_enviado',
+            'contexto': {'pedido': pedido, 'site_url': site_url},
+            'destinatarios': pedido.usuario.email,
+        }
+        for pedido in pedidos
+        if pedido.usuario.email
+    ]
+    quantidade = outbox.enfileirar_em_lote(mensagens)
+    logger.info(f'{quantidade} e-mail(s) de pedido enviado enfileirado(s)')
+    return quantidade
+
+
+def enviar_email_recuperacao_senha(usuario, url_recuperacao, request=None):
+    """Envia e-mail com o link de redefinição de senha."""
+    contexto = {
+        'usuario': usuario,
+        'url_recuperacao': url_recuperacao,
+    }
+    
+    return enviar_email_template(
+        assunto='Recuperação de Senha - Farmácia QUEOPS',
+        template_name='recuperacao_senha',
+        contexto=contexto,
+        destinatarios=usuario.email,
+        request=request,
+        corpo_texto=(
+            f'Olá {usuario.first_name or usuario.username},\n\n'
+            f'Acesse o link para redefinir sua senha: {url_recuperacao}'
+        ),
+    )
@@ -0,0 +1,27 @@
+"""Exibe as estatísticas de acerto do cache do catálogo."""
+from django.core.management.base import BaseCommand
+
+from core import cache as catalogo_cache
+
+
+class Command(BaseCommand):
+    help = 'Mostra hits, misses e taxa de acerto do cache do catálogo por namespace.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zerar', action='store_true', help='Zera os contadores após exibir.')
+
+    def handle(self, *args, **options):
+        dados = catalogo_cache.estatisticas()
+        if not dados:
+            self.stdout.write('Nenhuma estatística registrada.')
+
+        for nome, valores in dados.items():
+            self.stdout.write(
+                f'{nome}: {valores["hits"]} hits, {valores["misses"]} misses, '
+                f'{valores["esperas"]} esperas ({valores["esperas_expiradas"]} expiradas), '
+                f'taxa de acerto {valores["taxa_acerto"]}%'
+            )
+
+        if options['zerar']:
+            catalogo_cache.zerar_estatisticas()
+            self.stdout.write(self.style.SUCCESS('Estatísticas zeradas.'))
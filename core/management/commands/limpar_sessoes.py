@@ -0,0 +1,46 @@
+"""Remove sessões expiradas e carrinhos anônimos órfãos em lotes."""
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from pedidos.models import CarrinhoItem
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove sessões expiradas em lotes (evita um DELETE longo travando a '
+        'tabela) junto com os itens de carrinho anônimo dessas sessões.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Sessões removidas por transação.')
+        parser.add_argument('--pausa', type=float, default=0, help='Segundos de espera entre lotes.')
+
+    def handle(self, *args, **options):
+        agora = timezone.now()
+        total_sessoes = total_itens = 0
+
+        while True:
+            with transaction.atomic():
+                chaves = list(
+                    Session.objects.filter(expire_date__lt=agora)
+                    .values_list('session_key', flat=True)[:options['lote']]
+                )
+                if not chaves:
+                    break
+                itens, _ = CarrinhoItem.objects.filter(
+                    usuario__isnull=True, session_key__in=chaves
+                ).delete()
+                sessoes, _ = Session.objects.filter(session_key__in=chaves).delete()
+
+            total_sessoes += sessoes
+            total_itens += itens
+            if options['pausa']:
+                time.sleep(options['pausa'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_sessoes} sessões expiradas removidas ({total_itens} itens de carrinho anônimo).'
+        ))
@@ -0,0 +1,45 @@
+"""Worker do outbox de e-mails: renderiza e envia as mensagens enfileiradas."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Envia os e-mails pendentes do outbox em lotes, com uma conexão SMTP '
+        'por lote, novas tentativas com backoff e descarte após o limite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=50, help='Mensagens por lote.')
+        parser.add_argument(
+            '--continuo', action='store_true',
+            help='Continua aguardando novas mensagens em vez de sair com a fila vazia.',
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=5.0,
+            help='Segundos de espera quando a fila está vazia (com --continuo).',
+        )
+
+    def handle(self, *args, **options):
+        totais = {'enviadas': 0, 'reagendadas': 0, 'descartadas': 0}
+        try:
+            while True:
+                resultado = outbox.processar_lote(options['lote'])
+                for chave, valor in resultado.items():
+                    totais[chave] += valor
+
+                if any(resultado.values()):
+                    continue
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write('Interrompido.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{totais["enviadas"]} e-mail(s) enviado(s), {totais["reagendadas"]} reagendado(s), '
+            f'{totais["descartadas"]} descartado(s).'
+        ))
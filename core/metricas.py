@@ -0,0 +1,242 @@
+"""
+Métricas diárias pré-agregadas do dashboard administrativo.
+
+Cada tabela de rollup guarda um dia por linha (pedidos por status, produtos
+vendidos, métodos de pagamento, cadastros e novos compradores). Os signals
+de core só marcam, depois do commit, os dias tocados por uma alteração
+(MetricaDiaPendente); o recálculo desses dias fica para
+`atualizar_pendentes`, chamado pelo dashboard antes de ler os rollups, e não
+pesa no checkout. O comando `reconstruir_metricas` refaz qualquer período a
+partir das tabelas de origem.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Count, DecimalField, Exists, ExpressionWrapper, F, Min, OuterRef, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from pedidos.models import ItemPedido, Pagamento, Pedido
+from .models import (
+    MetricaCadastrosDia, MetricaDiaPendente, MetricaPagamentoDia, MetricaPedidosDia, MetricaProdutoDia,
+)
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+STATUS_VENDIDOS = ('processando', 'enviado', 'entregue')
+TENTATIVAS_RECALCULO = 3
+
+_pendentes = threading.local()
+
+
+def agendar_recalculo(data):
+    """
+    Marca, depois do commit, um dia para recálculo dos rollups.
+
+    Várias alterações do mesmo dia na mesma transação (pedido, pagamento,
+    itens) resultam em uma única marca, gravada em uma consulta; o recálculo
+    é feito por atualizar_pendentes().
+
+    Args:
+        data: date do dia afetado
+    """
+    if not hasattr(_pendentes, 'datas'):
+        _pendentes.datas = set()
+    _pendentes.datas.add(data)
+    transaction.on_commit(_descarregar)
+
+
+def _descarregar():
+    datas = getattr(_pendentes, 'datas', None)
+    if not datas:
+        return
+    _pendentes.datas = set()
+    try:
+        MetricaDiaPendente.objects.bulk_create(
+            [MetricaDiaPendente(data=data) for data in sorted(datas)],
+            ignore_conflicts=True,
+        )
+    except DatabaseError:
+        # O pedido já foi gravado; o comando reconstruir_metricas corrige o dia
+        logger.exception('Falha ao marcar as métricas diárias de %s', sorted(datas))
+
+
+def atualizar_pendentes():
+    """
+    Recalcula os dias marcados por agendar_recalculo e remove as marcas.
+
+    Uma marca gravada durante o recálculo (commit concorrente) continua
+    pendente para a próxima chamada.
+
+    Returns:
+        list[date]: Dias recalculados
+    """
+    datas = sorted(MetricaDiaPendente.objects.values_list('data', flat=True))
+    if datas:
+        with transaction.atomic():
+            MetricaDiaPendente.objects.filter(data__in=datas).delete()
+            recalcular_dias(datas)
+    return datas
+
+
+def recalcular_dias(datas):
+    """
+    Recalcula os rollups dos dias informados.
+
+    Args:
+        datas: Iterável de date
+    """
+    datas = sorted(set(datas))
+    if datas:
+        _recalcular({'data__in': datas}, '__date__in', datas)
+
+
+def recalcular_periodo(inicio, fim):
+    """
+    Recalcula os rollups de todos os dias entre inicio e fim (inclusive).
+
+    Args:
+        inicio: date inicial
+        fim: date final
+    """
+    _recalcular({'data__range': (inicio, fim)}, '__date__range', (inicio, fim))
+
+
+def primeiro_dia():
+    """
+    Retorna o dia mais antigo com dados de origem ou de rollup.
+
+    Returns:
+        date | None: None se não houver nenhum dado
+    """
+    candidatos = [
+        Pedido.objects.aggregate(m=Min('criado_em'))['m'],
+        Pagamento.objects.aggregate(m=Min('criado_em'))['m'],
+        User.objects.aggregate(m=Min('date_joined'))['m'],
+    ]
+    datas = [timezone.localdate(valor) for valor in candidatos if valor]
+    for modelo in (MetricaPedidosDia, MetricaProdutoDia, MetricaPagamentoDia, MetricaCadastrosDia):
+        data = modelo.objects.aggregate(m=Min('data'))['m']
+        if data:
+            datas.append(data)
+    return min(datas, default=None)
+
+
+def periodos(inicio, fim, dias_por_lote):
+    """Divide [inicio, fim] em intervalos consecutivos de até dias_por_lote dias."""
+    while inicio <= fim:
+        final_lote = min(inicio + timedelta(days=dias_por_lote - 1), fim)
+        yield inicio, final_lote
+        inicio = final_lote + timedelta(days=1)
+
+
+def _recalcular(filtro_rollup, sufixo, valor):
+    """Troca, em uma transação, as linhas de rollup do período pelos agregados atuais."""
+    for tentativa in range(1, TENTATIVAS_RECALCULO + 1):
+        try:
+            with transaction.atomic():
+                for modelo in (MetricaPedidosDia, MetricaProdutoDia, MetricaPagamentoDia, MetricaCadastrosDia):
+                    modelo.objects.filter(**filtro_rollup).delete()
+                _inserir_pedidos(sufixo, valor)
+                _inserir_produtos(sufixo, valor)
+                _inserir_pagamentos(sufixo, valor)
+                _inserir_cadastros(sufixo, valor)
+            return
+        except IntegrityError:
+            # Outro recálculo do mesmo dia gravou primeiro; refaz com os dados já commitados
+            if tentativa == TENTATIVAS_RECALCULO:
+                raise
+
+
+def _inserir_pedidos(sufixo, valor):
+    linhas = (
+        Pedido.objects.filter(**{f'criado_em{sufixo}': valor})
+        .annotate(dia=TruncDate('criado_em'))
+        .values('dia', 'status')
+        .annotate(quantidade=Count('id'), soma=Sum('total'))
+        .order_by()
+    )
+    MetricaPedidosDia.objects.bulk_create([
+        MetricaPedidosDia(
+            data=linha['dia'], status=linha['status'],
+            quantidade=linha['quantidade'], total=linha['soma'] or 0,
+        )
+        for linha in linhas
+    ])
+
+
+def _inserir_produtos(sufixo, valor):
+    receita = ExpressionWrapper(
+        F('quantidade') * F('preco_unitario'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    linhas = (
+        ItemPedido.objects.filter(
+            **{f'pedido__criado_em{sufixo}': valor},
+            pedido__status__in=STATUS_VENDIDOS,
+        )
+        .annotate(dia=TruncDate('pedido__criado_em'))
+        .values('dia', 'produto_id', 'produto__categoria_id')
+        .annotate(unidades=Sum('quantidade'), soma=Sum(receita))
+        .order_by()
+    )
+    MetricaProdutoDia.objects.bulk_create([
+        MetricaProdutoDia(
+            data=linha['dia'],
+            produto_id=linha['produto_id'],
+            categoria_id=linha['produto__categoria_id'],
+            quantidade=linha['unidades'],
+            receita=linha['soma'] or 0,
+        )
+        for linha in linhas
+    ])
+
+
+def _inserir_pagamentos(sufixo, valor):
+    linhas = (
+        Pagamento.objects.filter(**{f'criado_em{sufixo}': valor})
+        .annotate(dia=TruncDate('criado_em'))
+        .values('dia', 'metodo')
+        .annotate(quantidade=Count('id'), soma=Sum('valor'))
+        .order_by()
+    )
+    MetricaPagamentoDia.objects.bulk_create([
+        MetricaPagamentoDia(
+            data=linha['dia'], metodo=linha['metodo'],
+            quantidade=linha['quantidade'], receita=linha['soma'] or 0,
+        )
+        for linha in linhas
+    ])
+
+
+def _inserir_cadastros(sufixo, valor):
+    cadastros = dict(
+        User.objects.filter(**{f'date_joined{sufixo}': valor})
+        .annotate(dia=TruncDate('date_joined'))
+        .values('dia')
+        .annotate(quantidade=Count('id'))
+        .order_by()
+        .values_list('dia', 'quantidade')
+    )
+    # Novos compradores: clientes sem nenhum pedido anterior ao do dia
+    anteriores = Pedido.objects.filter(usuario=OuterRef('usuario'), criado_em__lt=OuterRef('criado_em'))
+    compradores = dict(
+        Pedido.objects.filter(**{f'criado_em{sufixo}': valor})
+        .exclude(Exists(anteriores))
+        .annotate(dia=TruncDate('criado_em'))
+        .values('dia')
+        .annotate(quantidade=Count('usuario', distinct=True))
+        .order_by()
+        .values_list('dia', 'quantidade')
+    )
+    MetricaCadastrosDia.objects.bulk_create([
+        MetricaCadastrosDia(
+            data=dia, quantidade=cadastros.get(dia, 0), compradores=compradores.get(dia, 0),
+        )
+        for dia in sorted(cadastros.keys() | compradores.keys())
+    ])
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('produtos', '0005_produto_indices_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricaCadastrosDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(unique=True, verbose_name='Data')),
+                ('quantidade', models.PositiveIntegerField(default=0, verbose_name='Quantidade')),
+            ],
+            options={
+                'verbose_name': 'Métrica de Cadastros (dia)',
+                'verbose_name_plural': 'Métricas de Cadastros (dia)',
+                'ordering': ['-data'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MetricaPagamentoDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('metodo', models.CharField(max_length=20, verbose_name='Método')),
+                ('quantidade', models.PositiveIntegerField(default=0, verbose_name='Quantidade')),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Receita')),
+            ],
+            options={
+                'verbose_name': 'Métrica de Pagamento (dia)',
+                'verbose_name_plural': 'Métricas de Pagamentos (dia)',
+                'ordering': ['-data', 'metodo'],
+                'constraints': [models.UniqueConstraint(fields=('data', 'metodo'), name='metrica_pagamento_dia_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MetricaPedidosDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('status', models.CharField(max_length=20, verbose_name='Status')),
+                ('quantidade', models.PositiveIntegerField(default=0, verbose_name='Quantidade')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total')),
+            ],
+            options={
+                'verbose_name': 'Métrica de Pedidos (dia)',
+                'verbose_name_plural': 'Métricas de Pedidos (dia)',
+                'ordering': ['-data', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('data', 'status'), name='metrica_pedidos_dia_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MetricaProdutoDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('quantidade', models.PositiveIntegerField(default=0, verbose_name='Quantidade')),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Receita')),
+                ('categoria', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='metricas_diarias', to='produtos.categoria', verbose_name='Categoria')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metricas_diarias', to='produtos.produto', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Métrica de Produto (dia)',
+                'verbose_name_plural': 'Métricas de Produtos (dia)',
+                'ordering': ['-data'],
+                'constraints': [models.UniqueConstraint(fields=('data', 'produto'), name='metrica_produto_dia_unica')],
+            },
+        ),
+    ]
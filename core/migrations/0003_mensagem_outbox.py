@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:51
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_metricas_diarias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MensagemOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assunto', models.CharField(max_length=255, verbose_name='Assunto')),
+                ('template', models.CharField(max_length=100, verbose_name='Template')),
+                ('contexto', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Contexto')),
+                ('corpo_texto', models.TextField(blank=True, verbose_name='Corpo em texto')),
+                ('remetente', models.CharField(max_length=255, verbose_name='Remetente')),
+                ('destinatarios', models.JSONField(default=list, verbose_name='Destinatários')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('falhou', 'Falhou')], default='pendente', max_length=20, verbose_name='Status')),
+                ('tentativas', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('proximo_envio_em', models.DateTimeField(default=django.utils.timezone.now, help_text='Quando pendente: próxima tentativa. Quando enviando: fim da reserva do worker.', verbose_name='Próximo envio em')),
+                ('ultimo_erro', models.TextField(blank=True, verbose_name='Último erro')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('enviado_em', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+            ],
+            options={
+                'verbose_name': 'Mensagem do Outbox',
+                'verbose_name_plural': 'Mensagens do Outbox',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['status', 'proximo_envio_em'], name='core_mensag_status_39e0ba_idx')],
+            },
+        ),
+    ]
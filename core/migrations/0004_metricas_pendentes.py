@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+from django.utils import timezone
+
+
+def reconstruir_historico(apps, schema_editor):
+    # Preenche os rollups com o histórico anterior a eles (inclusive os novos
+    # compradores). O cálculo é o do comando reconstruir_metricas, que lê os
+    # modelos atuais; aqui os históricos só dizem se há algo a agregar.
+    inicios = [
+        apps.get_model('pedidos', 'Pedido').objects.aggregate(m=Min('criado_em'))['m'],
+        apps.get_model('pedidos', 'Pagamento').objects.aggregate(m=Min('criado_em'))['m'],
+        apps.get_model('auth', 'User').objects.aggregate(m=Min('date_joined'))['m'],
+    ]
+    inicios = [timezone.localdate(valor) for valor in inicios if valor]
+    if not inicios:
+        return
+
+    from core import metricas
+    for inicio, fim in metricas.periodos(min(inicios), timezone.localdate(), 31):
+        metricas.recalcular_periodo(inicio, fim)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_mensagem_outbox'),
+        ('pedidos', '0007_historico_status_pedido'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricaDiaPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(unique=True, verbose_name='Data')),
+            ],
+            options={
+                'verbose_name': 'Métrica pendente (dia)',
+                'verbose_name_plural': 'Métricas pendentes (dia)',
+                'ordering': ['data'],
+            },
+        ),
+        migrations.AddField(
+            model_name='metricacadastrosdia',
+            name='compradores',
+            field=models.PositiveIntegerField(default=0, help_text='Usuários cujo primeiro pedido foi feito neste dia.', verbose_name='Novos compradores'),
+        ),
+        migrations.RunPython(reconstruir_historico, migrations.RunPython.noop),
+    ]
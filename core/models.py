@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -195,3 +197,148 @@ class PoliticaPrivacidade(models.Model):
             # Desativa outras políticas ao ativar esta
             PoliticaPrivacidade.objects.filter(ativa=True).update(ativa=False)
         super().save(*args, **kwargs)
+
+
+class MetricaPedidosDia(models.Model):
+    """Rollup diário de pedidos por status (quantidade e valor)."""
+    
+    data = models.DateField('Data')
+    status = models.CharField('Status', max_length=20)
+    quantidade = models.PositiveIntegerField('Quantidade', default=0)
+    total = models.DecimalField('Total', max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        verbose_name = 'Métrica de Pedidos (dia)'
+        verbose_name_plural = 'Métricas de Pedidos (dia)'
+        ordering = ['-data', 'status']
+        constraints = [
+            models.UniqueConstraint(fields=['data', 'status'], name='metrica_pedidos_dia_unica'),
+        ]
+    
+    def __str__(self):
+        return f"{self.data:%d/%m/%Y} - {self.status}: {self.quantidade}"
+
+
+class MetricaProdutoDia(models.Model):
+    """Rollup diário das unidades e da receita vendidas por produto."""
+    
+    data = models.DateField('Data')
+    produto = models.ForeignKey(
+        'produtos.Produto',
+        on_delete=models.CASCADE,
+        related_name='metricas_diarias',
+        verbose_name='Produto'
+    )
+    categoria = models.ForeignKey(
+        'produtos.Categoria',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='metricas_diarias',
+        verbose_name='Categoria'
+    )
+    quantidade = models.PositiveIntegerField('Quantidade', default=0)
+    receita = models.DecimalField('Receita', max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        verbose_name = 'Métrica de Produto (dia)'
+        verbose_name_plural = 'Métricas de Produtos (dia)'
+        ordering = ['-data']
+        constraints = [
+            models.UniqueConstraint(fields=['data', 'produto'], name='metrica_produto_dia_unica'),
+        ]
+    
+    def __str__(self):
+        return f"{self.data:%d/%m/%Y} - Produto #{self.produto_id}: {self.quantidade}"
+
+
+class MetricaPagamentoDia(models.Model):
+    """Rollup diário dos pagamentos por método."""
+    
+    data = models.DateField('Data')
+    metodo = models.CharField('Método', max_length=20)
+    quantidade = models.PositiveIntegerField('Quantidade', default=0)
+    receita = models.DecimalField('Receita', max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        verbose_name = 'Métrica de Pagamento (dia)'
+        verbose_name_plural = 'Métricas de Pagamentos (dia)'
+        ordering = ['-data', 'metodo']
+        constraints = [
+            models.UniqueConstraint(fields=['data', 'metodo'], name='metrica_pagamento_dia_unica'),
+        ]
+    
+    def __str__(self):
+        return f"{self.data:%d/%m/%Y} - {self.metodo}: {self.quantidade}"
+
+
+class MetricaCadastrosDia(models.Model):
+    """Rollup diário de novos usuários cadastrados e de clientes no primeiro pedido."""
+    
+    data = models.DateField('Data', unique=True)
+    quantidade = models.PositiveIntegerField('Quantidade', default=0)
+    compradores = models.PositiveIntegerField(
+        'Novos compradores',
+        default=0,
+        help_text='Usuários cujo primeiro pedido foi feito neste dia.'
+    )
+    
+    class Meta:
+        verbose_name = 'Métrica de Cadastros (dia)'
+        verbose_name_plural = 'Métricas de Cadastros (dia)'
+        ordering = ['-data']
+    
+    def __str__(self):
+        return f"{self.data:%d/%m/%Y}: {self.quantidade} cadastro(s)"
+
+
+class MetricaDiaPendente(models.Model):
+    """Dia com alterações ainda não refletidas nos rollups diários."""
+    
+    data = models.DateField('Data', unique=True)
+    
+    class Meta:
+        verbose_name = 'Métrica pendente (dia)'
+        verbose_name_plural = 'Métricas pendentes (dia)'
+        ordering = ['data']
+    
+    def __str__(self):
+        return f"{self.data:%d/%m/%Y}"
+
+
+class MensagemOutbox(models.Model):
+    """E-mail transacional enfileirado para envio pelo worker do outbox."""
+    
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('falhou', 'Falhou'),
+    ]
+    
+    assunto = models.CharField('Assunto', max_length=255)
+    template = models.CharField('Template', max_length=100)
+    contexto = models.JSONField('Contexto', default=dict, encoder=DjangoJSONEncoder)
+    corpo_texto = models.TextField('Corpo em texto', blank=True)
+    remetente = models.CharField('Remetente', max_length=255)
+    destinatarios = models.JSONField('Destinatários', default=list)
+    status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES, default='pendente')
+    tentativas = models.PositiveIntegerField('Tentativas', default=0)
+    proximo_envio_em = models.DateTimeField(
+        'Próximo envio em',
+        default=timezone.now,
+        help_text='Quando pendente: próxima tentativa. Quando enviando: fim da reserva do worker.'
+    )
+    ultimo_erro = models.TextField('Último erro', blank=True)
+    criado_em = models.DateTimeField('Criado em', auto_now_add=True)
+    enviado_em = models.DateTimeField('Enviado em', null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Mensagem do Outbox'
+        verbose_name_plural = 'Mensagens do Outbox'
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['status', 'proximo_envio_em']),
+        ]
+    
+    def __str__(self):
+        return f"{self.assunto} -> {', '.join(self.destinatarios)} ({self.get_status_display()})"
@@ -0,0 +1,292 @@
+"""
+Outbox de e-mails transacionais.
+
+As views apenas enfileiram a mensagem (uma linha em MensagemOutbox, na mesma
+transação dos dados quando houver uma). O comando `processar_outbox` (ou,
+na Vercel, o cron que chama /tarefas/processar-outbox/) reserva lotes,
+renderiza os templates e envia tudo por uma única conexão SMTP. Sem worker
+nem cron, OUTBOX_ENVIO_APOS_COMMIT envia a fila logo após o commit. Falhas são reagendadas com backoff exponencial; depois de
+OUTBOX_MAX_TENTATIVAS a mensagem fica com status 'falhou' (dead letter)
+e pode ser reenfileirada pelo admin.
+"""
+import logging
+import random
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import models, transaction
+from django.template import TemplateDoesNotExist
+from django.utils import timezone
+
+from . import email_render
+from .models import MensagemOutbox
+
+logger = logging.getLogger(__name__)
+
+CORPO_TEXTO_PADRAO = 'Este e-mail requer um cliente que suporte HTML.'
+CHAVE_MODELO = '__modelo__'
+
+
+class ErroRenderizacao(Exception):
+    """A mensagem não pode ser montada (template ou objeto inexistente); não adianta tentar de novo."""
+
+
+def enfileirar(assunto, template, contexto, destinatarios, corpo_texto='', remetente=None):
+    """
+    Enfileira um e-mail para envio pelo worker.
+
+    Instâncias de modelos no contexto são guardadas como referência
+    (app.modelo + pk) e recarregadas na renderização.
+
+    Args:
+        assunto: Assunto do e-mail
+        template: Nome do template em templates/emails (sem extensão)
+        contexto: Dicionário com variáveis do template
+        destinatarios: E-mail ou lista de e-mails
+        corpo_texto: Versão em texto puro (opcional)
+        remetente: Remetente (padrão: DEFAULT_FROM_EMAIL)
+
+    Returns:
+        MensagemOutbox: Mensagem criada
+    """
+    mensagem = _nova_mensagem(assunto, template, contexto, destinatarios, corpo_texto, remetente)
+    mensagem.save()
+    if settings.OUTBOX_ENVIO_APOS_COMMIT:
+        transaction.on_commit(_enviar_apos_commit)
+    return mensagem
+
+
+def enfileirar_em_lote(mensagens, tamanho_lote=500):
+    """
+    Enfileira várias mensagens com INSERTs em lote (envios em massa).
+
+    Args:
+        mensagens: Iterável de dicionários com os argumentos de `enfileirar`
+        tamanho_lote: Linhas por INSERT
+
+    Returns:
+        int: Quantidade de mensagens enfileiradas
+    """
+    criadas = MensagemOutbox.objects.bulk_create(
+        (_nova_mensagem(**dados) for dados in mensagens),
+        batch_size=tamanho_lote,
+    )
+    return len(criadas)
+
+
+def reservar_lote(tamanho):
+    """
+    Reserva até `tamanho` mensagens prontas para envio.
+
+    A reserva marca as mensagens como 'enviando' até OUTBOX_RESERVA
+    segundos no futuro; se o worker morrer no meio do lote, elas voltam a
+    ficar disponíveis quando a reserva expira. Workers concorrentes pulam
+    as linhas travadas (SKIP LOCKED onde o banco suporta).
+
+    Returns:
+        list[MensagemOutbox]: Mensagens reservadas
+    """
+    agora = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            MensagemOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=('pendente', 'enviando'), proximo_envio_em__lte=agora)
+            .order_by('proximo_envio_em', 'id')
+            .values_list('id', flat=True)[:tamanho]
+        )
+        MensagemOutbox.objects.filter(id__in=ids).update(
+            status='enviando',
+            proximo_envio_em=agora + timedelta(seconds=settings.OUTBOX_RESERVA),
+        )
+    return list(MensagemOutbox.objects.filter(id__in=ids).order_by('id'))
+
+
+def renderizar(mensagem):
+    """
+    Monta o EmailMultiAlternatives de uma mensagem do outbox.
+
+    Raises:
+        ErroRenderizacao: Se o template ou algum objeto do contexto não existir
+    """
+    try:
+        html = email_render.render(f'emails/{mensagem.template}.html', _restaurar(mensagem.contexto))
+    except (TemplateDoesNotExist, ObjectDoesNotExist, LookupError) as e:
+        raise ErroRenderizacao(str(e)) from e
+
+    email = EmailMultiAlternatives(
+        subject=mensagem.assunto,
+        body=mensagem.corpo_texto or CORPO_TEXTO_PADRAO,
+        from_email=mensagem.remetente,
+        to=mensagem.destinatarios,
+    )
+    email.attach_alternative(html, 'text/html')
+    return email
+
+
+def processar_lote(tamanho=50):
+    """
+    Envia um lote do outbox por uma única conexão SMTP.
+
+    Args:
+        tamanho: Máximo de mensagens no lote
+
+    Returns:
+        dict: Quantidades de mensagens enviadas, reagendadas e descartadas
+    """
+    resultado = {'enviadas': 0, 'reagendadas': 0, 'descartadas': 0}
+    mensagens = reservar_lote(tamanho)
+    if not mensagens:
+        return resultado
+
+    conexao = get_connection(fail_silently=False)
+    conectada = _abrir(conexao)
+    try:
+        for mensagem in mensagens:
+            try:
+                email = renderizar(mensagem)
+            except ErroRenderizacao as e:
+                mensagem.tentativas += 1
+                _descartar(mensagem, e)
+                resultado['descartadas'] += 1
+                continue
+
+            try:
+                if not conectada:
+                    conexao.open()
+                    conectada = True
+                email.connection = conexao
+                email.send()
+            except Exception as e:
+                resultado['reagendadas' if _reagendar(mensagem, e) else 'descartadas'] += 1
+                # A conexão pode ter caído: fecha e reabre na próxima mensagem
+                conexao.close()
+                conectada = False
+            else:
+                _marcar_enviada(mensagem)
+                resultado['enviadas'] += 1
+    finally:
+        conexao.close()
+    return resultado
+
+
+def processar_fila(tamanho_lote=50, limite_segundos=None):
+    """
+    Envia lotes até esvaziar a fila ou esgotar o tempo (execuções agendadas).
+
+    Args:
+        tamanho_lote: Máximo de mensagens por lote
+        limite_segundos: Não começa um novo lote depois desse tempo (None: sem limite)
+
+    Returns:
+        dict: Quantidades de mensagens enviadas, reagendadas e descartadas
+    """
+    totais = {'enviadas': 0, 'reagendadas': 0, 'descartadas': 0}
+    inicio = time.monotonic()
+    while limite_segundos is None or time.monotonic() - inicio < limite_segundos:
+        resultado = processar_lote(tamanho_lote)
+        for chave, valor in resultado.items():
+            totais[chave] += valor
+        if not any(resultado.values()):
+            break
+    return totais
+
+
+def atraso_nova_tentativa(tentativas):
+    """Backoff exponencial com jitter de até 10%, limitado a OUTBOX_BACKOFF_MAXIMO."""
+    atraso = min(settings.OUTBOX_BACKOFF_BASE * 2 ** (tentativas - 1), settings.OUTBOX_BACKOFF_MAXIMO)
+    return timedelta(seconds=atraso * (1 + random.uniform(0, 0.1)))
+
+
+def reenfileirar(queryset):
+    """Devolve mensagens (ex.: dead letters) à fila, zerando as tentativas."""
+    return queryset.exclude(status='enviado').update(
+        status='pendente', tentativas=0, proximo_envio_em=timezone.now(), ultimo_erro=''
+    )
+
+
+def _enviar_apos_commit():
+    try:
+        processar_lote()
+    except Exception:
+        # A mensagem continua na fila para a próxima tentativa
+        logger.exception('Falha ao enviar o outbox após o commit')
+
+
+def _abrir(conexao):
+    try:
+        conexao.open()
+    except Exception as e:
+        # Cada mensagem tenta reabrir e registra a própria falha
+        logger.warning('Falha ao conectar ao servidor de e-mail: %s', e)
+        return False
+    return True
+
+
+def _marcar_enviada(mensagem):
+    mensagem.status = 'enviado'
+    mensagem.enviado_em = timezone.now()
+    mensagem.tentativas += 1
+    mensagem.ultimo_erro = ''
+    mensagem.save(update_fields=['status', 'enviado_em', 'tentativas', 'ultimo_erro'])
+    logger.info(f'E-mail enviado com sucesso: {mensagem.assunto} para {mensagem.destinatarios}')
+
+
+def _reagendar(mensagem, erro):
+    """Agenda nova tentativa ou, esgotadas as tentativas, descarta. Retorna True se reagendou."""
+    mensagem.tentativas += 1
+    if mensagem.tentativas >= settings.OUTBOX_MAX_TENTATIVAS:
+        _descartar(mensagem, erro)
+        return False
+
+    mensagem.status = 'pendente'
+    mensagem.proximo_envio_em = timezone.now() + atraso_nova_tentativa(mensagem.tentativas)
+    mensagem.ultimo_erro = repr(erro)
+    mensagem.save(update_fields=['status', 'tentativas', 'proximo_envio_em', 'ultimo_erro'])
+    logger.warning(
+        f'Erro ao enviar e-mail #{mensagem.id} (tentativa {mensagem.tentativas}): {erro}. '
+        f'Nova tentativa em {mensagem.proximo_envio_em:%H:%M:%S}.'
+    )
+    return True
+
+
+def _descartar(mensagem, erro):
+    mensagem.status = 'falhou'
+    mensagem.ultimo_erro = repr(erro)
+    mensagem.save(update_fields=['status', 'tentativas', 'ultimo_erro'])
+    logger.error(f'E-mail #{mensagem.id} descartado: {mensagem.assunto} para {mensagem.destinatarios}. Erro: {erro}')
+
+
+def _nova_mensagem(assunto, template, contexto, destinatarios, corpo_texto='', remetente=None):
+    return MensagemOutbox(
+        assunto=assunto,
+        template=template,
+        contexto=_serializar(contexto),
+        corpo_texto=corpo_texto,
+        remetente=remetente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=destinatarios if isinstance(destinatarios, list) else [destinatarios],
+    )
+
+
+def _serializar(valor):
+    if isinstance(valor, models.Model):
+        return {CHAVE_MODELO: valor._meta.label_lower, 'pk': valor.pk}
+    if isinstance(valor, dict):
+        return {chave: _serializar(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_serializar(item) for item in valor]
+    return valor
+
+
+def _restaurar(valor):
+    if isinstance(valor, dict):
+        if CHAVE_MODELO in valor:
+            modelo = apps.get_model(valor[CHAVE_MODELO])
+            return modelo._default_manager.get(pk=valor['pk'])
+        return {chave: _restaurar(item) for chave, item in valor.items()}
+    if isinstance(valor, list):
+        return [_restaurar(item) for item in valor]
+    return valor
@@ -0,0 +1,296 @@
+"""
+Paginação da API.
+
+PaginacaoAdaptavel mantém a paginação por número de página como padrão e
+permite ao cliente escolher:
+
+- ?paginacao=cursor (ou ?cursor=...): keyset pela ordenação pedida em
+  `ordenar`, com o id como desempate; sem OFFSET e sem COUNT;
+- ?contar=false: paginação por página sem o COUNT(*) do total.
+
+percorrer_keyset aplica o mesmo keyset para varrer tabelas inteiras em
+lotes (exportações), sem OFFSET e sem carregar o queryset na memória.
+"""
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+VALORES_FALSOS = ('0', 'false', 'nao', 'não')
+
+
+class PaginacaoPorPagina(PageNumberPagination):
+    """PageNumberPagination que dispensa o COUNT com ?contar=false."""
+
+    contar_query_param = 'contar'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.contar_query_param, '').lower() not in VALORES_FALSOS:
+            self.sem_contagem = False
+            return super().paginate_queryset(queryset, request, view)
+
+        self.sem_contagem = True
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.numero = max(int(request.query_params.get(self.page_query_param, 1)), 1)
+        except ValueError:
+            self.numero = 1
+
+        inicio = (self.numero - 1) * page_size
+        # Um registro a mais indica se existe próxima página
+        itens = list(queryset[inicio:inicio + page_size + 1])
+        self.tem_proxima = len(itens) > page_size
+        return itens[:page_size]
+
+    def get_paginated_response(self, data):
+        if not self.sem_contagem:
+            return super().get_paginated_response(data)
+
+        url = self.request.build_absolute_uri()
+        proxima = replace_query_param(url, self.page_query_param, self.numero + 1) if self.tem_proxima else None
+        if self.numero <= 1:
+            anterior = None
+        elif self.numero == 2:
+            anterior = remove_query_param(url, self.page_query_param)
+        else:
+            anterior = replace_query_param(url, self.page_query_param, self.numero - 1)
+
+        return Response(OrderedDict([
+            ('next', proxima),
+            ('previous', anterior),
+            ('results', data),
+        ]))
+
+
+class PaginacaoCursor(BasePagination):
+    """
+    Paginação keyset sobre a ordenação escolhida em `ordenar`.
+
+    O cursor guarda os valores de todos os campos da ordenação do último (ou
+    primeiro) item da página, e a próxima página é filtrada pela comparação
+    composta desses valores, sem OFFSET, mesmo com muitos valores repetidos.
+
+    A view declara `ordenacao_cursor_padrao` e, opcionalmente,
+    `ordenacoes_cursor` (valor de `ordenar` -> tupla de campos). Toda tupla
+    termina em um desempate único (id).
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordenar_query_param = 'ordenar'
+    mensagem_cursor_invalido = 'Cursor inválido.'
+
+    def get_ordering(self, request, view):
+        ordenacoes = getattr(view, 'ordenacoes_cursor', {})
+        ordenar = request.query_params.get(self.ordenar_query_param)
+        return tuple(ordenacoes.get(ordenar) or view.ordenacao_cursor_padrao)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(request, view)
+        posicao, self.reverso = self.decodificar_cursor(request)
+        if posicao is not None:
+            posicao = self.converter_posicao(queryset.model, posicao)
+
+        # Páginas anteriores são lidas na ordem inversa e depois desinvertidas
+        ordem = [_inverter(campo) for campo in self.ordering] if self.reverso else list(self.ordering)
+        queryset = queryset.order_by(*ordem)
+        if posicao is not None:
+            queryset = queryset.filter(_depois_de(ordem, posicao))
+
+        itens = list(queryset[:self.page_size + 1])
+        tem_mais = len(itens) > self.page_size
+        itens = itens[:self.page_size]
+
+        if self.reverso:
+            itens.reverse()
+            self.tem_anterior, self.tem_proxima = tem_mais, posicao is not None
+        else:
+            self.tem_anterior, self.tem_proxima = posicao is not None, tem_mais
+        self.itens = itens
+        return itens
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not (self.tem_proxima and self.itens):
+            return None
+        return self._link(self.itens[-1], reverso=False)
+
+    def get_previous_link(self):
+        if not (self.tem_anterior and self.itens):
+            return None
+        return self._link(self.itens[0], reverso=True)
+
+    def _link(self, item, reverso):
+        valores = [_serializar(getattr(item, campo.lstrip('-'))) for campo in self.ordering]
+        bruto = json.dumps({'v': valores, 'r': reverso}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(bruto.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decodificar_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            dados = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            valores, reverso = dados['v'], bool(dados['r'])
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.mensagem_cursor_invalido)
+        if not isinstance(valores, list) or len(valores) != len(self.ordering):
+            raise NotFound(self.mensagem_cursor_invalido)
+        return valores, reverso
+
+    def converter_posicao(self, modelo, valores):
+        """
+        Converte os valores do cursor com o to_python de cada campo da ordenação.
+
+        Um cursor bem formado pode trazer valores que não servem ao campo (uma
+        data inválida, texto no lugar do preço); sem a conversão, o erro só
+        apareceria no filter() e a API responderia 500.
+
+        Raises:
+            NotFound: Algum valor não é válido para o seu campo
+        """
+        convertidos = []
+        for campo, valor in zip(self.ordering, valores):
+            if valor is None:
+                raise NotFound(self.mensagem_cursor_invalido)
+            try:
+                convertidos.append(_campo(modelo, campo.lstrip('-')).to_python(valor))
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.mensagem_cursor_invalido)
+        return convertidos
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+def _campo(modelo, caminho):
+    """Campo do modelo para um caminho de lookup (ex.: 'produto__nome')."""
+    *relacoes, nome = caminho.split('__')
+    for relacao in relacoes:
+        modelo = modelo._meta.get_field(relacao).related_model
+    try:
+        return modelo._meta.get_field(nome)
+    except FieldDoesNotExist:
+        # pk e outros aliases
+        if nome == 'pk':
+            return modelo._meta.pk
+        raise
+
+
+def _inverter(campo):
+    return campo[1:] if campo.startswith('-') else f'-{campo}'
+
+
+def _serializar(valor):
+    # isoformat preserva os microssegundos, necessários para comparar datas
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def percorrer_keyset(queryset, ordem, tamanho_lote=2000, chunk_size=500):
+    """
+    Itera um queryset inteiro em lotes keyset, em memória constante.
+
+    Cada lote é uma consulta curta (`WHERE (ordem) > último ORDER BY ordem
+    LIMIT tamanho_lote`) lida com `.iterator()`, então nenhuma transação ou
+    cursor fica aberto durante toda a exportação.
+
+    Args:
+        queryset: QuerySet de modelos ou de `.values()`
+        ordem: Campos da ordenação; o último deve ser único (id)
+        tamanho_lote: Registros por consulta
+        chunk_size: Registros buscados por vez dentro de cada lote
+
+    Yields:
+        Itens do queryset na ordem pedida
+    """
+    ordem = list(ordem)
+    posicao = None
+    while True:
+        lote = queryset.order_by(*ordem)
+        if posicao is not None:
+            lote = lote.filter(_depois_de(ordem, posicao))
+
+        lidos = 0
+        ultimo = None
+        for ultimo in lote[:tamanho_lote].iterator(chunk_size=chunk_size):
+            lidos += 1
+            yield ultimo
+
+        if lidos < tamanho_lote:
+            return
+        posicao = [_valor_campo(ultimo, campo.lstrip('-')) for campo in ordem]
+
+
+def _valor_campo(item, campo):
+    return item[campo] if isinstance(item, dict) else getattr(item, campo)
+
+
+def _depois_de(ordem, valores):
+    """(a, b, c) > (va, vb, vc) respeitando a direção de cada campo."""
+    condicao = Q()
+    for i, campo in enumerate(ordem):
+        nome = campo.lstrip('-')
+        operador = 'lt' if campo.startswith('-') else 'gt'
+        anteriores = {c.lstrip('-'): v for c, v in zip(ordem[:i], valores[:i])}
+        condicao |= Q(**anteriores, **{f'{nome}__{operador}': valores[i]})
+    return condicao
+
+
+class PaginacaoAdaptavel(BasePagination):
+    """Escolhe, por requisição, entre paginação por página e por cursor."""
+
+    def __init__(self):
+        self.por_pagina = PaginacaoPorPagina()
+        self.por_cursor = PaginacaoCursor()
+        self.ativa = self.por_pagina
+
+    def usar_cursor(self, request, view):
+        if getattr(view, 'ordenacao_cursor_padrao', None) is None:
+            return False
+        if hasattr(view, 'permite_cursor') and not view.permite_cursor():
+            return False
+        params = request.query_params
+        return self.por_cursor.cursor_query_param in params or params.get('paginacao') == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ativa = self.por_cursor if self.usar_cursor(request, view) else self.por_pagina
+        return self.ativa.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.ativa.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.por_pagina.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return self.por_pagina.get_schema_operation_parameters(view)
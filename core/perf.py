@@ -0,0 +1,384 @@
+"""
+Instrumentação de desempenho por requisição.
+
+O MedicaoDesempenhoMiddleware mede, para cada requisição:
+
+- tempo total (wall time);
+- quantidade e tempo das consultas SQL (connection.execute_wrapper);
+- acertos e falhas de cache registrados pelo código da aplicação
+  (registrar_cache, usado pelo cache do catálogo e pelos contadores);
+- tamanho da resposta.
+
+O resultado vai no cabeçalho Server-Timing, em uma linha JSON no logger
+'core.perf' e em um buffer circular em memória (por processo) que alimenta
+o painel /admin/perf/ com p50/p95/p99 por nome de URL. Respostas em
+streaming (exportações CSV) são medidas até o corpo ser consumido ou
+fechado, não têm Server-Timing e saem no log com "streaming": true.
+
+O Server-Timing expõe tempo de banco e número de consultas: só é enviado
+com DEBUG, para usuários staff ou com PERF_SERVER_TIMING_PUBLICO.
+
+Com PERF_CONSULTA_LENTA_MS > 0, consultas acima do limite também são
+registradas (log de consultas lentas) com a view e a linha do projeto que
+as disparou. Consultas com o mesmo formato (mesmo SQL a menos de literais
+e tamanho de listas IN) compartilham uma impressão digital e são agregadas
+para o painel. No PostgreSQL, a primeira ocorrência lenta de cada formato
+guarda o EXPLAIN (ANALYZE, BUFFERS).
+"""
+import contextlib
+import contextvars
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_medicao_atual = contextvars.ContextVar('medicao_desempenho', default=None)
+
+RAIZ_PROJETO = str(Path(settings.BASE_DIR).resolve())
+ESTE_ARQUIVO = str(Path(__file__).resolve())
+
+
+class Medicao:
+    """Contadores de uma requisição."""
+
+    __slots__ = (
+        'inicio', 'consultas', 'tempo_banco', 'cache_hits', 'cache_misses',
+        'request', 'limite_lenta', 'explicando',
+    )
+
+    def __init__(self, request=None):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tempo_banco = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.request = request
+        self.limite_lenta = getattr(settings, 'PERF_CONSULTA_LENTA_MS', 0) / 1000
+        self.explicando = False
+
+    def cronometrar_consulta(self, execute, sql, params, many, context):
+        """execute_wrapper: conta a consulta, soma seu tempo e registra as lentas."""
+        if self.explicando:
+            # O próprio EXPLAIN da consulta lenta não entra nas métricas
+            return execute(sql, params, many, context)
+        inicio = time.perf_counter()
+        resultado = execute(sql, params, many, context)
+        duracao = time.perf_counter() - inicio
+        self.consultas += 1
+        self.tempo_banco += duracao
+        if self.limite_lenta and duracao >= self.limite_lenta:
+            self._registrar_lenta(sql, params, many, context['connection'], duracao)
+        return resultado
+
+    def _registrar_lenta(self, sql, params, many, conexao, duracao):
+        explain = None
+        impressao = impressao_digital(sql)
+        if conexao.vendor == 'postgresql' and not many and not consultas_lentas.tem_plano(impressao):
+            explain = self._explicar(conexao, sql, params)
+        consultas_lentas.registrar(
+            impressao, sql, duracao * 1000, _nome_da_rota(self.request), _origem(), explain,
+        )
+
+    def _explicar(self, conexao, sql, params):
+        if not sql.lstrip()[:6].upper() == 'SELECT':
+            # ANALYZE executa a instrução de novo: só para leituras
+            return None
+        self.explicando = True
+        try:
+            # Dentro de um atomic() (checkout, mudanças de status) a falha do
+            # EXPLAIN abortaria a transação da requisição no PostgreSQL: o
+            # savepoint desfaz só o EXPLAIN
+            with transaction.atomic(using=conexao.alias), conexao.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+                return '\n'.join(linha[0] for linha in cursor.fetchall())
+        except DatabaseError as e:
+            return f'EXPLAIN indisponível: {e}'
+        finally:
+            self.explicando = False
+
+
+def registrar_cache(acertou):
+    """
+    Registra um acerto ou falha de cache na requisição atual (se houver).
+
+    Args:
+        acertou: True para hit, False para miss
+    """
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        return
+    if acertou:
+        medicao.cache_hits += 1
+    else:
+        medicao.cache_misses += 1
+
+
+class JanelaDesempenho:
+    """Buffer circular (limitado) das últimas requisições medidas no processo."""
+
+    def __init__(self, tamanho):
+        self._amostras = deque(maxlen=tamanho)
+        self._lock = threading.Lock()
+
+    def registrar(self, nome, duracao_ms, consultas, tempo_banco_ms):
+        with self._lock:
+            self._amostras.append((time.time(), nome, duracao_ms, consultas, tempo_banco_ms))
+
+    def limpar(self):
+        with self._lock:
+            self._amostras.clear()
+
+    def resumo(self, segundos=None):
+        """
+        Percentis por nome de URL nas amostras dos últimos `segundos`.
+
+        Returns:
+            list[dict]: Uma linha por URL, da mais lenta (p95) para a mais rápida
+        """
+        limite = time.time() - segundos if segundos else 0
+        with self._lock:
+            amostras = [a for a in self._amostras if a[0] >= limite]
+
+        por_nome = {}
+        for _, nome, duracao, consultas, tempo_banco in amostras:
+            por_nome.setdefault(nome, []).append((duracao, consultas, tempo_banco))
+
+        linhas = []
+        for nome, valores in por_nome.items():
+            duracoes = sorted(v[0] for v in valores)
+            linhas.append({
+                'nome': nome,
+                'requisicoes': len(valores),
+                'p50': percentil(duracoes, 50),
+                'p95': percentil(duracoes, 95),
+                'p99': percentil(duracoes, 99),
+                'maximo': duracoes[-1],
+                'consultas_media': sum(v[1] for v in valores) / len(valores),
+                'banco_media': sum(v[2] for v in valores) / len(valores),
+            })
+        return sorted(linhas, key=lambda linha: linha['p95'], reverse=True)
+
+
+class RegistroConsultasLentas:
+    """Consultas lentas agregadas por impressão digital (limitado, por processo)."""
+
+    def __init__(self, maximo):
+        self._maximo = maximo
+        self._formatos = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, impressao, sql, duracao_ms, rota, origem, explain=None):
+        with self._lock:
+            formato = self._formatos.get(impressao)
+            if formato is None:
+                if len(self._formatos) >= self._maximo:
+                    # Descarta o formato de menor tempo acumulado
+                    menor = min(self._formatos, key=lambda chave: self._formatos[chave]['total_ms'])
+                    del self._formatos[menor]
+                formato = self._formatos[impressao] = {
+                    'impressao': impressao,
+                    'sql': normalizar_sql(sql),
+                    'ocorrencias': 0,
+                    'total_ms': 0.0,
+                    'maximo_ms': 0.0,
+                    'rotas': set(),
+                    'origens': set(),
+                    'explain': None,
+                }
+            formato['ocorrencias'] += 1
+            formato['total_ms'] += duracao_ms
+            formato['maximo_ms'] = max(formato['maximo_ms'], duracao_ms)
+            if rota:
+                formato['rotas'].add(rota)
+            if origem:
+                formato['origens'].add(origem)
+            if explain and formato['explain'] is None:
+                formato['explain'] = explain
+
+        logger.warning('consulta_lenta', extra={'metricas': {
+            'impressao': impressao,
+            'duracao_ms': round(duracao_ms, 2),
+            'rota': rota,
+            'origem': origem,
+            'sql': sql,
+            'explain': explain,
+        }})
+
+    def tem_plano(self, impressao):
+        with self._lock:
+            formato = self._formatos.get(impressao)
+            return formato is not None and formato['explain'] is not None
+
+    def limpar(self):
+        with self._lock:
+            self._formatos.clear()
+
+    def piores(self, quantidade=20):
+        """Formatos com maior tempo acumulado."""
+        with self._lock:
+            formatos = [
+                dict(f, rotas=sorted(f['rotas']), origens=sorted(f['origens']),
+                     media_ms=f['total_ms'] / f['ocorrencias'])
+                for f in self._formatos.values()
+            ]
+        return sorted(formatos, key=lambda f: f['total_ms'], reverse=True)[:quantidade]
+
+
+def normalizar_sql(sql):
+    """SQL sem literais, com listas IN/VALUES colapsadas e espaços uniformes."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = re.sub(r'%s|\?', '?', sql)
+    sql = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', sql)
+    sql = re.sub(r'(\(\.\.\.\)\s*,\s*)+\(\.\.\.\)', '(...)', sql)
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def impressao_digital(sql):
+    """Identificador curto do formato da consulta (ver normalizar_sql)."""
+    return hashlib.sha1(normalizar_sql(sql).encode()).hexdigest()[:12]
+
+
+def _origem():
+    """Linha mais interna do código do projeto (fora deste módulo) na pilha atual."""
+    for quadro in reversed(traceback.extract_stack()):
+        arquivo = str(Path(quadro.filename).resolve())
+        if (
+            arquivo.startswith(RAIZ_PROJETO)
+            and arquivo != ESTE_ARQUIVO
+            and 'site-packages' not in arquivo
+        ):
+            return f'{Path(arquivo).relative_to(RAIZ_PROJETO)}:{quadro.lineno} em {quadro.name}'
+    return None
+
+
+def percentil(ordenados, p):
+    """Percentil pelo método nearest-rank de uma lista já ordenada."""
+    if not ordenados:
+        return 0
+    posicao = max(math.ceil(p / 100 * len(ordenados)), 1)
+    return ordenados[posicao - 1]
+
+
+janela = JanelaDesempenho(getattr(settings, 'PERF_JANELA_MAXIMA', 5000))
+consultas_lentas = RegistroConsultasLentas(getattr(settings, 'PERF_CONSULTAS_LENTAS_FORMATOS', 200))
+
+
+class MedicaoDesempenhoMiddleware:
+    """Mede cada requisição e publica o resultado (Server-Timing, log JSON, janela)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicao = Medicao(request)
+        token = _medicao_atual.set(medicao)
+        try:
+            with self._cronometrar(medicao):
+                response = self.get_response(request)
+        finally:
+            _medicao_atual.reset(token)
+
+        if not response.streaming:
+            duracao_ms, tempo_banco_ms = self._tempos(medicao)
+            if self._expor_server_timing(request):
+                response['Server-Timing'] = ', '.join([
+                    f'app;dur={duracao_ms - tempo_banco_ms:.1f}',
+                    f'db;dur={tempo_banco_ms:.1f};desc="{medicao.consultas} consultas"',
+                    f'cache;desc="hits={medicao.cache_hits} misses={medicao.cache_misses}"',
+                    f'total;dur={duracao_ms:.1f}',
+                ])
+            self._publicar(request, medicao, response, len(response.content))
+        elif response.is_async:
+            # Consumido em outra tarefa: sem como medir as consultas do streaming
+            self._publicar(request, medicao, response, None, na_janela=False)
+        else:
+            # As exportações CSV fazem as consultas enquanto o corpo é lido:
+            # a medição só termina quando o streaming acaba (ou é fechado)
+            response.streaming_content = self._medir_streaming(
+                request, medicao, response, response.streaming_content
+            )
+        return response
+
+    @staticmethod
+    def _expor_server_timing(request):
+        if settings.DEBUG or getattr(settings, 'PERF_SERVER_TIMING_PUBLICO', False):
+            return True
+        usuario = getattr(request, 'user', None)
+        return bool(usuario is not None and usuario.is_staff)
+
+    @staticmethod
+    def _cronometrar(medicao):
+        pilha = contextlib.ExitStack()
+        for conexao in connections.all():
+            pilha.enter_context(conexao.execute_wrapper(medicao.cronometrar_consulta))
+        return pilha
+
+    @staticmethod
+    def _tempos(medicao):
+        return (time.perf_counter() - medicao.inicio) * 1000, medicao.tempo_banco * 1000
+
+    def _medir_streaming(self, request, medicao, response, conteudo):
+        tamanho = 0
+        try:
+            with self._cronometrar(medicao):
+                for pedaco in conteudo:
+                    tamanho += len(pedaco)
+                    yield pedaco
+        finally:
+            self._publicar(request, medicao, response, tamanho)
+
+    def _publicar(self, request, medicao, response, tamanho, na_janela=True):
+        duracao_ms, tempo_banco_ms = self._tempos(medicao)
+        nome = _nome_da_rota(request)
+        if nome is not None and na_janela:
+            janela.registrar(nome, duracao_ms, medicao.consultas, tempo_banco_ms)
+        logger.info('requisicao', extra={'metricas': {
+            'metodo': request.method,
+            'caminho': request.path,
+            'rota': nome,
+            'status': response.status_code,
+            'duracao_ms': round(duracao_ms, 2),
+            'consultas': medicao.consultas,
+            'banco_ms': round(tempo_banco_ms, 2),
+            'cache_hits': medicao.cache_hits,
+            'cache_misses': medicao.cache_misses,
+            'bytes': tamanho,
+            'streaming': response.streaming,
+        }})
+
+
+def _nome_da_rota(request):
+    if request is None:
+        return None
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return match.view_name
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro, com as métricas passadas em extra={'metricas': ...}."""
+
+    def format(self, record):
+        linha = {
+            'momento': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensagem': record.getMessage(),
+        }
+        linha.update(getattr(record, 'metricas', {}))
+        if record.exc_info:
+            linha['excecao'] = self.formatException(record.exc_info)
+        return json.dumps(linha, ensure_ascii=False, default=str)
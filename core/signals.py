@@ -0,0 +1,108 @@
+"""Signals para o app core."""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Min
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from pedidos.models import CarrinhoItem, Pedido, ItemPedido, Pagamento
+from pedidos.services import contadores
+from produtos.models import Produto, Categoria, Avaliacao
+from usuarios.models import ListaDesejo
+from . import cache_http
+from .cache import invalidar_catalogo
+from .metricas import agendar_recalculo
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Produto)
+@receiver(post_delete, sender=Produto)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_save, sender=Avaliacao)
+@receiver(post_delete, sender=Avaliacao)
+def invalidar_cache_catalogo(sender, **kwargs):
+    """Invalida o cache do catálogo quando produtos, categorias ou notas mudam."""
+    # Só após o commit, para que nenhum worker recalcule com dados antigos
+    transaction.on_commit(invalidar_catalogo)
+
+
+@receiver(post_save, sender=Produto)
+@receiver(post_delete, sender=Produto)
+def purgar_cache_http_produto(sender, instance, **kwargs):
+    """Purga da CDN o produto, sua categoria e as listagens."""
+    chaves = [cache_http.chave_produto(instance.pk), cache_http.CHAVE_LISTAGENS]
+    if instance.categoria_id:
+        chaves.append(cache_http.chave_categoria(instance.categoria_id))
+    transaction.on_commit(lambda: cache_http.purgar(chaves))
+
+
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def purgar_cache_http_categoria(sender, instance, **kwargs):
+    """Purga da CDN a categoria, a lista de categorias e as listagens."""
+    chaves = [cache_http.chave_categoria(instance.pk), cache_http.CHAVE_CATEGORIAS, cache_http.CHAVE_LISTAGENS]
+    transaction.on_commit(lambda: cache_http.purgar(chaves))
+
+
+@receiver(post_save, sender=Avaliacao)
+@receiver(post_delete, sender=Avaliacao)
+def purgar_cache_http_avaliacao(sender, instance, **kwargs):
+    """Purga da CDN o produto avaliado (nota média e lista de avaliações)."""
+    chaves = [cache_http.chave_produto(instance.produto_id)]
+    transaction.on_commit(lambda: cache_http.purgar(chaves))
+
+
+@receiver(post_save, sender=CarrinhoItem)
+@receiver(post_delete, sender=CarrinhoItem)
+def invalidar_contador_carrinho(sender, instance, **kwargs):
+    """Descarta o badge do carrinho em mudanças fora do CarrinhoService (admin, cascata, limpar_sessoes)."""
+    usuario_id, session_key = instance.usuario_id, instance.session_key
+    transaction.on_commit(lambda: contadores.invalidar_carrinho(usuario_id=usuario_id, session_key=session_key))
+
+
+@receiver(post_save, sender=ListaDesejo)
+@receiver(post_delete, sender=ListaDesejo)
+def invalidar_contador_lista_desejos(sender, instance, **kwargs):
+    """Descarta o badge da lista de desejos em mudanças fora das views (admin, cascata)."""
+    usuario_id = instance.usuario_id
+    transaction.on_commit(lambda: contadores.invalidar_lista_desejos(usuario_id=usuario_id))
+
+
+@receiver(post_save, sender=Pedido)
+@receiver(post_delete, sender=Pedido)
+@receiver(post_save, sender=Pagamento)
+@receiver(post_delete, sender=Pagamento)
+def atualizar_metricas_pedido(sender, instance, **kwargs):
+    """Recalcula as métricas do dia do pedido ou pagamento alterado."""
+    agendar_recalculo(timezone.localdate(instance.criado_em))
+
+
+@receiver(post_delete, sender=Pedido)
+def atualizar_metricas_primeiro_pedido(sender, instance, **kwargs):
+    """Recalcula o dia do pedido mais antigo que restou ao cliente (novos compradores)."""
+    primeiro = Pedido.objects.filter(usuario_id=instance.usuario_id).aggregate(m=Min('criado_em'))['m']
+    if primeiro:
+        agendar_recalculo(timezone.localdate(primeiro))
+
+
+@receiver(post_save, sender=ItemPedido)
+@receiver(post_delete, sender=ItemPedido)
+def atualizar_metricas_item(sender, instance, **kwargs):
+    """Recalcula as métricas do dia do pedido ao qual o item pertence."""
+    try:
+        criado_em = instance.pedido.criado_em
+    except Pedido.DoesNotExist:
+        # Removido em cascata junto com o pedido, que já agendou o recálculo
+        return
+    agendar_recalculo(timezone.localdate(criado_em))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def atualizar_metricas_cadastro(sender, instance, created=True, **kwargs):
+    """Recalcula os cadastros do dia quando um usuário é criado ou removido."""
+    if created:
+        agendar_recalculo(timezone.localdate(instance.date_joined))
@@ -12,6 +12,9 @@ urlpatterns = [
     path('lgpd/revogar/<int:consentimento_id>/', views.revogar_consentimento, name='revogar_consentimento'),
     path('politica-privacidade/', views.politica_privacidade, name='politica_privacidade'),
     
+    # Tarefas agendadas (cron da Vercel)
+    path('tarefas/processar-outbox/', views.tarefa_processar_outbox, name='tarefa_processar_outbox'),
+    
     # Admin Dashboard e Relatórios
     path('admin-dashboard/', admin_views.dashboard_admin, name='dashboard_admin'),
     path('admin-relatorios/vendas/', admin_views.relatorio_vendas, name='relatorio_vendas'),
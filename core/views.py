@@ -1,11 +1,15 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.conf import settings
 from django.http import HttpResponse, JsonResponse
+from django.views.decorators.cache import never_cache
 from django.utils import timezone
 from produtos.models import Produto
 from pedidos.models import Pedido
+from . import cache as catalogo_cache, outbox
 from .models import ConsentimentoLGPD, SolicitacaoDados, PoliticaPrivacidade
+import hmac
 import json
 import logging
 
@@ -14,17 +18,21 @@ logger = logging.getLogger(__name__)
 
 def home(request):
     """View para a página inicial."""
-    # Produtos em destaque
-    produtos_destaque = Produto.objects.filter(
-        ativo=True, 
-        destaque=True
-    ).select_related('categoria')[:6]
-    
-    # Produtos em promoção
-    produtos_promocao = Produto.objects.filter(
-        ativo=True,
-        preco_promocional__isnull=False
-    ).select_related('categoria')[:6]
+    def vitrines():
+        # Produtos em destaque
+        produtos_destaque = Produto.objects.filter(
+            ativo=True, 
+            destaque=True
+        ).select_related('categoria')[:6]
+        
+        # Produtos em promoção
+        produtos_promocao = Produto.objects.filter(
+            ativo=True,
+            preco_promocional__isnull=False
+        ).select_related('categoria')[:6]
+        return list(produtos_destaque), list(produtos_promocao)
+
+    produtos_destaque, produtos_promocao = catalogo_cache.obter_ou_calcular('home', vitrines)
     
     context = {
         'produtos_destaque': produtos_destaque,
@@ -194,3 +202,30 @@ def politica_privacidade(request):
         'politica': politica,
     }
     return render(request, 'core/politica_privacidade.html', context)
+
+
+def _chamada_agendada(request):
+    """True se a requisição traz o CRON_SECRET (cabeçalho enviado pelo cron da Vercel)."""
+    if not settings.CRON_SECRET:
+        return False
+    esperado = f'Bearer {settings.CRON_SECRET}'
+    return hmac.compare_digest(request.headers.get('Authorization', ''), esperado)
+
+
+@never_cache
+def tarefa_processar_outbox(request):
+    """
+    Envia os e-mails pendentes do outbox (cron da Vercel, ver vercel.json).
+
+    Protegida pelo CRON_SECRET; processa lotes até esvaziar a fila ou
+    esgotar OUTBOX_TEMPO_TAREFA segundos. O que sobrar fica para a próxima
+    execução.
+    """
+    if not _chamada_agendada(request):
+        return JsonResponse({'erro': 'Não autorizado.'}, status=401)
+    resultado = outbox.processar_fila(limite_segundos=settings.OUTBOX_TEMPO_TAREFA)
+    logger.info(
+        f'Outbox agendado: {resultado["enviadas"]} enviada(s), '
+        f'{resultado["reagendadas"]} reagendada(s), {resultado["descartadas"]} descartada(s)'
+    )
+    return JsonResponse(resultado)
@@ -44,7 +44,7 @@ export default function ProdutoCard({ produto }: { produto: Produto }) {
       <div className="relative aspect-square bg-neutral-50 overflow-hidden">
         {produto.imagem_url ? (
           <Image
-            src={produto.imagem_url}
+            src={produto.imagens?.card.webp ?? produto.imagem_url}
             alt={produto.nome}
             fill
             className="object-cover group-hover:scale-105 transition-transform duration-500"
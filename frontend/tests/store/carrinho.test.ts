@@ -20,7 +20,7 @@ const CARRINHO_MOCK: Carrinho = {
         id: 1, nome: 'Dipirona', slug: 'dipirona', preco: '10.00', preco_promocional: null,
         preco_final: '10.00', tem_promocao: false, disponivel: true, estoque: 5,
         destaque: false, categoria: { id: 1, nome: 'Medicamentos', slug: 'medicamentos', descricao: '' },
-        imagem_url: null, media_avaliacoes: 0, total_avaliacoes: 0,
+        imagem_url: null, imagens: null, imagem_placeholder: '', media_avaliacoes: 0, total_avaliacoes: 0,
       },
       quantidade: 2,
       subtotal: '20.00',
@@ -5,6 +5,13 @@ export interface Categoria {
   descricao: string
 }
 
+export interface ImagemVariante {
+  jpeg: string
+  webp: string
+  largura: number | null
+  altura: number | null
+}
+
 export interface Produto {
   id: number
   nome: string
@@ -18,6 +25,8 @@ export interface Produto {
   destaque: boolean
   categoria: Categoria
   imagem_url: string | null
+  imagens: { card: ImagemVariante; lista: ImagemVariante; detalhe: ImagemVariante } | null
+  imagem_placeholder: string
   media_avaliacoes: number
   total_avaliacoes: number
   descricao?: string
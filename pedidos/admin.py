@@ -1,5 +1,6 @@
-from django.contrib import admin
-from .models import Pedido, ItemPedido, Pagamento
+from django.contrib import admin, messages
+from .models import Pedido, ItemPedido, Pagamento, HistoricoStatusPedido
+from .services.status import transicionar_em_massa
 
 
 class ItemPedidoInline(admin.TabularInline):
@@ -28,6 +29,17 @@ class PagamentoInline(admin.StackedInline):
     ]
 
 
+class HistoricoStatusInline(admin.TabularInline):
+    """Inline somente leitura com o histórico de status do pedido."""
+    model = HistoricoStatusPedido
+    extra = 0
+    can_delete = False
+    readonly_fields = ['status_anterior', 'status_novo', 'operador', 'criado_em']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Pedido)
 class PedidoAdmin(admin.ModelAdmin):
     """Configuração do admin para Pedidos."""
@@ -42,7 +54,8 @@ class PedidoAdmin(admin.ModelAdmin):
     list_filter = ['status', 'criado_em']
     search_fields = ['usuario__username', 'usuario__email', 'id']
     readonly_fields = ['total', 'valor_frete', 'criado_em', 'atualizado_em']
-    inlines = [ItemPedidoInline, PagamentoInline]
+    inlines = [ItemPedidoInline, PagamentoInline, HistoricoStatusInline]
+    actions = ['marcar_processando', 'marcar_enviado', 'marcar_entregue', 'marcar_cancelado']
     fieldsets = (
         ('Informações do Pedido', {
             'fields': ('usuario', 'status', 'total', 'valor_frete')
@@ -60,6 +73,38 @@ class PedidoAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         return qs.select_related('usuario').prefetch_related('itens__produto', 'pagamento')
 
+    def _transicionar(self, request, queryset, novo_status):
+        resultado = transicionar_em_massa(
+            queryset.order_by(), novo_status, operador=request.user, request=request
+        )
+        self.message_user(
+            request,
+            f'{resultado["atualizados"]} pedido(s) marcado(s) como "{novo_status}"; '
+            f'{resultado["emails"]} e-mail(s) enfileirado(s).'
+        )
+        if resultado['ignorados']:
+            self.message_user(
+                request,
+                f'{len(resultado["ignorados"])} pedido(s) ignorado(s): o status atual não permite a transição.',
+                level=messages.WARNING,
+            )
+
+    def marcar_processando(self, request, queryset):
+        self._transicionar(request, queryset, 'processando')
+    marcar_processando.short_description = 'Marcar como "Processando"'
+
+    def marcar_enviado(self, request, queryset):
+        self._transicionar(request, queryset, 'enviado')
+    marcar_enviado.short_description = 'Marcar como "Enviado" e avisar clientes'
+
+    def marcar_entregue(self, request, queryset):
+        self._transicionar(request, queryset, 'entregue')
+    marcar_entregue.short_description = 'Marcar como "Entregue"'
+
+    def marcar_cancelado(self, request, queryset):
+        self._transicionar(request, queryset, 'cancelado')
+    marcar_cancelado.short_description = 'Marcar como "Cancelado"'
+
 
 @admin.register(Pagamento)
 class PagamentoAdmin(admin.ModelAdmin):
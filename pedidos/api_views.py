@@ -2,14 +2,15 @@ import logging
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db import transaction
 from rest_framework import generics, status
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.carregamento import CarregamentoViewMixin
+from core.pagination import PaginacaoAdaptavel
 from pedidos import services as payment_services
-from .models import CarrinhoItem, Pedido, ItemPedido, Pagamento
+from .models import Pedido
 from .serializers import (
     CarrinhoItemSerializer,
     CarrinhoAdicaoSerializer,
@@ -17,6 +18,7 @@ from .serializers import (
     FreteSerializer,
     CheckoutSerializer,
     PedidoSerializer,
+    TransicaoStatusSerializer,
 )
 from .services.carrinho_service import CarrinhoService
 from .views import calcular_frete_por_cep
@@ -28,13 +30,13 @@ class CarrinhoView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        itens = CarrinhoService.get_carrinho(request)
-        serializer = CarrinhoItemSerializer(itens, many=True, context={'request': request})
-        total = CarrinhoService.get_total(request)
+        resumo = CarrinhoService.resumo(request)
+        serializer = CarrinhoItemSerializer(resumo['itens'], many=True, context={'request': request})
         return Response({
             'itens': serializer.data,
-            'total': total,
-            'quantidade_total': CarrinhoService.get_quantidade_total(request),
+            'subtotal_produtos': resumo['subtotal_produtos'],
+            'total': resumo['subtotal_promocional'],
+            'quantidade_total': resumo['quantidade'],
         })
 
     def post(self, request):
@@ -107,9 +109,9 @@ class CheckoutView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         data = serializer.validated_data
-        itens = CarrinhoService.get_carrinho(request)
+        resumo = CarrinhoService.resumo(request)
 
-        if not itens.exists():
+        if not resumo['itens']:
             return Response({'detail': 'O carrinho está vazio.'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
@@ -117,7 +119,7 @@ class CheckoutView(APIView):
         except ValueError as e:
             return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        total_produtos = CarrinhoService.get_total(request)
+        total_produtos = resumo['subtotal_promocional']
 
         dados_pagamento = {
             'numero_cartao': data.get('numero_cartao', ''),
@@ -126,52 +128,40 @@ class CheckoutView(APIView):
             'cvv': data.get('cvv', ''),
         }
 
+        carrinho = CarrinhoService.get_carrinho(request)
+
+        # Confere o estoque antes de cobrar; o pagamento fica fora da transação
+        # para não segurar locks de estoque
         try:
-            with transaction.atomic():
-                pedido = Pedido.objects.create(
-                    usuario=request.user,
-                    total=total_produtos,
-                    valor_frete=valor_frete,
-                    endereco=data['endereco'],
-                    cidade=data['cidade'],
-                    estado=data['estado'],
-                    cep=data['cep'],
-                    telefone=data['telefone'],
-                )
-
-                for item in itens:
-                    ItemPedido.objects.create(
-                        pedido=pedido,
-                        produto=item.produto,
-                        quantidade=item.quantidade,
-                        preco_unitario=item.produto.preco_final,
-                    )
-                    item.produto.estoque -= item.quantidade
-                    item.produto.save()
-
-                resultado = payment_services.processar_pagamento(
-                    valor=total_produtos + valor_frete,
-                    metodo=data['metodo_pagamento'],
-                    dados=dados_pagamento,
-                )
-
-                Pagamento.objects.create(
-                    pedido=pedido,
-                    metodo=data['metodo_pagamento'],
-                    status=resultado['status'],
-                    valor=total_produtos + valor_frete,
-                    transacao_id=resultado.get('transacao_id', ''),
-                    codigo_confirmacao=resultado.get('codigo_confirmacao', ''),
-                    mensagem_retorno=resultado.get('mensagem', ''),
-                    cartao_final=resultado.get('cartao_final', ''),
-                    nome_portador=resultado.get('nome_portador', ''),
-                )
-
-                CarrinhoService.limpar_carrinho(request)
+            payment_services.verificar_estoque(carrinho)
+        except payment_services.CheckoutErro as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+        try:
+            resultado = payment_services.processar_pagamento(
+                valor=total_produtos + valor_frete,
+                metodo=data['metodo_pagamento'],
+                dados=dados_pagamento,
+            )
         except payment_services.PagamentoErro as e:
             return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            pedido = payment_services.finalizar_pedido(
+                usuario=request.user,
+                carrinho=carrinho,
+                entrega=data,
+                total=total_produtos,
+                valor_frete=valor_frete,
+                metodo_pagamento=data['metodo_pagamento'],
+                resultado_pagamento=resultado,
+            )
+        except payment_services.CheckoutErro as e:
+            # Estoque levado por um checkout concorrente depois da cobrança
+            payment_services.cancelar_pagamento(resultado)
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
+            payment_services.cancelar_pagamento(resultado)
             logger.exception('Erro ao processar checkout: %s', e)
             return Response(
                 {'detail': 'Erro ao processar o pedido. Tente novamente.'},
@@ -181,21 +171,44 @@ class CheckoutView(APIView):
         return Response(PedidoSerializer(pedido).data, status=status.HTTP_201_CREATED)
 
 
-class PedidoListView(generics.ListAPIView):
+class PedidoListView(CarregamentoViewMixin, generics.ListAPIView):
     serializer_class = PedidoSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PaginacaoAdaptavel
+    ordenacao_cursor_padrao = ('-criado_em', '-id')
 
     def get_queryset(self):
-        return Pedido.objects.filter(
-            usuario=self.request.user
-        ).prefetch_related('itens__produto', 'pagamento')
+        return Pedido.objects.filter(usuario=self.request.user)
 
 
-class PedidoDetailView(generics.RetrieveAPIView):
+class PedidoDetailView(CarregamentoViewMixin, generics.RetrieveAPIView):
     serializer_class = PedidoSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Pedido.objects.filter(
-            usuario=self.request.user
-        ).prefetch_related('itens__produto', 'pagamento')
+        return Pedido.objects.filter(usuario=self.request.user)
+
+
+class PedidoStatusEmMassaView(APIView):
+    """Backoffice: move vários pedidos para um novo status de uma vez."""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = TransicaoStatusSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        try:
+            resultado = payment_services.transicionar_em_massa(
+                data['pedidos'], data['status'], operador=request.user, request=request
+            )
+        except payment_services.TransicaoInvalida as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'status': data['status'],
+            'atualizados': resultado['atualizados'],
+            'ignorados': resultado['ignorados'],
+            'emails_enfileirados': resultado['emails'],
+        })
@@ -1,17 +1,18 @@
-from usuarios.models import ListaDesejo
+from functools import partial, lru_cache
+
+from django.utils.functional import lazy
+
+from pedidos.services import contadores
+
+
+def _preguicoso(funcao, request):
+    # Só consulta o contador se o template usar o valor (e apenas uma vez)
+    return lazy(lru_cache(maxsize=None)(partial(funcao, request)), int)()
 
 
 def carrinho_context(request):
     """Context processor para adicionar informações do carrinho em todos os templates."""
-    carrinho = request.session.get('carrinho', {})
-    
-    # Calcula o número total de itens no carrinho
-    carrinho_count = sum(item['quantidade'] for item in carrinho.values())
-    wishlist_count = 0
-    if request.user.is_authenticated:
-        wishlist_count = ListaDesejo.objects.filter(usuario=request.user).count()
-    
     return {
-        'carrinho_count': carrinho_count,
-        'wishlist_count': wishlist_count,
+        'carrinho_count': _preguicoso(contadores.quantidade_carrinho, request),
+        'wishlist_count': _preguicoso(contadores.tamanho_lista_desejos, request),
     }
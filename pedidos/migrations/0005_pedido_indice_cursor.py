@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0004_carrinhoitem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['usuario', 'criado_em', 'id'], name='pedidos_ped_usuario_933a35_idx'),
+        ),
+    ]
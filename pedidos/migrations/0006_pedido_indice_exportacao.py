@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0005_pedido_indice_cursor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['criado_em', 'id'], name='pedidos_ped_criado__aededa_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0006_pedido_indice_exportacao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricoStatusPedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status_anterior', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('enviado', 'Enviado'), ('entregue', 'Entregue'), ('cancelado', 'Cancelado')], max_length=20)),
+                ('status_novo', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('enviado', 'Enviado'), ('entregue', 'Entregue'), ('cancelado', 'Cancelado')], max_length=20)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('operador', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historico_status', to='pedidos.pedido')),
+            ],
+            options={
+                'verbose_name': 'Histórico de Status',
+                'verbose_name_plural': 'Históricos de Status',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['pedido', 'criado_em'], name='pedidos_his_pedido__ea396d_idx')],
+            },
+        ),
+    ]
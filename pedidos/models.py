@@ -67,7 +67,7 @@ class CarrinhoItem(models.Model):
     def subtotal(self):
         """Calcula o subtotal do item."""
         if self.quantidade is not None and self.produto and self.produto.preco is not None:
-            return self.quantidade * self.produto.preco
+            return self.quantidade * self.produto.preco_final
         return None
 
 
@@ -81,6 +81,15 @@ class Pedido(models.Model):
         ('cancelado', 'Cancelado'),
     ]
 
+    # Transições de status permitidas (origem -> destinos)
+    TRANSICOES = {
+        'pendente': ('processando', 'cancelado'),
+        'processando': ('enviado', 'cancelado'),
+        'enviado': ('entregue',),
+        'entregue': (),
+        'cancelado': (),
+    }
+
     usuario = models.ForeignKey(
         User, 
         on_delete=models.CASCADE, 
@@ -112,6 +121,10 @@ class Pedido(models.Model):
         verbose_name = 'Pedido'
         verbose_name_plural = 'Pedidos'
         ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['usuario', 'criado_em', 'id']),
+            models.Index(fields=['criado_em', 'id']),
+        ]
 
     def __str__(self):
         return f'Pedido #{self.id} - {self.usuario.username}'
@@ -123,6 +136,11 @@ class Pedido(models.Model):
             return self.total + self.valor_frete
         return None
 
+    @classmethod
+    def origens_permitidas(cls, destino):
+        """Status a partir dos quais um pedido pode ir para `destino`."""
+        return [origem for origem, destinos in cls.TRANSICOES.items() if destino in destinos]
+
 
 class ItemPedido(models.Model):
     """Modelo para itens de um pedido."""
@@ -195,3 +213,33 @@ class Pagamento(models.Model):
 
     def __str__(self):
         return f'Pagamento #{self.id} - Pedido #{self.pedido_id}'
+
+
+class HistoricoStatusPedido(models.Model):
+    """Registro de auditoria de cada mudança de status de um pedido."""
+    pedido = models.ForeignKey(
+        Pedido,
+        on_delete=models.CASCADE,
+        related_name='historico_status'
+    )
+    status_anterior = models.CharField(max_length=20, choices=Pedido.STATUS_CHOICES)
+    status_novo = models.CharField(max_length=20, choices=Pedido.STATUS_CHOICES)
+    operador = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Histórico de Status'
+        verbose_name_plural = 'Históricos de Status'
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['pedido', 'criado_em']),
+        ]
+
+    def __str__(self):
+        return f'Pedido #{self.pedido_id}: {self.status_anterior} -> {self.status_novo}'
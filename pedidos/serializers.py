@@ -88,3 +88,10 @@ class CheckoutSerializer(serializers.Serializer):
                 if not data.get(campo):
                     raise serializers.ValidationError({campo: 'Este campo é obrigatório para pagamento com cartão.'})
         return data
+
+
+class TransicaoStatusSerializer(serializers.Serializer):
+    pedidos = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=10000
+    )
+    status = serializers.ChoiceField(choices=Pedido.STATUS_CHOICES)
@@ -1,5 +1,18 @@
 """Services package para o app pedidos."""
 from .carrinho_service import CarrinhoService
-from .pagamento import processar_pagamento, PagamentoErro
+from .checkout import finalizar_pedido, verificar_estoque, CheckoutErro, EstoqueInsuficiente
+from .pagamento import processar_pagamento, cancelar_pagamento, PagamentoErro
+from .status import transicionar_em_massa, TransicaoInvalida
 
-__all__ = ['CarrinhoService', 'processar_pagamento', 'PagamentoErro']
+__all__ = [
+    'CarrinhoService',
+    'finalizar_pedido',
+    'verificar_estoque',
+    'CheckoutErro',
+    'EstoqueInsuficiente',
+    'processar_pagamento',
+    'cancelar_pagamento',
+    'PagamentoErro',
+    'transicionar_em_massa',
+    'TransicaoInvalida',
+]
@@ -1,20 +1,99 @@
 """Serviço para gerenciar carrinho de compras persistente."""
-from django.db.models import Sum, F
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, When, Window
 from django.core.exceptions import ValidationError
+from rest_framework.request import Request as DRFRequest
+
 from produtos.models import Produto
 from pedidos.models import CarrinhoItem
+from . import contadores
+
+
+# Mesma regra de Produto.preco_final, usada no checkout
+PRECO_FINAL = Case(
+    When(produto__preco_promocional__gt=0, then=F('produto__preco_promocional')),
+    default=F('produto__preco'),
+)
+VALOR = DecimalField(max_digits=12, decimal_places=2)
 
 
 class CarrinhoService:
     """Service layer para operações do carrinho de compras."""
 
+    ATRIBUTO_RESUMO = '_resumo_carrinho'
+    CHAVE_SESSAO_ANONIMA = 'carrinho_session_key'
+
     @staticmethod
-    def _get_session_key(request):
-        """Obtém ou cria uma chave de sessão."""
-        if not request.session.session_key:
+    def _get_session_key(request, criar=False):
+        """
+        Obtém a chave de sessão do visitante anônimo.
+
+        A sessão só é criada quando `criar` é True (ao adicionar ao carrinho),
+        para que a navegação anônima não grave linhas de sessão.
+        """
+        if not request.session.session_key and criar:
             request.session.create()
         return request.session.session_key
 
+    @staticmethod
+    def _request_base(request):
+        # Request do DRF embrulha o HttpRequest; o resumo fica no HttpRequest
+        # para ser compartilhado com o context processor
+        return request._request if isinstance(request, DRFRequest) else request
+
+    @staticmethod
+    def resumo_memoizado(request):
+        """Retorna o resumo já calculado neste request, ou None."""
+        return vars(CarrinhoService._request_base(request)).get(CarrinhoService.ATRIBUTO_RESUMO)
+
+    @staticmethod
+    def resumo(request):
+        """
+        Retorna itens e totais do carrinho em uma única query.
+
+        Os totais são calculados pelo banco com funções de janela na mesma
+        query dos itens. O resultado é memoizado no request e descartado
+        quando o carrinho é alterado pelo service.
+
+        Args:
+            request: HttpRequest ou Request do DRF
+
+        Returns:
+            dict: itens (list[CarrinhoItem]), subtotal_produtos (preço cheio),
+            subtotal_promocional (preço final, cobrado no checkout) e
+            quantidade (soma das quantidades)
+        """
+        resumo = CarrinhoService.resumo_memoizado(request)
+        if resumo is not None:
+            return resumo
+
+        itens = list(CarrinhoService.get_carrinho(request).annotate(
+            soma_quantidade=Window(Sum('quantidade')),
+            soma_produtos=Window(Sum(F('quantidade') * F('produto__preco'), output_field=VALOR)),
+            soma_promocional=Window(Sum(F('quantidade') * PRECO_FINAL, output_field=VALOR)),
+        ))
+
+        primeiro = itens[0] if itens else None
+        resumo = {
+            'itens': itens,
+            'subtotal_produtos': primeiro.soma_produtos if primeiro else Decimal('0.00'),
+            'subtotal_promocional': primeiro.soma_promocional if primeiro else Decimal('0.00'),
+            'quantidade': primeiro.soma_quantidade if primeiro else 0,
+        }
+        setattr(CarrinhoService._request_base(request), CarrinhoService.ATRIBUTO_RESUMO, resumo)
+        return resumo
+
+    @staticmethod
+    def _invalidar_contador(request):
+        """Descarta o badge em cache e o resumo memoizado após uma alteração."""
+        vars(CarrinhoService._request_base(request)).pop(CarrinhoService.ATRIBUTO_RESUMO, None)
+        if request.user.is_authenticated:
+            contadores.invalidar_carrinho(usuario=request.user)
+        else:
+            contadores.invalidar_carrinho(session_key=request.session.session_key)
+
     @staticmethod
     def get_carrinho(request):
         """
@@ -32,6 +111,8 @@ class CarrinhoService:
             ).select_related('produto', 'produto__categoria')
         else:
             session_key = CarrinhoService._get_session_key(request)
+            if not session_key:
+                return CarrinhoItem.objects.none()
             return CarrinhoItem.objects.filter(
                 session_key=session_key
             ).select_related('produto', 'produto__categoria')
@@ -70,7 +151,10 @@ class CarrinhoService:
                 defaults={'quantidade': quantidade}
             )
         else:
-            session_key = CarrinhoService._get_session_key(request)
+            session_key = CarrinhoService._get_session_key(request, criar=True)
+            # O login troca a chave da sessão; a original fica guardada para a migração
+            if request.session.get(CarrinhoService.CHAVE_SESSAO_ANONIMA) != session_key:
+                request.session[CarrinhoService.CHAVE_SESSAO_ANONIMA] = session_key
             item, created = CarrinhoItem.objects.get_or_create(
                 session_key=session_key,
                 produto=produto,
@@ -85,6 +169,7 @@ class CarrinhoService:
             item.quantidade = nova_quantidade
             item.save()
 
+        CarrinhoService._invalidar_contador(request)
         return item
 
     @staticmethod
@@ -114,6 +199,8 @@ class CarrinhoService:
                 )
             else:
                 session_key = CarrinhoService._get_session_key(request)
+                if not session_key:
+                    raise CarrinhoItem.DoesNotExist
                 item = CarrinhoItem.objects.get(
                     session_key=session_key,
                     produto_id=produto_id
@@ -126,6 +213,7 @@ class CarrinhoService:
 
         item.quantidade = quantidade
         item.save()
+        CarrinhoService._invalidar_contador(request)
         return item
 
     @staticmethod
@@ -151,11 +239,14 @@ class CarrinhoService:
                 )
             else:
                 session_key = CarrinhoService._get_session_key(request)
+                if not session_key:
+                    raise CarrinhoItem.DoesNotExist
                 item = CarrinhoItem.objects.get(
                     session_key=session_key,
                     produto_id=produto_id
                 )
             item.delete()
+            CarrinhoService._invalidar_contador(request)
             return True
         except CarrinhoItem.DoesNotExist:
             raise ValidationError('Item não encontrado no carrinho.')
@@ -175,13 +266,16 @@ class CarrinhoService:
             count, _ = CarrinhoItem.objects.filter(usuario=request.user).delete()
         else:
             session_key = CarrinhoService._get_session_key(request)
+            if not session_key:
+                return 0
             count, _ = CarrinhoItem.objects.filter(session_key=session_key).delete()
+        CarrinhoService._invalidar_contador(request)
         return count
 
     @staticmethod
     def get_total(request):
         """
-        Calcula o total do carrinho.
+        Calcula o total do carrinho pelo preço final (com promoções).
         
         Args:
             request: HttpRequest object
@@ -189,11 +283,7 @@ class CarrinhoService:
         Returns:
             Decimal: Total do carrinho
         """
-        carrinho = CarrinhoService.get_carrinho(request)
-        total = carrinho.aggregate(
-            total=Sum(F('quantidade') * F('produto__preco'))
-        )['total']
-        return total or 0
+        return CarrinhoService.resumo(request)['subtotal_promocional']
 
     @staticmethod
     def get_quantidade_total(request):
@@ -206,14 +296,18 @@ class CarrinhoService:
         Returns:
             int: Quantidade total de itens
         """
-        carrinho = CarrinhoService.get_carrinho(request)
-        total = carrinho.aggregate(total=Sum('quantidade'))['total']
-        return total or 0
+        return CarrinhoService.resumo(request)['quantidade']
 
     @staticmethod
     def migrar_carrinho_anonimo_para_usuario(session_key, usuario):
         """
         Migra itens do carrinho anônimo para usuário autenticado.
+
+        Os dois carrinhos são lidos e travados em uma única query; a fusão
+        (limitada ao estoque) é feita em memória e gravada com um bulk_update
+        e um único DELETE. Logins simultâneos da mesma sessão (duas abas)
+        ficam serializados pelo lock: o segundo encontra o carrinho anônimo
+        já vazio.
         
         Args:
             session_key: Chave da sessão anônima
@@ -225,30 +319,38 @@ class CarrinhoService:
         if not session_key:
             return 0
 
-        itens_anonimos = CarrinhoItem.objects.filter(session_key=session_key)
-        count = 0
+        with transaction.atomic():
+            itens = list(
+                CarrinhoItem.objects.select_for_update(of=('self',))
+                .filter(Q(session_key=session_key, usuario__isnull=True) | Q(usuario=usuario))
+                .select_related('produto')
+                .order_by('pk')
+            )
+            do_usuario = {item.produto_id: item for item in itens if item.usuario_id == usuario.pk}
+            anonimos = [item for item in itens if item.usuario_id is None]
+            if not anonimos:
+                return 0
+
+            alterados, removidos = [], []
+            for item_anonimo in anonimos:
+                item_usuario = do_usuario.get(item_anonimo.produto_id)
+                if item_usuario is not None:
+                    # Soma as quantidades (respeitando estoque)
+                    item_usuario.quantidade = min(
+                        item_usuario.quantidade + item_anonimo.quantidade,
+                        item_anonimo.produto.estoque
+                    )
+                    alterados.append(item_usuario)
+                    removidos.append(item_anonimo.pk)
+                else:
+                    # Usuário não tem esse produto, transfere o item
+                    item_anonimo.usuario = usuario
+                    item_anonimo.session_key = None
+                    alterados.append(item_anonimo)
 
-        for item_anonimo in itens_anonimos:
-            try:
-                # Verifica se usuário já tem esse produto no carrinho
-                item_usuario = CarrinhoItem.objects.get(
-                    usuario=usuario,
-                    produto=item_anonimo.produto
-                )
-                # Soma as quantidades (respeitando estoque)
-                nova_quantidade = min(
-                    item_usuario.quantidade + item_anonimo.quantidade,
-                    item_anonimo.produto.estoque
-                )
-                item_usuario.quantidade = nova_quantidade
-                item_usuario.save()
-                item_anonimo.delete()
-                count += 1
-            except CarrinhoItem.DoesNotExist:
-                # Usuário não tem esse produto, transfere o item
-                item_anonimo.usuario = usuario
-                item_anonimo.session_key = None
-                item_anonimo.save()
-                count += 1
+            if removidos:
+                CarrinhoItem.objects.filter(pk__in=removidos).delete()
+            CarrinhoItem.objects.bulk_update(alterados, ['quantidade', 'usuario', 'session_key'])
 
-        return count
+        contadores.invalidar_carrinho(usuario=usuario, session_key=session_key)
+        return len(anonimos)
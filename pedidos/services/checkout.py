@@ -0,0 +1,180 @@
+"""Motor de checkout compartilhado pelas views HTML e pela API."""
+import logging
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.utils import timezone
+
+from core import cache_http
+from core.cache import invalidar_catalogo
+from produtos.models import Produto
+from pedidos.models import Pedido, ItemPedido, Pagamento
+from . import contadores
+
+logger = logging.getLogger(__name__)
+
+
+class CheckoutErro(Exception):
+    """Erro de negócio que impede a finalização do pedido."""
+
+
+class EstoqueInsuficiente(CheckoutErro):
+    """Um ou mais produtos do carrinho não têm estoque suficiente."""
+
+
+def finalizar_pedido(*, usuario, carrinho, entrega, total, valor_frete,
+                     metodo_pagamento, resultado_pagamento):
+    """
+    Cria o pedido a partir do carrinho em uma única transação.
+
+    Os produtos são travados com um único SELECT ... FOR UPDATE ordenado por
+    ID (evita deadlocks entre checkouts concorrentes), os itens são inseridos
+    com bulk_create e o estoque é baixado com um único UPDATE condicional.
+    O pagamento deve ser processado antes, fora dos locks, e depois de
+    verificar_estoque; se mesmo assim este passo falhar, quem chamou cancela o
+    pagamento (cancelar_pagamento).
+
+    Args:
+        usuario: Usuário dono do pedido
+        carrinho: QuerySet[CarrinhoItem] do usuário (removido ao final)
+        entrega: Dict com endereco, cidade, estado, cep e telefone
+        total: Valor dos produtos
+        valor_frete: Valor do frete
+        metodo_pagamento: Método escolhido (cartao_credito, pix, boleto)
+        resultado_pagamento: Dict retornado por processar_pagamento
+
+    Returns:
+        Pedido: Pedido criado
+
+    Raises:
+        CheckoutErro: Se o carrinho estiver vazio
+        EstoqueInsuficiente: Se algum produto não tiver estoque
+    """
+    status_pagamento = resultado_pagamento.get('status', 'pendente')
+    valor_total = total + (valor_frete or Decimal('0'))
+
+    with transaction.atomic():
+        quantidades = _quantidades(carrinho)
+        produtos = list(
+            Produto.objects.select_for_update().filter(pk__in=quantidades).order_by('pk')
+        )
+        _validar_estoque(produtos, quantidades)
+
+        pedido = Pedido.objects.create(
+            usuario=usuario,
+            status='processando' if status_pagamento == 'autorizado' else 'pendente',
+            total=total,
+            valor_frete=valor_frete,
+            endereco=entrega['endereco'],
+            cidade=entrega['cidade'],
+            estado=entrega['estado'],
+            cep=entrega['cep'],
+            telefone=entrega['telefone'],
+        )
+
+        ItemPedido.objects.bulk_create([
+            ItemPedido(
+                pedido=pedido,
+                produto=produto,
+                quantidade=quantidades[produto.pk],
+                preco_unitario=produto.preco_final,
+            )
+            for produto in produtos
+        ])
+
+        _baixar_estoque(quantidades)
+
+        # O UPDATE não dispara signals: produtos esgotados saem das vitrines em cache
+        chaves = [cache_http.chave_produto(produto.pk) for produto in produtos]
+        if any(produto.estoque == quantidades[produto.pk] for produto in produtos):
+            transaction.on_commit(invalidar_catalogo)
+            chaves.append(cache_http.CHAVE_LISTAGENS)
+        # O estoque exibido na página de cada produto mudou
+        transaction.on_commit(lambda: cache_http.purgar(chaves))
+
+        Pagamento.objects.create(
+            pedido=pedido,
+            metodo=metodo_pagamento,
+            status=status_pagamento,
+            valor=valor_total,
+            transacao_id=resultado_pagamento.get('transacao_id', ''),
+            codigo_confirmacao=resultado_pagamento.get('codigo_confirmacao', ''),
+            mensagem_retorno=resultado_pagamento.get('mensagem', ''),
+            cartao_final=resultado_pagamento.get('cartao_final', ''),
+            nome_portador=resultado_pagamento.get('nome_portador', ''),
+        )
+
+        carrinho.delete()
+
+    contadores.invalidar_carrinho(usuario=usuario)
+    logger.info(
+        f'Pedido #{pedido.id} criado com sucesso. '
+        f'Usuário: {usuario.username}, '
+        f'Itens: {len(produtos)}, '
+        f'Total: R$ {valor_total}, '
+        f'Método: {metodo_pagamento}'
+    )
+    return pedido
+
+
+def verificar_estoque(carrinho):
+    """
+    Confere, sem travar linhas, se o carrinho ainda pode ser atendido.
+
+    Roda antes de cobrar o cliente: evita autorizar um pagamento para um
+    pedido que finalizar_pedido recusaria. Não é uma reserva — um checkout
+    concorrente ainda pode levar o estoque entre as duas etapas.
+
+    Args:
+        carrinho: QuerySet[CarrinhoItem] do usuário
+
+    Raises:
+        CheckoutErro: Se o carrinho estiver vazio ou um produto sumiu
+        EstoqueInsuficiente: Se algum produto não tiver estoque
+    """
+    quantidades = _quantidades(carrinho)
+    _validar_estoque(list(Produto.objects.filter(pk__in=quantidades)), quantidades)
+
+
+def _quantidades(carrinho):
+    quantidades = {}
+    for produto_id, quantidade in carrinho.values_list('produto_id', 'quantidade'):
+        quantidades[produto_id] = quantidades.get(produto_id, 0) + quantidade
+
+    if not quantidades:
+        raise CheckoutErro('O carrinho está vazio.')
+    return quantidades
+
+
+def _validar_estoque(produtos, quantidades):
+    encontrados = {produto.pk for produto in produtos}
+    if encontrados != set(quantidades):
+        raise CheckoutErro('Um ou mais produtos do carrinho não estão mais disponíveis.')
+
+    for produto in produtos:
+        quantidade = quantidades[produto.pk]
+        if produto.estoque < quantidade:
+            logger.warning(
+                f'Tentativa de compra com estoque insuficiente: '
+                f'Produto {produto.nome} (ID: {produto.id}), '
+                f'Estoque: {produto.estoque}, Solicitado: {quantidade}'
+            )
+            raise EstoqueInsuficiente(f'Estoque insuficiente para {produto.nome}')
+
+
+def _baixar_estoque(quantidades):
+    """UPDATE ... SET estoque = estoque - q WHERE estoque >= q para todos os itens."""
+    condicao = reduce(or_, (Q(pk=pk, estoque__gte=q) for pk, q in quantidades.items()))
+    atualizados = Produto.objects.filter(condicao).update(
+        estoque=Case(
+            *[When(pk=pk, then=F('estoque') - q) for pk, q in quantidades.items()],
+            default=F('estoque'),
+            output_field=PositiveIntegerField(),
+        ),
+        atualizado_em=timezone.now(),
+    )
+    if atualizados != len(quantidades):
+        raise EstoqueInsuficiente('Estoque insuficiente para um ou mais produtos do carrinho.')
@@ -0,0 +1,110 @@
+"""
+Contadores dos badges de carrinho e lista de desejos.
+
+Os valores ficam em cache por usuário (ou sessão anônima) por
+CONTADORES_CACHE_TIMEOUT segundos e são invalidados pelo CarrinhoService,
+pelo checkout e pelas views da lista de desejos, e pelos signals de
+CarrinhoItem e ListaDesejo (admin, exclusões em cascata, limpar_sessoes).
+
+A invalidação só alcança todos os workers com um cache compartilhado
+(REDIS_URL); sem ele o padrão é 0, e os contadores vêm sempre do banco.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+from core.perf import registrar_cache
+from pedidos.models import CarrinhoItem
+from usuarios.models import ListaDesejo
+
+
+def _chave(tipo, usuario_id=None, session_key=None):
+    if usuario_id:
+        return f'contadores:{tipo}:u{usuario_id}'
+    return f'contadores:{tipo}:s{session_key}'
+
+
+def _em_cache(chave, calcular):
+    timeout = settings.CONTADORES_CACHE_TIMEOUT
+    if not timeout:
+        return calcular()
+
+    valor = cache.get(chave)
+    registrar_cache(valor is not None)
+    if valor is None:
+        valor = calcular()
+        cache.set(chave, valor, timeout)
+    return valor
+
+
+def quantidade_carrinho(request):
+    """
+    Retorna a quantidade total de itens no carrinho do visitante.
+
+    Args:
+        request: HttpRequest object
+
+    Returns:
+        int: Soma das quantidades (0 para anônimos sem sessão)
+    """
+    from .carrinho_service import CarrinhoService
+
+    # A view já montou o resumo do carrinho: reaproveita sem tocar no cache
+    resumo = CarrinhoService.resumo_memoizado(request)
+    if resumo is not None:
+        return resumo['quantidade']
+
+    if request.user.is_authenticated:
+        filtro = {'usuario_id': request.user.pk}
+        chave = _chave('carrinho', usuario_id=request.user.pk)
+    else:
+        session_key = request.session.session_key
+        if not session_key:
+            return 0
+        filtro = {'session_key': session_key}
+        chave = _chave('carrinho', session_key=session_key)
+
+    return _em_cache(
+        chave,
+        lambda: CarrinhoItem.objects.filter(**filtro).aggregate(total=Sum('quantidade'))['total'] or 0,
+    )
+
+
+def tamanho_lista_desejos(request):
+    """
+    Retorna o número de produtos na lista de desejos do usuário.
+
+    Args:
+        request: HttpRequest object
+
+    Returns:
+        int: Itens na lista (0 para anônimos)
+    """
+    if not request.user.is_authenticated:
+        return 0
+
+    usuario_id = request.user.pk
+    return _em_cache(
+        _chave('desejos', usuario_id=usuario_id),
+        lambda: ListaDesejo.objects.filter(usuario_id=usuario_id).count(),
+    )
+
+
+def invalidar_carrinho(usuario=None, session_key=None, usuario_id=None):
+    """Descarta o contador do carrinho de um usuário e/ou sessão anônima."""
+    if usuario is not None:
+        usuario_id = usuario.pk
+    chaves = []
+    if usuario_id:
+        chaves.append(_chave('carrinho', usuario_id=usuario_id))
+    if session_key:
+        chaves.append(_chave('carrinho', session_key=session_key))
+    if chaves:
+        cache.delete_many(chaves)
+
+
+def invalidar_lista_desejos(usuario=None, usuario_id=None):
+    """Descarta o contador da lista de desejos do usuário."""
+    if usuario is not None:
+        usuario_id = usuario.pk
+    cache.delete(_chave('desejos', usuario_id=usuario_id))
@@ -38,6 +38,22 @@ def processar_pagamento(valor: Decimal, metodo: str, dados: Dict[str, Any]) -> D
     raise PagamentoErro('Método de pagamento não suportado.')
 
 
+def cancelar_pagamento(resultado: Dict[str, Any]) -> Dict[str, Any]:
+    """Cancela (void) um pagamento autorizado ou pendente cujo pedido não foi criado.
+
+    Pagamentos recusados não têm o que cancelar e voltam como estão.
+    """
+
+    if resultado.get('status') not in ('autorizado', 'pendente'):
+        return resultado
+
+    return {
+        **resultado,
+        'status': 'cancelado',
+        'mensagem': 'Pagamento cancelado: o pedido não pôde ser concluído.',
+    }
+
+
 def _processar_cartao_credito(valor: Decimal, dados: Dict[str, Any]) -> Dict[str, Any]:
     numero_bruto = (dados.get('numero_cartao') or '').strip()
     numero_sanitizado = re.sub(r'\D', '', numero_bruto)
@@ -0,0 +1,104 @@
+"""Transições de status de pedidos em massa (admin e API de backoffice)."""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from core import metricas
+from core.email_utils import enviar_emails_pedido_enviado
+from pedidos.models import Pedido, HistoricoStatusPedido
+
+logger = logging.getLogger(__name__)
+
+# E-mail enfileirado para os clientes quando o pedido chega ao status
+NOTIFICACOES = {
+    'enviado': enviar_emails_pedido_enviado,
+}
+
+
+class TransicaoInvalida(Exception):
+    """O status de destino não existe ou não pode ser alcançado."""
+
+
+def transicionar_em_massa(pedidos, novo_status, operador=None, request=None):
+    """
+    Move pedidos para `novo_status` respeitando a máquina de estados.
+
+    Os pedidos elegíveis (status atual com transição permitida para o
+    destino) são travados, atualizados com um único UPDATE e recebem uma
+    linha de HistoricoStatusPedido cada (bulk_create). Os demais são
+    ignorados e devolvidos para o chamador. Os e-mails do novo status são
+    enfileirados no outbox na mesma transação e as métricas diárias dos
+    dias afetados são recalculadas após o commit (o UPDATE não dispara
+    signals).
+
+    Args:
+        pedidos: QuerySet[Pedido] ou iterável de IDs
+        novo_status: Status de destino
+        operador: Usuário responsável (registrado no histórico)
+        request: HttpRequest object (opcional, para a URL do site nos e-mails)
+
+    Returns:
+        dict: 'atualizados' (quantidade), 'ignorados' (IDs em status que
+        não permite a transição) e 'emails' (quantidade enfileirada)
+
+    Raises:
+        TransicaoInvalida: Se `novo_status` não for um status de pedido ou
+            não houver nenhuma origem que leve a ele
+    """
+    if novo_status not in Pedido.TRANSICOES:
+        raise TransicaoInvalida(f'Status inválido: {novo_status}.')
+    origens = Pedido.origens_permitidas(novo_status)
+    if not origens:
+        raise TransicaoInvalida(f'Nenhum pedido pode passar para o status "{novo_status}".')
+
+    if not hasattr(pedidos, 'model'):
+        pedidos = Pedido.objects.filter(pk__in=list(pedidos))
+    # A ordenação padrão (-criado_em) não interessa aqui; por ID evita deadlocks
+    pedidos = pedidos.order_by('pk')
+
+    with transaction.atomic():
+        elegiveis = list(
+            pedidos.filter(status__in=origens)
+            .select_for_update()
+            .values_list('pk', 'status', 'criado_em')
+        )
+        ignorados = list(
+            pedidos.exclude(status__in=origens).exclude(status=novo_status).values_list('pk', flat=True)
+        )
+        if not elegiveis:
+            return {'atualizados': 0, 'ignorados': ignorados, 'emails': 0}
+
+        ids = [pk for pk, _, _ in elegiveis]
+        atualizados = Pedido.objects.filter(pk__in=ids).update(
+            status=novo_status, atualizado_em=timezone.now()
+        )
+        HistoricoStatusPedido.objects.bulk_create(
+            [
+                HistoricoStatusPedido(
+                    pedido_id=pk,
+                    status_anterior=status_anterior,
+                    status_novo=novo_status,
+                    operador=operador,
+                )
+                for pk, status_anterior, _ in elegiveis
+            ],
+            batch_size=1000,
+        )
+
+        emails = 0
+        notificar = NOTIFICACOES.get(novo_status)
+        if notificar:
+            emails = notificar(
+                Pedido.objects.filter(pk__in=ids).select_related('usuario').order_by('pk').iterator(),
+                request=request,
+            )
+
+        for dia in {timezone.localdate(criado_em) for _, _, criado_em in elegiveis}:
+            metricas.agendar_recalculo(dia)
+
+    logger.info(
+        f'{atualizados} pedido(s) movido(s) para "{novo_status}" por {operador}; '
+        f'{len(ignorados)} ignorado(s), {emails} e-mail(s) enfileirado(s)'
+    )
+    return {'atualizados': atualizados, 'ignorados': ignorados, 'emails': emails}
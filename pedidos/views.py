@@ -5,10 +5,9 @@ import logging
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import transaction
 from django.core.exceptions import ValidationError
 from produtos.models import Produto
-from .models import Pedido, ItemPedido, Pagamento
+from .models import Pedido, Pagamento
 from pedidos import services as payment_services
 from .services.carrinho_service import CarrinhoService
 from core.email_utils import enviar_email_confirmacao_pedido
@@ -44,19 +43,19 @@ def calcular_frete_por_cep(cep: str) -> Decimal:
 
 def carrinho(request):
     """View para exibir o carrinho de compras."""
-    # Obter itens do carrinho via service
-    itens = CarrinhoService.get_carrinho(request)
+    # Itens e totais do carrinho em uma única query
+    resumo = CarrinhoService.resumo(request)
     
     # Montar estrutura do carrinho
     itens_carrinho = []
-    for item in itens:
+    for item in resumo['itens']:
         itens_carrinho.append({
             'produto': item.produto,
             'quantidade': item.quantidade,
             'subtotal': item.subtotal,
         })
     
-    total = CarrinhoService.get_total(request)
+    total = resumo['subtotal_promocional']
     
     checkout_info = request.session.get('checkout_info', {})
     valor_frete = checkout_info.get('valor_frete')
@@ -134,22 +133,22 @@ def remover_carrinho(request, produto_id):
 def checkout(request):
     """View para finalização de compra."""
     # Verificar se carrinho tem itens via service
-    itens = CarrinhoService.get_carrinho(request)
+    resumo = CarrinhoService.resumo(request)
     
-    if not itens.exists():
+    if not resumo['itens']:
         messages.warning(request, 'Seu carrinho está vazio.')
         return redirect('produtos:lista')
     
     # Montar estrutura do carrinho
     itens_carrinho = []
-    for item in itens:
+    for item in resumo['itens']:
         itens_carrinho.append({
             'produto': item.produto,
             'quantidade': item.quantidade,
             'subtotal': item.subtotal,
         })
     
-    total = CarrinhoService.get_total(request)
+    total = resumo['subtotal_promocional']
     
     checkout_info = request.session.get('checkout_info', {})
     valor_frete = Decimal(checkout_info.get('valor_frete')) if checkout_info.get('valor_frete') else None
@@ -230,13 +229,17 @@ def checkout(request):
                         'cvv': pagamento_data['cvv'],
                     }
 
+                    carrinho = CarrinhoService.get_carrinho(request)
+
+                    # Estoque conferido antes de cobrar o cliente
                     try:
+                        payment_services.verificar_estoque(carrinho)
                         resultado_pagamento = payment_services.processar_pagamento(
                             valor_total_com_frete,
                             metodo_pagamento,
                             dados_pagamento
                         )
-                    except payment_services.PagamentoErro as exc:
+                    except (payment_services.CheckoutErro, payment_services.PagamentoErro) as exc:
                         messages.error(request, str(exc))
                         resultado_pagamento = None
                     else:
@@ -249,79 +252,22 @@ def checkout(request):
 
                     if resultado_pagamento is not None:
                         try:
-                            with transaction.atomic():
-                                logger.info(f'Iniciando criação de pedido para usuário {request.user.username}')
-                                
-                                pedido = Pedido.objects.create(
-                                    usuario=request.user,
-                                    total=total,
-                                    valor_frete=valor_frete,
-                                    endereco=form_data['endereco'],
-                                    cidade=form_data['cidade'],
-                                    estado=form_data['estado'],
-                                    cep=form_data['cep'],
-                                    telefone=form_data['telefone'],
-                                )
-
-                                for item_data in itens_carrinho:
-                                    produto = item_data['produto']
-                                    quantidade = item_data['quantidade']
-
-                                    # Usa select_for_update para evitar race conditions
-                                    produto = Produto.objects.select_for_update().get(id=produto.id)
-                                    
-                                    if produto.estoque < quantidade:
-                                        logger.warning(
-                                            f'Tentativa de compra com estoque insuficiente: '
-                                            f'Produto {produto.nome} (ID: {produto.id}), '
-                                            f'Estoque: {produto.estoque}, Solicitado: {quantidade}'
-                                        )
-                                        raise ValueError(f'Estoque insuficiente para {produto.nome}')
-
-                                    ItemPedido.objects.create(
-                                        pedido=pedido,
-                                        produto=produto,
-                                        quantidade=quantidade,
-                                        preco_unitario=produto.preco_final,
-                                    )
-
-                                    produto.estoque -= quantidade
-                                    produto.save()
-                                    
-                                    logger.info(
-                                        f'Estoque atualizado: Produto {produto.nome} (ID: {produto.id}), '
-                                        f'Novo estoque: {produto.estoque}'
-                                    )
-
-                                Pagamento.objects.create(
-                                    pedido=pedido,
-                                    metodo=metodo_pagamento,
-                                    status=resultado_pagamento.get('status', 'pendente'),
-                                    valor=valor_total_com_frete,
-                                    transacao_id=resultado_pagamento.get('transacao_id', ''),
-                                    codigo_confirmacao=resultado_pagamento.get('codigo_confirmacao', ''),
-                                    mensagem_retorno=resultado_pagamento.get('mensagem', ''),
-                                    cartao_final=resultado_pagamento.get('cartao_final', ''),
-                                    nome_portador=resultado_pagamento.get('nome_portador', ''),
-                                )
-
-                                if resultado_pagamento.get('status') == 'autorizado' and pedido.status != 'processando':
-                                    pedido.status = 'processando'
-                                    pedido.save(update_fields=['status'])
-
-                                # Limpar carrinho via service
-                                CarrinhoService.limpar_carrinho(request)
-                                request.session['checkout_info'] = {}
-                                request.session.modified = True
-                                
-                                logger.info(
-                                    f'Pedido #{pedido.id} criado com sucesso. '
-                                    f'Usuário: {request.user.username}, '
-                                    f'Total: R$ {valor_total_com_frete}, '
-                                    f'Método: {metodo_pagamento}'
-                                )
+                            logger.info(f'Iniciando criação de pedido para usuário {request.user.username}')
+
+                            pedido = payment_services.finalizar_pedido(
+                                usuario=request.user,
+                                carrinho=carrinho,
+                                entrega=form_data,
+                                total=total,
+                                valor_frete=valor_frete,
+                                metodo_pagamento=metodo_pagamento,
+                                resultado_pagamento=resultado_pagamento,
+                            )
 
+                            request.session['checkout_info'] = {}
+                            request.session.modified = True
                         except Exception as exc:
+                            payment_services.cancelar_pagamento(resultado_pagamento)
                             logger.error(
                                 f'Erro ao processar pedido: {str(exc)}. '
                                 f'Usuário: {request.user.username}',
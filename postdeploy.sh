@@ -15,4 +15,7 @@ else:
     print('Superusuário já existe')
 EOF
 
+echo "Gerando derivados das imagens de produtos..."
+python manage.py warm_product_images
+
 echo "Deploy concluído!"
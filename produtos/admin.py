@@ -5,7 +5,7 @@ from .models import Categoria, Produto, Avaliacao
 @admin.register(Categoria)
 class CategoriaAdmin(admin.ModelAdmin):
     """Configuração do admin para Categorias."""
-    list_display = ['nome', 'slug', 'criado_em']
+    list_display = ['nome', 'slug', 'limite_estoque_baixo', 'criado_em']
     search_fields = ['nome', 'descricao']
     prepopulated_fields = {'slug': ('nome',)}
     readonly_fields = ['criado_em', 'atualizado_em']
@@ -27,7 +27,7 @@ class ProdutoAdmin(admin.ModelAdmin):
     search_fields = ['nome', 'descricao']
     prepopulated_fields = {'slug': ('nome',)}
     list_editable = ['preco', 'preco_promocional', 'estoque', 'ativo', 'destaque']
-    readonly_fields = ['criado_em', 'atualizado_em']
+    readonly_fields = ['criado_em', 'atualizado_em', 'imagem_largura', 'imagem_altura']
     fieldsets = (
         ('Informações Básicas', {
             'fields': ('nome', 'slug', 'descricao', 'categoria')
@@ -36,7 +36,7 @@ class ProdutoAdmin(admin.ModelAdmin):
             'fields': ('preco', 'preco_promocional', 'estoque')
         }),
         ('Imagem', {
-            'fields': ('imagem',)
+            'fields': ('imagem', ('imagem_largura', 'imagem_altura'))
         }),
         ('Status', {
             'fields': ('ativo', 'destaque')
@@ -1,9 +1,14 @@
-from django.db.models import Q
+from django.db.models import prefetch_related_objects
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core import cache as catalogo_cache
+from core import cache_http
+from core.carregamento import CarregamentoViewMixin
+from core.pagination import PaginacaoAdaptavel
+from . import facetas, search
 from .models import Categoria, Produto, Avaliacao
 from .serializers import (
     CategoriaSerializer,
@@ -19,45 +24,145 @@ class CategoriaListView(generics.ListAPIView):
     serializer_class = CategoriaSerializer
     permission_classes = [AllowAny]
 
-
-class ProdutoListView(generics.ListAPIView):
+    def list(self, request, *args, **kwargs):
+        return cache_http.responder(
+            request,
+            lambda: Response(catalogo_cache.obter_ou_calcular(
+                'api_categorias',
+                lambda: super(CategoriaListView, self).list(request, *args, **kwargs).data,
+            )),
+            cache_http.calcular_etag(request, 'categorias'),
+            cache_http.ultima_modificacao(),
+            chaves=lambda resposta: [cache_http.CHAVE_CATEGORIAS] + [
+                cache_http.chave_categoria(categoria['id']) for categoria in resposta.data['results']
+            ],
+        )
+
+
+class ProdutoListView(CarregamentoViewMixin, generics.ListAPIView):
     serializer_class = ProdutoListSerializer
     permission_classes = [AllowAny]
+    pagination_class = PaginacaoAdaptavel
+
+    # Ordenações aceitas no modo cursor (o id desempata valores repetidos)
+    ordenacao_cursor_padrao = ('-criado_em', '-id')
+    ordenacoes_cursor = {
+        'preco': ('preco', 'id'),
+        '-preco': ('-preco', '-id'),
+        'nome': ('nome', 'id'),
+        '-nome': ('-nome', '-id'),
+        'criado_em': ('criado_em', 'id'),
+        '-criado_em': ('-criado_em', '-id'),
+    }
+
+    # Páginas iniciais das listagens sem busca textual ficam em cache
+    PAGINAS_EM_CACHE = 3
+
+    def list(self, request, *args, **kwargs):
+        # O corpo depende só da query string e do catálogo: o 304 sai sem consultas
+        janela = cache_http.janela_estoque()
+        return cache_http.responder(
+            request,
+            lambda: self._listar(request, *args, **kwargs),
+            cache_http.calcular_etag(request, 'produtos', janela, sorted(request.query_params.lists())),
+            cache_http.ultima_modificacao(janela),
+            chaves=lambda resposta: [cache_http.CHAVE_LISTAGENS]
+            + list(cache_http.chaves_de_produtos(resposta.data['results'])),
+        )
+
+    def _listar(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            pagina = int(params.get('page', 1))
+        except ValueError:
+            pagina = 0
+
+        if params.get('q') or 'cursor' in params or not 1 <= pagina <= self.PAGINAS_EM_CACHE:
+            return super().list(request, *args, **kwargs)
+
+        filtros = sorted((chave, params.get(chave)) for chave in params if chave != 'page')
+        dados = catalogo_cache.obter_ou_calcular(
+            'api_produtos',
+            lambda: super(ProdutoListView, self).list(request, *args, **kwargs).data,
+            request.scheme, request.get_host(), pagina, filtros,
+        )
+        return Response(dados)
 
     def get_queryset(self):
-        qs = Produto.objects.filter(ativo=True).select_related('categoria')
+        qs = Produto.objects.filter(ativo=True)
 
         busca = self.request.query_params.get('q')
         if busca:
-            qs = qs.filter(Q(nome__icontains=busca) | Q(descricao__icontains=busca))
+            qs = search.buscar(qs, busca)
 
-        categoria = self.request.query_params.get('categoria')
-        if categoria:
-            qs = qs.filter(categoria__slug=categoria)
+        # categoria, preco, promocao, estoque e avaliacao
+        qs = facetas.filtrar(qs, self.request.query_params)
 
         destaque = self.request.query_params.get('destaque')
         if destaque == 'true':
             qs = qs.filter(destaque=True)
 
-        promocao = self.request.query_params.get('promocao')
-        if promocao == 'true':
-            qs = qs.filter(preco_promocional__isnull=False)
-
-        ordenar = self.request.query_params.get('ordenar', '-criado_em')
+        # Com busca e sem ordenação explícita, mantém a ordem por relevância
+        ordenar = self.request.query_params.get('ordenar', '' if busca else '-criado_em')
         campos_validos = ['preco', '-preco', 'nome', '-nome', '-criado_em', 'criado_em']
         if ordenar in campos_validos:
             qs = qs.order_by(ordenar)
 
         return qs
 
+    def permite_cursor(self):
+        # A ordem por relevância da busca não tem chave estável para o cursor
+        return not self.request.query_params.get('q')
+
 
-class ProdutoDetailView(generics.RetrieveAPIView):
+class ProdutoDetailView(CarregamentoViewMixin, generics.RetrieveAPIView):
     serializer_class = ProdutoDetailSerializer
     permission_classes = [AllowAny]
     lookup_field = 'slug'
 
     def get_queryset(self):
-        return Produto.objects.filter(ativo=True).select_related('categoria').prefetch_related('avaliacoes__usuario')
+        return Produto.objects.filter(ativo=True)
+
+    def filter_queryset(self, queryset):
+        # As avaliações (prefetch) só são carregadas se o corpo for montado
+        queryset = super().filter_queryset(queryset)
+        self._prefetch_adiado = queryset._prefetch_related_lookups
+        return queryset.prefetch_related(None)
+
+    def retrieve(self, request, *args, **kwargs):
+        produto = self.get_object()
+        chaves = [cache_http.chave_produto(produto.pk)]
+        if produto.categoria_id:
+            chaves.append(cache_http.chave_categoria(produto.categoria_id))
+
+        def serializar():
+            prefetch_related_objects([produto], *self._prefetch_adiado)
+            return Response(self.get_serializer(produto).data)
+
+        # O 304 dispensa as avaliações e a serialização
+        return cache_http.responder(
+            request,
+            serializar,
+            # usuario_ja_avaliou muda com o usuário
+            cache_http.calcular_etag(request, 'produto', produto.pk, produto.atualizado_em, por_usuario=True),
+            cache_http.ultima_modificacao(produto.atualizado_em),
+            chaves=chaves,
+        )
+
+
+class FacetaListView(APIView):
+    """Contagens das facetas para a busca e os filtros da listagem (mesma query string)."""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        janela = cache_http.janela_estoque()
+        return cache_http.responder(
+            request,
+            lambda: Response(facetas.contar(request.query_params)),
+            cache_http.calcular_etag(request, 'facetas', janela, sorted(request.query_params.lists())),
+            cache_http.ultima_modificacao(janela),
+            chaves=[cache_http.CHAVE_LISTAGENS, cache_http.CHAVE_CATEGORIAS],
+        )
 
 
 class AvaliacaoCreateView(APIView):
@@ -0,0 +1,199 @@
+"""
+Navegação facetada do catálogo: filtros combináveis e contagens por opção.
+
+Facetas: categoria, faixa de preço (sobre o preço final), promoção, estoque
+e nota mínima. Cada opção é uma condição (Q); a listagem aplica as opções
+selecionadas e as contagens usam a semântica usual de facetas: a contagem de
+uma opção aplica os filtros das *outras* facetas, para mostrar quantos
+produtos o usuário veria ao trocar de opção.
+
+Todas as contagens saem de uma única consulta com agregação condicional
+(COUNT(...) FILTER (WHERE ...)), não importa quantos filtros estejam
+combinados. Sem busca textual, o resultado fica no cache do catálogo, junto
+com as primeiras páginas das listagens.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Q
+
+from core import cache as catalogo_cache
+from . import search
+from .models import Categoria, Produto
+
+# (valor na query string, rótulo, mínimo, máximo) — mínimo incluso, máximo não
+FAIXAS_PRECO = (
+    ('ate-25', 'Até R$ 25', None, Decimal('25')),
+    ('25-50', 'R$ 25 a R$ 50', Decimal('25'), Decimal('50')),
+    ('50-100', 'R$ 50 a R$ 100', Decimal('50'), Decimal('100')),
+    ('100-200', 'R$ 100 a R$ 200', Decimal('100'), Decimal('200')),
+    ('acima-200', 'Acima de R$ 200', Decimal('200'), None),
+)
+NOTAS_MINIMAS = (4, 3, 2, 1)
+
+# Parâmetro da query string → título exibido, na ordem da barra lateral
+FACETAS = {
+    'categoria': 'Categorias',
+    'preco': 'Preço',
+    'promocao': 'Promoções',
+    'estoque': 'Disponibilidade',
+    'avaliacao': 'Avaliação',
+}
+
+
+def categorias():
+    """Categorias ordenadas por nome, do cache do catálogo."""
+    return catalogo_cache.obter_ou_calcular(
+        'categorias', lambda: list(Categoria.objects.all().order_by('nome'))
+    )
+
+
+def _faixa_preco(minimo, maximo):
+    # Preço final = promocional, se houver (Produto.preco_final)
+    def limites(campo):
+        condicao = Q()
+        if minimo is not None:
+            condicao &= Q(**{f'{campo}__gte': minimo})
+        if maximo is not None:
+            condicao &= Q(**{f'{campo}__lt': maximo})
+        return condicao
+
+    return (
+        Q(preco_promocional__isnull=False) & limites('preco_promocional')
+        | Q(preco_promocional__isnull=True) & limites('preco')
+    )
+
+
+def opcoes(lista_categorias=None):
+    """
+    Opções de cada faceta.
+
+    Args:
+        lista_categorias: Categorias (default: categorias())
+
+    Returns:
+        dict: Parâmetro → lista de (valor, rótulo, Q)
+    """
+    if lista_categorias is None:
+        lista_categorias = categorias()
+    return {
+        'categoria': [(c.slug, c.nome, Q(categoria_id=c.pk)) for c in lista_categorias],
+        'preco': [
+            (valor, rotulo, _faixa_preco(minimo, maximo))
+            for valor, rotulo, minimo, maximo in FAIXAS_PRECO
+        ],
+        'promocao': [('true', 'Em promoção', Q(preco_promocional__isnull=False))],
+        'estoque': [('true', 'Em estoque', Q(estoque__gt=0))],
+        'avaliacao': [
+            (str(nota), f'{nota} estrela{"s" if nota > 1 else ""} ou mais',
+             Q(rating_total__gt=0, rating_medio__gte=nota))
+            for nota in NOTAS_MINIMAS
+        ],
+    }
+
+
+def selecionar(params, catalogo=None):
+    """
+    Opções selecionadas na query string.
+
+    Valores desconhecidos são ignorados, exceto o slug de categoria, que
+    filtra pelo slug (e não casa com nenhum produto se não existir).
+
+    Args:
+        params: QueryDict (request.GET ou request.query_params)
+        catalogo: Resultado de opcoes() (default: calculado)
+
+    Returns:
+        dict: Parâmetro → (valor, Q)
+    """
+    catalogo = opcoes() if catalogo is None else catalogo
+    selecao = {}
+    for nome, lista in catalogo.items():
+        valor = params.get(nome)
+        if not valor:
+            continue
+        condicao = next((q for opcao, _, q in lista if opcao == valor), None)
+        if condicao is not None:
+            selecao[nome] = (valor, condicao)
+        elif nome == 'categoria':
+            selecao[nome] = (valor, Q(categoria__slug=valor))
+    return selecao
+
+
+def filtrar(queryset, params):
+    """
+    Aplica ao queryset de produtos as facetas selecionadas.
+
+    Args:
+        queryset: QuerySet de Produto
+        params: QueryDict com os filtros
+
+    Returns:
+        QuerySet[Produto]: Filtrado por todas as facetas selecionadas
+    """
+    # Sem a lista de categorias (nenhuma consulta extra): a categoria filtra pelo slug
+    for _, condicao in selecionar(params, opcoes(lista_categorias=())).values():
+        queryset = queryset.filter(condicao)
+    return queryset
+
+
+def contar(params):
+    """
+    Contagens de todas as opções para a busca e os filtros atuais.
+
+    Args:
+        params: QueryDict com a busca (q) e os filtros
+
+    Returns:
+        dict: {'total': int, 'facetas': [{'nome', 'titulo', 'opcoes': [
+            {'valor', 'rotulo', 'total', 'selecionada'}]}]}
+    """
+    catalogo = opcoes()
+    selecao = selecionar(params, catalogo)
+    busca = params.get('q')
+
+    if busca:
+        return _contar(catalogo, selecao, busca)
+    return catalogo_cache.obter_ou_calcular(
+        'facetas',
+        lambda: _contar(catalogo, selecao, busca),
+        sorted((nome, valor) for nome, (valor, _) in selecao.items()),
+    )
+
+
+def _contar(catalogo, selecao, busca):
+    produtos = Produto.objects.filter(ativo=True)
+    if busca:
+        produtos = search.buscar(produtos, busca)
+
+    def condicao(*partes):
+        partes = [parte for parte in partes if parte]
+        return Q(*partes) if partes else None
+
+    agregados = {'total': Count('pk', filter=condicao(*(q for _, q in selecao.values())))}
+    for nome, lista in catalogo.items():
+        # A própria faceta não restringe as suas opções
+        outras = [q for outro, (_, q) in selecao.items() if outro != nome]
+        for i, (_, _, q) in enumerate(lista):
+            agregados[f'{nome}_{i}'] = Count('pk', filter=condicao(q, *outras))
+
+    totais = produtos.order_by().aggregate(**agregados)
+
+    return {
+        'total': totais['total'],
+        'facetas': [
+            {
+                'nome': nome,
+                'titulo': FACETAS[nome],
+                'opcoes': [
+                    {
+                        'valor': valor,
+                        'rotulo': rotulo,
+                        'total': totais[f'{nome}_{i}'],
+                        'selecionada': selecao.get(nome, (None,))[0] == valor,
+                    }
+                    for i, (valor, rotulo, _) in enumerate(catalogo[nome])
+                ],
+            }
+            for nome in FACETAS
+        ],
+    }
@@ -0,0 +1,445 @@
+"""
+Geração antecipada dos derivados de imagem dos produtos (imagekit).
+
+Com a estratégia just-in-time padrão do imagekit, cada `.url` de um
+ImageSpecField confere no storage se o arquivo existe e, se não existir,
+redimensiona a imagem ali mesmo, na requisição do visitante. Aqui a
+estratégia é otimista: a URL é montada só a partir do nome da imagem de
+origem, sem tocar no storage, e os arquivos são gerados
+
+- quando a imagem do produto muda (após o commit da transação que a salvou);
+- pelo comando warm_product_images, que gera todos os derivados do catálogo
+  em paralelo (ProcessPoolExecutor) — roda no build.sh e deve rodar depois
+  de importações em massa, que não passam por save().
+
+Só essas duas gerações, quando terminam sem erros, gravam a marca de
+derivados gerados no mapa do produto (abaixo). Sem ela — produtos
+anteriores ao deploy, importados, ainda não aquecidos ou com falha na
+geração — nada garante que os arquivos existam, e as URLs desse produto
+seguem o just-in-time.
+
+URLs e dimensões de cada derivado ficam gravadas em Produto.imagens (o
+"mapa"), recalculado quando a imagem muda: a API serializa o mapa sem
+abrir a imagem nem consultar o storage — mas só dos produtos marcados;
+os demais ela serve pela imagem original.
+
+Antes de ir para o storage, todo upload passa pela ingestão (ingerir):
+orientação EXIF aplicada, metadados removidos, redução para a resolução
+mestre (IMAGENS_RESOLUCAO_MESTRE), dimensões gravadas no produto e um
+placeholder borrado minúsculo em data URI.
+"""
+import base64
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from imagekit.cachefiles.strategies import Optimistic
+from imagekit.processors import ResizeToFill, ResizeToFit
+from PIL import Image, ImageCms, ImageFilter, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# ImageSpecFields de Produto gerados pelo aquecimento
+DERIVADOS = (
+    'thumbnail', 'thumbnail_lista', 'imagem_detalhe',
+    'thumbnail_webp', 'thumbnail_lista_webp', 'imagem_detalhe_webp',
+)
+
+# Variantes expostas pela API: nome -> (derivado JPEG, derivado WebP)
+VARIANTES = {
+    'card': ('thumbnail', 'thumbnail_webp'),
+    'lista': ('thumbnail_lista', 'thumbnail_lista_webp'),
+    'detalhe': ('imagem_detalhe', 'imagem_detalhe_webp'),
+}
+
+LOTE_PADRAO = 25
+
+# Maior lado do placeholder: ~20 px bastam para um borrão fiel às cores
+LADO_PLACEHOLDER = 20
+
+
+class OtimistaAposCommit(Optimistic):
+    """
+    Estratégia otimista do imagekit que gera os derivados após o commit.
+
+    Gerar dentro da transação seguraria os locks do save() durante o
+    redimensionamento, e um rollback deixaria arquivos órfãos. A URL só é
+    otimista para produtos com a marca de derivados gerados (ver
+    derivados_gerados); os demais seguem o just-in-time.
+    """
+
+    def on_source_saved(self, file):
+        origem = file.generator.source
+        produto = origem.instance
+        # O signal chega uma vez por derivado: um único agendamento por imagem
+        if getattr(produto, '_derivados_agendados', None) == origem.name:
+            return
+        produto._derivados_agendados = origem.name
+        pk, nome = produto.pk, origem.name
+        transaction.on_commit(lambda: _gerar_apos_commit(pk, nome))
+
+    def on_existence_required(self, file):
+        origem = getattr(file.generator, 'source', None)
+        if not derivados_gerados(getattr(origem, 'instance', None)):
+            # generate() só redimensiona se o backend não souber do arquivo
+            _gerar_arquivo(file)
+
+
+def derivados_gerados(produto):
+    """
+    True se todos os derivados da imagem atual do produto foram gerados.
+
+    A marca (Produto.imagens['gerado'], com o nome da imagem) só é gravada
+    depois que a geração após o commit ou o aquecimento termina sem erros.
+
+    Args:
+        produto: Produto (ou None)
+
+    Returns:
+        bool
+    """
+    if produto is None or not produto.imagem:
+        return False
+    # Sem forçar a leitura de um campo adiado: na dúvida, just-in-time
+    mapa = produto.__dict__.get('imagens') or {}
+    return mapa.get('gerado') == produto.imagem.name
+
+
+def _gerar_apos_commit(pk, nome):
+    from .models import Produto
+
+    _, erros = gerar_derivados(Produto(pk=pk, imagem=nome))
+    registrar_geracao([(pk, nome, not erros)])
+
+
+def registrar_geracao(resultados):
+    """
+    Grava ou remove a marca de derivados gerados dos produtos.
+
+    O mapa é recalculado junto (produtos importados podem não ter um).
+    Produtos cuja imagem mudou desde a geração são ignorados.
+
+    Args:
+        resultados: Iterável de (pk, nome da imagem, True se não houve erros)
+    """
+    from .models import Produto
+
+    resultados = {pk: (nome, ok) for pk, nome, ok in resultados}
+    campos = ('pk', 'imagem', 'imagem_largura', 'imagem_altura', 'imagens')
+    alterados = []
+    for produto in Produto.objects.filter(pk__in=resultados).only(*campos):
+        nome, ok = resultados[produto.pk]
+        if produto.imagem.name != nome:
+            continue
+        mapa = mapa_derivados(produto)
+        if ok:
+            mapa['gerado'] = nome
+        else:
+            mapa.pop('gerado', None)
+        if mapa != produto.imagens:
+            produto.imagens = mapa
+            alterados.append(produto)
+    Produto.objects.bulk_update(alterados, ['imagens'], batch_size=500)
+
+
+def _gerar_arquivo(arquivo, forcar=False):
+    try:
+        if forcar:
+            # Salvar por cima faria o storage escolher outro nome para o arquivo
+            arquivo.storage.delete(arquivo.name)
+        arquivo.generate(force=forcar)
+        return True
+    except Exception:
+        # Um derivado com problema não pode derrubar o save nem o lote
+        logger.exception(f'Erro ao gerar o derivado {arquivo.name}')
+        return False
+
+
+def gerar_derivados(produto, forcar=False):
+    """
+    Gera todos os derivados de imagem de um produto.
+
+    Args:
+        produto: Produto com imagem
+        forcar: Regera mesmo os arquivos que já existem
+
+    Returns:
+        tuple[int, int]: (arquivos gerados ou já existentes, erros)
+    """
+    gerados = erros = 0
+    for nome in DERIVADOS:
+        if _gerar_arquivo(getattr(produto, nome), forcar):
+            gerados += 1
+        else:
+            erros += 1
+    return gerados, erros
+
+
+def _gerar_lote(itens, forcar):
+    """Executado nos processos do pool: não usa o banco, só o nome da imagem."""
+    from .models import Produto
+
+    gerados = erros = 0
+    resultados = []
+    for pk, imagem in itens:
+        g, e = gerar_derivados(Produto(pk=pk, imagem=imagem), forcar)
+        gerados += g
+        erros += e
+        resultados.append((pk, imagem, not e))
+    return resultados, gerados, erros
+
+
+def _inicializar_processo():
+    # Com o método 'spawn' (macOS/Windows) o processo começa sem o Django
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def aquecer(produtos=None, processos=None, lote=LOTE_PADRAO, forcar=False, progresso=None):
+    """
+    Gera os derivados de imagem de todos os produtos em paralelo.
+
+    Os processos recebem apenas (id, nome da imagem) de cada produto: a
+    geração não depende do banco, só do storage.
+
+    Args:
+        produtos: QuerySet de produtos (default: todos com imagem)
+        processos: Processos do pool (default: IMAGENS_PROCESSOS ou núcleos
+            da máquina; 1 gera no próprio processo)
+        lote: Produtos por tarefa enviada ao pool
+        forcar: Regera mesmo os arquivos que já existem
+        progresso: Callable(produtos_concluidos, total) chamado a cada lote
+
+    Returns:
+        dict: 'produtos', 'arquivos' e 'erros'
+    """
+    from .models import Produto
+
+    if produtos is None:
+        produtos = Produto.objects.all()
+    itens = list(
+        produtos.exclude(imagem='').exclude(imagem__isnull=True)
+        .order_by('pk').values_list('pk', 'imagem')
+    )
+    lotes = [itens[i:i + lote] for i in range(0, len(itens), lote)]
+    processos = processos or getattr(settings, 'IMAGENS_PROCESSOS', None)
+    totais = {'produtos': 0, 'arquivos': 0, 'erros': 0}
+
+    def acumular(resultado):
+        resultados, gerados, erros = resultado
+        # A marca só vale para produtos sem nenhum derivado com erro
+        registrar_geracao(resultados)
+        totais['produtos'] += len(resultados)
+        totais['arquivos'] += gerados
+        totais['erros'] += erros
+        if progresso:
+            progresso(totais['produtos'], len(itens))
+
+    if processos == 1 or len(lotes) <= 1:
+        for itens_lote in lotes:
+            acumular(_gerar_lote(itens_lote, forcar))
+        return totais
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_processo) as pool:
+        tarefas = [pool.submit(_gerar_lote, itens_lote, forcar) for itens_lote in lotes]
+        for tarefa in as_completed(tarefas):
+            acumular(tarefa.result())
+    return totais
+
+
+def ingerir(produto):
+    """
+    Normaliza a imagem recém-enviada de um produto, antes de ir para o storage.
+
+    Aplica a orientação EXIF, descarta os metadados (EXIF, ICC, XMP),
+    reduz o maior lado para IMAGENS_RESOLUCAO_MESTRE e regrava como JPEG
+    (ou PNG, se houver transparência). Preenche imagem_largura,
+    imagem_altura e imagem_placeholder. Um arquivo que o Pillow não
+    consegue abrir é mantido como veio.
+
+    Args:
+        produto: Produto com um upload ainda não salvo em `imagem`
+
+    Returns:
+        bool: True se a imagem foi processada
+    """
+    resolucao = getattr(settings, 'IMAGENS_RESOLUCAO_MESTRE', 2000)
+    enviado = produto.imagem
+    try:
+        enviado.seek(0)
+        with Image.open(enviado) as original:
+            imagem = ImageOps.exif_transpose(original)
+            imagem.thumbnail((resolucao, resolucao), Image.Resampling.LANCZOS)
+            transparente = imagem.mode in ('RGBA', 'LA', 'PA') or 'transparency' in imagem.info
+            imagem = _para_srgb(imagem).convert('RGBA' if transparente else 'RGB')
+            imagem.info = {}
+    except (UnidentifiedImageError, OSError):
+        logger.warning(f'Imagem {enviado.name} não pôde ser processada; mantida como enviada')
+        return False
+
+    saida = io.BytesIO()
+    if transparente:
+        imagem.save(saida, 'PNG', optimize=True)
+        extensao = '.png'
+    else:
+        # Sem exif=/icc_profile=: nada dos metadados originais é copiado
+        imagem.save(saida, 'JPEG', quality=90, optimize=True, progressive=True)
+        extensao = '.jpg'
+
+    produto.imagem = ContentFile(saida.getvalue(), name=f'{Path(enviado.name).stem}{extensao}')
+    produto.imagem_largura, produto.imagem_altura = imagem.size
+    produto.imagem_placeholder = placeholder(imagem)
+    return True
+
+
+def _para_srgb(imagem):
+    """Converte para sRGB se houver perfil ICC embutido (que será descartado)."""
+    perfil = imagem.info.get('icc_profile')
+    if not perfil:
+        return imagem
+    try:
+        return ImageCms.profileToProfile(
+            imagem, ImageCms.ImageCmsProfile(io.BytesIO(perfil)), ImageCms.createProfile('sRGB'),
+            outputMode='RGBA' if 'A' in imagem.mode else 'RGB',
+        )
+    except (ImageCms.PyCMSError, OSError, ValueError):
+        # Perfil inválido: segue sem conversão, como a maioria dos navegadores faria
+        return imagem
+
+
+def placeholder(imagem):
+    """
+    Miniatura borrada da imagem em data URI (JPEG, algumas centenas de bytes).
+
+    Args:
+        imagem: PIL.Image
+
+    Returns:
+        str: 'data:image/jpeg;base64,...'
+    """
+    miniatura = imagem.convert('RGB')
+    miniatura.thumbnail((LADO_PLACEHOLDER, LADO_PLACEHOLDER), Image.Resampling.BILINEAR)
+    miniatura = miniatura.filter(ImageFilter.GaussianBlur(1))
+    saida = io.BytesIO()
+    miniatura.save(saida, 'JPEG', quality=40, optimize=True)
+    return f'data:image/jpeg;base64,{base64.b64encode(saida.getvalue()).decode()}'
+
+
+def _dimensoes(processadores, largura, altura):
+    """Dimensões do resultado dos processadores (None se não der para prever)."""
+    for processador in processadores:
+        if isinstance(processador, ResizeToFill):
+            largura, altura = processador.width, processador.height
+        elif isinstance(processador, ResizeToFit) and largura and altura:
+            # Mesmo cálculo do pilkit (que amplia imagens menores por padrão)
+            proporcao = min(processador.width / largura, processador.height / altura)
+            largura, altura = round(largura * proporcao), round(altura * proporcao)
+        else:
+            return None, None
+    return largura, altura
+
+
+def mapa_derivados(produto):
+    """
+    Monta o mapa de URLs e dimensões dos derivados de um produto.
+
+    As dimensões da imagem original vêm da ingestão (imagem_largura e
+    imagem_altura) ou do mapa atual, se a imagem não mudou; senão o
+    cabeçalho da imagem é lido do storage (uma vez).
+
+    Args:
+        produto: Produto
+
+    Returns:
+        dict: {} sem imagem; senão 'origem', 'largura', 'altura' da imagem
+        original, 'gerado' (mantido se a imagem não mudou) e, por variante,
+        'jpeg', 'webp', 'largura' e 'altura'
+    """
+    if not produto.imagem:
+        return {}
+
+    atual = produto.imagens or {}
+    if produto.imagem_largura and produto.imagem_altura:
+        largura, altura = produto.imagem_largura, produto.imagem_altura
+    elif atual.get('origem') == produto.imagem.name and atual.get('largura'):
+        largura, altura = atual['largura'], atual['altura']
+    else:
+        try:
+            largura, altura = produto.imagem.width, produto.imagem.height
+        except (OSError, ValueError):
+            logger.warning(f'Não foi possível ler as dimensões de {produto.imagem.name}')
+            largura = altura = None
+
+    mapa = {'origem': produto.imagem.name, 'largura': largura, 'altura': altura}
+    if atual.get('gerado') == produto.imagem.name:
+        mapa['gerado'] = produto.imagem.name
+    for variante, (jpeg, webp) in VARIANTES.items():
+        arquivo = getattr(produto, jpeg)
+        largura_variante, altura_variante = _dimensoes(arquivo.generator.processors, largura, altura)
+        mapa[variante] = {
+            'jpeg': _url(arquivo),
+            'webp': _url(getattr(produto, webp)),
+            'largura': largura_variante,
+            'altura': altura_variante,
+        }
+    return mapa
+
+
+def _url(arquivo):
+    # Direto do storage: o mapa é montado antes de os derivados existirem
+    # (ainda na transação do save), e .url dispararia o just-in-time
+    return arquivo.storage.url(arquivo.name)
+
+
+def atualizar_mapa(produto):
+    """
+    Recalcula e grava o mapa de derivados de um produto (UPDATE sem signals).
+
+    Args:
+        produto: Produto (o atributo `imagens` também é atualizado)
+    """
+    produto.imagens = mapa_derivados(produto)
+    type(produto).objects.filter(pk=produto.pk).update(imagens=produto.imagens)
+
+
+def atualizar_mapas(produtos=None, lote=500):
+    """
+    Recalcula o mapa de derivados dos produtos e grava os que mudaram.
+
+    Cobre produtos criados por bulk_create/importação e mudanças de
+    MEDIA_URL ou de storage, que alteram as URLs.
+
+    Args:
+        produtos: QuerySet de produtos (default: todos)
+        lote: Tamanho dos lotes do bulk_update
+
+    Returns:
+        int: Número de produtos atualizados
+    """
+    from .models import Produto
+
+    if produtos is None:
+        produtos = Produto.objects.all()
+
+    alterados, total = [], 0
+    campos = ('pk', 'imagem', 'imagem_largura', 'imagem_altura', 'imagens')
+    for produto in produtos.only(*campos).order_by('pk').iterator(chunk_size=lote):
+        mapa = mapa_derivados(produto)
+        if mapa != produto.imagens:
+            produto.imagens = mapa
+            alterados.append(produto)
+        if len(alterados) >= lote:
+            Produto.objects.bulk_update(alterados, ['imagens'])
+            total += len(alterados)
+            alterados = []
+    if alterados:
+        Produto.objects.bulk_update(alterados, ['imagens'])
+        total += len(alterados)
+    return total
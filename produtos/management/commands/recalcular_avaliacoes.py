@@ -0,0 +1,30 @@
+"""Recalcula os agregados de avaliação armazenados em Produto."""
+from django.core.management.base import BaseCommand
+
+from produtos.models import Produto
+from produtos.services import recalcular_avaliacoes
+
+
+class Command(BaseCommand):
+    help = 'Recalcula rating_medio/rating_total de todos os produtos a partir das avaliações.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Quantidade de produtos atualizados por UPDATE (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        lote = max(options['lote'], 1)
+        ids = list(Produto.objects.order_by('pk').values_list('pk', flat=True))
+        total = 0
+
+        for inicio in range(0, len(ids), lote):
+            faixa = ids[inicio:inicio + lote]
+            total += recalcular_avaliacoes(
+                Produto.objects.filter(pk__gte=faixa[0], pk__lte=faixa[-1])
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'{total} produto(s) recalculado(s).'))
@@ -0,0 +1,13 @@
+"""Reconstrói o índice de busca textual do catálogo."""
+from django.core.management.base import BaseCommand
+
+from produtos import search
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca de produtos no backend configurado.'
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        search.reindexar()
+        self.stdout.write(self.style.SUCCESS(f'Índice reconstruído ({type(backend).__name__}).'))
@@ -0,0 +1,49 @@
+"""Gera antecipadamente os derivados de imagem (JPEG e WebP) e os mapas de URLs dos produtos."""
+from django.core.management.base import BaseCommand
+
+from produtos import imagens
+from produtos.models import Produto
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera em paralelo os thumbnails e imagens de detalhe (JPEG e WebP) dos '
+        'produtos, para que nenhuma requisição precise redimensionar imagens.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processos', type=int, default=None,
+            help='Processos do pool (padrão: IMAGENS_PROCESSOS ou núcleos da máquina).',
+        )
+        parser.add_argument('--lote', type=int, default=imagens.LOTE_PADRAO, help='Produtos por tarefa.')
+        parser.add_argument('--forcar', action='store_true', help='Regera mesmo os arquivos existentes.')
+        parser.add_argument('--produtos', type=int, nargs='+', metavar='ID', help='Apenas estes produtos.')
+
+    def handle(self, *args, **options):
+        produtos = Produto.objects.all()
+        if options['produtos']:
+            produtos = produtos.filter(pk__in=options['produtos'])
+
+        def progresso(concluidos, total):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{concluidos}/{total} produto(s)')
+
+        totais = imagens.aquecer(
+            produtos,
+            processos=options['processos'],
+            lote=options['lote'],
+            forcar=options['forcar'],
+            progresso=progresso,
+        )
+
+        mapas = imagens.atualizar_mapas(produtos)
+
+        mensagem = (
+            f'{totais["arquivos"]} derivado(s) prontos para {totais["produtos"]} produto(s), '
+            f'{mapas} mapa(s) de imagens atualizado(s)'
+        )
+        if totais['erros']:
+            self.stdout.write(self.style.WARNING(f'{mensagem}; {totais["erros"]} erro(s) (ver log).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{mensagem}.'))
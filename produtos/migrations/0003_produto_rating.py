@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:06
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def preencher_agregados(apps, schema_editor):
+    Produto = apps.get_model('produtos', 'Produto')
+    Avaliacao = apps.get_model('produtos', 'Avaliacao')
+
+    avaliacoes = Avaliacao.objects.filter(produto=OuterRef('pk')).order_by().values('produto')
+    Produto.objects.update(
+        rating_total=Coalesce(Subquery(avaliacoes.annotate(c=Count('id')).values('c')), 0),
+        rating_soma=Coalesce(Subquery(avaliacoes.annotate(s=Sum('rating')).values('s')), 0),
+        rating_medio=Coalesce(
+            Subquery(avaliacoes.annotate(m=Avg('rating')).values('m'), output_field=FloatField()),
+            0.0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0002_avaliacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='rating_medio',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='rating_soma',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='rating_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(preencher_agregados, migrations.RunPython.noop),
+    ]
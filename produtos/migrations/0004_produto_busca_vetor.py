@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:10
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+# Objetos específicos do PostgreSQL; em outros bancos estas etapas são ignoradas.
+SQL_CRIAR = [
+    """
+    CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent (COPY = portuguese);
+    ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent
+        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    """,
+    'CREATE INDEX produtos_produto_busca_vetor_gin ON produtos_produto USING gin (busca_vetor);',
+    'CREATE INDEX produtos_produto_nome_trgm ON produtos_produto USING gin (nome gin_trgm_ops);',
+    """
+    UPDATE produtos_produto SET busca_vetor =
+        setweight(to_tsvector('portuguese_unaccent', coalesce(nome, '')), 'A') ||
+        setweight(to_tsvector('portuguese_unaccent', coalesce(descricao, '')), 'B');
+    """,
+]
+
+SQL_REMOVER = [
+    'DROP INDEX IF EXISTS produtos_produto_nome_trgm;',
+    'DROP INDEX IF EXISTS produtos_produto_busca_vetor_gin;',
+    'DROP TEXT SEARCH CONFIGURATION IF EXISTS portuguese_unaccent;',
+]
+
+
+def criar_objetos_busca(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in SQL_CRIAR:
+        schema_editor.execute(sql)
+
+
+def remover_objetos_busca(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in SQL_REMOVER:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0003_produto_rating'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='produto',
+            name='busca_vetor',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(criar_objetos_busca, remover_objetos_busca),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0004_produto_busca_vetor'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['ativo', 'criado_em', 'id'], name='produtos_pr_ativo_431fe2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['ativo', 'preco', 'id'], name='produtos_pr_ativo_135274_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['ativo', 'nome', 'id'], name='produtos_pr_ativo_e4f5c2_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0005_produto_indices_cursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='limite_estoque_baixo',
+            field=models.PositiveIntegerField(blank=True, help_text='Estoque abaixo deste valor é considerado baixo (vazio usa o padrão do sistema)', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0006_categoria_limite_estoque_baixo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='imagens',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
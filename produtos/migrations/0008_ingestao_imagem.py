@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0007_mapa_imagens_derivadas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='imagem_altura',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='imagem_largura',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='imagem_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
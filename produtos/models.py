@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -11,6 +12,11 @@ class Categoria(models.Model):
     nome = models.CharField(max_length=100, unique=True)
     descricao = models.TextField(blank=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
+    limite_estoque_baixo = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Estoque abaixo deste valor é considerado baixo (vazio usa o padrão do sistema)'
+    )
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
 
@@ -72,6 +78,28 @@ class Produto(models.Model):
         format='JPEG',
         options={'quality': 90}
     )
+
+    # Mesmos recortes em WebP (servidos via <picture> a quem aceita o formato)
+    thumbnail_webp = ImageSpecField(
+        source='imagem',
+        processors=[ResizeToFill(300, 300)],
+        format='WEBP',
+        options={'quality': 80, 'method': 6}
+    )
+
+    thumbnail_lista_webp = ImageSpecField(
+        source='imagem',
+        processors=[ResizeToFill(260, 220)],
+        format='WEBP',
+        options={'quality': 75, 'method': 6}
+    )
+
+    imagem_detalhe_webp = ImageSpecField(
+        source='imagem',
+        processors=[ResizeToFit(800, 800)],
+        format='WEBP',
+        options={'quality': 85, 'method': 6}
+    )
     
     estoque = models.PositiveIntegerField(default=0)
     ativo = models.BooleanField(default=True)
@@ -80,6 +108,27 @@ class Produto(models.Model):
         help_text='Produto em destaque na página inicial'
     )
     slug = models.SlugField(max_length=200, unique=True, blank=True)
+
+    # Agregados das avaliações, mantidos pelos signals de Avaliacao (UPDATE
+    # com F()); save() de um produto existente não os grava (CAMPOS_AVALIACAO)
+    rating_medio = models.FloatField(default=0, editable=False)
+    rating_total = models.PositiveIntegerField(default=0, editable=False)
+    rating_soma = models.PositiveIntegerField(default=0, editable=False)
+
+    # Preenchidos na ingestão da imagem (produtos.imagens.ingerir). Não são
+    # width_field/height_field do ImageField, que abririam a imagem no
+    # post_init de cada produto ainda sem dimensões
+    imagem_largura = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    imagem_altura = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # Miniatura borrada em data URI, para exibir enquanto a imagem carrega
+    imagem_placeholder = models.TextField(blank=True, editable=False)
+
+    # URLs e dimensões dos derivados da imagem, mantidas por produtos.imagens
+    imagens = models.JSONField(default=dict, blank=True, editable=False)
+
+    # Vetor de busca full-text (PostgreSQL), mantido por produtos.search
+    busca_vetor = SearchVectorField(null=True, editable=False)
+
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
 
@@ -87,12 +136,40 @@ class Produto(models.Model):
         verbose_name = 'Produto'
         verbose_name_plural = 'Produtos'
         ordering = ['-criado_em']
+        # Listagens paginadas por cursor: filtro ativo + ordenação + desempate
+        indexes = [
+            models.Index(fields=['ativo', 'criado_em', 'id']),
+            models.Index(fields=['ativo', 'preco', 'id']),
+            models.Index(fields=['ativo', 'nome', 'id']),
+        ]
+
+    CAMPOS_AVALIACAO = ('rating_medio', 'rating_total', 'rating_soma')
 
     def save(self, *args, **kwargs):
-        if not self.slug:
+        adiados = self.get_deferred_fields()
+        if 'slug' not in adiados and not self.slug:
             self.slug = slugify(self.nome)
+        # Uma instância carregada antes de uma nova avaliação (ex.: edição no
+        # admin) regravaria os agregados antigos. Só vão no INSERT ou se
+        # pedidos explicitamente em update_fields (ver _do_update).
+        if adiados and not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # Como o Django faz com campos adiados: só os carregados são
+            # gravados (mais atualizado_em, preenchido no próprio save)
+            kwargs['update_fields'] = [
+                campo.attname for campo in self._meta.concrete_fields
+                if not campo.primary_key
+                and (campo.attname not in adiados or getattr(campo, 'auto_now', False))
+                and campo.name not in self.CAMPOS_AVALIACAO
+            ]
         super().save(*args, **kwargs)
 
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, *args, **kwargs):
+        # Save sem update_fields: o UPDATE deixa de fora os agregados. Se a
+        # linha não existir, o Django segue para o INSERT com todos os campos.
+        if update_fields is None:
+            values = [valor for valor in values if valor[0].name not in self.CAMPOS_AVALIACAO]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, *args, **kwargs)
+
     def __str__(self):
         return self.nome
 
@@ -113,16 +190,13 @@ class Produto(models.Model):
     
     @property
     def media_avaliacoes(self):
-        """Retorna a média das avaliações do produto."""
-        avaliacoes = self.avaliacoes.all()
-        if not avaliacoes:
-            return 0
-        return sum(av.rating for av in avaliacoes) / len(avaliacoes)
+        """Retorna a média das avaliações do produto (agregado rating_medio)."""
+        return self.rating_medio
     
     @property
     def total_avaliacoes(self):
-        """Retorna o total de avaliações do produto."""
-        return self.avaliacoes.count()
+        """Retorna o total de avaliações do produto (agregado rating_total)."""
+        return self.rating_total
 
 
 class Avaliacao(models.Model):
@@ -0,0 +1,54 @@
+"""
+Busca textual do catálogo de produtos com backends plugáveis.
+
+O backend é escolhido pela setting PRODUTOS_BUSCA_BACKEND (nome curto ou
+caminho pontilhado). Sem configuração, usa o full-text do PostgreSQL quando
+o banco é PostgreSQL e o índice invertido em memória nos demais casos.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    'postgres': 'produtos.search.postgres.PostgresBackend',
+    'memoria': 'produtos.search.memoria.IndiceInvertidoBackend',
+}
+
+
+@lru_cache(maxsize=None)
+def _instanciar(caminho):
+    return import_string(caminho)()
+
+
+def get_backend():
+    """Retorna a instância do backend de busca configurado."""
+    nome = getattr(settings, 'PRODUTOS_BUSCA_BACKEND', '') or (
+        'postgres' if connection.vendor == 'postgresql' else 'memoria'
+    )
+    return _instanciar(BACKENDS.get(nome, nome))
+
+
+def buscar(queryset, termo):
+    """
+    Filtra o queryset de produtos pelo termo, ordenando por relevância.
+
+    Args:
+        queryset: QuerySet de Produto já filtrado pela view
+        termo: Texto digitado pelo usuário
+
+    Returns:
+        QuerySet[Produto]: Produtos encontrados, anotados com `relevancia`
+    """
+    return get_backend().buscar(queryset, termo)
+
+
+def atualizar_produto(produto):
+    """Atualiza o índice de busca após alterações em um produto."""
+    get_backend().atualizar_produto(produto)
+
+
+def reindexar():
+    """Reconstrói o índice de busca de todo o catálogo."""
+    get_backend().reindexar()
@@ -0,0 +1,147 @@
+"""Backend de busca com índice invertido em memória (SQLite e testes)."""
+import heapq
+import json
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Case, Count, FloatField, Max, Value, When
+from django.db.models.expressions import RawSQL
+
+from produtos.models import Produto
+from .texto import tokenizar, similaridade
+
+
+class IndiceInvertidoBackend:
+    """
+    Índice invertido termo → {produto_id: peso} mantido por processo.
+
+    O índice é reconstruído quando a assinatura do catálogo (quantidade de
+    produtos e última atualização) muda, o que mantém processos diferentes
+    consistentes sem depender de signals.
+
+    Todos os produtos encontrados entram no resultado (contagem e paginação
+    corretas), mas só os LIMITE_RANKING mais relevantes recebem a
+    relevância calculada; os demais vêm depois deles, por data de criação.
+    """
+
+    PESOS = {'nome': 1.0, 'descricao': 0.4}
+    FATOR_PREFIXO = 0.5
+    SIMILARIDADE_MINIMA = 0.3
+    # Produtos ordenados por relevância (cada um vira um WHEN na consulta)
+    LIMITE_RANKING = 500
+    # Acima disso, no SQLite, os ids vão num único parâmetro JSON (json_each)
+    # em vez de um parâmetro por id, que estouraria o limite de variáveis
+    LIMITE_PARAMETROS = 900
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._assinatura = None
+        # (índice, vocabulário) trocados juntos: uma busca concorrente nunca
+        # vê o índice novo com o vocabulário antigo
+        self._dados = ({}, [])
+
+    def buscar(self, queryset, termo):
+        termos = tokenizar(termo)
+        if not termos:
+            return queryset
+
+        self._garantir_indice()
+        indice, vocabulario = self._dados
+        pontuacao = (
+            self._pontuar(indice, vocabulario, termos)
+            or self._pontuar_aproximado(indice, vocabulario, termos)
+        )
+        if not pontuacao:
+            return queryset.none()
+
+        melhores = heapq.nlargest(self.LIMITE_RANKING, pontuacao.items(), key=lambda par: par[1])
+        relevancia = Case(
+            *[When(pk=pk, then=Value(peso)) for pk, peso in melhores],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        return (
+            queryset.filter(pk__in=self._ids(list(pontuacao)))
+            .annotate(relevancia=relevancia)
+            .order_by('-relevancia', '-criado_em')
+        )
+
+    def _ids(self, ids):
+        if connection.vendor == 'sqlite' and len(ids) > self.LIMITE_PARAMETROS:
+            return RawSQL('SELECT value FROM json_each(%s)', [json.dumps(ids)])
+        return ids
+
+    def atualizar_produto(self, produto):
+        # A assinatura do catálogo muda a cada save; nada a fazer aqui.
+        pass
+
+    def reindexar(self):
+        with self._lock:
+            self._assinatura = None
+        self._garantir_indice()
+
+    def _assinatura_atual(self):
+        dados = Produto.objects.aggregate(total=Count('id'), ultimo=Max('atualizado_em'))
+        return dados['total'], dados['ultimo']
+
+    def _garantir_indice(self):
+        assinatura = self._assinatura_atual()
+        if assinatura == self._assinatura:
+            return
+        with self._lock:
+            if assinatura != self._assinatura:
+                self._construir()
+                self._assinatura = assinatura
+
+    def _construir(self):
+        indice = defaultdict(dict)
+        produtos = Produto.objects.order_by().values_list('pk', 'nome', 'descricao')
+
+        for pk, nome, descricao in produtos.iterator(chunk_size=2000):
+            for campo, texto in (('nome', nome), ('descricao', descricao)):
+                peso = self.PESOS[campo]
+                for termo in tokenizar(texto):
+                    postings = indice[termo]
+                    postings[pk] = postings.get(pk, 0) + peso
+
+        self._dados = (dict(indice), sorted(indice))
+
+    def _expandir(self, vocabulario, termo):
+        """Termos indexados iguais ao termo ou que começam com ele."""
+        i = bisect_left(vocabulario, termo)
+        while i < len(vocabulario) and vocabulario[i].startswith(termo):
+            indexado = vocabulario[i]
+            yield indexado, 1.0 if indexado == termo else self.FATOR_PREFIXO
+            i += 1
+
+    def _pontuar(self, indice, vocabulario, termos):
+        """Pontua produtos que contêm todos os termos (semântica AND)."""
+        pontuacao = None
+        for termo in termos:
+            parcial = {}
+            for indexado, fator in self._expandir(vocabulario, termo):
+                for pk, peso in indice[indexado].items():
+                    parcial[pk] = max(parcial.get(pk, 0), peso * fator)
+
+            if pontuacao is None:
+                pontuacao = parcial
+            else:
+                pontuacao = {pk: pontuacao[pk] + p for pk, p in parcial.items() if pk in pontuacao}
+
+            if not pontuacao:
+                return {}
+        return pontuacao
+
+    def _pontuar_aproximado(self, indice, vocabulario, termos):
+        """Fallback para erros de digitação usando similaridade de trigramas."""
+        pontuacao = {}
+        for termo in termos:
+            for indexado in vocabulario:
+                sim = similaridade(termo, indexado)
+                if sim < self.SIMILARIDADE_MINIMA:
+                    continue
+                for pk, peso in indice[indexado].items():
+                    pontuacao[pk] = max(pontuacao.get(pk, 0), peso * sim)
+        return pontuacao
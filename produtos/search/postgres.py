@@ -0,0 +1,51 @@
+"""Backend de busca full-text do PostgreSQL (tsvector + GIN + pg_trgm)."""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db.models import F
+
+from produtos.models import Produto
+from .texto import palavras
+
+# Configuração criada na migração 0004: dicionário portuguese_stem + unaccent
+CONFIGURACAO = 'portuguese_unaccent'
+
+
+def vetor_busca():
+    """Expressão do tsvector armazenado em Produto.busca_vetor."""
+    return (
+        SearchVector('nome', weight='A', config=CONFIGURACAO)
+        + SearchVector('descricao', weight='B', config=CONFIGURACAO)
+    )
+
+
+class PostgresBackend:
+    """Busca ranqueada sobre a coluna busca_vetor com fallback por trigramas."""
+
+    def buscar(self, queryset, termo):
+        termos = palavras(termo)
+        if not termos:
+            return queryset
+
+        # Termos saneados por palavras(); o sufixo :* permite buscar por prefixo
+        consulta = SearchQuery(
+            ' & '.join(f'{t}:*' for t in termos),
+            search_type='raw',
+            config=CONFIGURACAO,
+        )
+        resultado = queryset.filter(busca_vetor=consulta).annotate(
+            relevancia=SearchRank(F('busca_vetor'), consulta)
+        )
+        if resultado.exists():
+            return resultado.order_by('-relevancia', '-criado_em')
+
+        # Operador % (pg_trgm.similarity_threshold), acelerado pelo índice gin_trgm_ops
+        return (
+            queryset.filter(nome__trigram_similar=termo)
+            .annotate(relevancia=TrigramSimilarity('nome', termo))
+            .order_by('-relevancia', '-criado_em')
+        )
+
+    def atualizar_produto(self, produto):
+        Produto.objects.filter(pk=produto.pk).update(busca_vetor=vetor_busca())
+
+    def reindexar(self):
+        Produto.objects.update(busca_vetor=vetor_busca())
@@ -0,0 +1,58 @@
+"""Normalização de texto compartilhada pelos backends de busca."""
+import re
+import unicodedata
+
+_PALAVRA = re.compile(r'[a-z0-9]+')
+
+# Sufixos de plural mais comuns do português, do mais longo para o mais curto
+_SUFIXOS_PLURAL = (
+    ('oes', 'ao'),
+    ('aes', 'ao'),
+    ('ais', 'al'),
+    ('eis', 'el'),
+    ('ois', 'ol'),
+    ('ns', 'm'),
+    ('res', 'r'),
+    ('zes', 'z'),
+    ('s', ''),
+)
+
+
+def sem_acentos(texto):
+    """Remove acentos e converte para minúsculas."""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def radical(palavra):
+    """Aplica um stemming leve (remoção de plural) a uma palavra normalizada."""
+    if len(palavra) <= 3 or palavra.isdigit():
+        return palavra
+    for sufixo, troca in _SUFIXOS_PLURAL:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= 3:
+            return palavra[:-len(sufixo)] + troca
+    return palavra
+
+
+def palavras(texto):
+    """Quebra o texto em palavras sem acento, sem aplicar stemming."""
+    return _PALAVRA.findall(sem_acentos(texto))
+
+
+def tokenizar(texto):
+    """Quebra o texto em termos sem acento e reduzidos ao radical."""
+    return [radical(p) for p in palavras(texto)]
+
+
+def trigramas(palavra):
+    """Retorna o conjunto de trigramas da palavra (mesma convenção do pg_trgm)."""
+    preenchida = f'  {palavra} '
+    return {preenchida[i:i + 3] for i in range(len(preenchida) - 2)}
+
+
+def similaridade(a, b):
+    """Similaridade de Jaccard entre os trigramas de duas palavras."""
+    ta, tb = trigramas(a), trigramas(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
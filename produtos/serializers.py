@@ -1,4 +1,9 @@
+from django.db.models import Exists, OuterRef, Value
+from django.db.models.functions import Concat, Trim
 from rest_framework import serializers
+
+from core.carregamento import CarregamentoSerializerMixin
+from .imagens import VARIANTES, derivados_gerados
 from .models import Categoria, Produto, Avaliacao
 
 
@@ -8,15 +13,24 @@ class CategoriaSerializer(serializers.ModelSerializer):
         fields = ['id', 'nome', 'slug', 'descricao']
 
 
-class AvaliacaoSerializer(serializers.ModelSerializer):
-    usuario_nome = serializers.CharField(source='usuario.get_full_name', read_only=True)
+class AvaliacaoSerializer(CarregamentoSerializerMixin, serializers.ModelSerializer):
+    usuario_nome = serializers.SerializerMethodField()
     usuario_username = serializers.CharField(source='usuario.username', read_only=True)
 
+    # Mesmo resultado de User.get_full_name, calculado pelo banco
+    anotacoes = {
+        'nome_completo_usuario': Trim(Concat('usuario__first_name', Value(' '), 'usuario__last_name')),
+    }
+
     class Meta:
         model = Avaliacao
         fields = ['id', 'usuario_nome', 'usuario_username', 'rating', 'comentario', 'criado_em']
         read_only_fields = ['id', 'usuario_nome', 'usuario_username', 'criado_em']
 
+    def get_usuario_nome(self, obj):
+        nome = getattr(obj, 'nome_completo_usuario', None)
+        return obj.usuario.get_full_name() if nome is None else nome
+
 
 class AvaliacaoCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -34,35 +48,71 @@ class ProdutoListSerializer(serializers.ModelSerializer):
     preco_final = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     tem_promocao = serializers.BooleanField(read_only=True)
     disponivel = serializers.BooleanField(read_only=True)
-    media_avaliacoes = serializers.FloatField(read_only=True)
-    total_avaliacoes = serializers.IntegerField(read_only=True)
+    media_avaliacoes = serializers.FloatField(source='rating_medio', read_only=True)
+    total_avaliacoes = serializers.IntegerField(source='rating_total', read_only=True)
     imagem_url = serializers.SerializerMethodField()
+    imagens = serializers.SerializerMethodField()
+
+    # Derivado usado em imagem_url (ver produtos.imagens.VARIANTES)
+    variante_imagem = 'lista'
 
     class Meta:
         model = Produto
         fields = [
             'id', 'nome', 'slug', 'preco', 'preco_promocional', 'preco_final',
             'tem_promocao', 'disponivel', 'estoque', 'destaque', 'categoria',
-            'imagem_url', 'media_avaliacoes', 'total_avaliacoes',
+            'imagem_url', 'imagens', 'imagem_placeholder', 'media_avaliacoes', 'total_avaliacoes',
         ]
 
     def get_imagem_url(self, obj):
         request = self.context.get('request')
-        if obj.imagem and request:
-            return request.build_absolute_uri(obj.imagem.url)
-        return None
-
-
-class ProdutoDetailSerializer(ProdutoListSerializer):
+        if not obj.imagem or not request:
+            return None
+        variante = obj.imagens.get(self.variante_imagem) if derivados_gerados(obj) else None
+        # Derivados ainda não gerados (os arquivos podem não existir), cai para o original
+        return request.build_absolute_uri(variante['jpeg'] if variante else obj.imagem.url)
+
+    def get_imagens(self, obj):
+        """Variantes do mapa gravado no produto, com URLs absolutas e dimensões.
+
+        Só são expostas depois que os derivados foram gerados; antes disso o
+        cliente usa ``imagem_url``, que aponta para o original.
+        """
+        request = self.context.get('request')
+        if not request or not derivados_gerados(obj):
+            return None
+        return {
+            nome: {
+                'jpeg': request.build_absolute_uri(obj.imagens[nome]['jpeg']),
+                'webp': request.build_absolute_uri(obj.imagens[nome]['webp']),
+                'largura': obj.imagens[nome]['largura'],
+                'altura': obj.imagens[nome]['altura'],
+            }
+            for nome in VARIANTES if nome in obj.imagens
+        } or None
+
+
+def _usuario_ja_avaliou(request):
+    if request and request.user.is_authenticated:
+        return Exists(Avaliacao.objects.filter(produto=OuterRef('pk'), usuario=request.user))
+    return Value(False)
+
+
+class ProdutoDetailSerializer(CarregamentoSerializerMixin, ProdutoListSerializer):
     avaliacoes = AvaliacaoSerializer(many=True, read_only=True)
     usuario_ja_avaliou = serializers.SerializerMethodField()
 
+    variante_imagem = 'detalhe'
+    anotacoes = {'avaliado_pelo_usuario': _usuario_ja_avaliou}
+
     class Meta(ProdutoListSerializer.Meta):
         fields = ProdutoListSerializer.Meta.fields + [
             'descricao', 'avaliacoes', 'usuario_ja_avaliou', 'criado_em',
         ]
 
     def get_usuario_ja_avaliou(self, obj):
+        if hasattr(obj, 'avaliado_pelo_usuario'):
+            return obj.avaliado_pelo_usuario
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.avaliacoes.filter(usuario=request.user).exists()
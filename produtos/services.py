@@ -0,0 +1,56 @@
+"""Serviços do app produtos."""
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from .models import Produto, Avaliacao
+
+
+def aplicar_delta_avaliacoes(produto_id, delta_total, delta_soma):
+    """
+    Atualiza incrementalmente os agregados de avaliação de um produto.
+
+    Executa um único UPDATE usando os valores atuais da linha, sem
+    ler as avaliações do produto.
+
+    Args:
+        produto_id: ID do produto
+        delta_total: Variação na quantidade de avaliações
+        delta_soma: Variação na soma das notas
+    """
+    novo_total = F('rating_total') + delta_total
+    nova_soma = F('rating_soma') + delta_soma
+
+    Produto.objects.filter(pk=produto_id).update(
+        rating_total=novo_total,
+        rating_soma=nova_soma,
+        rating_medio=Case(
+            When(rating_total__lte=-delta_total, then=Value(0.0)),
+            default=Cast(nova_soma, FloatField()) / Cast(novo_total, FloatField()),
+            output_field=FloatField(),
+        ),
+    )
+
+
+def recalcular_avaliacoes(produtos=None):
+    """
+    Recalcula do zero os agregados de avaliação.
+
+    Args:
+        produtos: QuerySet de produtos a recalcular (default: todos)
+
+    Returns:
+        int: Número de produtos atualizados
+    """
+    if produtos is None:
+        produtos = Produto.objects.all()
+
+    avaliacoes = Avaliacao.objects.filter(produto=OuterRef('pk')).order_by().values('produto')
+
+    return produtos.update(
+        rating_total=Coalesce(Subquery(avaliacoes.annotate(c=Count('id')).values('c')), 0),
+        rating_soma=Coalesce(Subquery(avaliacoes.annotate(s=Sum('rating')).values('s')), 0),
+        rating_medio=Coalesce(
+            Subquery(avaliacoes.annotate(m=Avg('rating')).values('m'), output_field=FloatField()),
+            0.0,
+        ),
+    )
@@ -0,0 +1,72 @@
+"""Signals para o app produtos."""
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import imagens, search
+from .models import Produto, Avaliacao
+from .services import aplicar_delta_avaliacoes, recalcular_avaliacoes
+
+
+def _guardar_estado_original(instance):
+    # Lê direto do __dict__ para não disparar queries em campos adiados
+    instance._rating_original = instance.__dict__.get('rating')
+    instance._produto_id_original = instance.__dict__.get('produto_id')
+
+
+@receiver(post_init, sender=Avaliacao)
+def registrar_rating_original(sender, instance, **kwargs):
+    """Guarda a nota e o produto carregados do banco para calcular deltas."""
+    _guardar_estado_original(instance)
+
+
+@receiver(post_save, sender=Avaliacao)
+def atualizar_agregados_ao_salvar(sender, instance, created, **kwargs):
+    """Mantém rating_medio/rating_total do produto ao criar ou editar avaliações."""
+    if created:
+        aplicar_delta_avaliacoes(instance.produto_id, 1, instance.rating)
+    elif instance._rating_original is None or instance._produto_id_original is None:
+        # Estado anterior desconhecido: recalcula apenas os produtos envolvidos
+        ids = {instance.produto_id, instance._produto_id_original} - {None}
+        recalcular_avaliacoes(Produto.objects.filter(pk__in=ids))
+    elif instance._produto_id_original != instance.produto_id:
+        aplicar_delta_avaliacoes(instance._produto_id_original, -1, -instance._rating_original)
+        aplicar_delta_avaliacoes(instance.produto_id, 1, instance.rating)
+    elif instance._rating_original != instance.rating:
+        aplicar_delta_avaliacoes(instance.produto_id, 0, instance.rating - instance._rating_original)
+
+    _guardar_estado_original(instance)
+
+
+@receiver(post_delete, sender=Avaliacao)
+def atualizar_agregados_ao_excluir(sender, instance, **kwargs):
+    """Remove a avaliação excluída dos agregados do produto."""
+    produto_id = instance._produto_id_original or instance.produto_id
+    rating = instance._rating_original if instance._rating_original is not None else instance.rating
+    aplicar_delta_avaliacoes(produto_id, -1, -rating)
+
+
+@receiver(post_save, sender=Produto)
+def atualizar_indice_busca(sender, instance, **kwargs):
+    """Mantém o índice de busca em dia com nome e descrição do produto."""
+    search.atualizar_produto(instance)
+
+
+@receiver(pre_save, sender=Produto)
+def ingerir_imagem_enviada(sender, instance, **kwargs):
+    """Normaliza uploads novos antes que o FileField os grave no storage."""
+    if 'imagem' in instance.get_deferred_fields():
+        return  # não carregada, logo não alterada
+    if not instance.imagem:
+        instance.imagem_largura = instance.imagem_altura = None
+        instance.imagem_placeholder = ''
+    elif not instance.imagem._committed:
+        imagens.ingerir(instance)
+
+
+@receiver(post_save, sender=Produto)
+def atualizar_mapa_imagens(sender, instance, **kwargs):
+    """Recalcula URLs e dimensões dos derivados quando a imagem do produto muda."""
+    if 'imagem' in instance.get_deferred_fields():
+        return
+    if instance.imagens.get('origem') != (instance.imagem.name or None):
+        imagens.atualizar_mapa(instance)
@@ -1,43 +1,59 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.core.paginator import Paginator, Page
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import Produto, Categoria, Avaliacao
+from django.conf import settings
+from core import cache as catalogo_cache
+from core import cache_http
+from pedidos.services import contadores
+from . import facetas, search
+from .models import Produto, Avaliacao
 from usuarios.models import ListaDesejo
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Páginas iniciais da listagem sem busca que ficam em cache
+PAGINAS_EM_CACHE = 3
+
+# Valores aceitos em ?ordem= (os links de ordenação da listagem)
+ORDENACOES = ('-criado_em', 'criado_em', 'nome', '-nome', 'preco', '-preco')
+
 
 def lista_produtos(request):
     """View para listagem de produtos com filtros e busca."""
     produtos = Produto.objects.filter(ativo=True).select_related('categoria')
     
     # Buscar todas as categorias
-    categorias = Categoria.objects.all().order_by('nome')
+    categorias = facetas.categorias()
     
-    # Filtro por categoria
-    categoria_slug = request.GET.get('categoria')
-    if categoria_slug:
-        produtos = produtos.filter(categoria__slug=categoria_slug)
+    # Facetas (categoria, preço, promoção, estoque e avaliação)
+    selecao = facetas.selecionar(request.GET, facetas.opcoes(categorias))
+    for _, condicao in selecao.values():
+        produtos = produtos.filter(condicao)
     
-    # Busca por nome
+    # Busca textual (ordenada por relevância)
     busca = request.GET.get('q')
     if busca:
-        produtos = produtos.filter(
-            Q(nome__icontains=busca) | 
-            Q(descricao__icontains=busca)
-        )
+        produtos = search.buscar(produtos, busca)
     
-    # Ordenação
-    ordem = request.GET.get('ordem', '-criado_em')
-    produtos = produtos.order_by(ordem)
+    # Ordenação (com busca, a relevância é a ordem padrão); valores fora da lista são ignorados
+    padrao = '' if busca else '-criado_em'
+    ordem = request.GET.get('ordem', padrao)
+    if ordem not in ORDENACOES:
+        ordem = padrao
+    if ordem:
+        produtos = produtos.order_by(ordem)
     
-    # Paginação
+    # Paginação (as primeiras páginas sem busca vêm do cache do catálogo);
+    # a chave usa só os filtros reconhecidos, como a das contagens
     paginator = Paginator(produtos, 12)
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if busca:
+        page_obj = paginator.get_page(page_number)
+    else:
+        filtros = sorted((nome, valor) for nome, (valor, _) in selecao.items())
+        page_obj = _pagina_em_cache(paginator, page_number, filtros, ordem)
     
     wishlist_ids = set()
     if request.user.is_authenticated:
@@ -46,17 +62,65 @@ def lista_produtos(request):
             .values_list('produto_id', flat=True)
         )
 
+    contagens = facetas.contar(request.GET)
     context = {
         'page_obj': page_obj,
         'categorias': categorias,
-        'categoria_selecionada': categoria_slug,
+        'facetas': _com_links(contagens['facetas'], request.GET),
+        'filtros_selecionados': sum(
+            opcao['selecionada'] for faceta in contagens['facetas'] for opcao in faceta['opcoes']
+        ),
         'busca': busca,
         'ordem': ordem,
+        # Query strings para os links de ordenação e de paginação
+        'query_ordenacao': _sem(request.GET, 'page', 'ordem').urlencode(),
+        'query_paginacao': _sem(request.GET, 'page').urlencode(),
         'wishlist_ids': wishlist_ids,
     }
     return render(request, 'produtos/lista.html', context)
 
 
+def _sem(params, *chaves):
+    """Cópia da query string sem as chaves informadas."""
+    copia = params.copy()
+    for chave in chaves:
+        copia.pop(chave, None)
+    return copia
+
+
+def _com_links(lista_facetas, params):
+    """Acrescenta a cada opção o link que a seleciona (ou desmarca, se selecionada)."""
+    for faceta in lista_facetas:
+        for opcao in faceta['opcoes']:
+            query = _sem(params, 'page', faceta['nome'])
+            if not opcao['selecionada']:
+                query[faceta['nome']] = opcao['valor']
+            opcao['url'] = f'?{query.urlencode()}'
+    return lista_facetas
+
+
+def _pagina_em_cache(paginator, page_number, filtros, ordem):
+    """Retorna a página da listagem usando o cache para as páginas iniciais."""
+    try:
+        numero = int(page_number or 1)
+    except (TypeError, ValueError):
+        numero = None
+
+    if numero is None or not 1 <= numero <= PAGINAS_EM_CACHE:
+        return paginator.get_page(page_number)
+
+    def calcular():
+        page_obj = paginator.get_page(numero)
+        return paginator.count, page_obj.number, list(page_obj.object_list)
+
+    total, numero, itens = catalogo_cache.obter_ou_calcular(
+        'produtos', calcular, numero, filtros, ordem
+    )
+    # Evita o COUNT ao montar a navegação da página
+    paginator.__dict__['count'] = total
+    return Page(itens, numero, paginator)
+
+
 def detalhe_produto(request, slug):
     """View para detalhes de um produto."""
     produto = get_object_or_404(
@@ -64,25 +128,52 @@ def detalhe_produto(request, slug):
         slug=slug,
         ativo=True
     )
-    
+
+    em_lista_desejos = False
+    if request.user.is_authenticated:
+        em_lista_desejos = ListaDesejo.objects.filter(
+            usuario=request.user,
+            produto=produto
+        ).exists()
+
+    # Mensagens pendentes são exibidas (e consumidas) pela página: sem 304
+    if cache_http.tem_mensagens(request):
+        return _renderizar_detalhe(request, produto, em_lista_desejos)
+
+    # A página leva cabeçalho com contadores da sessão e o token CSRF
+    etag = cache_http.calcular_etag(
+        request,
+        'detalhe_produto',
+        produto.pk,
+        produto.atualizado_em,
+        em_lista_desejos,
+        contadores.quantidade_carrinho(request),
+        contadores.tamanho_lista_desejos(request),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        por_usuario=True,
+    )
+    return cache_http.responder(
+        request,
+        lambda: _renderizar_detalhe(request, produto, em_lista_desejos),
+        etag,
+        cache_http.ultima_modificacao(produto.atualizado_em),
+        publica=False,
+        vary=('Cookie',),
+    )
+
+
+def _renderizar_detalhe(request, produto, em_lista_desejos):
     # Produtos relacionados (mesma categoria)
     produtos_relacionados = Produto.objects.filter(
         categoria=produto.categoria,
         ativo=True
     ).select_related('categoria').exclude(id=produto.id)[:4]
-    
+
     # Avaliações do produto
     avaliacoes = produto.avaliacoes.select_related('usuario').order_by('-criado_em')
-    
-    em_lista_desejos = False
+
     ja_avaliou = False
-    
     if request.user.is_authenticated:
-        em_lista_desejos = ListaDesejo.objects.filter(
-            usuario=request.user,
-            produto=produto
-        ).exists()
-        
         ja_avaliou = Avaliacao.objects.filter(
             usuario=request.user,
             produto=produto
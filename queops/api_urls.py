@@ -2,7 +2,13 @@ from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from core.api_views import HomeView
-from produtos.api_views import CategoriaListView, ProdutoListView, ProdutoDetailView, AvaliacaoCreateView
+from produtos.api_views import (
+    CategoriaListView,
+    FacetaListView,
+    ProdutoListView,
+    ProdutoDetailView,
+    AvaliacaoCreateView,
+)
 from usuarios.api_views import RegistroView, PerfilView, ListaDesejoListView, ListaDesejoDetalheView
 from pedidos.api_views import (
     CarrinhoView,
@@ -11,6 +17,7 @@ from pedidos.api_views import (
     CheckoutView,
     PedidoListView,
     PedidoDetailView,
+    PedidoStatusEmMassaView,
 )
 
 urlpatterns = [
@@ -31,6 +38,7 @@ urlpatterns = [
 
     # Produtos
     path('categorias/', CategoriaListView.as_view()),
+    path('facetas/', FacetaListView.as_view()),
     path('produtos/', ProdutoListView.as_view()),
     path('produtos/<slug:slug>/', ProdutoDetailView.as_view()),
     path('produtos/<int:produto_id>/avaliacao/', AvaliacaoCreateView.as_view()),
@@ -46,4 +54,5 @@ urlpatterns = [
     path('checkout/', CheckoutView.as_view()),
     path('pedidos/', PedidoListView.as_view()),
     path('pedidos/<int:pk>/', PedidoDetailView.as_view()),
+    path('pedidos/status/', PedidoStatusEmMassaView.as_view()),
 ]
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 import importlib
 import os
+import sys
 from dotenv import load_dotenv
 load_dotenv()
 from pathlib import Path
@@ -69,6 +70,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Bibliotecas de terceiros
     'imagekit',
     'rest_framework',
@@ -84,6 +86,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise para arquivos estáticos
+    'core.perf.MedicaoDesempenhoMiddleware',  # Server-Timing, log JSON e /admin/perf/
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -183,6 +186,13 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Derivados de imagem (imagekit): gerados quando a imagem é salva e pelo
+# comando warm_product_images; a URL é montada sem consultar o storage
+IMAGEKIT_DEFAULT_CACHEFILE_STRATEGY = 'produtos.imagens.OtimistaAposCommit'
+IMAGENS_PROCESSOS = int(os.getenv('IMAGENS_PROCESSOS', '0')) or None
+# Maior lado da imagem original guardada após a ingestão do upload
+IMAGENS_RESOLUCAO_MESTRE = int(os.getenv('IMAGENS_RESOLUCAO_MESTRE', '2000'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -193,16 +203,95 @@ LOGIN_URL = 'usuarios:login'
 LOGIN_REDIRECT_URL = 'core:home'
 LOGOUT_REDIRECT_URL = 'core:home'
 
-# Cache Configuration (Desabilitado - usando memória local)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Cache Configuration
+# Com REDIS_URL, o cache é compartilhado entre workers e o default mantém um
+# LRU local por processo para as chaves quentes do catálogo.
+# Sem REDIS_URL, usa apenas memória local.
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.CacheDoisNiveis',
+            'LOCATION': 'compartilhado',
+            'OPTIONS': {
+                'PREFIXOS_LOCAIS': ['catalogo:'],
+                'TIMEOUT_LOCAL': int(os.getenv('CACHE_LOCAL_TIMEOUT', '5')),
+                'MAX_ENTRADAS_LOCAIS': 1000,
+            },
+        },
+        'compartilhado': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'queops',
+            'OPTIONS': {
+                # Repassadas ao ConnectionPool do redis-py (um pool por processo)
+                'max_connections': int(os.getenv('REDIS_MAX_CONEXOES', '20')),
+                'socket_connect_timeout': 1,
+                'socket_timeout': 1,
+                'retry_on_timeout': True,
+                'health_check_interval': 30,
+            },
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
     }
-}
 
-# Session Configuration (usando banco de dados)
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Instrumentação de desempenho (core.perf): requisições guardadas por processo
+# para os percentis de /admin/perf/ e janela de tempo considerada (segundos)
+PERF_JANELA_MAXIMA = int(os.getenv('PERF_JANELA_MAXIMA', '5000'))
+PERF_JANELA_SEGUNDOS = int(os.getenv('PERF_JANELA_SEGUNDOS', '900'))
+# Server-Timing para todos os clientes (padrão: só com DEBUG ou para staff)
+PERF_SERVER_TIMING_PUBLICO = os.getenv('PERF_SERVER_TIMING_PUBLICO', 'False') == 'True'
+# Log de consultas lentas: limite em ms (0 desliga) e formatos de SQL agregados por processo
+PERF_CONSULTA_LENTA_MS = float(os.getenv('PERF_CONSULTA_LENTA_MS', '0'))
+PERF_CONSULTAS_LENTAS_FORMATOS = int(os.getenv('PERF_CONSULTAS_LENTAS_FORMATOS', '200'))
+
+# Contadores dos badges de carrinho e lista de desejos (segundos). Sem
+# REDIS_URL o cache é por processo e a invalidação não chegaria aos outros
+# workers, então o padrão é não guardá-los.
+CONTADORES_CACHE_TIMEOUT = int(os.getenv('CONTADORES_CACHE_TIMEOUT', '3600' if REDIS_URL else '0'))
+
+# Cache do catálogo (home, categorias e primeiras páginas das listagens)
+CATALOGO_CACHE_TIMEOUT = int(os.getenv('CATALOGO_CACHE_TIMEOUT', '300'))
+# Tempo máximo (segundos) aguardando outro worker recalcular a mesma chave
+CATALOGO_CACHE_ESPERA = float(os.getenv('CATALOGO_CACHE_ESPERA', '2.0'))
+
+# Cache HTTP das respostas do catálogo (core/cache_http.py)
+# Navegador: reaproveita por max-age e serve o antigo enquanto revalida
+CACHE_HTTP_MAX_AGE = int(os.getenv('CACHE_HTTP_MAX_AGE', '60'))
+CACHE_HTTP_STALE_WHILE_REVALIDATE = int(os.getenv('CACHE_HTTP_STALE_WHILE_REVALIDATE', '300'))
+CACHE_HTTP_STALE_IF_ERROR = int(os.getenv('CACHE_HTTP_STALE_IF_ERROR', '86400'))
+# CDN/proxy: guarda por mais tempo e é purgada por chave quando o catálogo muda
+CACHE_HTTP_SURROGATE_MAX_AGE = int(os.getenv('CACHE_HTTP_SURROGATE_MAX_AGE', '86400'))
+# Surrogate-Key (Fastly), Cache-Tag (Cloudflare), xkey (Varnish)...
+CACHE_HTTP_CABECALHO_CHAVES = os.getenv('CACHE_HTTP_CABECALHO_CHAVES', 'Surrogate-Key')
+# Caminho pontilhado de um callable que recebe a lista de chaves a purgar
+CACHE_HTTP_PURGADOR = os.getenv('CACHE_HTTP_PURGADOR', '')
+
+# Estoque abaixo deste limite é "baixo" nas categorias sem limite próprio
+ESTOQUE_BAIXO_PADRAO = int(os.getenv('ESTOQUE_BAIXO_PADRAO', '10'))
+# Produtos por página em cada faixa do relatório de estoque
+RELATORIO_ESTOQUE_POR_PAGINA = int(os.getenv('RELATORIO_ESTOQUE_POR_PAGINA', '50'))
+
+# Busca de produtos ('postgres', 'memoria' ou caminho pontilhado; vazio = automático)
+PRODUTOS_BUSCA_BACKEND = os.getenv('PRODUTOS_BUSCA_BACKEND', '')
+
+# Session Configuration
+# Com REDIS_URL, cache compartilhado na frente do banco (o banco continua sendo
+# a fonte). Sem ele o cache é por processo: um logout ou flush() em um worker
+# não chegaria aos outros, então a sessão fica só no banco.
+# Sessões assinadas em cookie não servem: a chave muda a cada escrita e o
+# carrinho anônimo é indexado por session_key.
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if REDIS_URL else 'django.contrib.sessions.backends.db',
+)
 SESSION_COOKIE_AGE = 1209600  # 2 semanas
 
 # Login Social (Google)
@@ -223,7 +312,25 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@queops.com')
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
+# Outbox de e-mails (enviados pelo comando processar_outbox ou pelo cron da Vercel)
+OUTBOX_MAX_TENTATIVAS = int(os.environ.get('OUTBOX_MAX_TENTATIVAS', '5'))
+# Espera antes da 1ª nova tentativa; dobra a cada falha até o máximo (segundos)
+OUTBOX_BACKOFF_BASE = int(os.environ.get('OUTBOX_BACKOFF_BASE', '60'))
+OUTBOX_BACKOFF_MAXIMO = int(os.environ.get('OUTBOX_BACKOFF_MAXIMO', '3600'))
+# Tempo que um lote fica reservado para o worker antes de voltar à fila (segundos)
+OUTBOX_RESERVA = int(os.environ.get('OUTBOX_RESERVA', '300'))
+# Sem worker nem cron frequente: envia a fila logo após o commit, ainda na requisição
+OUTBOX_ENVIO_APOS_COMMIT = os.environ.get('OUTBOX_ENVIO_APOS_COMMIT', 'False') == 'True'
+# Tempo máximo de uma execução do cron /tarefas/processar-outbox/ (segundos)
+OUTBOX_TEMPO_TAREFA = int(os.environ.get('OUTBOX_TEMPO_TAREFA', '8'))
+# Segredo das tarefas agendadas (a Vercel envia "Authorization: Bearer <CRON_SECRET>")
+CRON_SECRET = os.environ.get('CRON_SECRET', '')
+
 # Logging
+# Nos testes (pytest ou manage.py test), as métricas por requisição do
+# core.perf não vão para logs/perf.log
+TESTANDO = 'pytest' in sys.modules or sys.argv[1:2] == ['test']
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -236,6 +343,9 @@ LOGGING = {
             'format': '{levelname} {asctime} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'core.perf.FormatadorJSON',
+        },
     },
     'filters': {
         'require_debug_false': {
@@ -267,11 +377,22 @@ LOGGING = {
             'backupCount': 5,
             'formatter': 'verbose',
         },
+        'perf_file': {
+            'level': 'INFO',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'logs' / 'perf.log',
+            'maxBytes': 1024 * 1024 * 10,  # 10 MB
+            'backupCount': 5,
+            'formatter': 'json',
+        },
         'mail_admins': {
             'level': 'ERROR',
             'class': 'django.utils.log.AdminEmailHandler',
             'filters': ['require_debug_false'],
         },
+        'null': {
+            'class': 'logging.NullHandler',
+        },
     },
     'loggers': {
         'django': {
@@ -284,6 +405,11 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': False,
         },
+        'core.perf': {
+            'handlers': ['null'] if TESTANDO else ['perf_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'pedidos': {
             'handlers': ['console', 'file', 'error_file'],
             'level': 'INFO',
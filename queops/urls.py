@@ -6,12 +6,16 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.admin_views import painel_desempenho
+
 # Customização do Admin
 admin.site.site_header = 'Farmácia QUEOPS - Administração'
 admin.site.site_title = 'QUEOPS Admin'
 admin.site.index_title = 'Painel de Controle'
 
 urlpatterns = [
+    # Antes do admin, que trataria 'perf' como nome de app
+    path('admin/perf/', painel_desempenho, name='painel_desempenho'),
     path('admin/', admin.site.urls),
     path('api/', include('queops.api_urls')),
     path('', include('core.urls')),
@@ -1,4 +1,10 @@
+import contextlib
+import re
+from collections import Counter
+
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from tests.factories import UserFactory
 
@@ -20,3 +26,41 @@ def api_autenticado(api_client, usuario):
     token = RefreshToken.for_user(usuario)
     api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
     return api_client
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    """O cache local persiste entre testes; cada teste começa com ele vazio."""
+    from django.core.cache import cache
+    from core import cache as catalogo_cache
+    cache.clear()
+    catalogo_cache.zerar_estatisticas()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def orcamento_consultas():
+    """
+    Falha o teste se o bloco executar mais de `limite` consultas.
+
+    A mensagem lista as consultas e destaca as repetidas (mesmo SQL com
+    parâmetros diferentes), que costumam indicar um N+1.
+
+    Uso: with orcamento_consultas(3): api_client.get('/api/produtos/')
+    """
+    @contextlib.contextmanager
+    def verificar(limite, using=connection):
+        with CaptureQueriesContext(using) as capturadas:
+            yield capturadas
+        consultas = [q['sql'] for q in capturadas.captured_queries]
+        if len(consultas) <= limite:
+            return
+        repetidas = Counter(re.sub(r"'[^']*'|\b\d+\b", '?', sql) for sql in consultas)
+        linhas = [f'{i}. {sql}' for i, sql in enumerate(consultas, 1)]
+        linhas += [f'repetida {n}x: {sql}' for sql, n in repetidas.most_common() if n > 1]
+        pytest.fail(
+            f'{len(consultas)} consultas executadas; o orçamento é {limite}.\n' + '\n'.join(linhas),
+            pytrace=False,
+        )
+    return verificar
@@ -46,6 +46,26 @@ class TestCarrinhoAPI:
         res = api_autenticado.get('/api/carrinho/')
         assert float(res.data['total']) == 60.0
 
+    def test_total_usa_preco_promocional(self, api_autenticado):
+        produto = ProdutoFactory(estoque=10, preco=Decimal('20.00'), preco_promocional=Decimal('15.00'))
+        api_autenticado.post('/api/carrinho/', {'produto_id': produto.id, 'quantidade': 2})
+        res = api_autenticado.get('/api/carrinho/')
+        assert res.data['subtotal_produtos'] == Decimal('40.00')
+        assert res.data['total'] == Decimal('30.00')
+        assert res.data['itens'][0]['subtotal'] == '30.00'
+
+    def test_carrinho_em_uma_query(self, api_autenticado, usuario, django_assert_num_queries):
+        from pedidos.models import CarrinhoItem
+        for produto in ProdutoFactory.create_batch(5, estoque=10):
+            CarrinhoItem.objects.create(usuario=usuario, produto=produto, quantidade=2)
+
+        # Usuário autenticado pelo JWT + itens e totais do carrinho
+        with django_assert_num_queries(2):
+            res = api_autenticado.get('/api/carrinho/')
+
+        assert res.data['quantidade_total'] == 10
+        assert len(res.data['itens']) == 5
+
 
 @pytest.mark.django_db
 class TestFreteAPI:
@@ -106,6 +126,39 @@ class TestCheckoutAPI:
         produto.refresh_from_db()
         assert produto.estoque == 7
 
+    def test_checkout_estoque_insuficiente_retorna_400_sem_cobrar(self, api_autenticado, monkeypatch):
+        from pedidos import services
+        produto = ProdutoFactory(estoque=5, preco=Decimal('50.00'))
+        api_autenticado.post('/api/carrinho/', {'produto_id': produto.id, 'quantidade': 3})
+        produto.estoque = 1
+        produto.save()
+        cobrancas = []
+        monkeypatch.setattr(services, 'processar_pagamento', lambda **kwargs: cobrancas.append(kwargs))
+
+        res = api_autenticado.post('/api/checkout/', self.BASE_PAYLOAD)
+
+        assert res.status_code == 400
+        assert 'estoque insuficiente' in res.data['detail'].lower()
+        assert cobrancas == []
+        produto.refresh_from_db()
+        assert produto.estoque == 1
+
+    def test_estoque_levado_apos_a_cobranca_cancela_o_pagamento(self, api_autenticado, monkeypatch):
+        from pedidos import services
+        produto = ProdutoFactory(estoque=5, preco=Decimal('50.00'))
+        api_autenticado.post('/api/carrinho/', {'produto_id': produto.id, 'quantidade': 3})
+        cancelados = []
+        # Simula um checkout concorrente entre a verificação e a finalização
+        monkeypatch.setattr(services, 'verificar_estoque', lambda carrinho: None)
+        monkeypatch.setattr(services, 'cancelar_pagamento', cancelados.append)
+        produto.estoque = 1
+        produto.save()
+
+        res = api_autenticado.post('/api/checkout/', self.BASE_PAYLOAD)
+
+        assert res.status_code == 400
+        assert [resultado['status'] for resultado in cancelados] == ['autorizado']
+
     def test_checkout_cartao_recusado_cria_pedido_com_status_recusado(self, api_autenticado):
         produto = ProdutoFactory(estoque=10, preco=Decimal('50.00'))
         api_autenticado.post('/api/carrinho/', {'produto_id': produto.id, 'quantidade': 1})
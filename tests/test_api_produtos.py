@@ -60,6 +60,14 @@ class TestProdutoListAPI:
         assert res.status_code == 200
         assert res.data['count'] == 1
 
+    def test_avaliacoes_lidas_dos_agregados(self, api_client, django_assert_num_queries):
+        for produto in ProdutoFactory.create_batch(5):
+            AvaliacaoFactory(produto=produto, rating=5)
+        with django_assert_num_queries(2):
+            res = api_client.get('/api/produtos/')
+        assert res.data['results'][0]['media_avaliacoes'] == 5.0
+        assert res.data['results'][0]['total_avaliacoes'] == 1
+
     def test_produto_tem_campos_esperados(self, api_client):
         ProdutoFactory()
         res = api_client.get('/api/produtos/')
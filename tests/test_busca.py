@@ -0,0 +1,71 @@
+"""Testes da busca textual de produtos (backend em memória)."""
+import pytest
+from tests.factories import ProdutoFactory
+
+from produtos import search
+from produtos.models import Produto
+from produtos.search.texto import tokenizar
+
+
+class TestTokenizacao:
+    def test_remove_acentos_e_plural(self):
+        assert tokenizar('Vitaminas Pediátricas') == ['vitamina', 'pediatrica']
+
+    def test_mantem_numeros(self):
+        assert tokenizar('Dipirona 500mg') == ['dipirona', '500mg']
+
+
+@pytest.mark.django_db
+class TestBuscaMemoria:
+    def _buscar(self, termo):
+        return list(search.buscar(Produto.objects.all(), termo))
+
+    def test_nome_tem_mais_relevancia_que_descricao(self):
+        na_descricao = ProdutoFactory(nome='Analgésico', descricao='Equivalente à dipirona')
+        no_nome = ProdutoFactory(nome='Dipirona 500mg', descricao='Comprimidos')
+        assert self._buscar('dipirona') == [no_nome, na_descricao]
+
+    def test_ignora_acentos(self):
+        produto = ProdutoFactory(nome='Protetor Solar', descricao='Proteção UVA')
+        assert self._buscar('protecao') == [produto]
+
+    def test_busca_por_prefixo(self):
+        produto = ProdutoFactory(nome='Paracetamol 750mg')
+        assert self._buscar('parace') == [produto]
+
+    def test_todos_os_termos_sao_obrigatorios(self):
+        ProdutoFactory(nome='Vitamina C', descricao='Suplemento')
+        produto = ProdutoFactory(nome='Vitamina D', descricao='Suplemento')
+        assert self._buscar('vitamina d') == [produto]
+
+    def test_fallback_para_erros_de_digitacao(self):
+        produto = ProdutoFactory(nome='Ibuprofeno', descricao='Anti-inflamatório')
+        assert self._buscar('ibuprofeno') == [produto]
+        assert self._buscar('ibuprofemo') == [produto]
+
+    def test_indice_acompanha_alteracoes(self):
+        produto = ProdutoFactory(nome='Shampoo')
+        assert self._buscar('condicionador') == []
+        produto.nome = 'Condicionador'
+        produto.save()
+        assert self._buscar('condicionador') == [produto]
+
+    def test_busca_ampla_nao_e_truncada(self, monkeypatch):
+        backend = search.get_backend()
+        monkeypatch.setattr(backend, 'LIMITE_RANKING', 2)
+        monkeypatch.setattr(backend, 'LIMITE_PARAMETROS', 3)
+        no_nome = ProdutoFactory(nome='Vitamina C', descricao='Suplemento')
+        outros = [ProdutoFactory(nome=f'Suplemento {i}', descricao='Com vitamina') for i in range(4)]
+
+        encontrados = self._buscar('vitamina')
+
+        assert len(encontrados) == 5
+        assert encontrados[0] == no_nome
+        assert set(encontrados) == {no_nome, *outros}
+
+    def test_lista_html_usa_busca(self, client):
+        ProdutoFactory(nome='Omega 3', descricao='Óleo de peixe')
+        ProdutoFactory(nome='Colágeno', descricao='Pó')
+        res = client.get('/produtos/?q=oleo')
+        assert res.status_code == 200
+        assert [p.nome for p in res.context['page_obj']] == ['Omega 3']
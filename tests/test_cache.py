@@ -0,0 +1,134 @@
+"""Testes do cache read-through do catálogo."""
+import threading
+
+import pytest
+from django.core.cache import cache
+from tests.factories import ProdutoFactory, CategoriaFactory
+
+from core import cache as catalogo_cache
+
+
+class TestObterOuCalcular:
+    def test_calcula_uma_vez_e_conta_hits(self):
+        chamadas = []
+
+        def calcular():
+            chamadas.append(1)
+            return 'valor'
+
+        assert catalogo_cache.obter_ou_calcular('teste', calcular, 1) == 'valor'
+        assert catalogo_cache.obter_ou_calcular('teste', calcular, 1) == 'valor'
+        assert len(chamadas) == 1
+
+        dados = catalogo_cache.estatisticas()['teste']
+        assert dados['hits'] == 1
+        assert dados['misses'] == 1
+        assert dados['taxa_acerto'] == 50.0
+
+    def test_partes_distintas_geram_chaves_distintas(self):
+        assert catalogo_cache.obter_ou_calcular('teste', lambda: 'a', 1) == 'a'
+        assert catalogo_cache.obter_ou_calcular('teste', lambda: 'b', 2) == 'b'
+
+    def test_invalidar_muda_versao(self):
+        catalogo_cache.obter_ou_calcular('teste', lambda: 'antigo')
+        catalogo_cache.invalidar_catalogo()
+        assert catalogo_cache.obter_ou_calcular('teste', lambda: 'novo') == 'novo'
+
+    def test_aguarda_recalculo_de_outro_worker(self, settings):
+        settings.CATALOGO_CACHE_ESPERA = 2.0
+        chave = catalogo_cache.montar_chave('teste')
+        # Simula outro worker segurando o lock e publicando o valor logo depois
+        cache.add(f'{chave}:lock', 1)
+        threading.Timer(0.1, cache.set, args=(chave, 'do outro worker')).start()
+
+        chamadas = []
+        valor = catalogo_cache.obter_ou_calcular('teste', lambda: chamadas.append(1) or 'local')
+
+        assert valor == 'do outro worker'
+        assert chamadas == []
+        assert catalogo_cache.estatisticas()['teste']['esperas'] == 1
+
+    def test_calcula_se_espera_expirar(self, settings):
+        settings.CATALOGO_CACHE_ESPERA = 0.1
+        chave = catalogo_cache.montar_chave('teste')
+        cache.add(f'{chave}:lock', 1)
+
+        assert catalogo_cache.obter_ou_calcular('teste', lambda: 'local') == 'local'
+        assert catalogo_cache.estatisticas()['teste']['esperas_expiradas'] == 1
+
+
+@pytest.mark.django_db
+class TestInvalidacaoCatalogo:
+    def test_salvar_produto_invalida(self, django_capture_on_commit_callbacks):
+        versao = catalogo_cache.versao_catalogo()
+        with django_capture_on_commit_callbacks(execute=True):
+            ProdutoFactory()
+        assert catalogo_cache.versao_catalogo() > versao
+
+    def test_excluir_categoria_invalida(self, django_capture_on_commit_callbacks):
+        categoria = CategoriaFactory()
+        versao = catalogo_cache.versao_catalogo()
+        with django_capture_on_commit_callbacks(execute=True):
+            categoria.delete()
+        assert catalogo_cache.versao_catalogo() > versao
+
+
+@pytest.mark.django_db
+class TestViewsComCache:
+    def test_home_api_servida_do_cache(self, api_client, django_assert_num_queries):
+        ProdutoFactory(destaque=True)
+        primeira = api_client.get('/api/home/')
+
+        with django_assert_num_queries(0):
+            segunda = api_client.get('/api/home/')
+
+        assert segunda.data == primeira.data
+        assert len(segunda.data['destaques']) == 1
+
+    def test_home_api_atualiza_apos_salvar_produto(self, api_client, django_capture_on_commit_callbacks):
+        api_client.get('/api/home/')
+        with django_capture_on_commit_callbacks(execute=True):
+            ProdutoFactory(destaque=True)
+
+        response = api_client.get('/api/home/')
+        assert len(response.data['destaques']) == 1
+
+    def test_listagem_api_primeira_pagina_em_cache(self, api_client, django_assert_num_queries):
+        ProdutoFactory.create_batch(3)
+        api_client.get('/api/produtos/')
+
+        with django_assert_num_queries(0):
+            response = api_client.get('/api/produtos/')
+        assert response.data['count'] == 3
+
+    def test_listagem_api_com_busca_nao_usa_cache(self, api_client):
+        ProdutoFactory(nome='Dipirona 500mg')
+        api_client.get('/api/produtos/?q=dipirona')
+        assert 'api_produtos' not in catalogo_cache.estatisticas()
+
+    def test_listagem_html_usa_categorias_e_pagina_em_cache(self, client, django_assert_num_queries):
+        ProdutoFactory.create_batch(2)
+        client.get('/produtos/')
+
+        # Apenas a sessão/autenticação do request anônimo não passa pelo cache
+        with django_assert_num_queries(0):
+            response = client.get('/produtos/')
+        assert len(response.context['page_obj']) == 2
+        assert response.context['page_obj'].paginator.count == 2
+
+    def test_listagem_html_ignora_parametros_desconhecidos_na_chave(self, client, django_assert_num_queries):
+        ProdutoFactory.create_batch(2)
+        client.get('/produtos/?preco=ate-25')
+
+        with django_assert_num_queries(0):
+            response = client.get('/produtos/?preco=ate-25&utm_source=newsletter&promocao=talvez')
+        assert response.status_code == 200
+
+    def test_listagem_html_ordem_fora_da_lista_usa_a_padrao(self, client, django_assert_num_queries):
+        ProdutoFactory.create_batch(2)
+        client.get('/produtos/')
+
+        with django_assert_num_queries(0):
+            response = client.get('/produtos/?ordem=usuario__password')
+        assert response.status_code == 200
+        assert response.context['ordem'] == '-criado_em'
@@ -0,0 +1,104 @@
+"""Testes do cache em dois níveis sobre um Redis falso (fakeredis)."""
+import pytest
+from django.core.cache import caches
+
+from core import cache as catalogo_cache
+from core.cache_backends import CacheDoisNiveis
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+@pytest.fixture
+def servidor_redis(settings):
+    """Configura default = dois níveis sobre um Redis em memória."""
+    servidor = fakeredis.FakeServer()
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.CacheDoisNiveis',
+            'LOCATION': 'compartilhado',
+            'OPTIONS': {'PREFIXOS_LOCAIS': ['catalogo:'], 'TIMEOUT_LOCAL': 60},
+        },
+        'compartilhado': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://localhost:6379/0',
+            'OPTIONS': {'connection_class': fakeredis.FakeConnection, 'server': servidor},
+        },
+    }
+    cache = caches['default']
+    assert isinstance(cache, CacheDoisNiveis)
+    cache.clear()
+    yield servidor
+    cache.clear()
+
+
+class TestCacheDoisNiveis:
+    def test_valores_ficam_no_compartilhado(self, servidor_redis):
+        cache = caches['default']
+        cache.set('pedido:1', {'total': 10})
+
+        assert caches['compartilhado'].get('pedido:1') == {'total': 10}
+        assert cache.local.get('pedido:1') is None
+
+    def test_chave_quente_servida_localmente_sem_redis(self, servidor_redis):
+        cache = caches['default']
+        cache.set('catalogo:categorias', ['Vitaminas'])
+        cache.set('pedido:1', 'frio')
+
+        servidor_redis.connected = False
+
+        assert cache.get('catalogo:categorias') == ['Vitaminas']
+        assert cache.get('pedido:1') is None
+
+    def test_le_do_compartilhado_quando_local_esta_frio(self, servidor_redis):
+        cache = caches['default']
+        cache.set('catalogo:categorias', ['Vitaminas'])
+        # Simula outro processo, com o LRU local vazio
+        cache.local.clear()
+
+        assert cache.get('catalogo:categorias') == ['Vitaminas']
+        assert cache.local.get('catalogo:categorias') == ['Vitaminas']
+
+    def test_incr_atualiza_nivel_local(self, servidor_redis):
+        cache = caches['default']
+        cache.set('catalogo:versao', 1)
+        assert cache.get('catalogo:versao') == 1
+
+        assert cache.incr('catalogo:versao') == 2
+        assert cache.get('catalogo:versao') == 2
+
+    def test_delete_remove_dos_dois_niveis(self, servidor_redis):
+        cache = caches['default']
+        cache.set('catalogo:home', 'x')
+        cache.delete('catalogo:home')
+
+        assert cache.local.get('catalogo:home') is None
+        assert caches['compartilhado'].get('catalogo:home') is None
+
+    def test_redis_indisponivel_usa_apenas_local(self, servidor_redis, caplog):
+        cache = caches['default']
+        servidor_redis.connected = False
+
+        cache.set('pedido:1', 'valor')
+        assert cache.get('pedido:1') == 'valor'
+        assert cache.add('lock', 1) is True
+        assert 'indisponível' in caplog.text
+
+    def test_get_many_combina_niveis(self, servidor_redis):
+        cache = caches['default']
+        cache.set('catalogo:a', 1)
+        cache.set('pedido:b', 2)
+
+        assert cache.get_many(['catalogo:a', 'pedido:b', 'inexistente']) == {'catalogo:a': 1, 'pedido:b': 2}
+
+    def test_cache_do_catalogo_funciona_sobre_o_tier(self, servidor_redis):
+        chamadas = []
+
+        def calcular():
+            chamadas.append(1)
+            return 'home'
+
+        catalogo_cache.obter_ou_calcular('home', calcular)
+        caches['default'].local.clear()
+        catalogo_cache.obter_ou_calcular('home', calcular)
+
+        assert len(chamadas) == 1
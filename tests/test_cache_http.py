@@ -0,0 +1,213 @@
+"""Testes das requisições condicionais e dos cabeçalhos de cache do catálogo."""
+import pytest
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from tests.factories import AvaliacaoFactory, CategoriaFactory, ProdutoFactory, UserFactory
+
+from core import cache_http
+from pedidos.models import CarrinhoItem
+
+# Purgador de teste (CACHE_HTTP_PURGADOR aponta para registrar_purga)
+PURGAS = []
+
+
+def registrar_purga(chaves):
+    PURGAS.append(chaves)
+
+
+@pytest.fixture
+def purgas(settings):
+    settings.CACHE_HTTP_PURGADOR = 'tests.test_cache_http.registrar_purga'
+    PURGAS.clear()
+    yield PURGAS
+    PURGAS.clear()
+
+
+def _url(produto):
+    return f'/api/produtos/{produto.slug}/'
+
+
+@pytest.mark.django_db
+class TestRequisicoesCondicionais:
+    def test_detalhe_304_sem_serializar(self, api_client, django_assert_num_queries):
+        produto = ProdutoFactory()
+        res = api_client.get(_url(produto))
+        assert res.status_code == 200
+
+        # Só a consulta do produto: sem avaliações nem serialização
+        with django_assert_num_queries(1):
+            repetida = api_client.get(_url(produto), HTTP_IF_NONE_MATCH=res['ETag'])
+
+        assert repetida.status_code == 304
+        assert repetida.content == b''
+        assert repetida['ETag'] == res['ETag']
+        assert 'public' in repetida['Cache-Control']
+
+    def test_listagem_304_sem_consultas(self, api_client, django_assert_num_queries):
+        ProdutoFactory(nome='Dipirona 500mg')
+        res = api_client.get('/api/produtos/?q=dipirona&ordenar=preco')
+        assert res.data['count'] == 1
+
+        with django_assert_num_queries(0):
+            repetida = api_client.get('/api/produtos/?q=dipirona&ordenar=preco', HTTP_IF_NONE_MATCH=res['ETag'])
+
+        assert repetida.status_code == 304
+
+    def test_query_string_distinta_muda_etag(self, api_client):
+        ProdutoFactory()
+        assert api_client.get('/api/produtos/')['ETag'] != api_client.get('/api/produtos/?ordenar=preco')['ETag']
+
+    def test_salvar_produto_muda_etag(self, api_client, django_capture_on_commit_callbacks):
+        produto = ProdutoFactory(preco=10)
+        etag = api_client.get(_url(produto))['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            produto.preco = 12
+            produto.save()
+
+        res = api_client.get(_url(produto), HTTP_IF_NONE_MATCH=etag)
+        assert res.status_code == 200
+        assert res.data['preco'] == '12.00'
+
+    def test_avaliacao_muda_etag(self, api_client, django_capture_on_commit_callbacks):
+        produto = ProdutoFactory()
+        etags = [api_client.get(url)['ETag'] for url in (_url(produto), '/api/home/')]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            AvaliacaoFactory(produto=produto, rating=5)
+
+        assert api_client.get(_url(produto), HTTP_IF_NONE_MATCH=etags[0]).status_code == 200
+        assert api_client.get('/api/home/', HTTP_IF_NONE_MATCH=etags[1]).status_code == 200
+
+    def test_if_modified_since(self, api_client, django_capture_on_commit_callbacks):
+        categoria = CategoriaFactory()
+        res = api_client.get('/api/categorias/')
+        modificado = res['Last-Modified']
+
+        assert api_client.get('/api/categorias/', HTTP_IF_MODIFIED_SINCE=modificado).status_code == 304
+
+        with django_capture_on_commit_callbacks(execute=True):
+            categoria.save()
+        antigo = http_date(cache_http.ultima_modificacao() - 10)
+        assert api_client.get('/api/categorias/', HTTP_IF_MODIFIED_SINCE=antigo).status_code == 200
+
+    def test_produto_inativo_continua_404(self, api_client):
+        produto = ProdutoFactory(ativo=False)
+        res = api_client.get(_url(produto))
+        assert res.status_code == 404
+        assert 'ETag' not in res
+
+
+@pytest.mark.django_db
+class TestPoliticaDeCache:
+    def test_anonimo_publico_com_chaves(self, api_client, settings):
+        settings.CACHE_HTTP_MAX_AGE = 60
+        settings.CACHE_HTTP_STALE_WHILE_REVALIDATE = 300
+        settings.CACHE_HTTP_SURROGATE_MAX_AGE = 86400
+        produto = ProdutoFactory()
+
+        res = api_client.get(_url(produto))
+
+        controle = {parte.strip() for parte in res['Cache-Control'].split(',')}
+        assert {'public', 'max-age=60', 'stale-while-revalidate=300'} <= controle
+        assert res['Surrogate-Control'] == 'max-age=86400'
+        assert res['Surrogate-Key'].split() == [f'categoria-{produto.categoria_id}', f'produto-{produto.pk}']
+        assert 'Authorization' in res['Vary']
+
+    def test_listagem_e_home_marcam_produtos_exibidos(self, api_client):
+        produtos = ProdutoFactory.create_batch(2, destaque=True)
+
+        listagem = set(api_client.get('/api/produtos/')['Surrogate-Key'].split())
+        home = set(api_client.get('/api/home/')['Surrogate-Key'].split())
+
+        esperadas = {'listagens'} | {f'produto-{p.pk}' for p in produtos} | {f'categoria-{p.categoria_id}' for p in produtos}
+        assert listagem == esperadas
+        assert home == esperadas
+
+    def test_categorias(self, api_client):
+        categoria = CategoriaFactory()
+        assert api_client.get('/api/categorias/')['Surrogate-Key'].split() == [f'categoria-{categoria.pk}', 'categorias']
+
+    def test_autenticado_privado_e_por_usuario(self, api_autenticado):
+        produto = ProdutoFactory()
+        res = api_autenticado.get(_url(produto))
+
+        assert 'private' in res['Cache-Control']
+        assert 'no-cache' in res['Cache-Control']
+        assert 'Surrogate-Key' not in res
+        assert api_autenticado.get(_url(produto), HTTP_IF_NONE_MATCH=res['ETag']).status_code == 304
+
+        anonimo = APIClient().get(_url(produto))
+        assert anonimo['ETag'] != res['ETag']
+
+
+@pytest.mark.django_db
+class TestPurga:
+    def test_salvar_produto_purga_produto_categoria_e_listagens(self, purgas, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            produto = ProdutoFactory()
+        assert [f'categoria-{produto.categoria_id}', 'listagens', f'produto-{produto.pk}'] in purgas
+
+    def test_categoria_e_avaliacao(self, purgas, django_capture_on_commit_callbacks):
+        produto = ProdutoFactory()
+        with django_capture_on_commit_callbacks(execute=True):
+            produto.categoria.save()
+            AvaliacaoFactory(produto=produto)
+        assert [f'categoria-{produto.categoria_id}', 'categorias', 'listagens'] in purgas
+        assert [f'produto-{produto.pk}'] in purgas
+
+    def test_nada_purgado_sem_commit(self, purgas, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False):
+            ProdutoFactory()
+        assert purgas == []
+
+    def test_checkout_purga_produtos_comprados(self, purgas, django_capture_on_commit_callbacks):
+        from tests.test_services import _finalizar
+        usuario = UserFactory()
+        produto = ProdutoFactory(estoque=5)
+        CarrinhoItem.objects.create(usuario=usuario, produto=produto, quantidade=1)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            _finalizar(usuario)
+
+        assert [f'produto-{produto.pk}'] in purgas
+
+    def test_falha_do_purgador_nao_propaga(self, settings, caplog):
+        settings.CACHE_HTTP_PURGADOR = 'tests.test_cache_http.nao_existe'
+        cache_http.purgar(['produto-1'])
+        assert 'Erro ao purgar' in caplog.text
+
+
+@pytest.mark.django_db
+class TestDetalheHTML:
+    def test_304_privado(self, client):
+        produto = ProdutoFactory()
+        url = f'/produtos/{produto.slug}/'
+        client.get(url)  # recebe o cookie CSRF
+        res = client.get(url)
+
+        assert res.status_code == 200
+        assert 'private' in res['Cache-Control']
+        assert 'Cookie' in res['Vary']
+        assert client.get(url, HTTP_IF_NONE_MATCH=res['ETag']).status_code == 304
+
+    def test_carrinho_muda_etag(self, client):
+        usuario = UserFactory()
+        client.force_login(usuario)
+        produto = ProdutoFactory(estoque=10)
+        url = f'/produtos/{produto.slug}/'
+        etag = client.get(url)['ETag']
+
+        CarrinhoItem.objects.create(usuario=usuario, produto=produto, quantidade=2)
+        from pedidos.services import contadores
+        contadores.invalidar_carrinho(usuario=usuario)
+
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_mensagens_pendentes_sem_304(self, client, monkeypatch):
+        produto = ProdutoFactory()
+        url = f'/produtos/{produto.slug}/'
+        etag = client.get(url)['ETag']
+
+        monkeypatch.setattr(cache_http, 'tem_mensagens', lambda request: True)
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
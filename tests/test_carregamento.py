@@ -0,0 +1,95 @@
+"""Testes do carregamento antecipado guiado pelos serializers e do orçamento de consultas."""
+import pytest
+from tests.factories import (
+    UserFactory, ProdutoFactory, AvaliacaoFactory, PedidoFactory, ItemPedidoFactory, PagamentoFactory,
+)
+
+from usuarios.models import ListaDesejo
+
+
+def _lote_de_pedidos(usuario, quantidade):
+    for pedido in PedidoFactory.create_batch(quantidade, usuario=usuario):
+        ItemPedidoFactory.create_batch(2, pedido=pedido)
+        PagamentoFactory(pedido=pedido)
+
+
+@pytest.mark.django_db
+class TestOrcamentoPorEndpoint:
+    """O número de consultas de cada endpoint não depende do tamanho da página."""
+
+    def test_listagem_de_produtos(self, api_client, orcamento_consultas):
+        ProdutoFactory.create_batch(30)
+        with orcamento_consultas(2):
+            res = api_client.get('/api/produtos/?page=2')
+        assert res.status_code == 200
+
+    def test_detalhe_do_produto(self, api_autenticado, usuario, orcamento_consultas):
+        produto = ProdutoFactory()
+        for autor in UserFactory.create_batch(5):
+            AvaliacaoFactory(produto=produto, usuario=autor)
+        AvaliacaoFactory(produto=produto, usuario=usuario)
+
+        # Usuário do token, produto (com a anotação) e avaliações com autores
+        with orcamento_consultas(3):
+            res = api_autenticado.get(f'/api/produtos/{produto.slug}/')
+
+        assert res.data['usuario_ja_avaliou'] is True
+        assert len(res.data['avaliacoes']) == 6
+
+    def test_pedidos(self, api_autenticado, usuario, orcamento_consultas):
+        _lote_de_pedidos(usuario, 5)
+        with orcamento_consultas(4):
+            res = api_autenticado.get('/api/pedidos/')
+        assert len(res.data['results']) == 5
+        assert all(len(p['itens']) == 2 and p['pagamento'] for p in res.data['results'])
+
+    def test_detalhe_do_pedido(self, api_autenticado, usuario, orcamento_consultas):
+        _lote_de_pedidos(usuario, 1)
+        pedido = usuario.pedidos.get()
+        with orcamento_consultas(3):
+            res = api_autenticado.get(f'/api/pedidos/{pedido.pk}/')
+        assert res.status_code == 200
+
+    def test_lista_de_desejos(self, api_autenticado, usuario, orcamento_consultas):
+        for produto in ProdutoFactory.create_batch(5):
+            ListaDesejo.objects.create(usuario=usuario, produto=produto)
+        with orcamento_consultas(3):
+            res = api_autenticado.get('/api/desejos/')
+        assert len(res.data['results']) == 5
+
+
+@pytest.mark.django_db
+class TestSerializers:
+    def test_nome_do_autor_calculado_pelo_banco(self, api_client):
+        produto = ProdutoFactory()
+        AvaliacaoFactory(produto=produto, usuario=UserFactory(first_name='Ana', last_name=''))
+
+        res = api_client.get(f'/api/produtos/{produto.slug}/')
+
+        assert res.data['avaliacoes'][0]['usuario_nome'] == 'Ana'
+        assert res.data['usuario_ja_avaliou'] is False
+
+    def test_avaliacao_criada_sem_anotacao(self, api_autenticado, usuario):
+        usuario.first_name, usuario.last_name = 'Bia', 'Souza'
+        usuario.save()
+        produto = ProdutoFactory()
+
+        res = api_autenticado.post(f'/api/produtos/{produto.id}/avaliacao/', {'rating': 4})
+
+        assert res.status_code == 201
+        assert res.data['usuario_nome'] == 'Bia Souza'
+
+
+class TestOrcamentoConsultas:
+    @pytest.mark.django_db
+    def test_falha_acima_do_limite_e_aponta_repeticoes(self, orcamento_consultas):
+        UserFactory.create_batch(2)
+        from django.contrib.auth.models import User
+
+        with pytest.raises(pytest.fail.Exception) as erro:
+            with orcamento_consultas(1):
+                for pk in User.objects.values_list('pk', flat=True):
+                    User.objects.get(pk=pk)
+
+        assert 'o orçamento é 1' in str(erro.value)
+        assert 'repetida 2x' in str(erro.value)
@@ -0,0 +1,148 @@
+"""Testes dos contadores de badge (carrinho e lista de desejos)."""
+from io import StringIO
+
+import pytest
+from django.test import RequestFactory
+from django.contrib.auth.models import AnonymousUser
+from tests.factories import UserFactory, ProdutoFactory
+
+from pedidos.context_processors import carrinho_context
+from pedidos.models import CarrinhoItem
+from pedidos.services import contadores
+from pedidos.services.carrinho_service import CarrinhoService
+from usuarios.models import ListaDesejo
+
+
+def _request(usuario=None):
+    request = RequestFactory().get('/')
+    request.user = usuario or AnonymousUser()
+    request.session = type('Sessao', (), {'session_key': None})()
+    return request
+
+
+@pytest.fixture
+def com_cache(settings):
+    """Contadores em cache, como em produção com REDIS_URL."""
+    settings.CONTADORES_CACHE_TIMEOUT = 3600
+
+
+@pytest.mark.django_db
+class TestContadores:
+    def test_quantidade_do_carrinho_vem_do_modelo(self):
+        usuario = UserFactory()
+        CarrinhoItem.objects.create(usuario=usuario, produto=ProdutoFactory(), quantidade=2)
+        CarrinhoItem.objects.create(usuario=usuario, produto=ProdutoFactory(), quantidade=3)
+
+        assert contadores.quantidade_carrinho(_request(usuario)) == 5
+
+    def test_segunda_leitura_nao_consulta_banco(self, com_cache, django_assert_num_queries):
+        usuario = UserFactory()
+        request = _request(usuario)
+        contadores.tamanho_lista_desejos(request)
+
+        with django_assert_num_queries(0):
+            assert contadores.tamanho_lista_desejos(request) == 0
+
+    def test_sem_cache_compartilhado_sempre_consulta(self, settings, django_assert_num_queries):
+        settings.CONTADORES_CACHE_TIMEOUT = 0
+        usuario = UserFactory()
+        request = _request(usuario)
+        contadores.tamanho_lista_desejos(request)
+
+        with django_assert_num_queries(1):
+            assert contadores.tamanho_lista_desejos(request) == 0
+
+    def test_anonimo_sem_sessao_nao_consulta(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert contadores.quantidade_carrinho(_request()) == 0
+
+    def test_carrinho_service_atualiza_badge(self, com_cache):
+        usuario = UserFactory()
+        request = _request(usuario)
+        assert contadores.quantidade_carrinho(request) == 0
+
+        CarrinhoService.adicionar_produto(request, ProdutoFactory(estoque=5).id, 2)
+
+        assert contadores.quantidade_carrinho(request) == 2
+
+    def test_view_da_lista_de_desejos_atualiza_badge(self, com_cache, client):
+        usuario = UserFactory()
+        produto = ProdutoFactory()
+        client.force_login(usuario)
+        assert contadores.tamanho_lista_desejos(_request(usuario)) == 0
+
+        client.post(f'/usuarios/desejos/adicionar/{produto.id}/')
+
+        assert ListaDesejo.objects.filter(usuario=usuario).count() == 1
+        assert contadores.tamanho_lista_desejos(_request(usuario)) == 1
+
+
+@pytest.mark.django_db
+class TestInvalidacaoPorSignals:
+    """Mudanças que não passam pelo CarrinhoService nem pelas views."""
+
+    def test_edicao_direta_do_item(self, com_cache, django_capture_on_commit_callbacks):
+        usuario = UserFactory()
+        item = CarrinhoItem.objects.create(usuario=usuario, produto=ProdutoFactory(), quantidade=1)
+        assert contadores.quantidade_carrinho(_request(usuario)) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            item.quantidade = 4
+            item.save()
+
+        assert contadores.quantidade_carrinho(_request(usuario)) == 4
+
+    def test_exclusao_em_cascata(self, com_cache, django_capture_on_commit_callbacks):
+        usuario = UserFactory()
+        produto = ProdutoFactory()
+        CarrinhoItem.objects.create(usuario=usuario, produto=produto, quantidade=2)
+        ListaDesejo.objects.create(usuario=usuario, produto=produto)
+        assert contadores.quantidade_carrinho(_request(usuario)) == 2
+        assert contadores.tamanho_lista_desejos(_request(usuario)) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            produto.delete()
+
+        assert contadores.quantidade_carrinho(_request(usuario)) == 0
+        assert contadores.tamanho_lista_desejos(_request(usuario)) == 0
+
+    def test_limpar_sessoes(self, com_cache, django_capture_on_commit_callbacks):
+        from datetime import timedelta
+        from django.contrib.sessions.models import Session
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        Session.objects.create(session_key='expirada', session_data='',
+                               expire_date=timezone.now() - timedelta(days=1))
+        CarrinhoItem.objects.create(session_key='expirada', produto=ProdutoFactory(), quantidade=3)
+        request = _request()
+        request.session.session_key = 'expirada'
+        assert contadores.quantidade_carrinho(request) == 3
+
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('limpar_sessoes', stdout=StringIO())
+
+        assert contadores.quantidade_carrinho(request) == 0
+
+
+@pytest.mark.django_db
+class TestContextProcessor:
+    def test_avaliado_apenas_quando_usado(self, django_assert_num_queries):
+        usuario = UserFactory()
+        CarrinhoItem.objects.create(usuario=usuario, produto=ProdutoFactory(), quantidade=4)
+
+        with django_assert_num_queries(0):
+            contexto = carrinho_context(_request(usuario))
+
+        with django_assert_num_queries(1):
+            assert contexto['carrinho_count'] > 0
+            assert int(contexto['carrinho_count']) == 4
+
+    def test_badge_renderizado_no_cabecalho(self, client):
+        usuario = UserFactory()
+        CarrinhoItem.objects.create(usuario=usuario, produto=ProdutoFactory(), quantidade=3)
+        client.force_login(usuario)
+
+        response = client.get('/')
+
+        assert 'Carrinho de compras (3 items)' in response.content.decode()
@@ -0,0 +1,39 @@
+"""Testes da renderização de e-mails."""
+from unittest import mock
+
+import pytest
+from django.template.loader import render_to_string
+from tests.factories import UserFactory, PedidoFactory, ItemPedidoFactory
+
+from core import email_render
+
+TEMPLATES = ['boas_vindas', 'confirmacao_pedido', 'pedido_enviado', 'recuperacao_senha']
+
+
+@pytest.mark.django_db
+class TestEmailRender:
+    @pytest.mark.parametrize('template', TEMPLATES)
+    def test_saida_igual_ao_render_to_string(self, template):
+        usuario = UserFactory(first_name='<Ana & Cia>')
+        pedido = PedidoFactory(usuario=usuario)
+        ItemPedidoFactory(pedido=pedido)
+        pedido.refresh_from_db()
+        contexto = {
+            'user': usuario,
+            'usuario': usuario,
+            'pedido': pedido,
+            'site_url': 'https://loja.example.com',
+            'url_recuperacao': 'https://loja.example.com/reset/abc/',
+        }
+        nome = f'emails/{template}.html'
+
+        assert email_render.render(nome, contexto) == render_to_string(nome, contexto)
+
+    def test_render_many_carrega_uma_vez(self):
+        usuarios = UserFactory.build_batch(3)
+
+        with mock.patch.object(email_render, 'get_template', wraps=email_render.get_template) as carregar:
+            htmls = email_render.render_many('emails/boas_vindas.html', [{'user': u} for u in usuarios])
+
+        assert [u.username in html for u, html in zip(usuarios, htmls)] == [True] * 3
+        assert carregar.call_count == 1
@@ -0,0 +1,101 @@
+"""Testes das exportações CSV em streaming do painel administrativo."""
+import csv
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from tests.factories import UserFactory, ProdutoFactory, PedidoFactory, PagamentoFactory
+
+from core.pagination import percorrer_keyset
+from pedidos.models import Pedido
+
+
+@pytest.fixture
+def admin_client(client):
+    client.force_login(UserFactory(is_staff=True, is_superuser=True))
+    return client
+
+
+def _ler_csv(res):
+    assert res.streaming
+    conteudo = b''.join(res.streaming_content).decode('utf-8-sig')
+    return list(csv.reader(conteudo.splitlines()))
+
+
+@pytest.mark.django_db
+class TestPercorrerKeyset:
+    def test_percorre_tudo_em_lotes_com_empates(self, django_assert_num_queries):
+        usuario = UserFactory()
+        agora = timezone.now()
+        Pedido.objects.bulk_create([
+            Pedido(usuario=usuario, total=1, endereco='R', cidade='C', estado='SP', cep='1', telefone='1')
+            for _ in range(7)
+        ])
+        Pedido.objects.update(criado_em=agora)
+
+        # 7 registros em lotes de 3: 3 consultas, a última incompleta
+        with django_assert_num_queries(3):
+            ids = [p['id'] for p in percorrer_keyset(Pedido.objects.values('id', 'criado_em'), ('-criado_em', '-id'), 3)]
+
+        assert ids == sorted(Pedido.objects.values_list('id', flat=True), reverse=True)
+
+
+@pytest.mark.django_db
+class TestExportarVendas:
+    def test_exporta_mais_de_mil_pedidos(self, admin_client):
+        usuario = UserFactory()
+        Pedido.objects.bulk_create([
+            Pedido(usuario=usuario, total=10, endereco='R', cidade='C', estado='SP', cep='1', telefone='1')
+            for _ in range(1005)
+        ])
+
+        linhas = _ler_csv(admin_client.get('/admin-relatorios/exportar-vendas/'))
+
+        assert len(linhas) == 1 + 1005
+
+    def test_aplica_os_filtros_do_relatorio(self, admin_client):
+        entregue = PedidoFactory(status='entregue', total=Decimal('50.00'))
+        PagamentoFactory(pedido=entregue, metodo='pix', valor=entregue.total)
+        PedidoFactory(status='pendente')
+        antigo = PedidoFactory(status='entregue')
+        Pedido.objects.filter(pk=antigo.pk).update(criado_em=timezone.now() - timedelta(days=10))
+
+        hoje = timezone.localdate().isoformat()
+        linhas = _ler_csv(admin_client.get(
+            '/admin-relatorios/exportar-vendas/', {'status': 'entregue', 'data_inicio': hoje, 'data_fim': hoje}
+        ))
+
+        assert [linha[0] for linha in linhas[1:]] == [str(entregue.id)]
+        assert linhas[1][3:] == ['Entregue', 'R$ 50.00', 'Pix', 'Autorizado']
+
+    def test_pedido_sem_pagamento(self, admin_client):
+        PedidoFactory()
+        linhas = _ler_csv(admin_client.get('/admin-relatorios/exportar-vendas/'))
+        assert linhas[1][5:] == ['N/A', 'N/A']
+
+    def test_bom_apenas_no_inicio(self, admin_client):
+        PedidoFactory.create_batch(2)
+        conteudo = b''.join(admin_client.get('/admin-relatorios/exportar-vendas/').streaming_content)
+        assert conteudo.startswith(b'\xef\xbb\xbfID Pedido')
+        assert conteudo.count(b'\xef\xbb\xbf') == 1
+
+    def test_data_invalida_e_ignorada(self, admin_client):
+        PedidoFactory()
+        linhas = _ler_csv(admin_client.get('/admin-relatorios/exportar-vendas/', {'data_inicio': '2024-02-30'}))
+        assert len(linhas) == 2
+
+
+@pytest.mark.django_db
+class TestExportarEstoque:
+    def test_situacao_do_estoque(self, admin_client):
+        ProdutoFactory(nome='Esgotado', estoque=0, preco=Decimal('2.00'))
+        ProdutoFactory(nome='Baixo', estoque=3, preco=Decimal('2.00'))
+        ProdutoFactory(nome='Inativo', ativo=False)
+
+        linhas = _ler_csv(admin_client.get('/admin-relatorios/exportar-estoque/'))
+
+        assert [(linha[1], linha[5], linha[6]) for linha in linhas[1:]] == [
+            ('Esgotado', 'R$ 0.00', 'Esgotado'),
+            ('Baixo', 'R$ 6.00', 'Estoque Baixo'),
+        ]
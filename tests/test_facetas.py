@@ -0,0 +1,122 @@
+"""Testes da navegação facetada: filtros combináveis e contagens em uma consulta."""
+from decimal import Decimal
+
+import pytest
+from django.http import QueryDict
+from tests.factories import CategoriaFactory, ProdutoFactory
+
+from produtos import facetas
+
+
+def _opcoes(resultado, nome):
+    faceta = next(f for f in resultado['facetas'] if f['nome'] == nome)
+    return {opcao['valor']: opcao['total'] for opcao in faceta['opcoes']}
+
+
+def _selecionadas(resultado):
+    return {
+        (faceta['nome'], opcao['valor'])
+        for faceta in resultado['facetas'] for opcao in faceta['opcoes'] if opcao['selecionada']
+    }
+
+
+@pytest.fixture
+def catalogo():
+    remedios = CategoriaFactory(nome='Remédios', slug='remedios')
+    beleza = CategoriaFactory(nome='Beleza', slug='beleza')
+    ProdutoFactory(nome='Dipirona', categoria=remedios, preco=Decimal('12.00'), estoque=10,
+                   rating_total=2, rating_medio=4.5)
+    ProdutoFactory(nome='Paracetamol', categoria=remedios, preco=Decimal('40.00'),
+                   preco_promocional=Decimal('19.90'), estoque=0)
+    ProdutoFactory(nome='Protetor Solar', categoria=beleza, preco=Decimal('89.90'), estoque=3,
+                   rating_total=1, rating_medio=3.0)
+    ProdutoFactory(nome='Perfume', categoria=beleza, preco=Decimal('250.00'), estoque=1)
+    ProdutoFactory(nome='Inativo', categoria=beleza, preco=Decimal('10.00'), ativo=False)
+    return remedios, beleza
+
+
+@pytest.mark.django_db
+class TestContagens:
+    def test_sem_filtros(self, catalogo):
+        resultado = facetas.contar(QueryDict())
+
+        assert resultado['total'] == 4
+        assert _opcoes(resultado, 'categoria') == {'beleza': 2, 'remedios': 2}
+        # Paracetamol entra pelo preço promocional
+        assert _opcoes(resultado, 'preco') == {
+            'ate-25': 2, '25-50': 0, '50-100': 1, '100-200': 0, 'acima-200': 1,
+        }
+        assert _opcoes(resultado, 'promocao') == {'true': 1}
+        assert _opcoes(resultado, 'estoque') == {'true': 3}
+        assert _opcoes(resultado, 'avaliacao') == {'4': 1, '3': 2, '2': 2, '1': 2}
+        assert _selecionadas(resultado) == set()
+
+    def test_faceta_selecionada_nao_restringe_as_proprias_opcoes(self, catalogo):
+        resultado = facetas.contar(QueryDict('categoria=remedios&estoque=true'))
+
+        assert resultado['total'] == 1
+        # Categorias contam com o filtro de estoque, mas não com o de categoria
+        assert _opcoes(resultado, 'categoria') == {'beleza': 2, 'remedios': 1}
+        # Estoque conta com o filtro de categoria, mas não com o próprio
+        assert _opcoes(resultado, 'estoque') == {'true': 1}
+        assert _opcoes(resultado, 'preco')['ate-25'] == 1
+        assert _selecionadas(resultado) == {('categoria', 'remedios'), ('estoque', 'true')}
+
+    def test_busca_restringe_as_contagens(self, catalogo):
+        resultado = facetas.contar(QueryDict('q=paracetamol'))
+
+        assert resultado['total'] == 1
+        assert _opcoes(resultado, 'categoria') == {'beleza': 0, 'remedios': 1}
+        assert _opcoes(resultado, 'promocao') == {'true': 1}
+
+    def test_valores_invalidos(self, catalogo):
+        assert facetas.contar(QueryDict('preco=barato&avaliacao=9'))['total'] == 4
+        # Categoria inexistente não casa com nada, como antes das facetas
+        assert facetas.contar(QueryDict('categoria=nao-existe'))['total'] == 0
+
+    def test_uma_consulta_para_qualquer_combinacao(self, catalogo, django_assert_num_queries):
+        facetas.categorias()  # já em cache, como em qualquer página do catálogo
+        for query in ('', 'categoria=beleza', 'categoria=beleza&preco=50-100&promocao=true&estoque=true&avaliacao=3'):
+            with django_assert_num_queries(1):
+                facetas.contar(QueryDict(query))
+
+    def test_sem_busca_vem_do_cache_do_catalogo(self, catalogo, django_assert_num_queries):
+        facetas.contar(QueryDict('estoque=true'))
+        with django_assert_num_queries(0):
+            assert facetas.contar(QueryDict('estoque=true'))['total'] == 3
+
+
+@pytest.mark.django_db
+class TestFiltros:
+    def test_api_combina_facetas(self, catalogo, api_client):
+        res = api_client.get('/api/produtos/?preco=ate-25&estoque=true')
+        assert [p['nome'] for p in res.data['results']] == ['Dipirona']
+
+        res = api_client.get('/api/produtos/?avaliacao=3&ordenar=preco')
+        assert [p['nome'] for p in res.data['results']] == ['Dipirona', 'Protetor Solar']
+
+    def test_api_facetas(self, catalogo, api_client):
+        res = api_client.get('/api/facetas/?categoria=beleza')
+
+        assert res.status_code == 200
+        assert res.data['total'] == 2
+        assert _opcoes(res.data, 'categoria') == {'beleza': 2, 'remedios': 2}
+        assert 'listagens' in res['Surrogate-Key'].split()
+        assert api_client.get('/api/facetas/?categoria=beleza', HTTP_IF_NONE_MATCH=res['ETag']).status_code == 304
+
+    def test_barra_lateral_html(self, catalogo, client):
+        res = client.get('/produtos/?categoria=beleza&ordem=preco')
+
+        assert [p.nome for p in res.context['page_obj']] == ['Protetor Solar', 'Perfume']
+        assert res.context['filtros_selecionados'] == 1
+        categoria = next(f for f in res.context['facetas'] if f['nome'] == 'categoria')
+        remedios = next(o for o in categoria['opcoes'] if o['valor'] == 'remedios')
+        beleza = next(o for o in categoria['opcoes'] if o['valor'] == 'beleza')
+        # Trocar de opção mantém os demais parâmetros; a selecionada desmarca
+        assert QueryDict(remedios['url'][1:]).dict() == {'categoria': 'remedios', 'ordem': 'preco'}
+        assert QueryDict(beleza['url'][1:]).dict() == {'ordem': 'preco'}
+        assert 'Em estoque' in res.content.decode()
+
+    def test_paginas_em_cache_distinguem_filtros(self, catalogo, client):
+        assert client.get('/produtos/?estoque=true').context['page_obj'].paginator.count == 3
+        assert client.get('/produtos/?promocao=true').context['page_obj'].paginator.count == 1
@@ -0,0 +1,286 @@
+"""Testes da ingestão de uploads, dos derivados de imagem (JPEG e WebP) e do mapa servido pela API."""
+import base64
+import io
+
+import pytest
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+from tests.factories import ProdutoFactory
+
+from produtos import imagens
+from produtos.models import Produto
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def _upload(nome='foto.jpg', tamanho=(1200, 900), **opcoes):
+    conteudo = io.BytesIO()
+    Image.new('RGB', tamanho, 'teal').save(conteudo, 'JPEG', **opcoes)
+    return SimpleUploadedFile(nome, conteudo.getvalue(), content_type='image/jpeg')
+
+
+def _arquivos(produto):
+    return [getattr(produto, nome) for nome in imagens.DERIVADOS]
+
+
+def _geracoes(callbacks):
+    # Outros on_commit (invalidação do catálogo, busca) também são capturados
+    return [c for c in callbacks if 'OtimistaAposCommit' in c.__qualname__]
+
+
+@pytest.mark.django_db
+class TestIngestao:
+    def test_foto_de_camera_normalizada(self, media, settings):
+        settings.IMAGENS_RESOLUCAO_MESTRE = 1000
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: girar 90° para exibir
+        exif[0x010F] = 'Fabricante da Câmera'
+
+        produto = ProdutoFactory(imagem=_upload('IMG_0001.JPG', tamanho=(4000, 3000), exif=exif.tobytes()))
+
+        with Image.open(media / produto.imagem.name) as gravada:
+            assert gravada.format == 'JPEG'
+            assert gravada.size == (750, 1000)
+            assert 'exif' not in gravada.info
+            assert not gravada.getexif()
+        assert produto.imagem.name == 'produtos/IMG_0001.jpg'
+        assert (produto.imagem_largura, produto.imagem_altura) == (750, 1000)
+        produto.refresh_from_db()
+        assert (produto.imagens['detalhe']['largura'], produto.imagens['detalhe']['altura']) == (600, 800)
+
+    def test_transparencia_preservada_em_png(self, media):
+        conteudo = io.BytesIO()
+        Image.new('RGBA', (400, 200), (255, 0, 0, 128)).save(conteudo, 'PNG')
+
+        produto = ProdutoFactory(imagem=SimpleUploadedFile('logo.png', conteudo.getvalue()))
+
+        with Image.open(media / produto.imagem.name) as gravada:
+            assert (gravada.format, gravada.mode, gravada.size) == ('PNG', 'RGBA', (400, 200))
+
+    def test_placeholder_minusculo(self, media):
+        produto = ProdutoFactory(imagem=_upload(tamanho=(1600, 800)))
+
+        prefixo = 'data:image/jpeg;base64,'
+        assert produto.imagem_placeholder.startswith(prefixo)
+        assert len(produto.imagem_placeholder) < 1500
+        with Image.open(io.BytesIO(base64.b64decode(produto.imagem_placeholder[len(prefixo):]))) as miniatura:
+            assert miniatura.size == (20, 10)
+
+    def test_arquivo_que_nao_e_imagem_mantido(self, media):
+        produto = ProdutoFactory(imagem=SimpleUploadedFile('foto.jpg', b'nao sou uma imagem'))
+
+        assert (media / produto.imagem.name).read_bytes() == b'nao sou uma imagem'
+        assert produto.imagem_largura is None
+
+    def test_api_expoe_placeholder(self, media, api_client):
+        produto = ProdutoFactory(imagem=_upload())
+        res = api_client.get('/api/produtos/')
+        assert res.data['results'][0]['imagem_placeholder'] == produto.imagem_placeholder
+
+
+@pytest.mark.django_db
+class TestGeracaoAoSalvar:
+    def test_derivados_gerados_apos_commit(self, media, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            produto = ProdutoFactory(imagem=_upload())
+
+        produto.refresh_from_db()
+        assert imagens.derivados_gerados(produto)
+        for arquivo in _arquivos(produto):
+            assert (media / arquivo.name).exists()
+        with Image.open(media / produto.thumbnail_webp.name) as webp:
+            assert webp.format == 'WEBP'
+            assert webp.size == (300, 300)
+        with Image.open(media / produto.imagem_detalhe.name) as jpeg:
+            assert jpeg.format == 'JPEG'
+            assert jpeg.size == (800, 600)
+
+    def test_nada_gerado_sem_commit(self, media, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            produto = ProdutoFactory(imagem=_upload())
+
+        assert len(_geracoes(callbacks)) == 1  # uma geração por imagem, não por derivado
+        assert not any((media / arquivo.name).exists() for arquivo in _arquivos(produto))
+
+    def test_salvar_sem_trocar_a_imagem_nao_regera(self, media, django_capture_on_commit_callbacks):
+        produto = ProdutoFactory(imagem=_upload())
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            produto.estoque = 3
+            produto.save()
+        assert _geracoes(callbacks) == []
+
+    def test_url_nao_consulta_o_storage(self, media, monkeypatch, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            produto = ProdutoFactory(imagem=_upload())
+        produto.refresh_from_db()
+        chamadas = []
+
+        def registrar(*args, **kwargs):
+            # Falhas de geração são só registradas no log: conta as chamadas
+            chamadas.append(args)
+            raise AssertionError('o storage não deveria ser consultado')
+
+        monkeypatch.setattr(FileSystemStorage, 'exists', registrar)
+        monkeypatch.setattr(FileSystemStorage, 'save', registrar)
+
+        assert produto.thumbnail_lista.url.endswith('.jpg')
+        assert produto.thumbnail_lista_webp.url.endswith('.webp')
+        assert chamadas == []
+
+    def test_produto_nao_aquecido_gera_na_hora(self, media):
+        # Anterior ao deploy ou importado: sem mapa, sem derivados
+        pk = ProdutoFactory(imagem=_upload()).pk
+        Produto.objects.filter(pk=pk).update(imagens={})
+        produto = Produto.objects.get(pk=pk)
+        assert not (media / produto.thumbnail_lista.name).exists()
+
+        url = produto.thumbnail_lista.url
+
+        assert url.endswith('.jpg')
+        assert (media / produto.thumbnail_lista.name).exists()
+        assert not (media / produto.thumbnail.name).exists()
+
+    def test_salvar_produto_sem_mapa_nao_o_marca_como_gerado(self, media):
+        # Imagem já no storage, sem mapa: salvar outro campo grava o mapa,
+        # mas o imagekit não gera nada (a imagem não mudou)
+        pk = ProdutoFactory(imagem=_upload()).pk
+        Produto.objects.filter(pk=pk).update(imagens={})
+        produto = Produto.objects.get(pk=pk)
+        produto.preco = 99
+        produto.save()
+
+        produto = Produto.objects.get(pk=pk)
+        assert produto.imagens['origem'] == produto.imagem.name
+        assert not imagens.derivados_gerados(produto)
+        produto.thumbnail.url
+        assert (media / produto.thumbnail.name).exists()
+
+    def test_falha_apos_commit_nao_marca(self, media, monkeypatch, django_capture_on_commit_callbacks):
+        monkeypatch.setattr(imagens, 'gerar_derivados', lambda produto, forcar=False: (5, 1))
+        with django_capture_on_commit_callbacks(execute=True):
+            produto = ProdutoFactory(imagem=_upload())
+
+        produto.refresh_from_db()
+        assert 'card' in produto.imagens
+        assert not imagens.derivados_gerados(produto)
+
+    def test_mapa_montado_sem_gerar(self, media, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False):
+            produto = ProdutoFactory(imagem=_upload())
+
+        assert produto.imagens['card']['jpeg'].endswith('.jpg')
+        assert not any((media / arquivo.name).exists() for arquivo in _arquivos(produto))
+
+
+@pytest.mark.django_db
+class TestAquecimento:
+    def test_comando_gera_tudo_em_paralelo(self, media):
+        produtos = [ProdutoFactory(imagem=_upload(f'foto{i}.jpg')) for i in range(3)]
+        ProdutoFactory()  # sem imagem: ignorado
+        # Como numa importação por bulk_create: sem mapa
+        Produto.objects.filter(pk=produtos[0].pk).update(imagens={})
+        saida = io.StringIO()
+
+        call_command('warm_product_images', processos=2, lote=1, stdout=saida)
+
+        assert '18 derivado(s) prontos para 3 produto(s)' in saida.getvalue()
+        for produto in produtos:
+            assert all((media / arquivo.name).exists() for arquivo in _arquivos(produto))
+            produto.refresh_from_db()
+            assert imagens.derivados_gerados(produto)
+        assert produtos[0].imagens['card']['largura'] == 300
+
+    def test_forcar_regera_no_mesmo_nome(self, media):
+        produto = ProdutoFactory(imagem=_upload())
+        imagens.aquecer(processos=1)
+        nomes = sorted(p.name for p in media.rglob('*') if p.is_file())
+
+        resultado = imagens.aquecer(processos=1, forcar=True)
+
+        assert resultado == {'produtos': 1, 'arquivos': 6, 'erros': 0}
+        assert sorted(p.name for p in media.rglob('*') if p.is_file()) == nomes
+        assert (media / produto.thumbnail.name).exists()
+
+    def test_imagem_ausente_conta_erro_sem_interromper(self, media):
+        ProdutoFactory(imagem='produtos/nao-existe.jpg')
+        ok = ProdutoFactory(imagem=_upload())
+
+        resultado = imagens.aquecer(processos=1)
+
+        assert resultado == {'produtos': 2, 'arquivos': 6, 'erros': 6}
+        assert (media / ok.thumbnail.name).exists()
+        assert [imagens.derivados_gerados(p) for p in Produto.objects.order_by('pk')] == [False, True]
+
+
+@pytest.mark.django_db
+class TestMapaDerivados:
+    def test_mapa_gravado_ao_salvar(self, media):
+        produto = ProdutoFactory(imagem=_upload(tamanho=(1200, 900)))
+        produto.refresh_from_db()
+
+        mapa = produto.imagens
+        assert mapa['origem'] == produto.imagem.name
+        assert (mapa['largura'], mapa['altura']) == (1200, 900)
+        assert {nome: (v['largura'], v['altura']) for nome, v in mapa.items() if isinstance(v, dict)} == {
+            'card': (300, 300), 'lista': (260, 220), 'detalhe': (800, 600),
+        }
+        assert mapa['lista']['jpeg'] == produto.thumbnail_lista.url
+        assert mapa['lista']['webp'].endswith('.webp')
+
+    def test_remover_imagem_limpa_mapa(self, media):
+        produto = ProdutoFactory(imagem=_upload())
+        produto.imagem = None
+        produto.save()
+        produto.refresh_from_db()
+        assert produto.imagens == {}
+        assert (produto.imagem_largura, produto.imagem_altura, produto.imagem_placeholder) == (None, None, '')
+
+    def test_api_serve_derivados_sem_tocar_no_storage(self, media, api_client, monkeypatch,
+                                                      django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            produto = ProdutoFactory(imagem=_upload(tamanho=(600, 1200)))
+        produto.refresh_from_db()
+
+        def proibido(*args, **kwargs):
+            raise AssertionError('o storage não deveria ser consultado')
+
+        for metodo in ('exists', 'open', 'url', 'size'):
+            monkeypatch.setattr(FileSystemStorage, metodo, proibido)
+
+        lista = api_client.get('/api/produtos/').data['results'][0]
+        detalhe = api_client.get(f'/api/produtos/{produto.slug}/').data
+
+        assert lista['imagem_url'] == f'http://testserver{produto.imagens["lista"]["jpeg"]}'
+        assert detalhe['imagem_url'] == f'http://testserver{produto.imagens["detalhe"]["jpeg"]}'
+        assert detalhe['imagens']['detalhe'] == {
+            'jpeg': f'http://testserver{produto.imagens["detalhe"]["jpeg"]}',
+            'webp': f'http://testserver{produto.imagens["detalhe"]["webp"]}',
+            'largura': 400,
+            'altura': 800,
+        }
+
+    def test_api_serve_original_ate_gerar(self, media, api_client, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False):
+            produto = ProdutoFactory(imagem=_upload(tamanho=(600, 1200)))
+        produto.refresh_from_db()
+        assert produto.imagens['lista']
+
+        lista = api_client.get('/api/produtos/').data['results'][0]
+        detalhe = api_client.get(f'/api/produtos/{produto.slug}/').data
+
+        assert lista['imagem_url'] == f'http://testserver{produto.imagem.url}'
+        assert detalhe['imagem_url'] == f'http://testserver{produto.imagem.url}'
+        assert lista['imagens'] is None
+        assert detalhe['imagens'] is None
+
+    def test_sem_imagem(self, api_client):
+        ProdutoFactory()
+        produto = api_client.get('/api/produtos/').data['results'][0]
+        assert produto['imagem_url'] is None
+        assert produto['imagens'] is None
@@ -0,0 +1,215 @@
+"""Testes dos rollups diários de métricas e do dashboard administrativo."""
+import importlib
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from tests.factories import (
+    UserFactory, ProdutoFactory, PedidoFactory, ItemPedidoFactory, PagamentoFactory,
+)
+
+from core import metricas
+from core.models import MetricaCadastrosDia, MetricaDiaPendente, MetricaPagamentoDia, MetricaPedidosDia, MetricaProdutoDia
+from pedidos.models import Pedido
+
+MODELOS = (MetricaPedidosDia, MetricaProdutoDia, MetricaPagamentoDia, MetricaCadastrosDia)
+
+
+def _venda(status='processando', quantidade=2, preco='10.00', metodo='pix', produto=None):
+    pedido = PedidoFactory(status=status, total=Decimal(preco) * quantidade)
+    ItemPedidoFactory(
+        pedido=pedido, produto=produto or ProdutoFactory(),
+        quantidade=quantidade, preco_unitario=Decimal(preco),
+    )
+    PagamentoFactory(pedido=pedido, metodo=metodo, valor=pedido.total)
+    return pedido
+
+
+def _retrato():
+    return {
+        modelo.__name__: sorted(
+            tuple(str(v) for v in linha)
+            for linha in modelo.objects.values_list(*[f.attname for f in modelo._meta.fields if f.name != 'id'])
+        )
+        for modelo in MODELOS
+    }
+
+
+@pytest.mark.django_db
+class TestAtualizacaoIncremental:
+    def test_venda_gera_rollups_do_dia(self, django_capture_on_commit_callbacks):
+        produto = ProdutoFactory()
+        with django_capture_on_commit_callbacks(execute=True):
+            _venda(produto=produto, quantidade=3, preco='5.00')
+        metricas.atualizar_pendentes()
+
+        hoje = timezone.localdate()
+        pedidos = MetricaPedidosDia.objects.get(data=hoje, status='processando')
+        assert (pedidos.quantidade, pedidos.total) == (1, Decimal('15.00'))
+        item = MetricaProdutoDia.objects.get(data=hoje, produto=produto)
+        assert (item.quantidade, item.receita, item.categoria_id) == (3, Decimal('15.00'), produto.categoria_id)
+        assert MetricaPagamentoDia.objects.get(data=hoje, metodo='pix').quantidade == 1
+        assert MetricaCadastrosDia.objects.get(data=hoje).quantidade == 1
+
+    def test_mudanca_de_status_move_o_pedido(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            pedido = _venda(status='pendente')
+        metricas.atualizar_pendentes()
+        assert not MetricaProdutoDia.objects.exists()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            pedido.status = 'enviado'
+            pedido.save()
+        metricas.atualizar_pendentes()
+
+        assert list(MetricaPedidosDia.objects.values_list('status', 'quantidade')) == [('enviado', 1)]
+        assert MetricaProdutoDia.objects.get().quantidade == 2
+
+    def test_checkout_so_marca_o_dia(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            _venda()
+
+        with CaptureQueriesContext(connection) as capturadas:
+            for callback in callbacks:
+                callback()
+
+        # Uma única marca por transação, sem recálculo no request do cliente
+        assert len(capturadas.captured_queries) == 1
+        assert list(MetricaDiaPendente.objects.values_list('data', flat=True)) == [timezone.localdate()]
+        assert not MetricaPedidosDia.objects.exists()
+
+    def test_recalculo_unico_dos_dias_pendentes(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            _venda()
+        with django_capture_on_commit_callbacks(execute=True):
+            _venda()
+
+        with CaptureQueriesContext(connection) as capturadas:
+            assert metricas.atualizar_pendentes() == [timezone.localdate()]
+
+        apagados = [q for q in capturadas.captured_queries if q['sql'].startswith('DELETE')]
+        assert len(apagados) == len(MODELOS) + 1
+        assert not MetricaDiaPendente.objects.exists()
+        assert MetricaPedidosDia.objects.get().quantidade == 2
+        assert metricas.atualizar_pendentes() == []
+
+    def test_exclusao_do_pedido_remove_as_metricas(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            pedido = _venda()
+        with django_capture_on_commit_callbacks(execute=True):
+            pedido.delete()
+        metricas.atualizar_pendentes()
+
+        assert not MetricaPedidosDia.objects.exists()
+        assert not MetricaProdutoDia.objects.exists()
+        assert not MetricaPagamentoDia.objects.exists()
+
+    def test_novos_compradores_contam_o_primeiro_pedido(self, django_capture_on_commit_callbacks):
+        ontem = timezone.now() - timedelta(days=1)
+        with django_capture_on_commit_callbacks(execute=True):
+            cliente = UserFactory()
+            primeiro = PedidoFactory(usuario=cliente)
+            PedidoFactory(usuario=cliente)
+            UserFactory()  # cadastrado, sem pedido
+        Pedido.objects.filter(pk=primeiro.pk).update(criado_em=ontem)
+        metricas.recalcular_periodo(timezone.localdate(ontem), timezone.localdate())
+
+        compradores = dict(MetricaCadastrosDia.objects.values_list('data', 'compradores'))
+        assert compradores == {timezone.localdate(ontem): 1, timezone.localdate(): 0}
+
+        # Sem o primeiro pedido, o cliente passa a contar no dia do seguinte
+        with django_capture_on_commit_callbacks(execute=True):
+            Pedido.objects.get(pk=primeiro.pk).delete()
+        metricas.atualizar_pendentes()
+
+        assert dict(MetricaCadastrosDia.objects.values_list('data', 'compradores')) == {timezone.localdate(): 1}
+
+
+@pytest.mark.django_db
+class TestReconstruirMetricas:
+    def test_reconstrucao_igual_a_atualizacao_incremental(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            _venda(quantidade=1)
+            _venda(status='cancelado', metodo='boleto')
+            _venda(status='entregue', metodo='cartao_credito')
+        metricas.atualizar_pendentes()
+        incremental = _retrato()
+
+        for modelo in MODELOS:
+            modelo.objects.all().delete()
+        call_command('reconstruir_metricas', '--dias-por-lote', '1', stdout=StringIO())
+
+        assert _retrato() == incremental
+
+    def test_reconstrucao_de_periodo_antigo(self):
+        pedido = _venda()
+        ontem = timezone.now() - timedelta(days=1)
+        Pedido.objects.filter(pk=pedido.pk).update(criado_em=ontem)
+
+        dia = timezone.localdate(ontem).isoformat()
+        call_command('reconstruir_metricas', '--inicio', dia, '--fim', dia, stdout=StringIO())
+
+        assert MetricaPedidosDia.objects.get().data == timezone.localdate(ontem)
+
+    def test_migracao_preenche_o_historico(self):
+        from django.apps import apps
+        migracao = importlib.import_module('core.migrations.0004_metricas_pendentes')
+        _venda(quantidade=3)
+
+        migracao.reconstruir_historico(apps, None)
+
+        assert MetricaProdutoDia.objects.get().quantidade == 3
+        assert MetricaCadastrosDia.objects.get().compradores == 1
+
+
+@pytest.mark.django_db
+class TestDashboard:
+    def _abrir(self, client):
+        admin = UserFactory(is_staff=True, is_superuser=True)
+        client.force_login(admin)
+        with CaptureQueriesContext(connection) as capturadas:
+            res = client.get('/admin-dashboard/')
+        assert res.status_code == 200
+        return res, len(capturadas.captured_queries)
+
+    def test_le_os_rollups(self, client, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            _venda(quantidade=2, preco='10.00')
+            _venda(status='pendente')
+
+        res, _ = self._abrir(client)
+
+        assert res.context['total_vendas'] == Decimal('20.00')
+        assert res.context['total_pedidos'] == 2
+        assert res.context['pedidos_pendentes'] == 1
+        # Os dois clientes e o admin que abriu o dashboard
+        assert res.context['total_usuarios'] == 3
+        assert res.context['taxa_conversao'] == 66.67
+
+    def test_recalcula_os_dias_pendentes(self, client, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            _venda(quantidade=1, preco='7.00')
+            UserFactory()
+
+        res, _ = self._abrir(client)
+
+        assert res.context['total_vendas'] == Decimal('7.00')
+        assert res.context['taxa_conversao'] == 33.33  # um cliente de três usuários
+        assert not MetricaDiaPendente.objects.exists()
+
+    def test_consultas_nao_crescem_com_o_historico(self, client, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            _venda()
+        _, poucas = self._abrir(client)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for _ in range(5):
+                _venda()
+        _, muitas = self._abrir(client)
+
+        assert muitas == poucas
@@ -1,6 +1,7 @@
 """Testes unitários dos models."""
 import pytest
 from decimal import Decimal
+from io import StringIO
 from tests.factories import (
     ProdutoFactory, CategoriaFactory, AvaliacaoFactory,
     UserFactory, PedidoFactory, ItemPedidoFactory, CarrinhoItem,
@@ -49,19 +50,129 @@ class TestProdutoModel:
         produto = ProdutoFactory()
         AvaliacaoFactory(produto=produto, rating=4)
         AvaliacaoFactory(produto=produto, rating=2)
+        produto.refresh_from_db()
         assert produto.media_avaliacoes == 3.0
 
     def test_total_avaliacoes(self):
         produto = ProdutoFactory()
         AvaliacaoFactory(produto=produto)
         AvaliacaoFactory(produto=produto, usuario=UserFactory())
+        produto.refresh_from_db()
         assert produto.total_avaliacoes == 2
 
+    def test_media_e_total_nao_consultam_avaliacoes(self, django_assert_num_queries):
+        produto = ProdutoFactory()
+        AvaliacaoFactory(produto=produto, rating=5)
+        produto.refresh_from_db()
+        with django_assert_num_queries(0):
+            assert (produto.media_avaliacoes, produto.total_avaliacoes) == (5.0, 1)
+
     def test_str(self):
         produto = ProdutoFactory(nome='Vitamina C')
         assert str(produto) == 'Vitamina C'
 
 
+@pytest.mark.django_db
+class TestAgregadosAvaliacao:
+    def test_criar_avaliacao_atualiza_agregados(self):
+        produto = ProdutoFactory()
+        AvaliacaoFactory(produto=produto, rating=4)
+        AvaliacaoFactory(produto=produto, rating=2)
+        produto.refresh_from_db()
+        assert produto.rating_total == 2
+        assert produto.rating_medio == 3.0
+
+    def test_editar_avaliacao_atualiza_media(self):
+        produto = ProdutoFactory()
+        avaliacao = AvaliacaoFactory(produto=produto, rating=4)
+        avaliacao.rating = 1
+        avaliacao.save()
+        produto.refresh_from_db()
+        assert produto.rating_total == 1
+        assert produto.rating_medio == 1.0
+
+    def test_excluir_avaliacao_atualiza_agregados(self):
+        produto = ProdutoFactory()
+        avaliacao = AvaliacaoFactory(produto=produto, rating=5)
+        AvaliacaoFactory(produto=produto, rating=3)
+        avaliacao.delete()
+        produto.refresh_from_db()
+        assert produto.rating_total == 1
+        assert produto.rating_medio == 3.0
+
+    def test_excluir_ultima_avaliacao_zera_media(self):
+        produto = ProdutoFactory()
+        AvaliacaoFactory(produto=produto, rating=5).delete()
+        produto.refresh_from_db()
+        assert produto.rating_total == 0
+        assert produto.rating_medio == 0
+
+    def test_salvar_instancia_antiga_preserva_agregados(self):
+        from produtos.models import Produto
+        produto = ProdutoFactory(preco=Decimal('10.00'))
+        no_admin = Produto.objects.get(pk=produto.pk)  # carregado antes da avaliação
+        AvaliacaoFactory(produto=produto, rating=4)
+
+        no_admin.preco = Decimal('12.00')
+        no_admin.save()
+
+        produto.refresh_from_db()
+        assert produto.preco == Decimal('12.00')
+        assert (produto.rating_total, produto.rating_soma, produto.rating_medio) == (1, 4, 4.0)
+
+    def test_salvar_instancia_com_campos_adiados(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from produtos.models import Produto
+        produto = ProdutoFactory(preco=Decimal('10.00'), estoque=5)
+        parcial = Produto.objects.only('pk', 'preco', 'rating_total').get(pk=produto.pk)
+        AvaliacaoFactory(produto=produto, rating=4)
+        Produto.objects.filter(pk=produto.pk).update(estoque=7)
+
+        parcial.preco = Decimal('12.00')
+        with CaptureQueriesContext(connection) as consultas:
+            parcial.save()
+
+        [update] = [q['sql'] for q in consultas.captured_queries if q['sql'].startswith('UPDATE')]
+        assert '"preco"' in update and '"atualizado_em"' in update
+        assert '"estoque"' not in update and '"slug"' not in update and '"rating_total"' not in update
+
+        produto.refresh_from_db()
+        assert produto.preco == Decimal('12.00')
+        assert produto.estoque == 7
+        assert produto.rating_total == 1
+
+    def test_salvar_produto_removido_recria_a_linha(self):
+        from produtos.models import Produto
+        produto = ProdutoFactory(preco=Decimal('10.00'))
+        Produto.objects.filter(pk=produto.pk).delete()
+
+        produto.save()
+
+        assert Produto.objects.get(pk=produto.pk).preco == Decimal('10.00')
+
+    def test_agregados_gravados_se_pedidos_explicitamente(self):
+        produto = ProdutoFactory()
+        produto.rating_total, produto.rating_soma, produto.rating_medio = 2, 9, 4.5
+        produto.save(update_fields=['rating_total', 'rating_soma', 'rating_medio'])
+        produto.refresh_from_db()
+        assert produto.rating_total == 2
+
+    def test_comando_recalcula_agregados(self):
+        from django.core.management import call_command
+        from produtos.models import Produto
+        produto = ProdutoFactory()
+        AvaliacaoFactory(produto=produto, rating=4)
+        AvaliacaoFactory(produto=produto, rating=5)
+        Produto.objects.update(rating_total=0, rating_soma=0, rating_medio=0)
+
+        call_command('recalcular_avaliacoes', stdout=StringIO())
+
+        produto.refresh_from_db()
+        assert produto.rating_total == 2
+        assert produto.rating_medio == 4.5
+
+
 @pytest.mark.django_db
 class TestCategoriaModel:
     def test_slug_gerado_automaticamente(self):
@@ -0,0 +1,197 @@
+"""Testes do outbox de e-mails e do worker processar_outbox."""
+import smtplib
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.utils import timezone
+from tests.factories import UserFactory, PedidoFactory
+
+from core import outbox
+from core.email_utils import enviar_email_confirmacao_pedido
+from core.models import MensagemOutbox
+
+
+class BackendContador(locmem.EmailBackend):
+    """Stand-in do SMTP que conta quantas conexões foram abertas."""
+
+    aberturas = 0
+
+    def open(self):
+        type(self).aberturas += 1
+        return super().open()
+
+
+class BackendFora(locmem.EmailBackend):
+    """Stand-in de um servidor SMTP que derruba toda conexão."""
+
+    def send_messages(self, messages):
+        raise smtplib.SMTPServerDisconnected('Conexão encerrada pelo servidor')
+
+
+@pytest.fixture
+def contador(settings):
+    settings.EMAIL_BACKEND = 'tests.test_outbox.BackendContador'
+    BackendContador.aberturas = 0
+    return BackendContador
+
+
+def _vencer(mensagem):
+    MensagemOutbox.objects.filter(pk=mensagem.pk).update(proximo_envio_em=timezone.now() - timedelta(seconds=1))
+
+
+@pytest.mark.django_db
+class TestEnfileirar:
+    def test_confirmacao_de_pedido_nao_envia_na_requisicao(self):
+        pedido = PedidoFactory()
+
+        assert enviar_email_confirmacao_pedido(pedido) is True
+
+        assert mail.outbox == []
+        mensagem = MensagemOutbox.objects.get()
+        assert mensagem.status == 'pendente'
+        assert mensagem.destinatarios == [pedido.usuario.email]
+        assert mensagem.contexto['pedido'] == {'__modelo__': 'pedidos.pedido', 'pk': pedido.pk}
+
+    def test_recuperacao_de_senha_enfileira(self, client):
+        usuario = UserFactory()
+
+        res = client.post('/usuarios/recuperar-senha/', {'email': usuario.email})
+
+        assert res.status_code == 302
+        assert mail.outbox == []
+        mensagem = MensagemOutbox.objects.get()
+        assert mensagem.template == 'recuperacao_senha'
+        assert mensagem.contexto['url_recuperacao'] in mensagem.corpo_texto
+
+
+@pytest.mark.django_db
+class TestWorker:
+    def test_envia_lote_por_uma_conexao(self, contador):
+        for pedido in PedidoFactory.create_batch(3):
+            enviar_email_confirmacao_pedido(pedido)
+
+        resultado = outbox.processar_lote(10)
+
+        assert resultado == {'enviadas': 3, 'reagendadas': 0, 'descartadas': 0}
+        assert contador.aberturas == 1
+        assert len(mail.outbox) == 3
+        html, _ = mail.outbox[0].alternatives[0]
+        assert 'Pedido' in html
+        assert set(MensagemOutbox.objects.values_list('status', flat=True)) == {'enviado'}
+
+    def test_falha_reagenda_com_backoff_e_depois_descarta(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_outbox.BackendFora'
+        settings.OUTBOX_MAX_TENTATIVAS = 2
+        enviar_email_confirmacao_pedido(PedidoFactory())
+
+        assert outbox.processar_lote() == {'enviadas': 0, 'reagendadas': 1, 'descartadas': 0}
+        mensagem = MensagemOutbox.objects.get()
+        assert (mensagem.status, mensagem.tentativas) == ('pendente', 1)
+        assert mensagem.proximo_envio_em > timezone.now() + timedelta(seconds=settings.OUTBOX_BACKOFF_BASE - 5)
+        assert 'SMTPServerDisconnected' in mensagem.ultimo_erro
+
+        # Ainda não venceu o backoff
+        assert outbox.processar_lote()['reagendadas'] == 0
+
+        _vencer(mensagem)
+        assert outbox.processar_lote()['descartadas'] == 1
+        mensagem.refresh_from_db()
+        assert (mensagem.status, mensagem.tentativas) == ('falhou', 2)
+
+    def test_backoff_exponencial_limitado(self, settings):
+        settings.OUTBOX_BACKOFF_BASE = 10
+        settings.OUTBOX_BACKOFF_MAXIMO = 60
+        atrasos = [outbox.atraso_nova_tentativa(t).total_seconds() for t in (1, 2, 3, 10)]
+        assert 10 <= atrasos[0] <= 11
+        assert 20 <= atrasos[1] <= 22
+        assert 40 <= atrasos[2] <= 44
+        assert 60 <= atrasos[3] <= 66
+
+    def test_template_inexistente_vai_direto_para_dead_letter(self, contador):
+        outbox.enfileirar('Assunto', 'nao_existe', {}, 'cliente@example.com')
+
+        assert outbox.processar_lote()['descartadas'] == 1
+        assert MensagemOutbox.objects.get().status == 'falhou'
+        assert mail.outbox == []
+
+    def test_objeto_removido_descarta(self, contador):
+        pedido = PedidoFactory()
+        enviar_email_confirmacao_pedido(pedido)
+        pedido.delete()
+
+        assert outbox.processar_lote()['descartadas'] == 1
+
+    def test_reserva_expirada_volta_para_a_fila(self, contador):
+        mensagem = outbox.enfileirar('Assunto', 'boas_vindas', {'user': UserFactory()}, 'a@example.com')
+        assert len(outbox.reservar_lote(10)) == 1
+        assert outbox.reservar_lote(10) == []
+
+        _vencer(mensagem)
+
+        assert outbox.processar_lote()['enviadas'] == 1
+
+    def test_reenfileirar_dead_letters(self):
+        mensagem = outbox.enfileirar('Assunto', 'boas_vindas', {}, 'a@example.com')
+        MensagemOutbox.objects.filter(pk=mensagem.pk).update(status='falhou', tentativas=5)
+
+        assert outbox.reenfileirar(MensagemOutbox.objects.all()) == 1
+        mensagem.refresh_from_db()
+        assert (mensagem.status, mensagem.tentativas) == ('pendente', 0)
+
+    def test_comando_esvazia_a_fila(self, contador):
+        for pedido in PedidoFactory.create_batch(3):
+            enviar_email_confirmacao_pedido(pedido)
+        saida = StringIO()
+
+        call_command('processar_outbox', '--lote', '2', stdout=saida)
+
+        assert len(mail.outbox) == 3
+        assert contador.aberturas == 2
+        assert '3 e-mail(s) enviado(s)' in saida.getvalue()
+
+    def test_envio_apos_commit_sem_worker(self, settings, django_capture_on_commit_callbacks):
+        settings.OUTBOX_ENVIO_APOS_COMMIT = True
+
+        with django_capture_on_commit_callbacks(execute=True):
+            enviar_email_confirmacao_pedido(PedidoFactory())
+            assert mail.outbox == []
+
+        assert len(mail.outbox) == 1
+        assert MensagemOutbox.objects.get().status == 'enviado'
+
+
+@pytest.mark.django_db
+class TestTarefaAgendada:
+    URL = '/tarefas/processar-outbox/'
+
+    def test_exige_o_segredo_do_cron(self, client, settings):
+        enviar_email_confirmacao_pedido(PedidoFactory())
+
+        settings.CRON_SECRET = ''
+        assert client.get(self.URL, HTTP_AUTHORIZATION='Bearer ').status_code == 401
+        settings.CRON_SECRET = 'segredo'
+        assert client.get(self.URL).status_code == 401
+        assert client.get(self.URL, HTTP_AUTHORIZATION='Bearer outro').status_code == 401
+        assert mail.outbox == []
+
+    def test_esvazia_a_fila(self, client, settings, contador):
+        settings.CRON_SECRET = 'segredo'
+        for pedido in PedidoFactory.create_batch(3):
+            enviar_email_confirmacao_pedido(pedido)
+
+        res = client.get(self.URL, HTTP_AUTHORIZATION='Bearer segredo')
+
+        assert res.status_code == 200
+        assert res.json() == {'enviadas': 3, 'reagendadas': 0, 'descartadas': 0}
+        assert 'no-cache' in res['Cache-Control']
+        assert len(mail.outbox) == 3
+
+    def test_nao_comeca_lote_depois_do_limite(self, contador):
+        enviar_email_confirmacao_pedido(PedidoFactory())
+
+        assert outbox.processar_fila(limite_segundos=0) == {'enviadas': 0, 'reagendadas': 0, 'descartadas': 0}
+        assert outbox.processar_fila(limite_segundos=60)['enviadas'] == 1
@@ -0,0 +1,124 @@
+"""Testes da paginação por cursor e sem contagem da API."""
+import base64
+import json
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tests.factories import ProdutoFactory, PedidoFactory
+
+from core.pagination import PaginacaoCursor, PaginacaoPorPagina
+
+
+@pytest.fixture
+def paginas_de_dois(monkeypatch):
+    monkeypatch.setattr(PaginacaoCursor, 'page_size', 2)
+    monkeypatch.setattr(PaginacaoPorPagina, 'page_size', 2)
+
+
+def _percorrer(client, url):
+    ids, consultas = [], []
+    while url:
+        with CaptureQueriesContext(connection) as capturadas:
+            res = client.get(url)
+        consultas.extend(q['sql'] for q in capturadas.captured_queries)
+        assert res.status_code == 200
+        ids.extend(item['id'] for item in res.data['results'])
+        url = res.data['next']
+    return ids, consultas
+
+
+@pytest.mark.django_db
+class TestCursorProdutos:
+    def test_percorre_todas_as_paginas_com_empates(self, api_client, paginas_de_dois):
+        produtos = ProdutoFactory.create_batch(5, preco=Decimal('10.00'))
+        produtos += ProdutoFactory.create_batch(2, preco=Decimal('5.00'))
+
+        ids, consultas = _percorrer(api_client, '/api/produtos/?paginacao=cursor&ordenar=preco')
+
+        esperado = sorted(produtos, key=lambda p: (p.preco, p.id))
+        assert ids == [p.id for p in esperado]
+        assert not any('COUNT(' in sql.upper() for sql in consultas)
+        assert not any('OFFSET' in sql.upper() for sql in consultas if 'produtos_produto' in sql)
+
+    def test_link_anterior_volta_para_a_pagina_inicial(self, api_client, paginas_de_dois):
+        ProdutoFactory.create_batch(5, preco=Decimal('10.00'))
+        primeira = api_client.get('/api/produtos/?paginacao=cursor&ordenar=-preco')
+        segunda = api_client.get(primeira.data['next'])
+
+        voltou = api_client.get(segunda.data['previous'])
+
+        assert [p['id'] for p in voltou.data['results']] == [p['id'] for p in primeira.data['results']]
+        assert voltou.data['previous'] is None
+
+    def test_cursor_invalido_retorna_404(self, api_client):
+        res = api_client.get('/api/produtos/?cursor=invalido')
+        assert res.status_code == 404
+
+    @pytest.mark.parametrize('ordenar, valores', [
+        ('', ['ontem', 1]),
+        ('preco', ['barato', 1]),
+        ('preco', [None, 1]),
+        ('nome', ['Dipirona', 'um']),
+    ])
+    def test_cursor_com_valores_invalidos_retorna_404(self, api_client, ordenar, valores):
+        ProdutoFactory()
+        bruto = json.dumps({'v': valores, 'r': False}).encode()
+        cursor = base64.urlsafe_b64encode(bruto).decode()
+
+        res = api_client.get('/api/produtos/', {'cursor': cursor, 'ordenar': ordenar})
+
+        assert res.status_code == 404
+        assert res.data['detail'] == 'Cursor inválido.'
+
+    def test_resposta_sem_total(self, api_client):
+        ProdutoFactory()
+        res = api_client.get('/api/produtos/?paginacao=cursor')
+        assert 'count' not in res.data
+        assert len(res.data['results']) == 1
+
+    def test_busca_usa_paginacao_por_pagina(self, api_client):
+        ProdutoFactory(nome='Dipirona 500mg')
+        res = api_client.get('/api/produtos/?q=dipirona&paginacao=cursor')
+        assert res.data['count'] == 1
+
+
+@pytest.mark.django_db
+class TestSemContagem:
+    def test_contar_false_dispensa_count(self, api_client, paginas_de_dois):
+        ProdutoFactory.create_batch(3)
+
+        with CaptureQueriesContext(connection) as capturadas:
+            res = api_client.get('/api/produtos/?contar=false')
+
+        assert 'count' not in res.data
+        assert len(res.data['results']) == 2
+        assert 'page=2' in res.data['next']
+        assert not any('COUNT(' in q['sql'].upper() for q in capturadas.captured_queries)
+
+    def test_ultima_pagina_sem_proxima(self, api_client, paginas_de_dois):
+        ProdutoFactory.create_batch(3)
+        res = api_client.get('/api/produtos/?contar=false&page=2')
+        assert len(res.data['results']) == 1
+        assert res.data['next'] is None
+        assert res.data['previous'] is not None
+
+
+@pytest.mark.django_db
+class TestCursorPedidosEDesejos:
+    def test_pedidos_do_mais_recente_para_o_mais_antigo(self, api_autenticado, usuario, paginas_de_dois):
+        pedidos = [PedidoFactory(usuario=usuario) for _ in range(3)]
+
+        ids, _ = _percorrer(api_autenticado, '/api/pedidos/?paginacao=cursor')
+
+        assert ids == [p.id for p in sorted(pedidos, key=lambda p: (p.criado_em, p.id), reverse=True)]
+
+    def test_lista_de_desejos_por_cursor(self, api_autenticado, usuario, paginas_de_dois):
+        from usuarios.models import ListaDesejo
+        for produto in ProdutoFactory.create_batch(3):
+            ListaDesejo.objects.create(usuario=usuario, produto=produto)
+
+        ids, _ = _percorrer(api_autenticado, '/api/desejos/?paginacao=cursor')
+
+        assert len(set(ids)) == 3
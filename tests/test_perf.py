@@ -0,0 +1,234 @@
+"""Testes da instrumentação de desempenho por requisição."""
+import json
+import logging
+
+import pytest
+from tests.factories import UserFactory, ProdutoFactory
+
+from core import perf
+
+
+@pytest.fixture(autouse=True)
+def janela_limpa():
+    perf.janela.limpar()
+    yield
+    perf.janela.limpar()
+
+
+def _server_timing(response):
+    metricas = {}
+    for parte in response['Server-Timing'].split(', '):
+        nome, *atributos = parte.split(';')
+        metricas[nome] = dict(a.split('=', 1) for a in atributos)
+    return metricas
+
+
+@pytest.mark.django_db
+class TestMiddleware:
+    def test_server_timing_com_banco_e_cache(self, api_client, settings):
+        settings.PERF_SERVER_TIMING_PUBLICO = True
+        ProdutoFactory.create_batch(2)
+
+        primeira = _server_timing(api_client.get('/api/categorias/'))
+        segunda = _server_timing(api_client.get('/api/categorias/'))
+
+        assert primeira['db']['desc'] != '"0 consultas"'
+        assert primeira['cache']['desc'] == '"hits=0 misses=1"'
+        assert segunda['db']['desc'] == '"0 consultas"'
+        assert segunda['cache']['desc'] == '"hits=1 misses=0"'
+        assert float(primeira['total']['dur']) >= float(primeira['db']['dur'])
+
+    def test_server_timing_so_para_staff(self, client, settings):
+        settings.DEBUG = False
+        settings.PERF_SERVER_TIMING_PUBLICO = False
+
+        assert 'Server-Timing' not in client.get('/produtos/')
+
+        client.force_login(UserFactory(is_staff=True))
+        assert 'db' in _server_timing(client.get('/produtos/'))
+
+    def test_log_json(self, api_client, caplog):
+        # O logger não propaga para a raiz (vai só para logs/perf.log)
+        logger = logging.getLogger('core.perf')
+        logger.addHandler(caplog.handler)
+        try:
+            response = api_client.get('/api/categorias/')
+        finally:
+            logger.removeHandler(caplog.handler)
+
+        registro = next(r for r in caplog.records if r.name == 'core.perf')
+        linha = json.loads(perf.FormatadorJSON().format(registro))
+        assert linha['rota'] == 'produtos.api_views.CategoriaListView'
+        assert linha['status'] == 200
+        assert linha['bytes'] == len(response.content)
+        assert linha['consultas'] > 0
+        assert linha['cache_misses'] == 1
+
+    def test_streaming_medido_ate_o_fim_do_corpo(self, client, caplog):
+        from tests.factories import PedidoFactory
+        PedidoFactory.create_batch(3)
+        client.force_login(UserFactory(is_staff=True))
+        perf.janela.limpar()
+        logger = logging.getLogger('core.perf')
+        logger.addHandler(caplog.handler)
+        try:
+            response = client.get('/admin-relatorios/exportar-vendas/')
+            assert perf.janela.resumo() == []  # ainda não lido
+            corpo = b''.join(response.streaming_content)
+        finally:
+            logger.removeHandler(caplog.handler)
+
+        (linha,) = perf.janela.resumo()
+        assert linha['consultas_media'] >= 1
+        registro = json.loads(perf.FormatadorJSON().format(
+            next(r for r in caplog.records if r.name == 'core.perf' and 'exportar' in r.metricas['caminho'])
+        ))
+        assert registro['streaming'] is True
+        assert registro['bytes'] == len(corpo)
+        assert registro['consultas'] >= 1
+
+    def test_rota_inexistente_fora_da_janela(self, client):
+        client.get('/nao-existe/')
+        assert perf.janela.resumo() == []
+
+
+class TestJanela:
+    def test_percentis_por_rota(self):
+        janela = perf.JanelaDesempenho(1000)
+        for duracao in range(1, 101):
+            janela.registrar('lenta', duracao, 2, 1.0)
+        janela.registrar('rapida', 1, 0, 0)
+
+        lenta, rapida = janela.resumo()
+
+        assert (lenta['nome'], lenta['requisicoes']) == ('lenta', 100)
+        assert (lenta['p50'], lenta['p95'], lenta['p99'], lenta['maximo']) == (50, 95, 99, 100)
+        assert lenta['consultas_media'] == 2
+        assert rapida['p99'] == 1
+
+    def test_buffer_limitado(self):
+        janela = perf.JanelaDesempenho(10)
+        for duracao in range(100):
+            janela.registrar('rota', duracao, 0, 0)
+
+        (linha,) = janela.resumo()
+        assert linha['requisicoes'] == 10
+        assert linha['p50'] == 94
+
+
+@pytest.mark.django_db
+class TestPainel:
+    def test_apenas_staff(self, client):
+        client.force_login(UserFactory())
+        assert client.get('/admin/perf/').status_code == 302
+
+    def test_lista_rotas_medidas(self, client, api_client):
+        api_client.get('/api/categorias/')
+        client.force_login(UserFactory(is_staff=True))
+
+        res = client.get('/admin/perf/')
+
+        assert res.status_code == 200
+        assert [r['nome'] for r in res.context['rotas']] == ['produtos.api_views.CategoriaListView']
+
+
+@pytest.fixture
+def consultas_lentas(settings):
+    settings.PERF_CONSULTA_LENTA_MS = 0.000001
+    perf.consultas_lentas.limpar()
+    yield perf.consultas_lentas
+    perf.consultas_lentas.limpar()
+
+
+class _CursorFalso:
+    def __init__(self, executadas):
+        self.executadas = executadas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params):
+        self.executadas.append((sql, params))
+
+    def fetchall(self):
+        return [('Seq Scan on produtos_produto',), ('Buffers: shared hit=4',)]
+
+
+class _ConexaoPostgresFalsa:
+    vendor = 'postgresql'
+    alias = 'default'
+
+    def __init__(self):
+        self.executadas = []
+
+    def cursor(self):
+        return _CursorFalso(self.executadas)
+
+
+@pytest.mark.django_db
+class TestConsultasLentas:
+    def test_desligado_por_padrao(self, client):
+        perf.consultas_lentas.limpar()
+        client.get('/')
+        assert perf.consultas_lentas.piores() == []
+
+    def test_agrega_por_formato_com_rota_e_origem(self, api_client, consultas_lentas):
+        a, b = ProdutoFactory.create_batch(2)
+
+        api_client.get(f'/api/produtos/{a.slug}/')
+        api_client.get(f'/api/produtos/{b.slug}/')
+
+        produto = next(f for f in consultas_lentas.piores() if 'FROM "produtos_produto"' in f['sql'])
+        assert produto['ocorrencias'] == 2
+        assert produto['rotas'] == ['produtos.api_views.ProdutoDetailView']
+        assert a.slug not in produto['sql']
+        assert produto['origens']
+
+    def test_dashboard_aparece_no_painel(self, client, consultas_lentas):
+        client.force_login(UserFactory(is_staff=True))
+        client.get('/admin-dashboard/')
+
+        res = client.get('/admin/perf/')
+
+        rotas = {rota for f in res.context['consultas_lentas'] for rota in f['rotas']}
+        assert 'core:dashboard_admin' in rotas
+        assert any('core/admin_views.py' in o for f in res.context['consultas_lentas'] for o in f['origens'])
+        assert 'Consultas Lentas' in res.content.decode()
+
+    def test_explain_no_postgresql_uma_vez_por_formato(self, consultas_lentas):
+        conexao = _ConexaoPostgresFalsa()
+        medicao = perf.Medicao()
+        sql = 'SELECT * FROM produtos_produto WHERE nome LIKE %s'
+
+        medicao._registrar_lenta(sql, ['%a%'], False, conexao, 0.5)
+        medicao._registrar_lenta(sql, ['%b%'], False, conexao, 0.7)
+        medicao._registrar_lenta('UPDATE produtos_produto SET estoque = %s', [1], False, conexao, 0.5)
+
+        assert conexao.executadas == [(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', ['%a%'])]
+        (formato,) = [f for f in consultas_lentas.piores() if f['sql'].startswith('SELECT')]
+        assert formato['explain'].startswith('Seq Scan')
+        assert (formato['ocorrencias'], formato['maximo_ms']) == (2, 700)
+
+
+    def test_falha_do_explain_nao_aborta_a_transacao(self, consultas_lentas):
+        from django.db import connection, transaction
+        from django.test.utils import CaptureQueriesContext
+
+        with transaction.atomic():
+            ProdutoFactory()
+            with CaptureQueriesContext(connection) as capturadas:
+                # O SQLite não entende EXPLAIN (ANALYZE, BUFFERS): a falha fica no savepoint
+                resultado = perf.Medicao()._explicar(connection, 'SELECT 1', [])
+            assert resultado.startswith('EXPLAIN indisponível')
+            assert any(q['sql'].startswith('ROLLBACK TO SAVEPOINT') for q in capturadas.captured_queries)
+            assert ProdutoFactory()
+
+
+class TestImpressaoDigital:
+    def test_literais_e_listas_in_nao_mudam_o_formato(self):
+        assert perf.impressao_digital('SELECT a FROM t WHERE id IN (%s, %s) AND n = 1') == \
+            perf.impressao_digital('SELECT a FROM t WHERE id IN (%s, %s, %s, %s) AND n = 2')
+        assert perf.impressao_digital('SELECT a FROM t') != perf.impressao_digital('SELECT b FROM t')
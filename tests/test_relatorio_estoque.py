@@ -0,0 +1,71 @@
+"""Testes do relatório de estoque (agregado condicional, limites por categoria e paginação)."""
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tests.factories import UserFactory, CategoriaFactory, ProdutoFactory
+
+
+@pytest.fixture
+def admin_client(client):
+    client.force_login(UserFactory(is_staff=True, is_superuser=True))
+    return client
+
+
+def _abrir(client, **params):
+    with CaptureQueriesContext(connection) as capturadas:
+        res = client.get('/admin-relatorios/estoque/', params)
+    assert res.status_code == 200
+    return res, len(capturadas.captured_queries)
+
+
+@pytest.mark.django_db
+class TestRelatorioEstoque:
+    def test_totais_e_faixas(self, admin_client):
+        ProdutoFactory(estoque=20, preco=Decimal('2.50'))
+        ProdutoFactory(estoque=3, preco=Decimal('10.00'))
+        ProdutoFactory(estoque=0, preco=Decimal('99.00'))
+        ProdutoFactory(estoque=100, ativo=False)
+
+        res, _ = _abrir(admin_client)
+
+        assert res.context['total_produtos_ativos'] == 3
+        assert res.context['valor_total_estoque'] == Decimal('80.00')
+        assert res.context['estoque_ok'].paginator.count == 1
+        assert res.context['estoque_baixo'].paginator.count == 1
+        assert res.context['esgotados'].paginator.count == 1
+        assert res.context['estoque_ok'][0].valor_estoque == Decimal('50.00')
+
+    def test_limite_de_estoque_baixo_por_categoria(self, admin_client):
+        exigente = CategoriaFactory(limite_estoque_baixo=50)
+        tolerante = CategoriaFactory(limite_estoque_baixo=2)
+        ProdutoFactory(nome='Soro', categoria=exigente, estoque=30)
+        ProdutoFactory(nome='Curativo', categoria=tolerante, estoque=5)
+
+        res, _ = _abrir(admin_client)
+
+        assert [p.nome for p in res.context['estoque_baixo']] == ['Soro']
+        assert [p.nome for p in res.context['estoque_ok']] == ['Curativo']
+
+    def test_faixas_paginadas(self, admin_client, settings):
+        settings.RELATORIO_ESTOQUE_POR_PAGINA = 2
+        ProdutoFactory.create_batch(5, estoque=3)
+
+        res, _ = _abrir(admin_client, pagina_baixo=3)
+
+        pagina = res.context['estoque_baixo']
+        assert (pagina.number, len(pagina), pagina.paginator.num_pages) == (3, 1, 3)
+        assert 'pagina_baixo=2' in res.content.decode()
+
+    def test_consultas_nao_crescem_com_o_catalogo(self, admin_client):
+        # Um produto em cada faixa: as mesmas seções são listadas nas duas aberturas
+        for estoque in (0, 3, 20):
+            ProdutoFactory(estoque=estoque)
+        _, poucas = _abrir(admin_client)
+
+        for estoque in (0, 3, 20):
+            ProdutoFactory.create_batch(5, estoque=estoque)
+        _, muitas = _abrir(admin_client)
+
+        assert muitas == poucas
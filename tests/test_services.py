@@ -5,8 +5,10 @@ from unittest.mock import MagicMock
 from django.core.exceptions import ValidationError
 
 from pedidos.services.carrinho_service import CarrinhoService
-from pedidos.services import processar_pagamento, PagamentoErro
-from pedidos.models import CarrinhoItem
+from pedidos.services import processar_pagamento, cancelar_pagamento, PagamentoErro
+from pedidos.services import finalizar_pedido, verificar_estoque, CheckoutErro, EstoqueInsuficiente
+from pedidos.models import CarrinhoItem, Pedido
+from produtos.models import Produto
 from tests.factories import UserFactory, ProdutoFactory
 
 
@@ -44,6 +46,32 @@ class TestCarrinhoService:
         assert item.quantidade == 1
         assert item.session_key == 'sess-abc'
 
+    def test_carrinho_anonimo_sem_sessao_nao_cria_sessao(self):
+        req = _make_request(session_key=None)
+
+        assert list(CarrinhoService.get_carrinho(req)) == []
+        assert CarrinhoService.limpar_carrinho(req) == 0
+        req.session.create.assert_not_called()
+
+    def test_adicionar_produto_anonimo_cria_sessao(self):
+        produto = ProdutoFactory(estoque=5)
+        req = _make_request(session_key=None)
+        req.session.create.side_effect = lambda: setattr(req.session, 'session_key', 'nova')
+
+        item = CarrinhoService.adicionar_produto(req, produto.id, 1)
+
+        req.session.create.assert_called_once()
+        assert item.session_key == 'nova'
+
+    def test_remover_sem_sessao_nao_atinge_itens_de_usuarios(self):
+        produto = ProdutoFactory(estoque=5)
+        CarrinhoItem.objects.create(usuario=UserFactory(), produto=produto, quantidade=1)
+        req = _make_request(session_key=None)
+
+        with pytest.raises(ValidationError, match='não encontrado'):
+            CarrinhoService.remover_produto(req, produto.id)
+        assert CarrinhoItem.objects.count() == 1
+
     def test_adicionar_produto_inexistente_levanta_erro(self):
         req = _make_request()
         with pytest.raises(ValidationError, match='não encontrado'):
@@ -109,6 +137,33 @@ class TestCarrinhoService:
 
         assert total == Decimal('60.00')
 
+    def test_resumo_soma_precos_cheio_e_promocional(self):
+        usuario = UserFactory()
+        normal = ProdutoFactory(estoque=10, preco=Decimal('20.00'))
+        promocao = ProdutoFactory(estoque=10, preco=Decimal('50.00'), preco_promocional=Decimal('40.00'))
+        CarrinhoItem.objects.create(usuario=usuario, produto=normal, quantidade=2)
+        CarrinhoItem.objects.create(usuario=usuario, produto=promocao, quantidade=1)
+
+        resumo = CarrinhoService.resumo(_make_request(user=usuario))
+
+        assert len(resumo['itens']) == 2
+        assert resumo['subtotal_produtos'] == Decimal('90.00')
+        assert resumo['subtotal_promocional'] == Decimal('80.00')
+        assert resumo['quantidade'] == 3
+
+    def test_resumo_memoizado_no_request(self, django_assert_num_queries):
+        usuario = UserFactory()
+        produto = ProdutoFactory(estoque=10)
+        req = _make_request(user=usuario)
+        CarrinhoService.resumo(req)
+
+        with django_assert_num_queries(0):
+            assert CarrinhoService.get_total(req) == 0
+            assert CarrinhoService.get_quantidade_total(req) == 0
+
+        CarrinhoService.adicionar_produto(req, produto.id, 2)
+        assert CarrinhoService.get_quantidade_total(req) == 2
+
     def test_limpar_carrinho(self):
         usuario = UserFactory()
         produto1 = ProdutoFactory(estoque=5)
@@ -133,6 +188,156 @@ class TestCarrinhoService:
         item = CarrinhoItem.objects.get(usuario=usuario, produto=produto)
         assert item.quantidade == 2
 
+    def test_migrar_soma_quantidades_limitadas_ao_estoque(self):
+        usuario = UserFactory()
+        repetido = ProdutoFactory(estoque=4)
+        novo = ProdutoFactory(estoque=10)
+        CarrinhoItem.objects.create(usuario=usuario, produto=repetido, quantidade=3)
+        CarrinhoItem.objects.create(session_key='sess-teste', produto=repetido, quantidade=2)
+        CarrinhoItem.objects.create(session_key='sess-teste', produto=novo, quantidade=1)
+
+        count = CarrinhoService.migrar_carrinho_anonimo_para_usuario('sess-teste', usuario)
+
+        assert count == 2
+        assert dict(
+            CarrinhoItem.objects.filter(usuario=usuario).values_list('produto_id', 'quantidade')
+        ) == {repetido.id: 4, novo.id: 1}
+        assert not CarrinhoItem.objects.filter(session_key='sess-teste').exists()
+
+    def test_migrar_repetido_nao_duplica(self):
+        """Segundo login da mesma sessão (outra aba) não encontra nada a migrar."""
+        usuario = UserFactory()
+        CarrinhoItem.objects.create(session_key='sess-teste', produto=ProdutoFactory(), quantidade=1)
+
+        assert CarrinhoService.migrar_carrinho_anonimo_para_usuario('sess-teste', usuario) == 1
+        assert CarrinhoService.migrar_carrinho_anonimo_para_usuario('sess-teste', usuario) == 0
+        assert CarrinhoItem.objects.filter(usuario=usuario).get().quantidade == 1
+
+    def test_migrar_numero_de_queries_independe_do_tamanho(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def medir(tamanho):
+            usuario = UserFactory()
+            for produto in ProdutoFactory.create_batch(tamanho, estoque=10):
+                CarrinhoItem.objects.create(usuario=usuario, produto=produto, quantidade=1)
+                CarrinhoItem.objects.create(session_key=f'sess-{tamanho}', produto=produto, quantidade=1)
+                CarrinhoItem.objects.create(session_key=f'sess-{tamanho}', produto=ProdutoFactory(), quantidade=1)
+            with CaptureQueriesContext(connection) as capturadas:
+                CarrinhoService.migrar_carrinho_anonimo_para_usuario(f'sess-{tamanho}', usuario)
+            return len(capturadas)
+
+        assert medir(1) == medir(15)
+
+
+# ─── Checkout ───────────────────────────────────────────────────────────────
+
+ENTREGA = {
+    'endereco': 'Rua Teste, 100',
+    'cidade': 'São Paulo',
+    'estado': 'SP',
+    'cep': '01310100',
+    'telefone': '11999999999',
+}
+
+
+def _finalizar(usuario, resultado=None):
+    return finalizar_pedido(
+        usuario=usuario,
+        carrinho=CarrinhoItem.objects.filter(usuario=usuario),
+        entrega=ENTREGA,
+        total=Decimal('100.00'),
+        valor_frete=Decimal('14.90'),
+        metodo_pagamento='pix',
+        resultado_pagamento=resultado or {'status': 'autorizado', 'transacao_id': 'abc'},
+    )
+
+
+@pytest.mark.django_db
+class TestCheckoutService:
+    def test_cria_pedido_e_baixa_estoque_de_todos_os_itens(self):
+        usuario = UserFactory()
+        produtos = ProdutoFactory.create_batch(3, estoque=10)
+        for i, produto in enumerate(produtos, start=1):
+            CarrinhoItem.objects.create(usuario=usuario, produto=produto, quantidade=i)
+
+        pedido = _finalizar(usuario)
+
+        assert pedido.itens.count() == 3
+        assert pedido.status == 'processando'
+        assert pedido.pagamento.valor == Decimal('114.90')
+        assert [p.estoque for p in Produto.objects.order_by('pk')] == [9, 8, 7]
+        assert not CarrinhoItem.objects.filter(usuario=usuario).exists()
+
+    def test_pagamento_pendente_mantem_pedido_pendente(self):
+        usuario = UserFactory()
+        CarrinhoItem.objects.create(usuario=usuario, produto=ProdutoFactory(), quantidade=1)
+
+        pedido = _finalizar(usuario, {'status': 'pendente'})
+
+        assert pedido.status == 'pendente'
+
+    def test_estoque_insuficiente_desfaz_tudo(self):
+        usuario = UserFactory()
+        ok = ProdutoFactory(estoque=10)
+        faltando = ProdutoFactory(estoque=1)
+        CarrinhoItem.objects.create(usuario=usuario, produto=ok, quantidade=2)
+        CarrinhoItem.objects.create(usuario=usuario, produto=faltando, quantidade=2)
+
+        with pytest.raises(EstoqueInsuficiente):
+            _finalizar(usuario)
+
+        ok.refresh_from_db()
+        assert ok.estoque == 10
+        assert Pedido.objects.count() == 0
+        assert CarrinhoItem.objects.filter(usuario=usuario).count() == 2
+
+    def test_verificar_estoque_nao_altera_nada(self):
+        usuario = UserFactory()
+        produto = ProdutoFactory(estoque=3)
+        CarrinhoItem.objects.create(usuario=usuario, produto=produto, quantidade=3)
+
+        verificar_estoque(CarrinhoItem.objects.filter(usuario=usuario))
+
+        produto.refresh_from_db()
+        assert produto.estoque == 3
+        assert CarrinhoItem.objects.filter(usuario=usuario).exists()
+
+    def test_verificar_estoque_insuficiente(self):
+        usuario = UserFactory()
+        CarrinhoItem.objects.create(usuario=usuario, produto=ProdutoFactory(estoque=1), quantidade=2)
+
+        with pytest.raises(EstoqueInsuficiente):
+            verificar_estoque(CarrinhoItem.objects.filter(usuario=usuario))
+
+    def test_carrinho_vazio_levanta_erro(self):
+        with pytest.raises(CheckoutErro, match='vazio'):
+            _finalizar(UserFactory())
+
+    def test_produto_esgotado_invalida_cache_do_catalogo(self, django_capture_on_commit_callbacks):
+        from core.cache import invalidar_catalogo, versao_catalogo
+        usuario = UserFactory()
+        CarrinhoItem.objects.create(usuario=usuario, produto=ProdutoFactory(estoque=2), quantidade=2)
+        versao = versao_catalogo()
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            _finalizar(usuario)
+
+        assert callbacks.count(invalidar_catalogo) == 1
+        for callback in callbacks:
+            callback()
+        assert versao_catalogo() > versao
+
+    def test_numero_de_queries_independe_do_tamanho_do_carrinho(self, django_assert_num_queries):
+        usuario = UserFactory()
+        for produto in ProdutoFactory.create_batch(20, estoque=5):
+            CarrinhoItem.objects.create(usuario=usuario, produto=produto, quantidade=1)
+
+        # SAVEPOINT/RELEASE + carrinho, lock, pedido, itens, estoque, pagamento e
+        # limpeza (SELECT + DELETE: os signals do contador do carrinho recebem os itens)
+        with django_assert_num_queries(10):
+            _finalizar(usuario)
+
 
 # ─── PagamentoService ────────────────────────────────────────────────────────
 
@@ -175,6 +380,16 @@ class TestPagamentoService:
         with pytest.raises(PagamentoErro, match='maior que zero'):
             processar_pagamento(Decimal('0'), 'pix', {})
 
+    def test_cancelar_pagamento_autorizado(self):
+        resultado = processar_pagamento(Decimal('100.00'), 'pix', {})
+        cancelado = cancelar_pagamento(resultado)
+        assert cancelado['status'] == 'cancelado'
+        assert cancelado['transacao_id'] == resultado['transacao_id']
+
+    def test_cancelar_pagamento_recusado_nao_faz_nada(self):
+        resultado = {'status': 'recusado', 'transacao_id': 'abc'}
+        assert cancelar_pagamento(resultado) == resultado
+
     def test_metodo_invalido_levanta_erro(self):
         with pytest.raises(PagamentoErro, match='não suportado'):
             processar_pagamento(Decimal('100.00'), 'bitcoin', {})
@@ -0,0 +1,68 @@
+"""Testes da criação adiada de sessões e da limpeza de sessões expiradas."""
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.utils import timezone
+from tests.factories import ProdutoFactory
+
+from pedidos.models import CarrinhoItem
+
+
+@pytest.mark.django_db
+class TestSessaoAnonima:
+    def test_navegacao_anonima_nao_grava_sessao(self, client):
+        produto = ProdutoFactory()
+        for url in ('/', '/produtos/', f'/produtos/{produto.slug}/', '/pedidos/carrinho/'):
+            assert client.get(url).status_code == 200
+
+        assert Session.objects.count() == 0
+        assert 'sessionid' not in client.cookies
+
+    def test_adicionar_ao_carrinho_cria_sessao(self, client):
+        produto = ProdutoFactory(estoque=5)
+        client.post(f'/pedidos/adicionar/{produto.id}/', {'quantidade': 1})
+
+        sessao = Session.objects.get()
+        assert client.cookies['sessionid'].value == sessao.session_key
+        assert CarrinhoItem.objects.get().session_key == sessao.session_key
+
+
+@pytest.mark.django_db
+class TestLimparSessoes:
+    def _sessao(self, chave, expira_em):
+        return Session.objects.create(session_key=chave, session_data='', expire_date=expira_em)
+
+    def test_remove_expiradas_e_carrinhos_orfaos_em_lotes(self):
+        passado = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            self._sessao(f'expirada{i}', passado)
+        self._sessao('ativa', timezone.now() + timedelta(days=1))
+        produto = ProdutoFactory()
+        CarrinhoItem.objects.create(session_key='expirada0', produto=produto, quantidade=1)
+        CarrinhoItem.objects.create(session_key='ativa', produto=produto, quantidade=1)
+
+        saida = StringIO()
+        call_command('limpar_sessoes', lote=2, stdout=saida)
+
+        assert list(Session.objects.values_list('session_key', flat=True)) == ['ativa']
+        assert list(CarrinhoItem.objects.values_list('session_key', flat=True)) == ['ativa']
+        assert '5 sessões expiradas removidas (1 itens' in saida.getvalue()
+
+
+@pytest.mark.django_db
+class TestMigracaoNoLogin:
+    def test_carrinho_anonimo_sobrevive_ao_login(self, client):
+        from tests.factories import UserFactory
+        usuario = UserFactory(username='maria')
+        produto = ProdutoFactory(estoque=5)
+        client.post(f'/pedidos/adicionar/{produto.id}/', {'quantidade': 2})
+
+        client.post('/usuarios/login/', {'username': 'maria', 'password': 'senha123'})
+
+        item = CarrinhoItem.objects.get()
+        assert item.usuario == usuario
+        assert item.session_key is None
+        assert item.quantidade == 2
@@ -0,0 +1,134 @@
+"""Testes das transições de status em massa (serviço, admin e API)."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from tests.factories import UserFactory, PedidoFactory
+
+from core import metricas
+from core.models import MensagemOutbox, MetricaPedidosDia
+from pedidos.models import Pedido, HistoricoStatusPedido
+from pedidos.services import transicionar_em_massa, TransicaoInvalida
+
+
+@pytest.fixture
+def staff():
+    return UserFactory(is_staff=True, is_superuser=True)
+
+
+@pytest.mark.django_db
+class TestTransicionarEmMassa:
+    def test_move_elegiveis_e_registra_historico(self, staff):
+        processando = PedidoFactory.create_batch(3, status='processando')
+        entregue = PedidoFactory(status='entregue')
+
+        resultado = transicionar_em_massa(Pedido.objects.all(), 'enviado', operador=staff)
+
+        assert resultado == {'atualizados': 3, 'ignorados': [entregue.pk], 'emails': 3}
+        assert set(Pedido.objects.filter(status='enviado').values_list('pk', flat=True)) == {
+            p.pk for p in processando
+        }
+        historico = HistoricoStatusPedido.objects.all()
+        assert len(historico) == 3
+        assert {(h.status_anterior, h.status_novo, h.operador) for h in historico} == {
+            ('processando', 'enviado', staff)
+        }
+
+    def test_emails_enfileirados_sem_envio(self):
+        pedido = PedidoFactory(status='processando')
+
+        transicionar_em_massa([pedido.pk], 'enviado')
+
+        mensagem = MensagemOutbox.objects.get()
+        assert mensagem.template == 'pedido_enviado'
+        assert mensagem.destinatarios == [pedido.usuario.email]
+        assert mensagem.contexto['pedido'] == {'__modelo__': 'pedidos.pedido', 'pk': pedido.pk}
+
+    def test_status_sem_notificacao_nao_enfileira(self):
+        PedidoFactory(status='pendente')
+
+        assert transicionar_em_massa(Pedido.objects.all(), 'cancelado')['emails'] == 0
+        assert not MensagemOutbox.objects.exists()
+
+    def test_destino_invalido(self):
+        with pytest.raises(TransicaoInvalida):
+            transicionar_em_massa(Pedido.objects.all(), 'extraviado')
+        with pytest.raises(TransicaoInvalida):
+            transicionar_em_massa(Pedido.objects.all(), 'pendente')
+
+    def test_consultas_nao_crescem_com_o_lote(self):
+        PedidoFactory.create_batch(2, status='processando')
+        with CaptureQueriesContext(connection) as poucas:
+            transicionar_em_massa(Pedido.objects.all(), 'enviado')
+
+        PedidoFactory.create_batch(20, status='processando')
+        with CaptureQueriesContext(connection) as muitas:
+            transicionar_em_massa(Pedido.objects.filter(status='processando'), 'enviado')
+
+        assert len(muitas) == len(poucas)
+        assert sum(q['sql'].startswith('UPDATE') for q in muitas.captured_queries) == 1
+
+    def test_metricas_recalculadas_apos_commit(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            PedidoFactory.create_batch(2, status='processando')
+        with django_capture_on_commit_callbacks(execute=True):
+            transicionar_em_massa(Pedido.objects.all(), 'enviado')
+        metricas.atualizar_pendentes()
+
+        hoje = timezone.localdate()
+        assert MetricaPedidosDia.objects.get(data=hoje, status='enviado').quantidade == 2
+        assert not MetricaPedidosDia.objects.filter(data=hoje, status='processando').exists()
+
+
+@pytest.mark.django_db
+class TestAdminTransicoes:
+    def test_acao_marcar_enviado(self, client, staff):
+        client.force_login(staff)
+        pedidos = PedidoFactory.create_batch(2, status='processando')
+        pendente = PedidoFactory(status='pendente')
+
+        res = client.post('/admin/pedidos/pedido/', {
+            'action': 'marcar_enviado',
+            '_selected_action': [p.pk for p in pedidos] + [pendente.pk],
+        }, follow=True)
+
+        assert res.status_code == 200
+        mensagens = [str(m) for m in res.context['messages']]
+        assert any('2 pedido(s) marcado(s)' in m for m in mensagens)
+        assert any('1 pedido(s) ignorado(s)' in m for m in mensagens)
+        pendente.refresh_from_db()
+        assert pendente.status == 'pendente'
+        assert MensagemOutbox.objects.count() == 2
+
+
+@pytest.mark.django_db
+class TestAPITransicoes:
+    def _autenticar(self, api_client, usuario):
+        token = RefreshToken.for_user(usuario)
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        return api_client
+
+    def test_requer_staff(self, api_autenticado):
+        res = api_autenticado.post('/api/pedidos/status/', {'pedidos': [1], 'status': 'enviado'}, format='json')
+        assert res.status_code == 403
+
+    def test_transicao_em_massa(self, api_client, staff):
+        pedidos = PedidoFactory.create_batch(3, status='pendente')
+        entregue = PedidoFactory(status='entregue')
+        api = self._autenticar(api_client, staff)
+
+        res = api.post('/api/pedidos/status/', {
+            'pedidos': [p.pk for p in pedidos] + [entregue.pk],
+            'status': 'processando',
+        }, format='json')
+
+        assert res.status_code == 200
+        assert res.data['atualizados'] == 3
+        assert res.data['ignorados'] == [entregue.pk]
+        assert Pedido.objects.filter(status='processando').count() == 3
+
+    def test_status_invalido(self, api_client, staff):
+        api = self._autenticar(api_client, staff)
+        res = api.post('/api/pedidos/status/', {'pedidos': [1], 'status': 'voando'}, format='json')
+        assert res.status_code == 400
@@ -3,6 +3,9 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.carregamento import CarregamentoViewMixin
+from core.pagination import PaginacaoAdaptavel
+from pedidos.services import contadores
 from usuarios.models import ListaDesejo
 from .serializers import RegistroSerializer, PerfilSerializer, ListaDesejoSerializer
 
@@ -29,14 +32,18 @@ class PerfilView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
-class ListaDesejoListView(generics.ListCreateAPIView):
+class ListaDesejoListView(CarregamentoViewMixin, generics.ListCreateAPIView):
     serializer_class = ListaDesejoSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PaginacaoAdaptavel
+    ordenacao_cursor_padrao = ('-criado_em', '-id')
 
     def get_queryset(self):
-        return ListaDesejo.objects.filter(
-            usuario=self.request.user
-        ).select_related('produto', 'produto__categoria')
+        return ListaDesejo.objects.filter(usuario=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save()
+        contadores.invalidar_lista_desejos(self.request.user)
 
 
 class ListaDesejoDetalheView(generics.DestroyAPIView):
@@ -50,6 +57,7 @@ class ListaDesejoDetalheView(generics.DestroyAPIView):
         try:
             item = ListaDesejo.objects.get(usuario=request.user, produto_id=produto_id)
             item.delete()
+            contadores.invalidar_lista_desejos(request.user)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except ListaDesejo.DoesNotExist:
             return Response({'detail': 'Item não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0005_produto_indices_cursor'),
+        ('usuarios', '0002_contasocial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listadesejo',
+            index=models.Index(fields=['usuario', 'criado_em', 'id'], name='usuarios_li_usuario_93db83_idx'),
+        ),
+    ]
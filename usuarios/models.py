@@ -22,6 +22,9 @@ class ListaDesejo(models.Model):
 		verbose_name_plural = 'Lista de Desejos'
 		unique_together = ('usuario', 'produto')
 		ordering = ['-criado_em']
+		indexes = [
+			models.Index(fields=['usuario', 'criado_em', 'id']),
+		]
 
 	def __str__(self):
 		return f'{self.usuario.username} → {self.produto.nome}'
@@ -15,7 +15,11 @@ def migrar_carrinho_anonimo(sender, request, user, **kwargs):
         user: Usuário que acabou de fazer login
         **kwargs: Argumentos adicionais do signal
     """
-    session_key = request.session.session_key
+    # login() já trocou a chave da sessão: usa a chave em que o carrinho foi criado
+    session_key = (
+        request.session.pop(CarrinhoService.CHAVE_SESSAO_ANONIMA, None)
+        or request.session.session_key
+    )
     if session_key:
         count = CarrinhoService.migrar_carrinho_anonimo_para_usuario(session_key, user)
         if count > 0:
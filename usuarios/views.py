@@ -12,12 +12,11 @@ from django.contrib import messages
 from django.urls import reverse
 from django.utils.http import url_has_allowed_host_and_scheme, urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
-from django.template.loader import render_to_string
-from django.core.mail import send_mail
 from pedidos.models import Pedido, Pagamento
+from pedidos.services import contadores
 from produtos.models import Produto
 from .models import ListaDesejo, ContaSocial
-from core.email_utils import enviar_email_boas_vindas
+from core.email_utils import enviar_email_boas_vindas, enviar_email_recuperacao_senha
 import logging
 
 logger = logging.getLogger(__name__)
@@ -315,6 +314,7 @@ def adicionar_lista_desejos(request, produto_id):
 
     item, criado = ListaDesejo.objects.get_or_create(usuario=request.user, produto=produto)
     if criado:
+        contadores.invalidar_lista_desejos(request.user)
         messages.success(request, f'{produto.nome} adicionado à sua lista de desejos.')
     else:
         messages.info(request, f'{produto.nome} já está na sua lista de desejos.')
@@ -333,6 +333,7 @@ def remover_lista_desejos(request, produto_id):
 
     removidos, _ = ListaDesejo.objects.filter(usuario=request.user, produto=produto).delete()
     if removidos:
+        contadores.invalidar_lista_desejos(request.user)
         messages.success(request, f'{produto.nome} removido da sua lista de desejos.')
     else:
         messages.info(request, f'{produto.nome} não estava na sua lista de desejos.')
@@ -363,26 +364,8 @@ def recuperar_senha(request):
                     reverse('usuarios:redefinir_senha', kwargs={'uidb64': uid, 'token': token})
                 )
                 
-                # Renderiza e envia e-mail
-                context = {
-                    'usuario': usuario,
-                    'url_recuperacao': url_recuperacao,
-                }
-                
-                html_message = render_to_string('emails/recuperacao_senha.html', context)
-                
-                try:
-                    send_mail(
-                        subject='Recuperação de Senha - Farmácia QUEOPS',
-                        message=f'Olá {usuario.first_name or usuario.username},\n\nAcesse o link para redefinir sua senha: {url_recuperacao}',
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[usuario.email],
-                        html_message=html_message,
-                        fail_silently=False,
-                    )
-                    logger.info(f'E-mail de recuperação enviado para: {usuario.email}')
-                except Exception as e:
-                    logger.error(f'Erro ao enviar e-mail de recuperação: {e}')
+                # Enfileira o e-mail (o envio acontece fora da requisição)
+                enviar_email_recuperacao_senha(usuario, url_recuperacao, request)
         
         # Sempre redireciona para confirmação (segurança - não revela se e-mail existe)
         return redirect('usuarios:recuperar_senha_confirmacao')